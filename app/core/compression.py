@@ -0,0 +1,124 @@
+"""
+Response compression for DRIMS
+
+Compresses dynamic responses (HTML pages, JSON drawer and widget responses,
+CSV exports) with Brotli or gzip when the client accepts it. Shelters and
+field staff often work over slow mobile links, where page size dominates
+load time.
+
+A response is compressed when:
+- The client's Accept-Encoding allows br or gzip (br is preferred when the
+  optional Brotli package is installed)
+- Its mimetype is text-like (COMPRESSIBLE_MIMETYPES)
+- It is at least COMPRESS_MIN_SIZE bytes
+- It is not streamed, a file response, or already encoded
+
+Static files are not compressed per request; scripts/build_static.py writes
+precompressed copies that app/core/static_assets.py serves directly.
+"""
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+}
+
+GZIP_LEVEL = 6
+# Brotli quality 11 is for build-time compression; 5 is close to gzip speed
+# with a better ratio
+BROTLI_QUALITY = 5
+
+
+def choose_encoding(accept_encodings):
+    """
+    Pick the response encoding from a parsed Accept-Encoding header.
+
+    Returns:
+        'br', 'gzip' or None when neither is accepted
+    """
+    if brotli is not None and accept_encodings['br'] > 0:
+        return 'br'
+    if accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def compress_response(response, min_size):
+    """
+    Compress the response body in place when it qualifies.
+
+    Args:
+        response: Flask response object
+        min_size: Smallest body size in bytes worth compressing
+
+    Returns:
+        The response
+    """
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or request.method == 'HEAD'
+    ):
+        return response
+
+    # The representation depends on Accept-Encoding even when it is not
+    # compressed, so shared caches must key on it
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # A strong ETag must differ between content codings; weaken it like nginx does
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """
+    Initialize response compression for Flask application
+
+    Args:
+        app: Flask application instance
+    """
+    if not app.config.get('COMPRESS_RESPONSES', True):
+        return
+
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+
+    @app.after_request
+    def apply_compression(response):
+        """Compress text responses the client accepts compressed"""
+        return compress_response(response, min_size)
@@ -0,0 +1,115 @@
+"""
+Conditional GET (ETag / If-None-Match) for JSON API endpoints
+
+Field clients on slow links re-fetch the same JSON repeatedly. Endpoints
+decorated with @etag_validated compute a cheap validator from row versions
+(count, sum of version_nbr, latest update time) before building the payload;
+when the client's If-None-Match still matches, the view is skipped and an
+empty 304 Not Modified is returned.
+
+These responses are sent with "Cache-Control: private, no-cache" instead of the
+app-wide no-store policy (app/security/cache_control.py): the browser may keep
+a private copy but must revalidate it on every use, which it does
+transparently for fetch()/XHR.
+
+Usage:
+    from app.core.etag import etag_validated, version_aggregate, fetch_versions
+
+    def _batch_version(batch_id):
+        return fetch_versions(version_aggregate(ItemBatch, ItemBatch.batch_id == batch_id))
+
+    @packaging_bp.route('/api/batch/<int:batch_id>')
+    @login_required
+    @etag_validated(_batch_version)
+    def get_batch_details(batch_id):
+        ...
+"""
+import hashlib
+from functools import wraps
+
+from flask import request, make_response
+from flask_login import current_user
+from sqlalchemy import func, select
+
+from app.db import db
+from app.security.cache_control import allow_revalidation
+
+
+def version_aggregate(model, *criteria, version_col=None, time_col=None) -> list:
+    """
+    Scalar subqueries describing the current state of the model rows matching
+    criteria: row count, sum of version_nbr and latest update time.
+
+    Every optimistic-locked update increments version_nbr and sets
+    update_dtime, so any insert, update or delete changes at least one value.
+
+    Args:
+        model: Mapped class
+        *criteria: Filter expressions
+        version_col: Column to sum (default model.version_nbr)
+        time_col: Column to take the max of (default model.update_dtime)
+    """
+    version_col = version_col if version_col is not None else model.version_nbr
+    time_col = time_col if time_col is not None else model.update_dtime
+    return [
+        select(aggregate).select_from(model).where(*criteria).scalar_subquery()
+        for aggregate in (func.count(), func.coalesce(func.sum(version_col), 0), func.max(time_col))
+    ]
+
+
+def fetch_versions(*aggregates) -> tuple:
+    """
+    Evaluate one or more version_aggregate() results (or single scalar
+    subqueries) in a single round trip.
+    """
+    columns = []
+    for aggregate in aggregates:
+        if isinstance(aggregate, (list, tuple)):
+            columns.extend(aggregate)
+        else:
+            columns.append(aggregate)
+    return tuple(db.session.query(*columns).one())
+
+
+def make_etag(*parts) -> str:
+    """Opaque tag for the given validator parts"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def etag_validated(validator):
+    """
+    Decorator for GET JSON endpoints: answer 304 Not Modified when the
+    client's copy is still current.
+
+    Args:
+        validator: Called with the view's arguments; returns a hashable value
+                   that changes whenever the response would change, or None to
+                   skip validation for this request
+
+    The tag also covers the endpoint, query string and user, so per-user and
+    per-parameter responses never share a validator.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return f(*args, **kwargs)
+
+            version = validator(*args, **kwargs)
+            if version is None:
+                return f(*args, **kwargs)
+
+            user_id = current_user.get_id() if current_user.is_authenticated else None
+            etag = make_etag(request.endpoint, request.query_string, user_id, version)
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            return allow_revalidation(response)
+        return decorated_function
+    return decorator
@@ -36,7 +36,7 @@ Usage:
     # Returns list of features for user's dashboard
 """
 
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Set, Tuple
 
 
 class FeatureRegistry:
@@ -449,6 +449,17 @@ class FeatureRegistry:
             'navigation_group': 'admin',
             'priority': 1
         },
+        'diagnostics': {
+            'name': 'Diagnostics',
+            'description': 'View template render times and profile live requests',
+            'roles': ['SYSTEM_ADMINISTRATOR'],
+            'route': 'diagnostics.templates',
+            'url': '/admin/diagnostics/templates',
+            'icon': 'bi-speedometer2',
+            'category': 'admin',
+            'navigation_group': 'admin',
+            'priority': 3
+        },
         
         # =================================================================
         # NOTIFICATIONS
@@ -519,6 +530,24 @@ class FeatureRegistry:
         },
     }
     
+    # Sidebar section of each navigation group; other groups go under OTHER
+    SIDEBAR_SECTIONS = {
+        'dashboard': 'MAIN',
+        'inventory': 'INVENTORY',
+        'relief_requests': 'OPERATIONS',
+        'eligibility': 'OPERATIONS',
+        'packaging': 'OPERATIONS',
+        'master_data': 'MANAGEMENT',
+        'admin': 'MANAGEMENT',
+        'reports': 'MANAGEMENT',
+        'notifications': 'MANAGEMENT',
+        'user': 'MANAGEMENT'
+    }
+    SIDEBAR_SECTION_ORDER = ['MAIN', 'INVENTORY', 'OPERATIONS', 'MANAGEMENT', 'OTHER']
+    
+    # (role codes, script root) -> sidebar sections
+    _sidebar_cache = {}
+    
     @classmethod
     def get_user_role_codes(cls, user) -> Set[str]:
         """
@@ -621,6 +650,43 @@ class FeatureRegistry:
         
         return sorted(nav_features, key=lambda x: x.get('priority', 999), reverse=True)
     
+    @classmethod
+    def get_sidebar_sections(cls, user) -> List[Tuple[str, List[Dict]]]:
+        """
+        Get the sidebar navigation grouped into sections.
+        
+        The sidebar depends only on the user's roles, so it is built once per
+        role combination instead of on every page render.
+        
+        Args:
+            user: User object with roles
+            
+        Returns:
+            List of (section name, features) in display order, without empty
+            sections. Each feature has its URL in 'href'.
+        """
+        from flask import request, url_for
+        from app.core.metrics import record_cache_lookup
+        
+        cache_key = (frozenset(cls.get_user_role_codes(user)), request.script_root)
+        sections = cls._sidebar_cache.get(cache_key)
+        record_cache_lookup('sidebar', sections is not None)
+        if sections is None:
+            grouped = {name: [] for name in cls.SIDEBAR_SECTION_ORDER}
+            for feature in cls.get_accessible_features(user):
+                if not feature.get('route'):
+                    continue
+                if feature.get('is_dashboard', False):
+                    section = 'MAIN'
+                else:
+                    section = cls.SIDEBAR_SECTIONS.get(feature.get('navigation_group'), 'OTHER')
+                grouped[section].append({**feature, 'href': url_for(feature['route'])})
+            
+            sections = [(name, grouped[name]) for name in cls.SIDEBAR_SECTION_ORDER if grouped[name]]
+            cls._sidebar_cache[cache_key] = sections
+        
+        return sections
+    
     @classmethod
     def get_features_by_category(cls, user, category: str) -> List[Dict]:
         """
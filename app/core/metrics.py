@@ -0,0 +1,258 @@
+"""
+Prometheus metrics for DRIMS
+
+GET /metrics returns the metrics in the Prometheus text format:
+
+Requests
+    drims_http_request_duration_seconds{blueprint, endpoint, method}  histogram
+    drims_http_responses_total{blueprint, status}                      counter
+
+Database pool (app/db/pool.py)
+    drims_db_pool_checkout_wait_seconds{bind}   histogram, time to get a connection
+    drims_db_pool_connections_in_use{bind}      gauge
+    drims_db_pool_overflow{bind}                gauge, connections above pool_size
+
+Caches
+    drims_cache_requests_total{cache, result}   counter, result is hit or miss
+
+Inventory (app/services/inventory_reservation_service.py)
+    drims_inventory_operation_duration_seconds{operation, outcome}  histogram
+
+Read from the database at scrape time
+    drims_fulfillment_locks, drims_fulfillment_locks_expired,
+    drims_fulfillment_lock_oldest_age_seconds
+    drims_packages_dispatched_total (counter, one manifest per dispatch),
+    drims_packages_dispatched_last_minute
+    drims_notification_outbox_pending, drims_notification_outbox_failed,
+    drims_notification_outbox_oldest_pending_seconds
+
+Multiple worker processes:
+    Set PROMETHEUS_MULTIPROC_DIR to an empty directory shared by the workers
+    of one server before they start. Each process then writes its values to
+    memory-mapped files there, and the scrape merges them, so every worker's
+    requests are counted whichever worker answers the scrape.
+    gunicorn.conf.py clears the directory on start and removes the files of
+    exited workers.
+
+    Database-derived values are global, so they are read once per scrape
+    instead of per process.
+
+Outside debug mode, GET /metrics requires METRICS_TOKEN as a Bearer token
+and returns 404 while no token is configured. Metrics are still recorded, so
+nothing is lost once a token is set.
+
+Recording a request costs two label lookups and a histogram observation,
+a few microseconds.
+"""
+import hmac
+import logging
+import os
+from datetime import timedelta
+from functools import wraps
+from time import perf_counter
+
+from flask import Response, current_app, g, request, abort
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    CONTENT_TYPE_LATEST, generate_latest
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client import multiprocess
+
+logger = logging.getLogger(__name__)
+
+REQUEST_DURATION = Histogram(
+    'drims_http_request_duration_seconds',
+    'Request latency by blueprint and endpoint',
+    ['blueprint', 'endpoint', 'method'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+RESPONSES = Counter(
+    'drims_http_responses_total',
+    'Responses by blueprint and status code',
+    ['blueprint', 'status']
+)
+
+POOL_CHECKOUT_WAIT = Histogram(
+    'drims_db_pool_checkout_wait_seconds',
+    'Time spent waiting for a pooled database connection, including opening a new one',
+    ['bind'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+POOL_IN_USE = Gauge(
+    'drims_db_pool_connections_in_use',
+    'Database connections checked out of the pool',
+    ['bind'],
+    multiprocess_mode='livesum'
+)
+POOL_OVERFLOW = Gauge(
+    'drims_db_pool_overflow',
+    'Connections open beyond pool_size',
+    ['bind'],
+    multiprocess_mode='livesum'
+)
+
+CACHE_REQUESTS = Counter(
+    'drims_cache_requests_total',
+    'In-process cache lookups',
+    ['cache', 'result']
+)
+
+INVENTORY_OPERATION_DURATION = Histogram(
+    'drims_inventory_operation_duration_seconds',
+    'Duration of inventory reservation operations',
+    ['operation', 'outcome'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Count a lookup in an in-process cache"""
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def timed_operation(operation: str):
+    """
+    Decorator recording the duration of a service function that returns
+    (success, message), labelled with its outcome.
+
+    Usage:
+        @timed_operation('reserve')
+        def reserve_inventory(...) -> Tuple[bool, str]:
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            started = perf_counter()
+            outcome = 'error'
+            try:
+                result = f(*args, **kwargs)
+                outcome = 'success' if result[0] else 'failure'
+                return result
+            finally:
+                INVENTORY_OPERATION_DURATION.labels(operation, outcome).observe(perf_counter() - started)
+        return decorated_function
+    return decorator
+
+
+class DatabaseCollector:
+    """Business metrics read from the database when Prometheus scrapes"""
+
+    def describe(self):
+        # Keeps registration from running the queries outside a request
+        return []
+
+    def collect(self):
+        from app.db import db
+        from app.db.models import ReliefRequestFulfillmentLock, ReliefPkgManifest
+        from app.services.dispatch_manifest_service import BACKFILL_USER
+        from app.services.notification_outbox_service import get_outbox_metrics
+        from app.utils.timezone import now
+
+        current = now()
+        try:
+            lock_count, expired_count, oldest_acquired_at = db.session.query(
+                db.func.count(ReliefRequestFulfillmentLock.reliefrqst_id),
+                db.func.count(ReliefRequestFulfillmentLock.reliefrqst_id).filter(
+                    ReliefRequestFulfillmentLock.expires_at < current
+                ),
+                db.func.min(ReliefRequestFulfillmentLock.acquired_at)
+            ).one()
+
+            dispatched_total, dispatched_last_minute = db.session.query(
+                db.func.count(ReliefPkgManifest.reliefpkg_id),
+                db.func.count(ReliefPkgManifest.reliefpkg_id).filter(
+                    ReliefPkgManifest.create_dtime >= current - timedelta(minutes=1)
+                )
+            ).filter(
+                # Backfilled manifests are not dispatches happening now
+                ReliefPkgManifest.create_by_id != BACKFILL_USER
+            ).one()
+
+            outbox = get_outbox_metrics()
+        except Exception as e:
+            logger.warning(f"Database metrics unavailable: {e}")
+            db.session.rollback()
+            return
+
+        yield GaugeMetricFamily('drims_fulfillment_locks', 'Relief requests locked for fulfillment', value=lock_count)
+        yield GaugeMetricFamily('drims_fulfillment_locks_expired', 'Fulfillment locks past their expiry', value=expired_count)
+        oldest_age = 0.0
+        if oldest_acquired_at is not None:
+            oldest_age = max((current - oldest_acquired_at).total_seconds(), 0.0)
+        yield GaugeMetricFamily(
+            'drims_fulfillment_lock_oldest_age_seconds',
+            'Age of the oldest fulfillment lock (0 when none are held)',
+            value=oldest_age
+        )
+
+        yield CounterMetricFamily(
+            'drims_packages_dispatched',
+            'Packages dispatched (one dispatch manifest per package)',
+            value=dispatched_total
+        )
+        yield GaugeMetricFamily(
+            'drims_packages_dispatched_last_minute',
+            'Packages dispatched in the last 60 seconds',
+            value=dispatched_last_minute
+        )
+
+        yield GaugeMetricFamily('drims_notification_outbox_pending', 'Undelivered notification events', value=outbox['pending'])
+        yield GaugeMetricFamily('drims_notification_outbox_failed', 'Notification events that exhausted their retries', value=outbox['failed'])
+        yield GaugeMetricFamily(
+            'drims_notification_outbox_oldest_pending_seconds',
+            'Age of the oldest undelivered notification event (0 when none)',
+            value=outbox['oldest_pending_seconds'] or 0.0
+        )
+
+
+def metrics_view():
+    """Prometheus scrape endpoint"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        # Open scrapes are only allowed in development; production needs METRICS_TOKEN
+        if not current_app.debug:
+            abort(404)
+    else:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            abort(401)
+
+    registry = REGISTRY
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    database = CollectorRegistry()
+    database.register(DatabaseCollector())
+
+    return Response(generate_latest(registry) + generate_latest(database), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """
+    Record request metrics and register GET /metrics
+
+    Args:
+        app: Flask application instance
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            blueprint = request.blueprint or 'app'
+            REQUEST_DURATION.labels(blueprint, endpoint, request.method).observe(perf_counter() - started)
+            RESPONSES.labels(blueprint, str(response.status_code)).inc()
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    if not app.config.get('METRICS_TOKEN') and not app.debug:
+        logger.warning('METRICS_TOKEN is not set; /metrics returns 404 until it is')
@@ -1,51 +1,33 @@
 """
 Optimistic Locking Implementation for DRIMS
 Uses version_nbr column to prevent concurrent modification conflicts
-"""
-from sqlalchemy.orm.exc import StaleDataError
-from app.core.exceptions import OptimisticLockError
-import logging
 
-logger = logging.getLogger(__name__)
+Every model with a version_nbr column declares it as the mapper's version
+column:
+
+    version_nbr = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+
+SQLAlchemy then includes the version in the WHERE clause of every UPDATE and
+increments it. Declaring it on the class replaces the boot-time scan of all
+mapper properties, which forced mapper configuration during startup.
+"""
+from typing import List
 
 
-def setup_optimistic_locking(db):
+def unversioned_models(db) -> List[str]:
     """
-    Setup optimistic locking using SQLAlchemy's version_id_col feature.
-    
-    This ensures that all UPDATE operations on tables with version_nbr
-    include the version number in the WHERE clause and increment it automatically.
+    Names of mapped classes whose table has a version_nbr column but whose
+    mapper does not use it as version_id_col.
+
+    Reads only mapper attributes set at class creation, so it does not
+    configure the mappers. Used by scripts/check_startup.py.
     """
-    
-    from sqlalchemy import inspect
-    from app.db import models
-    
-    configured_count = 0
-    
-    for model_name in dir(models):
-        model_class = getattr(models, model_name)
-        
-        if not isinstance(model_class, type):
-            continue
-        
-        if not hasattr(model_class, '__tablename__'):
-            continue
-        
-        if not hasattr(model_class, 'version_nbr'):
-            continue
-        
-        try:
-            mapper_obj = inspect(model_class)
-            
-            for prop in mapper_obj.iterate_properties:
-                if hasattr(prop, 'columns') and len(prop.columns) > 0:
-                    col = prop.columns[0]
-                    if col.name == 'version_nbr':
-                        mapper_obj.version_id_col = col
-                        configured_count += 1
-                        logger.info(f"✓ Configured optimistic locking for {model_name}")
-                        break
-        except Exception as e:
-            logger.warning(f"Could not configure optimistic locking for {model_name}: {e}")
-    
-    logger.info(f"Optimistic locking configured for {configured_count} models with version_nbr")
+    return sorted(
+        mapper.class_.__name__
+        for mapper in db.Model.registry.mappers
+        if 'version_nbr' in mapper.local_table.c and mapper.version_id_col is None
+    )
@@ -0,0 +1,462 @@
+"""
+On-demand sampling profiler for live requests
+
+A system administrator profiles a request in one of two ways:
+
+- Token: issue a signed, short-lived token on /admin/diagnostics/profiles,
+  then send it with a request as the X-DRIMS-Profile header or the _profile
+  query flag.
+- Sampling: profile a random fraction of the requests to one endpoint for a
+  number of minutes.
+
+While a request is profiled, a sampler thread records the stack of the
+request thread every PROFILER_INTERVAL_MS. The profile stores:
+- the stacks in collapsed format ("module:function;module:function count"),
+  which flamegraph.pl and speedscope read directly
+- a timeline of the SQL statements the request ran, without parameter values
+
+Profiles are JSON files in PROFILER_DIR (default instance/profiles), shared
+by all workers. The sampling rule is stored in the same directory.
+
+Profiling is done by a WSGI middleware in front of Flask. Requests that are
+not profiled pay for two environ lookups and a cached check of the sampling
+rule, well under a microsecond. The SQL listeners are attached to the
+engines only when the first profile starts. After that, each statement
+costs one dict lookup.
+
+The query flag is removed from the query string before Flask parses it, so
+strip_sensitive_query_params, the views and generated links never see it.
+The profile ends when Flask returns the response. The body of a streamed
+response is produced later and is not sampled.
+"""
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from time import perf_counter
+from urllib.parse import unquote_plus
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import event
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-DRIMS-Profile'
+PROFILE_HEADER_ENVIRON = 'HTTP_X_DRIMS_PROFILE'
+PROFILE_ID_HEADER = 'X-DRIMS-Profile-Id'
+PROFILE_QUERY_FLAG = '_profile'
+TOKEN_SALT = 'drims-request-profiler'
+
+SAMPLING_FILE = 'sampling.json'
+SUMMARY_SUFFIX = '.summary.json'
+SAMPLING_REFRESH_SECONDS = 5.0
+
+MAX_STACK_DEPTH = 128
+MAX_SQL_STATEMENTS = 500
+MAX_STATEMENT_LENGTH = 2000
+
+PROFILE_ID_PATTERN = re.compile(r'^\d{8}-\d{6}-[0-9a-f]{8}$')
+
+# Thread ident -> RequestProfile for the requests being profiled in this process
+_active = {}
+
+_engine_binds = {}
+_engines_lock = threading.Lock()
+
+_rule_cache = {'checked': float('-inf'), 'rule': None}
+
+
+class RequestProfile:
+    """Stack samples and SQL timeline of one request"""
+
+    def __init__(self, trigger, requested_by, interval, max_seconds):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.thread_id = threading.get_ident()
+        self.trigger = trigger
+        self.requested_by = requested_by
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = Counter()
+        self.sql = []
+        self.sql_dropped = 0
+        self.status = None
+        self.started_at = time.time()
+        self.started = perf_counter()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name=f'request-profiler-{self.id}', daemon=True)
+
+    def start(self):
+        self._sampler.start()
+
+    def stop(self):
+        """Stop sampling and return the request duration in seconds"""
+        duration = perf_counter() - self.started
+        self._stop.set()
+        self._sampler.join()
+        return duration
+
+    def _sample(self):
+        deadline = self.started + self.max_seconds
+        while not self._stop.wait(self.interval) and perf_counter() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            self.stacks[collapse_stack(frame)] += 1
+
+    def record_sql(self, statement, started, finished, bind):
+        if len(self.sql) >= MAX_SQL_STATEMENTS:
+            self.sql_dropped += 1
+            return
+        self.sql.append({
+            'start_ms': round((started - self.started) * 1000, 2),
+            'duration_ms': round((finished - started) * 1000, 2),
+            'bind': bind,
+            'statement': statement[:MAX_STATEMENT_LENGTH]
+        })
+
+
+def collapse_stack(frame):
+    """Frames from the outermost call to frame, as 'module:function;...'"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def function_summary(stacks, limit=30):
+    """
+    Per-function sample counts from collapsed stacks.
+
+    Returns:
+        List of {'function', 'self', 'total'}, sorted by total samples.
+        'self' counts samples where the function was running, 'total'
+        samples where it was anywhere on the stack.
+    """
+    own = Counter()
+    total = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        own[frames[-1]] += count
+        for name in set(frames):
+            total[name] += count
+    rows = [{'function': name, 'self': own[name], 'total': count} for name, count in total.items()]
+    rows.sort(key=lambda r: (r['total'], r['self']), reverse=True)
+    return rows[:limit]
+
+
+# =============================================================================
+# SQL timeline
+# =============================================================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and threading.get_ident() in _active:
+        context._profiler_started = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active.get(threading.get_ident())
+    started = getattr(context, '_profiler_started', None)
+    if profile is not None and started is not None:
+        profile.record_sql(statement, started, perf_counter(), _engine_binds.get(id(conn.engine), 'primary'))
+
+
+def _instrument_engines():
+    """Attach the SQL listeners to every engine the first time a profile starts"""
+    from app.db import db
+
+    with _engines_lock:
+        for bind, engine in db.engines.items():
+            if id(engine) in _engine_binds:
+                continue
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+            _engine_binds[id(engine)] = bind or 'primary'
+
+
+# =============================================================================
+# Tokens and sampling rule
+# =============================================================================
+
+def _serializer(app):
+    return URLSafeTimedSerializer(app.config['SECRET_KEY'], salt=TOKEN_SALT)
+
+
+def issue_token(app, user_id):
+    """Signed token that profiles any request sent with it until it expires"""
+    return _serializer(app).dumps({'user_id': user_id})
+
+
+def verify_token(app, token):
+    """
+    Returns:
+        user_id the token was issued to, or None when it is invalid or expired
+    """
+    try:
+        data = _serializer(app).loads(token, max_age=app.config.get('PROFILER_TOKEN_MAX_AGE', 900))
+    except BadSignature:
+        return None
+    return data.get('user_id') if isinstance(data, dict) else None
+
+
+def profile_dir(app):
+    return app.config.get('PROFILER_DIR') or os.path.join(app.instance_path, 'profiles')
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def sampling_rule(app):
+    """
+    The active sampling rule, read from PROFILER_DIR.
+
+    Returns:
+        {'endpoint', 'rate', 'expires_at', 'created_by'} or None when there
+        is no rule or it has expired
+    """
+    try:
+        with open(os.path.join(profile_dir(app), SAMPLING_FILE)) as f:
+            rule = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Profiler sampling rule unreadable: {e}")
+        return None
+    if rule.get('expires_at', 0) <= time.time():
+        return None
+    return rule
+
+
+def set_sampling_rule(app, endpoint, rate, minutes, user_id):
+    """Profile a fraction of the requests to endpoint on every worker for a number of minutes"""
+    rule = {
+        'endpoint': endpoint,
+        'rate': rate,
+        'expires_at': time.time() + minutes * 60,
+        'created_by': user_id
+    }
+    _write_json(os.path.join(profile_dir(app), SAMPLING_FILE), rule)
+    _rule_cache.update(checked=time.monotonic(), rule=rule)
+    return rule
+
+
+def clear_sampling_rule(app):
+    try:
+        os.remove(os.path.join(profile_dir(app), SAMPLING_FILE))
+    except FileNotFoundError:
+        pass
+    _rule_cache.update(checked=time.monotonic(), rule=None)
+
+
+def _current_rule(app):
+    """Sampling rule, re-read from disk at most every SAMPLING_REFRESH_SECONDS"""
+    checked = time.monotonic()
+    if checked - _rule_cache['checked'] > SAMPLING_REFRESH_SECONDS:
+        _rule_cache.update(checked=checked, rule=sampling_rule(app))
+    rule = _rule_cache['rule']
+    if rule is not None and rule['expires_at'] <= time.time():
+        rule = _rule_cache['rule'] = None
+    return rule
+
+
+# =============================================================================
+# Storage
+# =============================================================================
+
+def save_profile(app, profile, duration, environ):
+    summary = {
+        'id': profile.id,
+        'started_at': profile.started_at,
+        'method': environ.get('REQUEST_METHOD'),
+        'path': environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', ''),
+        'endpoint': _match_endpoint(app, environ),
+        'status': profile.status or 500,
+        'duration_ms': round(duration * 1000, 1),
+        'trigger': profile.trigger,
+        'requested_by': profile.requested_by,
+        'worker_pid': os.getpid(),
+        'interval_ms': round(profile.interval * 1000, 1),
+        'sample_count': sum(profile.stacks.values()),
+        'sql_count': len(profile.sql) + profile.sql_dropped,
+        'sql_ms': round(sum(q['duration_ms'] for q in profile.sql), 1)
+    }
+    directory = profile_dir(app)
+    _write_json(os.path.join(directory, profile.id + '.json'), dict(
+        summary,
+        stacks=dict(profile.stacks.most_common()),
+        sql=profile.sql,
+        sql_dropped=profile.sql_dropped
+    ))
+    _write_json(os.path.join(directory, profile.id + SUMMARY_SUFFIX), summary)
+    _prune_profiles(directory, app.config.get('PROFILER_MAX_PROFILES', 200))
+
+
+def _prune_profiles(directory, keep):
+    ids = sorted(name[:-len(SUMMARY_SUFFIX)] for name in os.listdir(directory) if name.endswith(SUMMARY_SUFFIX))
+    for profile_id in ids[:-max(keep, 1)]:
+        delete_profile_files(directory, profile_id)
+
+
+def delete_profile_files(directory, profile_id):
+    for name in (profile_id + '.json', profile_id + SUMMARY_SUFFIX):
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def list_profiles(app):
+    """Summaries of the stored profiles, newest first"""
+    directory = profile_dir(app)
+    try:
+        names = sorted((n for n in os.listdir(directory) if n.endswith(SUMMARY_SUFFIX)), reverse=True)
+    except FileNotFoundError:
+        return []
+    summaries = []
+    for name in names:
+        try:
+            with open(os.path.join(directory, name)) as f:
+                summaries.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # Pruned or being written by another worker
+    return summaries
+
+
+def load_profile(app, profile_id):
+    """Full profile, or None when the ID is malformed or unknown"""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(profile_dir(app), profile_id + '.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def clear_profiles(app):
+    directory = profile_dir(app)
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.endswith(SUMMARY_SUFFIX):
+            delete_profile_files(directory, name[:-len(SUMMARY_SUFFIX)])
+
+
+# =============================================================================
+# WSGI middleware
+# =============================================================================
+
+def _pop_query_flag(query_string):
+    """
+    Remove the profiling flag from a raw query string.
+
+    Returns:
+        (query string without the flag, flag value or None)
+    """
+    kept = []
+    value = None
+    for part in query_string.split('&'):
+        name, _, raw = part.partition('=')
+        if unquote_plus(name) == PROFILE_QUERY_FLAG:
+            value = value or unquote_plus(raw)
+        else:
+            kept.append(part)
+    return '&'.join(kept), value
+
+
+def _match_endpoint(app, environ):
+    try:
+        return app.url_map.bind_to_environ(environ).match()[0]
+    except (HTTPException, RequestRedirect):
+        return None
+
+
+class RequestProfilerMiddleware:
+    """
+    WSGI middleware that profiles requests asked for by token or sampling rule
+
+    Runs in front of Flask, so the profile covers every request hook and the
+    _profile flag is removed from the query string before Flask parses it.
+    """
+
+    def __init__(self, wsgi_app, app):
+        """
+        Args:
+            wsgi_app: WSGI application (Flask app.wsgi_app)
+            app: Flask application instance, for configuration and the URL map
+        """
+        self.wsgi_app = wsgi_app
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        token = environ.get(PROFILE_HEADER_ENVIRON)
+        query_string = environ.get('QUERY_STRING', '')
+        if f'{PROFILE_QUERY_FLAG}=' in query_string:
+            environ['QUERY_STRING'], flag = _pop_query_flag(query_string)
+            token = token or flag
+
+        if token:
+            requested_by = verify_token(self.app, token)
+            if requested_by is None:
+                logger.warning('Profiling token rejected', extra={'path': environ.get('PATH_INFO')})
+                return self.wsgi_app(environ, start_response)
+            return self._profile(environ, start_response, 'token', requested_by)
+
+        rule = _current_rule(self.app)
+        if rule is None or random.random() >= rule['rate'] or _match_endpoint(self.app, environ) != rule['endpoint']:
+            return self.wsgi_app(environ, start_response)
+        return self._profile(environ, start_response, 'sample', rule['created_by'])
+
+    def _profile(self, environ, start_response, trigger, requested_by):
+        with self.app.app_context():
+            _instrument_engines()
+
+        profile = RequestProfile(
+            trigger,
+            requested_by,
+            self.app.config.get('PROFILER_INTERVAL_MS', 5) / 1000,
+            self.app.config.get('PROFILER_MAX_SECONDS', 30)
+        )
+
+        def profiling_start_response(status, headers, exc_info=None):
+            profile.status = int(status.split(' ', 1)[0])
+            headers.append((PROFILE_ID_HEADER, profile.id))
+            return start_response(status, headers, exc_info)
+
+        _active[profile.thread_id] = profile
+        profile.start()
+        try:
+            return self.wsgi_app(environ, profiling_start_response)
+        finally:
+            _active.pop(profile.thread_id, None)
+            duration = profile.stop()
+            try:
+                save_profile(self.app, profile, duration, environ)
+            except OSError as e:
+                logger.warning(f"Could not store request profile {profile.id}: {e}")
+
+
+def init_request_profiler(app):
+    """
+    Wrap the WSGI app with the profiler
+
+    Args:
+        app: Flask application instance
+    """
+    if not app.config.get('PROFILER_ENABLED', True):
+        return
+
+    app.wsgi_app = RequestProfilerMiddleware(app.wsgi_app, app)
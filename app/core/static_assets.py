@@ -0,0 +1,108 @@
+"""
+Fingerprinted, precompressed static assets for DRIMS
+
+scripts/build_static.py copies every file under static/ to static/dist/ with
+a content hash in its name (css/modern-ui.css -> dist/css/modern-ui.3f2a9c1b04de.css),
+writes .gz/.br siblings for text assets and records the mapping in
+static/dist/manifest.json.
+
+With the manifest present and STATIC_FINGERPRINTING enabled:
+- url_for('static', filename='css/modern-ui.css') builds the hashed URL, so
+  templates do not change
+- Hashed files are served with Cache-Control: immutable for a year; a new
+  build changes the name, so browsers never use a stale copy
+- The .br or .gz sibling is sent when the client accepts it, without
+  compressing per request
+
+Files without a manifest entry, and every file when no build has been run,
+are served by Flask's static view as before.
+"""
+import json
+import logging
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory
+
+from app.security.cache_control import IMMUTABLE_CACHE_CONTROL
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Precompressed siblings in order of preference
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def load_manifest(static_folder):
+    """
+    Read static/dist/manifest.json.
+
+    Returns:
+        {source path: hashed path relative to static/}, empty when there is
+        no build
+    """
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Static manifest {path} unusable, serving unhashed assets: {e}")
+        return {}
+
+
+def serve_static(filename):
+    """
+    Static view: hashed build output is served immutable and precompressed,
+    everything else through Flask's send_static_file.
+    """
+    if not filename.startswith(DIST_DIR + '/'):
+        return current_app.send_static_file(filename)
+
+    static_folder = current_app.static_folder
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    encoding = None
+    served = filename
+    for candidate, suffix in PRECOMPRESSED:
+        if request.accept_encodings[candidate] > 0 and os.path.isfile(os.path.join(static_folder, filename + suffix)):
+            encoding = candidate
+            served = filename + suffix
+            break
+
+    response = send_from_directory(static_folder, served, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if os.path.isfile(os.path.join(static_folder, filename + PRECOMPRESSED[-1][1])):
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def init_static_assets(app):
+    """
+    Serve fingerprinted build output and rewrite static URLs to it
+
+    Args:
+        app: Flask application instance
+    """
+    if 'static' in app.view_functions:
+        app.view_functions['static'] = serve_static
+
+    if not app.config.get('STATIC_FINGERPRINTING', True):
+        return
+
+    manifest = load_manifest(app.static_folder)
+    if not manifest:
+        return
+
+    @app.url_defaults
+    def fingerprint_static_url(endpoint, values):
+        """Point url_for('static', ...) at the hashed copy of the file"""
+        if endpoint == 'static':
+            hashed = manifest.get(values.get('filename'))
+            if hashed:
+                values['filename'] = hashed
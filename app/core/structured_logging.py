@@ -0,0 +1,243 @@
+"""
+Non-blocking structured logging for DRIMS
+
+Log records go to a QueueHandler on the root logger. A QueueListener thread
+formats them and writes them to stdout/stderr, so a slow terminal, pipe or
+log collector never holds up a request.
+
+Each record is tagged with the current request ID and user ID while it is
+still on the request thread. Output is one JSON object per line (LOG_FORMAT=json)
+or a single readable line (LOG_FORMAT=text, the default in debug):
+
+    {"ts": "2026-10-19T14:02:11.402Z", "level": "DEBUG",
+     "logger": "app.features.packaging", "message": "Drawer batches loaded",
+     "request_id": "5f0c...", "user_id": 12, "item_id": 431, "shortfall": "0"}
+
+Fields passed with extra={...} become JSON keys.
+
+Per-module levels:
+    LOG_LEVELS="app.features.packaging=DEBUG,sqlalchemy.engine=WARNING"
+
+High-frequency debug events:
+    LOG_DEBUG_SAMPLE_RATE keeps that fraction of DEBUG records (1.0 keeps all).
+    Records at INFO and above are never sampled.
+
+Code on hot paths should guard expensive debug output with
+logger.isEnabledFor(logging.DEBUG). When debug is off, no message or extra
+fields are built at all.
+
+The listener thread is started by the process that calls configure_logging.
+Gunicorn workers import the app after forking, so each worker gets its own
+thread. Do not run gunicorn with --preload, because the thread would not
+survive the fork.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# Accept upstream request IDs (nginx $request_id, load balancer trace IDs) that are safe to log
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Attributes of every LogRecord; anything else on a record came from extra={...}
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {
+    'message', 'asctime', 'taskName', 'request_id', 'user_id'
+}
+
+_listener = None
+
+
+class RequestContextFilter(logging.Filter):
+    """Tag records with the request and user they were logged under"""
+
+    def filter(self, record):
+        record.request_id = None
+        record.user_id = None
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            # Only read a user flask_login has already loaded; never query from a log call
+            user = g.get('_login_user')
+            if user is not None and getattr(user, 'is_authenticated', False):
+                record.user_id = getattr(user, 'user_id', None)
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep a fraction of DEBUG records; higher levels always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'user_id': getattr(record, 'user_id', None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Readable single line with the request ID and extra fields appended"""
+
+    def __init__(self):
+        super().__init__('[%(asctime)s] %(levelname)s in %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRIBUTES and not k.startswith('_')}
+        if fields:
+            line += ' ' + ' '.join(f'{k}={v}' for k, v in fields.items())
+        if getattr(record, 'request_id', None):
+            line += f' [request_id={record.request_id}]'
+        return line
+
+
+class _QueueHandler(QueueHandler):
+    """QueueHandler that keeps extra fields and leaves formatting to the listener"""
+
+    def prepare(self, record):
+        # The base class formats the whole record on the calling thread; only
+        # merge the message arguments and render the traceback, which must
+        # happen before the objects they refer to change.
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_levels(spec: str):
+    """
+    Parse LOG_LEVELS.
+
+    Args:
+        spec: "logger=LEVEL,logger=LEVEL"
+
+    Returns:
+        {logger name: level number}; malformed entries are skipped
+    """
+    levels = {}
+    for part in (spec or '').split(','):
+        name, _, level = part.partition('=')
+        name, level = name.strip(), level.strip().upper()
+        if name and isinstance(logging.getLevelName(level), int):
+            levels[name] = logging.getLevelName(level)
+    return levels
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(app):
+    """
+    Route all logging through the queue and start the writer thread
+
+    Args:
+        app: Flask application instance
+    """
+    global _listener
+    stop_logging()
+
+    stream = sys.stdout if app.config.get('LOG_TO_STDOUT') else sys.stderr
+    output = logging.StreamHandler(stream)
+    if app.config.get('LOG_FORMAT', 'json') == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(DebugSamplingFilter(app.config.get('LOG_DEBUG_SAMPLE_RATE', 1.0)))
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, QueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(logging.getLevelName(app.config.get('LOG_LEVEL', 'INFO').upper()))
+
+    # Records reach the queue through the root logger; Flask's own handler would print them twice
+    app.logger.removeHandler(default_handler)
+    app.logger.setLevel(logging.NOTSET)
+
+    for name, level in parse_levels(app.config.get('LOG_LEVELS', '')).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def init_request_ids(app):
+    """
+    Give each request an ID for its log records and return it to the client
+
+    An incoming X-Request-ID (e.g. nginx $request_id) is reused when it is
+    well formed, so proxy and application logs can be joined.
+
+    Args:
+        app: Flask application instance
+    """
+    @app.before_request
+    def assign_request_id():
+        supplied = request.headers.get(REQUEST_ID_HEADER, '')
+        g.request_id = supplied if _VALID_REQUEST_ID.match(supplied) else uuid.uuid4().hex
+
+    @app.after_request
+    def return_request_id(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
+
+def init_logging(app):
+    """
+    Configure the logging pipeline and request IDs
+
+    Args:
+        app: Flask application instance
+    """
+    configure_logging(app)
+    init_request_ids(app)
+    atexit.register(stop_logging)
@@ -0,0 +1,218 @@
+"""
+Jinja bytecode cache and template render profiling for DRIMS
+
+Bytecode cache:
+    Compiled templates are written to JINJA_BYTECODE_CACHE_DIR (by default a
+    private per-user directory under the system temp dir), shared by all
+    workers on the host. A new or recycled worker loads the compiled code
+    instead of parsing and compiling base.html, the dashboards and the large
+    packaging pages again. Entries are keyed by template name and source
+    checksum, so an edited template is recompiled.
+
+Render profiling (TEMPLATE_PROFILING=true):
+    - Time of every template execution, including templates pulled in with
+      {% include %} and {% extends %} (inclusive of what they render)
+    - Time and call count of every macro
+    - Calls per top-level render of each template helper (url_for, has_role,
+      has_feature, macros...); helpers called more than
+      TEMPLATE_HELPER_CALL_THRESHOLD times in one render are flagged
+
+    Statistics are kept per worker process and shown on the admin
+    diagnostics page (app/features/diagnostics.py). Profiling is off by
+    default; when off, the standard Jinja classes are used and nothing is
+    measured.
+"""
+import logging
+import os
+import threading
+import types
+from collections import Counter
+from time import perf_counter
+
+from jinja2 import FileSystemBytecodeCache, Template
+from jinja2.runtime import Context, Macro
+
+logger = logging.getLogger(__name__)
+
+_stats_lock = threading.Lock()
+_template_stats = {}
+_macro_stats = {}
+_helper_stats = {}
+
+# Stack of helper call counters, one per top-level render in this thread
+_renders = threading.local()
+
+# id(callable) -> template global name, built on first use
+_global_names = None
+
+
+def _record(stats, name, seconds):
+    with _stats_lock:
+        entry = stats.get(name)
+        if entry is None:
+            entry = stats[name] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        ms = seconds * 1000
+        entry['count'] += 1
+        entry['total_ms'] += ms
+        entry['max_ms'] = max(entry['max_ms'], ms)
+
+
+def _record_helper_calls(template_name, calls):
+    with _stats_lock:
+        per_template = _helper_stats.setdefault(template_name, {})
+        for helper, count in calls.items():
+            entry = per_template.get(helper)
+            if entry is None:
+                entry = per_template[helper] = {'renders': 0, 'calls': 0, 'max_per_render': 0}
+            entry['renders'] += 1
+            entry['calls'] += count
+            entry['max_per_render'] = max(entry['max_per_render'], count)
+
+
+def _helper_name(environment, obj):
+    """Template-visible name of a callable, or None for builtins like dict.get"""
+    global _global_names
+    if isinstance(obj, Macro):
+        return f"macro {obj.name}"
+    if not isinstance(obj, (types.FunctionType, types.MethodType)):
+        return None
+    if _global_names is None:
+        _global_names = {id(value): name for name, value in environment.globals.items()}
+    return _global_names.get(id(obj)) or obj.__qualname__
+
+
+class ProfiledTemplate(Template):
+    """Template that times each execution and counts helper calls per render"""
+
+    @classmethod
+    def _from_namespace(cls, environment, namespace, globals):
+        template = super()._from_namespace(environment, namespace, globals)
+        root_render_func = template.root_render_func
+        name = template.name or '<string>'
+
+        # include/extends call root_render_func directly, so timing it here
+        # covers included and parent templates as well as top-level renders
+        def timed_root_render_func(context):
+            started = perf_counter()
+            try:
+                yield from root_render_func(context)
+            finally:
+                _record(_template_stats, name, perf_counter() - started)
+
+        template.root_render_func = timed_root_render_func
+        return template
+
+    def render(self, *args, **kwargs):
+        stack = getattr(_renders, 'stack', None)
+        if stack is None:
+            stack = _renders.stack = []
+        calls = Counter()
+        stack.append(calls)
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            stack.pop()
+            _record_helper_calls(self.name or '<string>', calls)
+
+
+class ProfiledContext(Context):
+    """Context that counts helper calls and times macros"""
+
+    def call(__self, __obj, *args, **kwargs):
+        name = _helper_name(__self.environment, __obj)
+        stack = getattr(_renders, 'stack', None)
+        if name is not None and stack:
+            stack[-1][name] += 1
+
+        if not isinstance(__obj, Macro):
+            return super().call(__obj, *args, **kwargs)
+
+        started = perf_counter()
+        try:
+            return super().call(__obj, *args, **kwargs)
+        finally:
+            _record(_macro_stats, __obj.name, perf_counter() - started)
+
+
+def template_profile(threshold):
+    """
+    Snapshot of the profiling statistics of this worker.
+
+    Args:
+        threshold: Flag helpers called more than this many times in one render
+
+    Returns:
+        Dict with 'templates' and 'macros' (sorted by total time) and
+        'helpers' (sorted by highest calls per render)
+    """
+    def rows(stats):
+        return sorted(
+            (
+                {
+                    'name': name,
+                    'count': s['count'],
+                    'total_ms': round(s['total_ms'], 1),
+                    'avg_ms': round(s['total_ms'] / s['count'], 2),
+                    'max_ms': round(s['max_ms'], 1),
+                }
+                for name, s in stats.items()
+            ),
+            key=lambda row: row['total_ms'],
+            reverse=True
+        )
+
+    with _stats_lock:
+        templates = rows(_template_stats)
+        macros = rows(_macro_stats)
+        helpers = sorted(
+            (
+                {
+                    'template': template_name,
+                    'helper': helper,
+                    'renders': s['renders'],
+                    'avg_per_render': round(s['calls'] / s['renders'], 1),
+                    'max_per_render': s['max_per_render'],
+                    'flagged': s['max_per_render'] > threshold,
+                }
+                for template_name, per_template in _helper_stats.items()
+                for helper, s in per_template.items()
+            ),
+            key=lambda row: row['max_per_render'],
+            reverse=True
+        )
+
+    return {'templates': templates, 'macros': macros, 'helpers': helpers}
+
+
+def reset_template_profile():
+    """Clear the profiling statistics of this worker"""
+    with _stats_lock:
+        _template_stats.clear()
+        _macro_stats.clear()
+        _helper_stats.clear()
+
+
+def profiling_enabled(app):
+    """True when init_template_profiling installed the profiling classes"""
+    return app.jinja_env.template_class is ProfiledTemplate
+
+
+def init_template_profiling(app):
+    """
+    Configure the bytecode cache and, when enabled, render profiling.
+
+    Must run before the first template is loaded.
+    """
+    if app.config.get('JINJA_BYTECODE_CACHE', True):
+        cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+        try:
+            if cache_dir:
+                os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"Jinja bytecode cache disabled: {e}")
+
+    if app.config.get('TEMPLATE_PROFILING', False):
+        app.jinja_env.template_class = ProfiledTemplate
+        app.jinja_env.context_class = ProfiledContext
+        logger.info("Template render profiling enabled")
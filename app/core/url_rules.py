@@ -0,0 +1,34 @@
+"""
+URL rules with lazily compiled URL builders
+
+Registering a route makes Werkzeug compile two Python functions per rule for
+url_for() (with and without extra query arguments), using ast and compile().
+With ~180 routes this was the largest share of application startup, although
+most workers only ever build URLs for a fraction of the routes.
+
+LazyBuilderRule keeps route matching unchanged and compiles a rule's builder
+the first time url_for() builds that rule. Every blueprint is still registered
+at startup: Flask does not allow registering blueprints once requests are
+served, and the shared navigation calls url_for() for most endpoints.
+
+Usage:
+    app = Flask(__name__)
+    app.url_rule_class = LazyBuilderRule
+"""
+from werkzeug.routing import Rule
+
+
+class LazyBuilderRule(Rule):
+    """Rule whose URL builder functions are compiled on first use"""
+
+    def _compile_builder(self, append_unknown: bool = True):
+        attribute = '_build_unknown' if append_unknown else '_build'
+
+        def build(rule, *args, **kwargs):
+            # Replace this stub on the instance; a concurrent first build
+            # compiles an identical function, so no lock is needed
+            builder = Rule._compile_builder(rule, append_unknown).__get__(rule, None)
+            setattr(rule, attribute, builder)
+            return builder(*args, **kwargs)
+
+        return build
@@ -0,0 +1,207 @@
+"""
+Worker warm-up for DRIMS
+
+After a deploy or worker recycle the first requests used to pay the cold
+costs: SQLAlchemy mapper configuration and statement compilation, the item
+status map, Jinja compilation of base.html and the dashboards, and the first
+database connections. run_warmup() pays them once in the worker before it
+accepts traffic.
+
+Under gunicorn (post_worker_init) and `python drims_app.py`, warm-up finishes
+before the process accepts a connection, so a worker that answers
+/health/ready is always warm and the endpoint returns 200. Until the first
+worker is warm, probes wait in the listen backlog instead of receiving 503.
+The endpoint only returns 503 when the app is served without calling
+run_warmup(), e.g. under another WSGI server without an equivalent hook.
+
+Each step is timed and a failing step is logged and recorded without stopping
+the others; warm-up only moves work earlier, so a worker whose warm-up step
+failed still serves requests correctly.
+
+Usage (gunicorn.conf.py):
+    def post_worker_init(worker):
+        from app.core.warmup import run_warmup
+        run_warmup(worker.wsgi)
+"""
+import logging
+import threading
+import time
+
+from flask import jsonify
+
+logger = logging.getLogger(__name__)
+
+# Templates rendered on most page views or right after login
+WARMUP_TEMPLATES = (
+    'base.html',
+    'login.html',
+    'dashboard/logistics.html',
+    'dashboard/lo.html',
+    'dashboard/agency.html',
+    'dashboard/director.html',
+    'dashboard/admin.html',
+    'dashboard/inventory.html',
+    'dashboard/general.html',
+    'dashboard/donations_analytics.html',
+    'operations_dashboard/index.html',
+    'packaging/pending_fulfillment.html',
+    'requests/list.html',
+)
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_READY = 'ready'
+
+_state_lock = threading.Lock()
+_state = {
+    'status': STATUS_PENDING,
+    'started_at': None,
+    'finished_at': None,
+    'steps': [],
+}
+
+
+def _configure_mappers(app):
+    from sqlalchemy.orm import configure_mappers
+    from app.db import loader_profiles
+
+    configure_mappers()
+    # The first lookup builds and caches every named profile
+    loader_profiles.loader_options(loader_profiles.REQUEST_QUEUE)
+
+
+def _prime_reference_caches(app):
+    from app.services.item_status_service import load_status_map
+
+    load_status_map(force_reload=True)
+
+
+def _compile_templates(app):
+    from jinja2 import TemplateNotFound
+
+    for name in WARMUP_TEMPLATES:
+        try:
+            app.jinja_env.get_template(name)
+        except TemplateNotFound:
+            logger.warning(f"Warm-up template not found: {name}")
+
+
+def _open_connections(app):
+    from app.db import db
+
+    for engine in db.engines.values():
+        count = app.config.get('WARMUP_DB_CONNECTIONS', 2)
+        pool_size = getattr(engine.pool, 'size', None)
+        if callable(pool_size):
+            count = min(count, pool_size())
+        # Hold them all at once so the pool really opens `count` connections
+        connections = [engine.connect() for _ in range(max(count, 0))]
+        for connection in connections:
+            connection.close()
+
+
+def _run_hot_queries(app):
+    from app.db import db
+    from app.db.loader_profiles import (
+        loader_options, REQUEST_QUEUE, REQUEST_LINES, REQUEST_PACKAGING,
+        REQUEST_SUMMARY, REQUEST_FULFILLMENT, PACKAGE_DISPATCH
+    )
+    from app.db.models import User, ReliefRqst, ReliefPkg, Inventory
+
+    # Login and the per-request user loader
+    db.session.get(User, 0)
+    User.query.filter_by(email='').first()
+
+    for profile in (REQUEST_QUEUE, REQUEST_LINES, REQUEST_PACKAGING,
+                    REQUEST_SUMMARY, REQUEST_FULFILLMENT):
+        ReliefRqst.query.options(*loader_options(profile)).limit(1).all()
+    ReliefPkg.query.options(*loader_options(PACKAGE_DISPATCH)).limit(1).all()
+    Inventory.query.limit(1).all()
+
+
+WARMUP_STEPS = (
+    ('configure_mappers', _configure_mappers),
+    ('reference_caches', _prime_reference_caches),
+    ('templates', _compile_templates),
+    ('db_connections', _open_connections),
+    ('hot_queries', _run_hot_queries),
+)
+
+
+def run_warmup(app):
+    """
+    Run the warm-up steps in an app context and mark the worker ready.
+
+    Does nothing but mark the worker ready when WARMUP_ENABLED is False.
+    Safe to call more than once; later calls return the recorded result.
+
+    Returns:
+        Warm-up state dict (see warmup_state)
+    """
+    with _state_lock:
+        if _state['status'] != STATUS_PENDING:
+            return warmup_state()
+        _state['status'] = STATUS_RUNNING
+        _state['started_at'] = time.time()
+
+    steps = []
+    if app.config.get('WARMUP_ENABLED', True):
+        from app.db import db
+
+        with app.app_context():
+            for name, step in WARMUP_STEPS:
+                started = time.perf_counter()
+                error = None
+                try:
+                    step(app)
+                except Exception as e:
+                    error = str(e)
+                    logger.warning(f"Warm-up step {name} failed: {error}", exc_info=True)
+                    db.session.rollback()
+                steps.append({
+                    'name': name,
+                    'ms': round((time.perf_counter() - started) * 1000, 1),
+                    'error': error,
+                })
+            db.session.remove()
+
+    with _state_lock:
+        _state['steps'] = steps
+        _state['finished_at'] = time.time()
+        _state['status'] = STATUS_READY
+
+    total_ms = sum(s['ms'] for s in steps)
+    failed = [s['name'] for s in steps if s['error']]
+    logger.info(
+        f"Warm-up finished in {total_ms:.0f} ms"
+        + (f" ({', '.join(failed)} failed)" if failed else "")
+    )
+    return warmup_state()
+
+
+def warmup_state():
+    """Copy of the warm-up status, timestamps and per-step timings"""
+    with _state_lock:
+        return {**_state, 'steps': [dict(s) for s in _state['steps']]}
+
+
+def init_warmup(app):
+    """
+    Register the readiness endpoint.
+
+    GET /health/ready returns 200 once run_warmup() has finished in this
+    worker and 503 before (see the module docstring for when 503 is seen).
+    Step errors are logged, not returned, since the endpoint is public.
+    """
+
+    @app.route('/health/ready')
+    def health_ready():
+        state = warmup_state()
+        body = {
+            'status': state['status'],
+            'steps': [
+                {'name': s['name'], 'ms': s['ms'], 'ok': s['error'] is None}
+                for s in state['steps']
+            ],
+        }
+        return jsonify(body), 200 if state['status'] == STATUS_READY else 503
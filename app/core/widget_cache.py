@@ -0,0 +1,130 @@
+"""
+Lazy-loaded dashboard widgets with a short TTL cache
+
+Dashboards render a lightweight shell; each chart or KPI group is fetched by
+static/js/dashboard-widgets.js from its own JSON endpoint, all in parallel. A
+slow aggregate then delays only its own widget, and a failing one shows
+"unavailable" in its card instead of breaking the page.
+
+Endpoints decorated with @widget_endpoint cache their payload in process for
+a few seconds to minutes, keyed by endpoint, scope and period:
+- SCOPE_GLOBAL: the data is the same for every user allowed to see the
+  dashboard (role-restricted system-wide metrics)
+- SCOPE_USER: the data depends on the user (e.g. an officer's own work)
+
+With period=True the view receives period_days, parsed from ?period=
+(default DEFAULT_PERIOD_DAYS, 400 when outside 1..MAX_PERIOD_DAYS).
+
+Usage:
+    from app.core.widget_cache import widget_endpoint, SCOPE_USER
+
+    @dashboard_bp.route('/lo/widgets/kpis')
+    @login_required
+    @read_only
+    @widget_endpoint(ttl=60, scope=SCOPE_USER)
+    def lo_widget_kpis():
+        return {'total_packages': ...}
+"""
+import logging
+import threading
+import time
+from functools import wraps
+from typing import Any, Hashable, Optional
+
+from flask import jsonify, request
+from flask_login import current_user
+from werkzeug.exceptions import HTTPException
+
+from app.core.metrics import record_cache_lookup
+from app.db import db
+
+logger = logging.getLogger(__name__)
+
+SCOPE_GLOBAL = 'global'
+SCOPE_USER = 'user'
+
+DEFAULT_PERIOD_DAYS = 30
+MAX_PERIOD_DAYS = 366
+
+
+class TTLCache:
+    """Thread-safe in-process cache whose entries expire after their TTL"""
+
+    def __init__(self, name: str, max_entries: int = 1024):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+        record_cache_lookup(self.name, entry is not None)
+        return entry[1] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop expired entries, then the ones closest to expiry
+                for stale_key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+                    del self._entries[stale_key]
+                overflow = len(self._entries) - self.max_entries + 1
+                if overflow > 0:
+                    for stale_key in sorted(self._entries, key=lambda k: self._entries[k][0])[:overflow]:
+                        del self._entries[stale_key]
+            self._entries[key] = (now + ttl, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+widget_cache = TTLCache('widget')
+
+
+def widget_endpoint(ttl: float = 60, scope: str = SCOPE_GLOBAL, period: bool = False):
+    """
+    Decorator for dashboard widget endpoints returning a JSON-serializable dict.
+
+    Place it below @login_required and role checks so that access control
+    runs on every request, cached or not.
+
+    Args:
+        ttl: Seconds a payload is served from the cache
+        scope: SCOPE_GLOBAL or SCOPE_USER
+        period: Pass period_days (from ?period=) to the view and key on it
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if period:
+                try:
+                    period_days = int(request.args.get('period', DEFAULT_PERIOD_DAYS))
+                except ValueError:
+                    return jsonify({'error': 'period must be a number of days'}), 400
+                if not 1 <= period_days <= MAX_PERIOD_DAYS:
+                    return jsonify({'error': f'period must be between 1 and {MAX_PERIOD_DAYS} days'}), 400
+                kwargs['period_days'] = period_days
+
+            scope_key = current_user.user_name if scope == SCOPE_USER else SCOPE_GLOBAL
+            key = (request.endpoint, scope_key, kwargs.get('period_days'))
+
+            data = widget_cache.get(key)
+            if data is None:
+                try:
+                    data = f(*args, **kwargs)
+                except HTTPException:
+                    raise
+                except Exception as e:
+                    logger.exception(f"Dashboard widget {request.endpoint} failed: {str(e)}")
+                    db.session.rollback()
+                    return jsonify({'error': 'Widget data is temporarily unavailable'}), 503
+                widget_cache.set(key, data, ttl)
+
+            return jsonify(data)
+        return decorated_function
+    return decorator
@@ -2,15 +2,38 @@
 Database configuration and session management
 """
 from flask_sqlalchemy import SQLAlchemy
-from app.core.optimistic_locking import setup_optimistic_locking
+from app.db.routing import RoutingSession, init_read_routing
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 def init_db(app):
     """Initialize database with Flask app"""
+    if app.config.get('METRICS_ENABLED', True):
+        from app.db.pool import InstrumentedQueuePool
+        engine_options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        engine_options.setdefault('poolclass', InstrumentedQueuePool)
+        # SQLALCHEMY_ENGINE_OPTIONS only applies to the primary engine, so
+        # each bind (the read replica) gets the pool class in its own options
+        binds = {}
+        for key, options in (app.config.get('SQLALCHEMY_BINDS') or {}).items():
+            options = dict(options) if isinstance(options, dict) else {'url': options}
+            options.setdefault('poolclass', InstrumentedQueuePool)
+            binds[key] = options
+        app.config['SQLALCHEMY_BINDS'] = binds
+    
     db.init_app(app)
     
-    with app.app_context():
-        setup_optimistic_locking(db)
+    if app.config.get('METRICS_ENABLED', True):
+        from app.db.pool import label_pools
+        with app.app_context():
+            label_pools(db.engines)
+    
+    init_read_routing(app)
+    
+    from app.db.change_feed import init_change_feed
+    init_change_feed(RoutingSession)
+    
+    from app.db.stock_ledger import init_stock_ledger
+    init_stock_ledger(RoutingSession)
     
     return db
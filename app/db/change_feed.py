@@ -0,0 +1,291 @@
+"""
+Change feed capture for DRIMS
+
+Records inserts, updates and deletes of the tables field clients sync
+(inventory, itembatch, reliefrqst, reliefpkg, notification) in change_log, so
+/api/changes can hand out deltas instead of full list reloads.
+
+Capture:
+- after_flush collects the changed rows of tracked models in session.info
+- before_commit writes them to change_log in one INSERT, holding a transaction
+  advisory lock until commit. change_seq values are therefore handed out in
+  commit order: a reader that has seen change N has already seen every
+  change < N, so a client cursor never skips a late-committing transaction.
+
+Bulk UPDATE/DELETE statements bypass the unit of work; callers that issue them
+on tracked tables call record_change() for the affected rows.
+
+Changes made in a savepoint that is later rolled back are still recorded; the
+feed then reports the row as missing, which clients treat like a delete.
+"""
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import String, and_, cast, event, func, insert, inspect, or_, select, text, tuple_
+
+from app.db.models import ChangeLog, Inventory, ItemBatch, ReliefRqst, ReliefPkg, ReliefPkgItem, Notification
+from app.utils.timezone import now
+
+
+OP_INSERT = 'I'
+OP_UPDATE = 'U'
+OP_DELETE = 'D'
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+
+# pg_advisory_xact_lock key serializing change_log writers ('DRIMSCHG')
+_CHANGE_LOG_LOCK_KEY = 0x4452494D53434847
+_PENDING_KEY = 'change_feed_pending'
+
+# model -> (table name, row key, scope columns)
+TRACKED_MODELS = {
+    Inventory: ('inventory', lambda r: f"{r.inventory_id}:{r.item_id}",
+                lambda r: {'warehouse_id': r.inventory_id}),
+    ItemBatch: ('itembatch', lambda r: str(r.batch_id),
+                lambda r: {'warehouse_id': r.inventory_id}),
+    ReliefRqst: ('reliefrqst', lambda r: str(r.reliefrqst_id),
+                 lambda r: {'agency_id': r.agency_id}),
+    ReliefPkg: ('reliefpkg', lambda r: str(r.reliefpkg_id),
+                lambda r: {'agency_id': r.agency_id, 'warehouse_id': r.to_inventory_id}),
+    Notification: ('notification', lambda r: str(r.id),
+                   lambda r: {'user_id': r.user_id}),
+}
+_MODELS_BY_TABLE = {table_name: model for model, (table_name, _, _) in TRACKED_MODELS.items()}
+
+
+def _merge_op(previous: Optional[str], op: str) -> str:
+    """Net operation for a row changed more than once in a transaction"""
+    if previous == OP_INSERT and op == OP_UPDATE:
+        return OP_INSERT
+    if previous == OP_DELETE and op == OP_INSERT:
+        return OP_UPDATE
+    return op
+
+
+def record_change(db_session, table_name: str, row_key: str, op_code: str,
+                  warehouse_id: Optional[int] = None, agency_id: Optional[int] = None,
+                  user_id: Optional[int] = None) -> None:
+    """
+    Queue a change for change_log; written when the session commits.
+    Used directly for bulk UPDATE/DELETE statements on tracked tables.
+    """
+    pending = db_session.info.setdefault(_PENDING_KEY, OrderedDict())
+    key = (table_name, row_key)
+    previous = pending.pop(key, None)
+    pending[key] = {
+        'table_name': table_name,
+        'row_key': row_key,
+        'op_code': _merge_op(previous['op_code'] if previous else None, op_code),
+        'warehouse_id': warehouse_id,
+        'agency_id': agency_id,
+        'user_id': user_id
+    }
+
+
+def _capture_flush(db_session, flush_context):
+    for objects, op_code in ((db_session.new, OP_INSERT), (db_session.dirty, OP_UPDATE),
+                             (db_session.deleted, OP_DELETE)):
+        for obj in objects:
+            tracked = TRACKED_MODELS.get(type(obj))
+            if tracked is None:
+                continue
+            if op_code == OP_UPDATE and not db_session.is_modified(obj, include_collections=False):
+                continue
+            table_name, key_of, scope_of = tracked
+            record_change(db_session, table_name, key_of(obj), op_code, **scope_of(obj))
+
+
+def _write_changes(db_session):
+    # Savepoint releases also fire before_commit; write once, at the real commit
+    if db_session.in_nested_transaction():
+        return
+
+    # Flush outstanding changes first so they are captured too
+    db_session.flush()
+    pending = db_session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    if db_session.get_bind(mapper=inspect(ChangeLog)).dialect.name == 'postgresql':
+        db_session.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _CHANGE_LOG_LOCK_KEY})
+
+    changed_at = now()
+    db_session.execute(insert(ChangeLog), [dict(row, changed_at=changed_at) for row in pending.values()])
+
+
+def _discard_changes(db_session, *args):
+    db_session.info.pop(_PENDING_KEY, None)
+
+
+def init_change_feed(session_class):
+    """Register the capture hooks on the application's session class"""
+    event.listen(session_class, 'after_flush', _capture_flush)
+    event.listen(session_class, 'before_commit', _write_changes)
+    event.listen(session_class, 'after_rollback', _discard_changes)
+
+
+# ==================== READING ====================
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _row_to_dict(row) -> dict:
+    return {attr.key: _json_value(getattr(row, attr.key)) for attr in inspect(row).mapper.column_attrs}
+
+
+def _load_rows(db_session, table_name: str, row_keys: Iterable[str]) -> Dict[str, dict]:
+    """Current state of the given rows, keyed by row_key"""
+    model = _MODELS_BY_TABLE[table_name]
+    key_of = TRACKED_MODELS[model][1]
+    row_keys = list(row_keys)
+
+    if model is Inventory:
+        pairs = [tuple(int(part) for part in key.split(':')) for key in row_keys]
+        criterion = tuple_(Inventory.inventory_id, Inventory.item_id).in_(pairs)
+    else:
+        pk_column = inspect(model).primary_key[0]
+        criterion = pk_column.in_([int(key) for key in row_keys])
+
+    return {key_of(row): _row_to_dict(row) for row in db_session.query(model).filter(criterion).all()}
+
+
+def scope_criteria(global_access: bool, user_id: int, warehouse_ids: Iterable[int] = (),
+                   agency_id: Optional[int] = None):
+    """
+    change_log filter for a caller's RBAC scope.
+
+    Args:
+        global_access: Caller may see every inventory/request/package change
+        user_id: Caller's own notifications are always included
+        warehouse_ids: Warehouses the caller is assigned to
+        agency_id: Caller's agency (agency users)
+    """
+    clauses = [and_(ChangeLog.table_name == 'notification', ChangeLog.user_id == user_id)]
+
+    if global_access:
+        clauses.append(ChangeLog.table_name != 'notification')
+        return or_(*clauses)
+
+    warehouse_ids = list(warehouse_ids)
+    if warehouse_ids:
+        clauses.append(and_(
+            ChangeLog.table_name.in_(['inventory', 'itembatch']),
+            ChangeLog.warehouse_id.in_(warehouse_ids)
+        ))
+        # Packages with items issued from (or destined to) the caller's warehouses
+        clauses.append(and_(
+            ChangeLog.table_name == 'reliefpkg',
+            or_(
+                ChangeLog.warehouse_id.in_(warehouse_ids),
+                ChangeLog.row_key.in_(
+                    select(cast(ReliefPkgItem.reliefpkg_id, String)).where(
+                        ReliefPkgItem.fr_inventory_id.in_(warehouse_ids)
+                    )
+                )
+            )
+        ))
+
+    if agency_id is not None:
+        clauses.append(and_(
+            ChangeLog.table_name.in_(['reliefrqst', 'reliefpkg']),
+            ChangeLog.agency_id == agency_id
+        ))
+
+    return or_(*clauses)
+
+
+def read_changes(db_session, since: int, scope, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[Optional[List[dict]], int, bool]:
+    """
+    One page of changes after cursor `since`, in change_seq order.
+
+    A row changed several times within the page is reported once, at its
+    latest position, with its current state (None when it no longer exists).
+
+    Args:
+        db_session: Session to query with
+        since: Last change_seq the client has applied (0 for the full history)
+        scope: Criterion from scope_criteria()
+        limit: Maximum number of change_log entries to examine
+
+    Returns:
+        Tuple of (changes, next_cursor, has_more). changes is None when the
+        cursor is older than the retained history, including a full sync from
+        0 after a purge; next_cursor is then the current head, from which the
+        client resumes once it has reloaded the base tables.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    oldest_seq, head_seq = db_session.query(
+        func.min(ChangeLog.change_seq), func.max(ChangeLog.change_seq)
+    ).one()
+    if head_seq is None:
+        return [], since, False
+    if since + 1 < oldest_seq:
+        return None, head_seq, False
+
+    entries = db_session.query(ChangeLog).filter(
+        ChangeLog.change_seq > since,
+        ChangeLog.change_seq <= head_seq,
+        scope
+    ).order_by(ChangeLog.change_seq).limit(limit + 1).all()
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Latest entry per row
+    latest = OrderedDict()
+    for entry in entries:
+        latest.pop((entry.table_name, entry.row_key), None)
+        latest[(entry.table_name, entry.row_key)] = entry
+
+    keys_by_table = {}
+    for table_name, row_key in latest:
+        keys_by_table.setdefault(table_name, []).append(row_key)
+    rows = {
+        table_name: _load_rows(db_session, table_name, row_keys)
+        for table_name, row_keys in keys_by_table.items()
+    }
+
+    changes = [
+        {
+            'seq': entry.change_seq,
+            'table': entry.table_name,
+            'op': entry.op_code,
+            'key': entry.row_key,
+            'row': rows[entry.table_name].get(entry.row_key) if entry.op_code != OP_DELETE else None
+        }
+        for entry in latest.values()
+    ]
+
+    # Every change up to head_seq is committed and visible, so a caller with
+    # nothing more in scope can jump straight to the head
+    next_cursor = entries[-1].change_seq if has_more else max(head_seq, since)
+    return changes, next_cursor, has_more
+
+
+def purge_changes(db_session, before: datetime) -> int:
+    """
+    Delete change_log entries older than `before`. The caller commits.
+    Clients whose cursor predates the remaining history must resync.
+
+    The newest entry is always kept, so a purged log never looks like one
+    that has no history and a full sync from 0 still detects the gap.
+
+    Returns:
+        Number of entries deleted
+    """
+    head_seq = db_session.query(func.max(ChangeLog.change_seq)).scalar()
+    if head_seq is None:
+        return 0
+    return db_session.query(ChangeLog).filter(
+        ChangeLog.changed_at < before,
+        ChangeLog.change_seq < head_seq
+    ).delete(synchronize_session=False)
@@ -0,0 +1,135 @@
+"""
+Concurrent execution of independent read-only queries
+
+Dashboards issue a dozen or more independent aggregates. Run one after the
+other on the request's session, the page waits for the sum of their round
+trips. fan_out() runs them on a bounded, process-wide thread pool instead and
+gathers the results into a dict.
+
+Each query gets its own short-lived session on its own pooled connection,
+bound to the engine the request reads from (the replica when a @read_only
+route was routed there). On PostgreSQL the transaction is read-only and has
+a statement_timeout of QUERY_FANOUT_TIMEOUT_SECONDS.
+
+The queries run serially on the request's session, as before, when:
+- QUERY_FANOUT_WORKERS is 0 or there is a single query
+- The engine's pool is not a QueuePool (e.g. in-memory SQLite)
+- Fewer than QUERY_FANOUT_MIN_FREE_CONNECTIONS connections would remain free
+  in the pool, so request handling is never starved of connections
+- The thread pool already has a backlog of other requests' queries
+
+Queries are callables taking a session. They must use session.query() or
+session.execute() - Model.query is bound to the request's session - and return
+plain values or fully loaded objects, because the session is closed afterwards.
+
+Usage:
+    from app.db.fanout import fan_out
+
+    results = fan_out({
+        'total': lambda s: s.query(Donation).count(),
+        'by_status': lambda s: s.query(Donation.status_code, func.count()).group_by(Donation.status_code).all(),
+    })
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from app.db import db
+
+logger = logging.getLogger(__name__)
+
+Query = Callable[[Session], Any]
+
+_pool_lock = threading.Lock()
+_pool_state = {'executor': None, 'pid': None, 'workers': 0, 'in_flight': 0}
+
+
+def _executor(workers: int) -> ThreadPoolExecutor:
+    """Process-wide executor, created lazily so each forked worker gets its own threads"""
+    if _pool_state['executor'] is None or _pool_state['pid'] != os.getpid():
+        _pool_state['executor'] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='query-fanout')
+        _pool_state['pid'] = os.getpid()
+        _pool_state['workers'] = workers
+        _pool_state['in_flight'] = 0
+    return _pool_state['executor']
+
+
+def _free_connections(engine) -> int:
+    """Connections the engine's pool can still hand out"""
+    pool = engine.pool
+    return pool.size() + max(pool._max_overflow, 0) - pool.checkedout()
+
+
+def _reserve(engine, count: int) -> bool:
+    """Claim thread pool capacity for count queries; False to run them serially"""
+    workers = current_app.config.get('QUERY_FANOUT_WORKERS', 4)
+    if workers < 1 or count < 2 or not isinstance(engine.pool, QueuePool):
+        return False
+
+    min_free = current_app.config.get('QUERY_FANOUT_MIN_FREE_CONNECTIONS', 2)
+    with _pool_lock:
+        _executor(workers)
+        in_flight = _pool_state['in_flight']
+        if in_flight + count > 2 * _pool_state['workers']:
+            logger.info(f"Query fan-out backlog ({in_flight} queued), running {count} queries serially")
+            return False
+        if _free_connections(engine) - min(count, _pool_state['workers']) < min_free:
+            logger.info(f"Connection pool under pressure, running {count} queries serially")
+            return False
+        _pool_state['in_flight'] += count
+    return True
+
+
+def _release(future):
+    with _pool_lock:
+        _pool_state['in_flight'] -= 1
+
+
+def _run_query(engine, query: Query, timeout_ms: int):
+    with Session(bind=engine) as session:
+        if engine.dialect.name == 'postgresql':
+            session.execute(text('SET TRANSACTION READ ONLY'))
+            session.execute(text(f'SET LOCAL statement_timeout = {timeout_ms}'))
+        return query(session)
+
+
+def fan_out(queries: Dict[str, Query]) -> Dict[str, Any]:
+    """
+    Run independent read-only queries concurrently and gather their results.
+
+    Args:
+        queries: name -> callable taking a session and returning the result
+
+    Returns:
+        name -> result, in the order of queries
+
+    Raises:
+        The first exception raised by a query (remaining queries are cancelled);
+        concurrent.futures.TimeoutError when a query outlives the timeout
+    """
+    engine = db.session.get_bind()
+    if not _reserve(engine, len(queries)):
+        return {name: query(db.session) for name, query in queries.items()}
+
+    timeout = current_app.config.get('QUERY_FANOUT_TIMEOUT_SECONDS', 10)
+    executor = _pool_state['executor']
+    futures = {}
+    for name, query in queries.items():
+        future = executor.submit(_run_query, engine, query, int(timeout * 1000))
+        future.add_done_callback(_release)
+        futures[name] = future
+
+    try:
+        # statement_timeout cancels slow queries on PostgreSQL; the wait is a backstop
+        return {name: future.result(timeout=timeout + 1) for name, future in futures.items()}
+    except Exception:
+        for future in futures.values():
+            future.cancel()
+        raise
@@ -0,0 +1,134 @@
+"""
+Eager-loading profiles for DRIMS
+
+Named sets of loader options for the views that render relief requests and
+packages, so every view loads the same relationships the same way.
+
+joinedload of a collection repeats the parent row once per child, and two
+collections joined in one query multiply: a request with 50 items and 4
+packages comes back as 200 rows that SQLAlchemy then de-duplicates in Python.
+The profiles therefore load collections with selectinload (one extra
+SELECT ... WHERE parent_id IN (...) per collection, each child row sent once)
+and use joinedload only along many-to-one relationships, where the join never
+adds rows.
+
+scripts/benchmark_loader_profiles.py compares rows fetched and latency of the
+profiles against the previous joinedload chains.
+
+Usage:
+    from app.db.loader_profiles import loader_options, REQUEST_QUEUE
+
+    ReliefRqst.query.options(*loader_options(REQUEST_QUEUE)).filter(...)
+"""
+from typing import Tuple
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.db.models import (
+    Agency, Item, ReliefPkg, ReliefPkgItem, ReliefRequestFulfillmentLock, ReliefRqst, ReliefRqstItem
+)
+
+
+# Relief request lists: header plus items and packages (pending approval and fulfillment queues)
+REQUEST_QUEUE = 'request_queue'
+# Relief request lists and detail pages showing item lines with UOM and category
+REQUEST_LINES = 'request_lines'
+# Package preparation and LM review: item lines plus the request's packages
+REQUEST_PACKAGING = 'request_packaging'
+# Dashboard request lists: header plus items (item counts)
+REQUEST_SUMMARY = 'request_summary'
+# Logistics dashboard: request summary plus the fulfillment lock holder
+REQUEST_FULFILLMENT = 'request_fulfillment'
+# Dispatch manifest: request with agency parish and item lines with status
+REQUEST_MANIFEST = 'request_manifest'
+# Dispatched packages with their request header and item/batch lines
+PACKAGE_DISPATCH = 'package_dispatch'
+# Dispatched packages that also show the request's item lines
+PACKAGE_DISPATCH_REQUEST_LINES = 'package_dispatch_request_lines'
+
+
+def _build_profiles():
+    """
+    Build the loader options on first use. Creating an option from a mapped
+    attribute configures all mappers, which would otherwise happen at import
+    time and slow down application startup.
+    """
+    request_header = (
+        joinedload(ReliefRqst.agency),
+        joinedload(ReliefRqst.eligible_event),
+        joinedload(ReliefRqst.status),
+    )
+
+    request_item_lines = selectinload(ReliefRqst.items).joinedload(ReliefRqstItem.item).options(
+        joinedload(Item.default_uom),
+        joinedload(Item.category)
+    )
+
+    package_header = joinedload(ReliefPkg.relief_request).options(
+        joinedload(ReliefRqst.agency),
+        joinedload(ReliefRqst.eligible_event)
+    )
+
+    package_item_lines = selectinload(ReliefPkg.items).options(
+        joinedload(ReliefPkgItem.item),
+        joinedload(ReliefPkgItem.batch)
+    )
+
+    return {
+        REQUEST_QUEUE: (
+            *request_header,
+            selectinload(ReliefRqst.items),
+            selectinload(ReliefRqst.packages),
+        ),
+        REQUEST_LINES: (
+            *request_header,
+            request_item_lines,
+        ),
+        REQUEST_PACKAGING: (
+            *request_header,
+            request_item_lines,
+            selectinload(ReliefRqst.packages),
+        ),
+        REQUEST_SUMMARY: (
+            *request_header,
+            selectinload(ReliefRqst.items),
+        ),
+        REQUEST_FULFILLMENT: (
+            *request_header,
+            selectinload(ReliefRqst.items),
+            joinedload(ReliefRqst.fulfillment_lock).joinedload(ReliefRequestFulfillmentLock.fulfiller),
+        ),
+        REQUEST_MANIFEST: (
+            joinedload(ReliefRqst.agency).joinedload(Agency.parish),
+            joinedload(ReliefRqst.eligible_event),
+            selectinload(ReliefRqst.items).options(
+                joinedload(ReliefRqstItem.item).joinedload(Item.default_uom),
+                joinedload(ReliefRqstItem.item_status)
+            ),
+        ),
+        PACKAGE_DISPATCH: (
+            package_header,
+            package_item_lines,
+        ),
+        PACKAGE_DISPATCH_REQUEST_LINES: (
+            package_header,
+            joinedload(ReliefPkg.relief_request).selectinload(ReliefRqst.items),
+            package_item_lines,
+        ),
+    }
+
+
+_profiles = None
+
+
+def loader_options(profile: str) -> Tuple:
+    """
+    Loader options of a named profile, for Query.options(*...).
+
+    Raises:
+        KeyError: Unknown profile name
+    """
+    global _profiles
+    if _profiles is None:
+        _profiles = _build_profiles()
+    return _profiles[profile]
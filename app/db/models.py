@@ -44,6 +44,10 @@ class User(UserMixin, db.Model):
     status_code = db.Column(db.CHAR(1), nullable=False, default='A')
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     roles = db.relationship('Role', 
                            secondary='user_role', 
                            primaryjoin='User.user_id==UserRole.user_id',
@@ -127,6 +131,10 @@ class UserRole(db.Model):
     update_by_id = db.Column(db.String(20), nullable=False, default='system')
     update_dtime = db.Column(db.DateTime, nullable=False, default=jamaica_now)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
 
 class Permission(db.Model):
     """Permission definitions for RBAC"""
@@ -140,6 +148,10 @@ class Permission(db.Model):
     update_by_id = db.Column(db.String(20), nullable=False)
     update_dtime = db.Column(db.DateTime, nullable=False, default=jamaica_now)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
 
 class RolePermission(db.Model):
     """Role-Permission assignment (many-to-many)"""
@@ -153,6 +165,10 @@ class RolePermission(db.Model):
     update_by_id = db.Column(db.String(20), nullable=False)
     update_dtime = db.Column(db.DateTime, nullable=False, default=jamaica_now)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
 
 class UserWarehouse(db.Model):
     """User-Warehouse access control"""
@@ -252,6 +268,10 @@ class Warehouse(db.Model):
     update_dtime = db.Column(db.DateTime, nullable=False)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     parish = db.relationship('Parish', backref='warehouses')
     custodian = db.relationship('Custodian', backref='warehouses')
     users = db.relationship('User', 
@@ -282,6 +302,10 @@ class Agency(db.Model):
     update_dtime = db.Column(db.DateTime, nullable=False)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     parish = db.relationship('Parish', backref='agencies')
     ineligible_event = db.relationship('Event', backref='ineligible_agencies')
     warehouse = db.relationship('Warehouse', backref='agency', uselist=False)
@@ -535,6 +559,21 @@ class BatchLocation(db.Model):
     batch = db.relationship('ItemBatch', foreign_keys=[batch_id], backref='locations')
     location = db.relationship('Location', backref='batch_locations')
 
+class BatchNoCounter(db.Model):
+    """Batch Number Counter - Last sequence issued per batch number prefix
+
+    One row per (item_code, inventory_id, batch_date), i.e. per ITEM-WH-YYYYMMDD
+    prefix. Incremented atomically by BatchCreationService.reserve_batch_numbers()
+    so concurrent intakes never compute the same batch number.
+    """
+    __tablename__ = 'batch_no_counter'
+
+    item_code = db.Column(db.String(16), primary_key=True)
+    inventory_id = db.Column(db.Integer, primary_key=True)
+    batch_date = db.Column(db.Date, primary_key=True)
+    last_seq = db.Column(db.Integer, nullable=False, default=0)
+    update_dtime = db.Column(db.DateTime, nullable=False, default=jamaica_now)
+
 class Currency(db.Model):
     """Currency Lookup Table"""
     __tablename__ = 'currency'
@@ -592,6 +631,10 @@ class Donor(db.Model):
     update_dtime = db.Column(db.DateTime, nullable=False)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     country = db.relationship('Country', backref='donors')
 
 class Donation(db.Model):
@@ -778,6 +821,10 @@ class ReliefRqstItemStatus(db.Model):
     update_by_id = db.Column(db.String(20), nullable=False)
     update_dtime = db.Column(db.DateTime, nullable=False)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
 
 class ReliefRqst(db.Model):
     """Relief Request / Needs List (AIDMGMT workflow)"""
@@ -801,6 +848,10 @@ class ReliefRqst(db.Model):
     action_dtime = db.Column(db.DateTime)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     agency = db.relationship('Agency', backref='relief_requests')
     eligible_event = db.relationship('Event', backref='eligible_relief_requests')
     status = db.relationship('ReliefRqstStatus', backref='relief_requests')
@@ -822,6 +873,10 @@ class ReliefRqstItem(db.Model):
     action_dtime = db.Column(db.DateTime)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     relief_request = db.relationship('ReliefRqst', backref='items')
     item = db.relationship('Item', backref='request_items')
     item_status = db.relationship('ReliefRqstItemStatus', backref='request_items')
@@ -953,6 +1008,10 @@ class DBIntake(db.Model):
     verify_dtime = db.Column(db.DateTime)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     package = db.relationship('ReliefPkg', backref='intake_records')
     inventory = db.relationship('Inventory', backref='intake_records')
 
@@ -984,6 +1043,10 @@ class DBIntakeItem(db.Model):
     update_dtime = db.Column(db.DateTime, nullable=False)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     item = db.relationship('Item',
                           primaryjoin='DBIntakeItem.item_id==Item.item_id',
                           foreign_keys=[item_id],
@@ -1057,6 +1120,10 @@ class Transfer(db.Model):
     verify_dtime = db.Column(db.DateTime)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     __table_args__ = (
         db.CheckConstraint("transfer_date <= CURRENT_DATE", name='c_transfer_1'),
         db.CheckConstraint("status_code IN ('D', 'C', 'V', 'P')", name='c_transfer_2'),
@@ -1186,6 +1253,10 @@ class DonationIntake(db.Model):
     verify_dtime = db.Column(db.DateTime)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     donation = db.relationship('Donation', backref='intakes')
     inventory = db.relationship('Inventory', backref='donation_intakes')
     warehouse = db.relationship('Warehouse', 
@@ -1328,6 +1399,10 @@ class TransferReturn(db.Model):
     verify_dtime = db.Column(db.DateTime)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     from_warehouse = db.relationship('Warehouse', foreign_keys=[fr_inventory_id], backref='returns_sent')
     to_warehouse = db.relationship('Warehouse', foreign_keys=[to_inventory_id], backref='returns_received')
 
@@ -1349,6 +1424,10 @@ class TransferReturnItem(db.Model):
     update_dtime = db.Column(db.DateTime, nullable=False)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     __table_args__ = (
         db.ForeignKeyConstraint(['item_id', 'inventory_id'], ['inventory.item_id', 'inventory.inventory_id']),
     )
@@ -1374,6 +1453,10 @@ class ReturnIntake(db.Model):
     verify_dtime = db.Column(db.DateTime)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     transfer_return = db.relationship('TransferReturn', backref='intakes')
     inventory = db.relationship('Inventory', backref='return_intakes')
 
@@ -1399,6 +1482,10 @@ class ReturnIntakeItem(db.Model):
     update_dtime = db.Column(db.DateTime, nullable=False)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     __table_args__ = (
         db.ForeignKeyConstraint(['xfreturn_id', 'inventory_id'], ['rtintake.xfreturn_id', 'rtintake.inventory_id']),
     )
@@ -1433,6 +1520,10 @@ class AgencyAccountRequest(db.Model):
     updated_at = db.Column(db.DateTime, nullable=False, default=jamaica_now)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     agency = db.relationship('Agency', foreign_keys=[agency_id], backref='account_requests')
     user = db.relationship('User', foreign_keys=[user_id], backref='account_requests')
     created_by = db.relationship('User', foreign_keys=[created_by_id], backref='requests_created')
@@ -1450,6 +1541,10 @@ class AgencyAccountRequestAudit(db.Model):
     event_dtime = db.Column(db.DateTime, nullable=False, default=jamaica_now)
     version_nbr = db.Column(db.Integer, nullable=False, default=1)
     
+    __mapper_args__ = {
+        'version_id_col': version_nbr
+    }
+    
     request = db.relationship('AgencyAccountRequest', backref='audit_log')
     actor = db.relationship('User', foreign_keys=[actor_user_id], backref='audit_actions')
 
@@ -1473,3 +1568,137 @@ class Notification(db.Model):
     user = db.relationship('User', backref='notifications')
     warehouse = db.relationship('Warehouse', backref='notifications')
     relief_request = db.relationship('ReliefRqst', backref='notifications')
+
+class NotificationOutbox(db.Model):
+    """Transactional outbox of notification events
+
+    Business transactions append one compact event row; the notification worker
+    (scripts/notification_worker.py) expands it into Notification rows after
+    commit. See app/services/notification_outbox_service.py.
+
+    Status Codes:
+        P = Pending (includes events waiting for a retry)
+        D = Done
+        F = Failed (retries exhausted)
+    """
+    __tablename__ = 'notification_outbox'
+
+    outbox_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    event_type = db.Column(db.String(50), nullable=False)
+    idempotency_key = db.Column(db.String(120), nullable=False, unique=True)
+    payload = db.Column(db.Text, nullable=False)
+    status_code = db.Column(db.CHAR(1), nullable=False, default='P')
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    available_at = db.Column(db.DateTime, nullable=False, default=jamaica_now)
+    created_at = db.Column(db.DateTime, nullable=False, default=jamaica_now)
+    processed_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('dk_notification_outbox_1', 'status_code', 'available_at'),
+    )
+
+class ReliefPkgManifest(db.Model):
+    """Immutable dispatch manifest for a relief package
+
+    Written once when the package is dispatched. Holds the package contents
+    (items, batches, quantities, agency and warehouse names) as a JSON document
+    pre-split by source warehouse, so post-dispatch pages and the printable
+    dispatch slip read one row by primary key instead of re-joining
+    reliefpkg_item, itembatch, item, warehouse and agency.
+    See app/services/dispatch_manifest_service.py.
+    """
+    __tablename__ = 'reliefpkg_manifest'
+
+    reliefpkg_id = db.Column(db.Integer, db.ForeignKey('reliefpkg.reliefpkg_id'), primary_key=True)
+    reliefrqst_id = db.Column(db.Integer, nullable=False)
+    manifest_version = db.Column(db.SmallInteger, nullable=False, default=1)
+    manifest_json = db.Column(db.Text, nullable=False)
+    create_by_id = db.Column(db.String(20), nullable=False)
+    create_dtime = db.Column(db.DateTime, nullable=False)
+
+    package = db.relationship('ReliefPkg', backref=db.backref('manifest', uselist=False))
+
+class ChangeLog(db.Model):
+    """Change feed entries for offline-capable clients
+
+    One row per insert/update/delete of a tracked table (inventory, itembatch,
+    reliefrqst, reliefpkg, notification), captured on flush and numbered at
+    commit so change_seq order matches commit order. Scope columns let
+    /api/changes filter by the caller's warehouses, agency or user.
+    See app/db/change_feed.py.
+
+    Operation Codes:
+        I = Insert
+        U = Update
+        D = Delete
+    """
+    __tablename__ = 'change_log'
+
+    change_seq = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    table_name = db.Column(db.String(30), nullable=False)
+    row_key = db.Column(db.String(60), nullable=False)
+    op_code = db.Column(db.CHAR(1), nullable=False)
+    warehouse_id = db.Column(db.Integer)
+    agency_id = db.Column(db.Integer)
+    user_id = db.Column(db.Integer)
+    changed_at = db.Column(db.DateTime, nullable=False, default=jamaica_now)
+
+    __table_args__ = (
+        db.Index('dk_change_log_1', 'changed_at'),
+    )
+
+
+class StockMovement(db.Model):
+    """Stock ledger - append-only record of every stock quantity change
+
+    One row per change to the usable/defective/expired quantities of an
+    inventory or itembatch row, captured on flush (see app/db/stock_ledger.py).
+    Rows are never updated or deleted. batch_id 0 marks warehouse-level
+    (inventory) movements; batch-level movements carry the itembatch id.
+
+    Movement Types:
+        OPEN = Opening balance (seeded by migration 022)
+        RCPT = Receipt (donation or relief package intake)
+        XFER = Transfer between warehouses
+        DSPT = Dispatch of a relief package
+        ADJ  = Any other change
+    """
+    __tablename__ = 'stock_movement'
+
+    movement_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    inventory_id = db.Column(db.Integer, nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    batch_id = db.Column(db.Integer, nullable=False, default=0)
+    movement_type = db.Column(db.String(4), nullable=False)
+    ref_type = db.Column(db.String(20))
+    ref_id = db.Column(db.Integer)
+    usable_delta = db.Column(db.Numeric(15, 4), nullable=False, default=0)
+    defective_delta = db.Column(db.Numeric(15, 4), nullable=False, default=0)
+    expired_delta = db.Column(db.Numeric(15, 4), nullable=False, default=0)
+    moved_by_id = db.Column(db.String(20))
+    moved_at = db.Column(db.DateTime, nullable=False, default=jamaica_now)
+
+    __table_args__ = (
+        db.Index('dk_stock_movement_1', 'inventory_id', 'item_id', 'moved_at'),
+        db.Index('dk_stock_movement_2', 'moved_at'),
+    )
+
+
+class StockSnapshot(db.Model):
+    """Stock ledger snapshot - balances at the end of a day
+
+    Balance of every (warehouse, item, batch) key after all movements
+    with moved_at before snapshot_date + 1 day. Point-in-time queries start
+    from the latest snapshot and add the movements since.
+    """
+    __tablename__ = 'stock_snapshot'
+
+    snapshot_date = db.Column(db.Date, primary_key=True)
+    inventory_id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, primary_key=True)
+    batch_id = db.Column(db.Integer, primary_key=True)
+    usable_qty = db.Column(db.Numeric(15, 4), nullable=False, default=0)
+    defective_qty = db.Column(db.Numeric(15, 4), nullable=False, default=0)
+    expired_qty = db.Column(db.Numeric(15, 4), nullable=False, default=0)
+    create_dtime = db.Column(db.DateTime, nullable=False, default=jamaica_now)
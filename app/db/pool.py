@@ -0,0 +1,59 @@
+"""
+Instrumented connection pool for DRIMS
+
+InstrumentedQueuePool is SQLAlchemy's QueuePool plus the pool metrics in
+app/core/metrics.py:
+- drims_db_pool_checkout_wait_seconds: time to get a connection, including
+  waiting for a free one and opening a new one
+- drims_db_pool_connections_in_use and drims_db_pool_overflow
+
+init_db() makes it the pool class of every engine when METRICS_ENABLED is
+on. Engines that SQLAlchemy gives a different pool (in-memory SQLite) are
+left unchanged.
+"""
+from time import perf_counter
+
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import POOL_CHECKOUT_WAIT, POOL_IN_USE, POOL_OVERFLOW
+
+PRIMARY_BIND = 'primary'
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout wait and connections in use"""
+
+    bind_name = PRIMARY_BIND
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            record = super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.bind_name).observe(perf_counter() - started)
+        POOL_IN_USE.labels(self.bind_name).inc()
+        POOL_OVERFLOW.labels(self.bind_name).set(max(self.overflow(), 0))
+        return record
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        POOL_IN_USE.labels(self.bind_name).dec()
+        POOL_OVERFLOW.labels(self.bind_name).set(max(self.overflow(), 0))
+
+    def recreate(self):
+        # Engine.dispose() replaces the pool; keep the bind label
+        pool = super().recreate()
+        pool.bind_name = self.bind_name
+        return pool
+
+
+def label_pools(engines):
+    """
+    Name each instrumented pool after its bind.
+
+    Args:
+        engines: Flask-SQLAlchemy db.engines ({bind key or None: Engine})
+    """
+    for bind, engine in engines.items():
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.bind_name = bind or PRIMARY_BIND
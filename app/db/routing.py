@@ -0,0 +1,167 @@
+"""
+Read-replica session routing for DRIMS
+
+Routes marked with @read_only send their SELECT queries to the 'replica' bind
+configured in SQLALCHEMY_BINDS. Everything else - including any flush issued
+from a read-only route - stays pinned to the primary database.
+
+The replica is skipped (queries fall back to primary) when:
+- No replica bind is configured (single-database deployments)
+- Replica replay lag exceeds REPLICA_MAX_LAG_SECONDS
+- The lag check itself fails (replica unreachable)
+- The current user wrote to the primary within REPLICA_STICKY_SECONDS,
+  so they always read their own writes
+
+Usage:
+    from app.db.routing import read_only
+
+    @bp.route('/summary')
+    @login_required
+    @read_only
+    def summary():
+        ...
+"""
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event, text
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = 'replica'
+LAST_WRITE_SESSION_KEY = '_db_last_write_at'
+
+# Replay lag in seconds; NULL when this is not a standby. When the standby has
+# replayed everything it received it is current, regardless of replay timestamp.
+_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM (now() - pg_last_xact_replay_timestamp()))
+    END
+""")
+
+_lag_lock = threading.Lock()
+_lag_state = {'checked_at': 0.0, 'lag': None}
+
+
+class RoutingSession(FlaskSession):
+    """
+    Flask-SQLAlchemy session that sends reads to the replica bind when the
+    current request has been marked read-only. Flushes always use primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _replica_selected():
+            engines = self._db.engines
+            if REPLICA_BIND in engines:
+                return engines[REPLICA_BIND]
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_primary_write(db_session, flush_context):
+    """Remember that this request wrote to primary (for read-your-writes)"""
+    if has_request_context() and (db_session.new or db_session.dirty or db_session.deleted):
+        g.db_wrote_primary = True
+
+
+def _replica_selected():
+    """True when the current request was routed to the replica"""
+    return has_request_context() and g.get('db_route') == REPLICA_BIND
+
+
+def replica_configured(app=None):
+    """Check whether a replica bind is configured for the app"""
+    app = app or current_app
+    return REPLICA_BIND in (app.config.get('SQLALCHEMY_BINDS') or {})
+
+
+def get_replica_lag(app=None):
+    """
+    Get the replica replay lag in seconds, cached for REPLICA_LAG_CHECK_INTERVAL.
+
+    Returns:
+        float lag in seconds, or None if the replica could not be queried
+    """
+    app = app or current_app
+    interval = app.config.get('REPLICA_LAG_CHECK_INTERVAL', 5)
+    now = time.monotonic()
+
+    with _lag_lock:
+        if now - _lag_state['checked_at'] < interval:
+            return _lag_state['lag']
+        _lag_state['checked_at'] = now
+
+    lag = None
+    try:
+        engine = app.extensions['sqlalchemy'].engines[REPLICA_BIND]
+        with engine.connect() as conn:
+            value = conn.execute(_LAG_SQL).scalar()
+        lag = float(value) if value is not None else 0.0
+    except Exception as e:
+        logger.warning(f"Replica lag check failed, using primary: {str(e)}")
+
+    with _lag_lock:
+        _lag_state['lag'] = lag
+
+    return lag
+
+
+def should_use_replica():
+    """
+    Decide whether the current request may read from the replica.
+
+    Returns:
+        bool: True if the replica is configured, fresh enough, and the user
+        has not written to primary within the sticky window
+    """
+    if not replica_configured():
+        return False
+
+    last_write = session.get(LAST_WRITE_SESSION_KEY)
+    sticky_seconds = current_app.config.get('REPLICA_STICKY_SECONDS', 10)
+    if last_write and time.time() - last_write < sticky_seconds:
+        return False
+
+    lag = get_replica_lag()
+    if lag is None:
+        return False
+
+    return lag <= current_app.config.get('REPLICA_MAX_LAG_SECONDS', 5)
+
+
+def read_only(f):
+    """
+    Decorator marking a route as read-only so its queries may use the replica.
+
+    Place it below @login_required / role decorators so that the user lookup
+    and permission checks run against primary.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if should_use_replica():
+            g.db_route = REPLICA_BIND
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def init_read_routing(app):
+    """
+    Initialize read-replica routing hooks
+
+    Args:
+        app: Flask application instance
+    """
+
+    @app.after_request
+    def record_last_write(response):
+        """Pin the user's following reads to primary after they write"""
+        if g.get('db_wrote_primary') and replica_configured(app):
+            session[LAST_WRITE_SESSION_KEY] = time.time()
+        return response
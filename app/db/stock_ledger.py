@@ -0,0 +1,162 @@
+"""
+Stock ledger capture for DRIMS
+
+Appends a stock_movement row for every change to the usable, defective or
+expired quantity of an inventory or itembatch row, whichever code path made
+it (intake, transfer execution, dispatch, manual edits). Quantities on the
+live tables are still updated in place; the ledger records how they got there
+so balances can be reconstructed for any point in time
+(app/services/stock_ledger_service.py).
+
+Capture:
+- after_flush computes the quantity deltas of flushed Inventory/ItemBatch rows
+  from their attribute history and queues them in session.info
+- before_commit writes the queued movements in one INSERT
+
+Callers label the movements of a business operation with set_movement()
+before changing quantities; unlabelled changes are recorded as adjustments.
+Reserved quantities are allocations, not stock, and are not recorded.
+"""
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import attributes
+
+from app.db.models import Inventory, ItemBatch, StockMovement
+from app.utils.timezone import now
+
+
+MOVEMENT_OPENING = 'OPEN'
+MOVEMENT_RECEIPT = 'RCPT'
+MOVEMENT_TRANSFER = 'XFER'
+MOVEMENT_DISPATCH = 'DSPT'
+MOVEMENT_ADJUSTMENT = 'ADJ'
+
+# batch_id of warehouse-level (inventory) movements and snapshots
+INVENTORY_LEVEL_BATCH_ID = 0
+
+QTY_FIELDS = ('usable_qty', 'defective_qty', 'expired_qty')
+
+_CONTEXT_KEY = 'stock_ledger_context'
+_PENDING_KEY = 'stock_ledger_pending'
+_SAVEPOINTS_KEY = 'stock_ledger_savepoints'
+_DEFAULT_CONTEXT = (MOVEMENT_ADJUSTMENT, None, None)
+
+
+def set_movement(db_session, movement_type: str, ref_type: Optional[str] = None,
+                 ref_id: Optional[int] = None) -> None:
+    """
+    Label the quantity changes that follow, until commit or rollback.
+
+    Args:
+        db_session: Session making the changes
+        movement_type: One of the MOVEMENT_* constants
+        ref_type: Kind of document behind the movement (e.g. 'transfer', 'reliefpkg')
+        ref_id: ID of that document
+    """
+    # Changes made under an earlier label keep that label
+    if db_session.info.get(_CONTEXT_KEY) and db_session.dirty | db_session.new | db_session.deleted:
+        db_session.flush()
+    db_session.info[_CONTEXT_KEY] = (movement_type, ref_type, ref_id)
+
+
+def _keys(obj):
+    if isinstance(obj, ItemBatch):
+        return obj.inventory_id, obj.item_id, obj.batch_id
+    return obj.inventory_id, obj.item_id, INVENTORY_LEVEL_BATCH_ID
+
+
+def _deltas(obj, sign: int = 0) -> dict:
+    """Quantity changes of obj in this flush; sign +1/-1 for inserted/deleted rows"""
+    deltas = {}
+    for field in QTY_FIELDS:
+        if sign:
+            value = getattr(obj, field) or Decimal('0')
+            deltas[field] = sign * Decimal(value)
+            continue
+        history = attributes.get_history(obj, field)
+        if not history.added:
+            deltas[field] = Decimal('0')
+            continue
+        old_value = history.deleted[0] if history.deleted else None
+        deltas[field] = Decimal(history.added[0] or 0) - Decimal(old_value or 0)
+    return deltas
+
+
+def _capture_flush(db_session, flush_context):
+    movement_type, ref_type, ref_id = db_session.info.get(_CONTEXT_KEY, _DEFAULT_CONTEXT)
+    # Jamaica time; migration 022 seeds the opening rows with the same clock
+    moved_at = now()
+
+    for objects, sign in ((db_session.new, 1), (db_session.dirty, 0), (db_session.deleted, -1)):
+        for obj in objects:
+            if not isinstance(obj, (Inventory, ItemBatch)):
+                continue
+            deltas = _deltas(obj, sign)
+            if not any(deltas.values()):
+                continue
+            inventory_id, item_id, batch_id = _keys(obj)
+            db_session.info.setdefault(_PENDING_KEY, []).append({
+                'inventory_id': inventory_id,
+                'item_id': item_id,
+                'batch_id': batch_id,
+                'movement_type': movement_type,
+                'ref_type': ref_type,
+                'ref_id': ref_id,
+                'usable_delta': deltas['usable_qty'],
+                'defective_delta': deltas['defective_qty'],
+                'expired_delta': deltas['expired_qty'],
+                'moved_by_id': obj.update_by_id or obj.create_by_id,
+                'moved_at': moved_at
+            })
+
+
+def _write_movements(db_session):
+    # Savepoint releases also fire before_commit; write once, at the real commit
+    if db_session.in_nested_transaction():
+        return
+
+    db_session.flush()
+    pending = db_session.info.pop(_PENDING_KEY, None)
+    db_session.info.pop(_CONTEXT_KEY, None)
+    db_session.info.pop(_SAVEPOINTS_KEY, None)
+    if pending:
+        db_session.execute(insert(StockMovement), pending)
+
+
+def _discard_movements(db_session, *args):
+    db_session.info.pop(_PENDING_KEY, None)
+    db_session.info.pop(_CONTEXT_KEY, None)
+    db_session.info.pop(_SAVEPOINTS_KEY, None)
+
+
+def _mark_savepoint(db_session, transaction):
+    if transaction.nested:
+        marks = db_session.info.setdefault(_SAVEPOINTS_KEY, {})
+        marks[transaction] = len(db_session.info.get(_PENDING_KEY, ()))
+
+
+def _rollback_savepoint(db_session, previous_transaction):
+    # Movements captured inside a rolled-back savepoint never happened
+    mark = db_session.info.get(_SAVEPOINTS_KEY, {}).pop(previous_transaction, None)
+    if mark is not None and _PENDING_KEY in db_session.info:
+        del db_session.info[_PENDING_KEY][mark:]
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+def init_stock_ledger(session_class):
+    """Register the capture hooks on the application's session class"""
+    # Load the old quantity before a blind assignment so the delta is known
+    for model in (Inventory, ItemBatch):
+        for field in QTY_FIELDS:
+            event.listen(getattr(model, field), 'set', _load_old_value, active_history=True, retval=True)
+
+    event.listen(session_class, 'after_flush', _capture_flush)
+    event.listen(session_class, 'before_commit', _write_movements)
+    event.listen(session_class, 'after_rollback', _discard_movements)
+    event.listen(session_class, 'after_transaction_create', _mark_savepoint)
+    event.listen(session_class, 'after_soft_rollback', _rollback_savepoint)
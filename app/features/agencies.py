@@ -7,6 +7,7 @@ from app.db.models import db, Agency, Parish, Event, Warehouse, ReliefRqst
 from app.core.audit import add_audit_fields
 from app.core.phone_utils import validate_phone_format, get_phone_validation_error
 from app.core.decorators import feature_required
+from app.db.routing import read_only
 import re
 
 agencies_bp = Blueprint('agencies', __name__)
@@ -141,6 +142,7 @@ def validate_agency_data(form_data, is_update=False, agency_id=None):
 @agencies_bp.route('/')
 @login_required
 @feature_required('agency_management')
+@read_only
 def list_agencies():
     """
     Display list of all agencies with filter and search capabilities.
@@ -0,0 +1,60 @@
+from flask import Blueprint, jsonify, request
+from flask_login import login_required, current_user
+from app.db import db
+from app.db.change_feed import DEFAULT_PAGE_SIZE, scope_criteria, read_changes
+from app.core.rbac import has_role
+
+changes_bp = Blueprint('changes', __name__, url_prefix='/api')
+
+# Roles that see inventory, request and package changes for every warehouse/agency
+GLOBAL_FEED_ROLES = (
+    'SYSTEM_ADMINISTRATOR', 'SYS_ADMIN',
+    'LOGISTICS_MANAGER', 'LOGISTICS_OFFICER',
+    'ODPEM_DG', 'ODPEM_DDG', 'ODPEM_DIR_PEOD'
+)
+
+@changes_bp.route('/changes')
+@login_required
+def list_changes():
+    """
+    Incremental change feed for offline-capable clients.
+
+    Query parameters:
+        since: Cursor returned by the previous call (0 or omitted for a full sync)
+        limit: Maximum number of change entries to examine (default 500)
+
+    Returns the changed rows in commit order with a new cursor. 410 Gone means
+    the cursor is older than the retained history. This includes a full sync
+    from 0 once old entries have been purged. The client then reloads its data
+    from the regular list endpoints and resumes from the cursor in the 410
+    body, which is the head of the feed at the time of the call.
+    """
+    try:
+        since = int(request.args.get('since', 0))
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'since and limit must be integers'}), 400
+    if since < 0:
+        return jsonify({'error': 'since must not be negative'}), 400
+
+    scope = scope_criteria(
+        has_role(*GLOBAL_FEED_ROLES),
+        current_user.user_id,
+        [w.warehouse_id for w in current_user.warehouses],
+        current_user.agency_id
+    )
+    changes, next_cursor, has_more = read_changes(db.session, since, scope, limit)
+
+    if changes is None:
+        return jsonify({
+            'error': 'Change history before this cursor has been purged; '
+                     'reload the data and resume from the returned cursor',
+            'resync': True,
+            'cursor': str(next_cursor)
+        }), 410
+
+    return jsonify({
+        'changes': changes,
+        'cursor': str(next_cursor),
+        'has_more': has_more
+    })
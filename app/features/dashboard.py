@@ -10,13 +10,16 @@ from flask_login import login_required, current_user
 from sqlalchemy import func, desc, or_, and_, extract
 from app.db.models import (
     db, Inventory, Item, Warehouse, 
-    Event, Donor, Agency, User, ReliefRqst, ReliefRequestFulfillmentLock, ReliefPkg, ReliefPkgItem,
+    Event, Donor, Agency, User, ReliefRqst, ReliefPkg, ReliefPkgItem,
     Donation, DonationItem, Country
 )
 from app.services import relief_request_service as rr_service
 from app.services.dashboard_service import DashboardService
 from app.core.feature_registry import FeatureRegistry
 from app.core.rbac import has_role, role_required
+from app.db.routing import read_only
+from app.db.fanout import fan_out
+from app.core.widget_cache import widget_endpoint, SCOPE_USER
 from datetime import datetime, timedelta
 from collections import defaultdict
 from app.utils.timezone import now as jamaica_now
@@ -58,6 +61,8 @@ def logistics_dashboard():
     """
     Logistics dashboard with modern UI matching Relief Package preparation.
     For Logistics Officers and Logistics Managers.
+    
+    The summary card counts are loaded from logistics_widget_counts.
     """
     # RBAC: Only LO and LM can access this dashboard
     from app.core.rbac import is_logistics_officer, is_logistics_manager
@@ -76,15 +81,10 @@ def logistics_dashboard():
     is_lo = has_role('LOGISTICS_OFFICER') and not is_lm
     
     # Query fulfillment requests
-    from sqlalchemy.orm import joinedload
+    from app.db.loader_profiles import loader_options, REQUEST_FULFILLMENT
     from sqlalchemy import or_
     
-    base_query = ReliefRqst.query.options(
-        joinedload(ReliefRqst.agency),
-        joinedload(ReliefRqst.items),
-        joinedload(ReliefRqst.status),
-        joinedload(ReliefRqst.fulfillment_lock).joinedload(ReliefRequestFulfillmentLock.fulfiller)
-    )
+    base_query = ReliefRqst.query.options(*loader_options(REQUEST_FULFILLMENT))
     
     # All LOs and LMs see all approved/eligible requests (no ownership filtering)
     
@@ -115,44 +115,10 @@ def logistics_dashboard():
             ])
         ).order_by(desc(ReliefRqst.request_date)).all()
     
-    # Calculate counts for filter tabs
-    # Both LOs and LMs see global counts for all approved/eligible requests
-    counts = {
-        'pending': ReliefRqst.query.filter(
-            ReliefRqst.status_code == rr_service.STATUS_SUBMITTED,
-            ~ReliefRqst.fulfillment_lock.has()
-        ).count(),
-        'in_progress': ReliefRqst.query.filter(
-            ReliefRqst.fulfillment_lock.has()
-        ).count(),
-        'ready': ReliefRqst.query.filter(
-            ReliefRqst.status_code == rr_service.STATUS_PART_FILLED
-        ).count(),
-        'completed': ReliefRqst.query.filter(
-            ReliefRqst.status_code == rr_service.STATUS_FILLED
-        ).count(),
-    }
-    
-    counts['all'] = sum(counts.values())
-    
-    # Inventory metrics
-    low_stock_count = db.session.query(Item).join(Inventory).filter(
-        Item.status_code == 'A'
-    ).group_by(Item.item_id).having(
-        func.sum(Inventory.usable_qty) <= Item.reorder_qty
-    ).count()
-    
-    # Total inventory count (value calculation not available - no cost field in schema)
-    total_inventory_value = 0
-    
     context = {
         **dashboard_data,
         'requests': requests,
         'current_filter': current_filter,
-        'counts': counts,
-        'global_counts': counts,  # For LMs: global counts; For LOs: their own counts
-        'low_stock_count': low_stock_count,
-        'total_inventory_value': total_inventory_value,
         'STATUS_SUBMITTED': rr_service.STATUS_SUBMITTED,
         'STATUS_PART_FILLED': rr_service.STATUS_PART_FILLED,
         'STATUS_FILLED': rr_service.STATUS_FILLED,
@@ -163,6 +129,34 @@ def logistics_dashboard():
     return render_template('dashboard/logistics.html', **context)
 
 
+@dashboard_bp.route('/logistics/widgets/counts')
+@login_required
+@role_required('LOGISTICS_OFFICER', 'LOGISTICS_MANAGER')
+@read_only
+@widget_endpoint(ttl=30)
+def logistics_widget_counts():
+    """Counts for the logistics dashboard filter tabs"""
+    # Both LOs and LMs see global counts for all approved/eligible requests
+    counts = fan_out({
+        'pending': lambda s: s.query(ReliefRqst).filter(
+            ReliefRqst.status_code == rr_service.STATUS_SUBMITTED,
+            ~ReliefRqst.fulfillment_lock.has()
+        ).count(),
+        'in_progress': lambda s: s.query(ReliefRqst).filter(
+            ReliefRqst.fulfillment_lock.has()
+        ).count(),
+        'ready': lambda s: s.query(ReliefRqst).filter(
+            ReliefRqst.status_code == rr_service.STATUS_PART_FILLED
+        ).count(),
+        'completed': lambda s: s.query(ReliefRqst).filter(
+            ReliefRqst.status_code == rr_service.STATUS_FILLED
+        ).count(),
+    })
+    
+    counts['all'] = sum(counts.values())
+    return counts
+
+
 @dashboard_bp.route('/agency')
 @login_required
 def agency_dashboard():
@@ -177,13 +171,9 @@ def agency_dashboard():
     current_filter = request.args.get('filter', 'active')
     
     # Query agency's requests
-    from sqlalchemy.orm import joinedload
+    from app.db.loader_profiles import loader_options, REQUEST_SUMMARY
     
-    base_query = ReliefRqst.query.options(
-        joinedload(ReliefRqst.items),
-        joinedload(ReliefRqst.status),
-        joinedload(ReliefRqst.eligible_event)
-    ).filter_by(agency_id=current_user.agency_id)
+    base_query = ReliefRqst.query.options(*loader_options(REQUEST_SUMMARY)).filter_by(agency_id=current_user.agency_id)
     
     # Apply filters
     if current_filter == 'draft':
@@ -235,14 +225,9 @@ def director_dashboard():
     current_filter = request.args.get('filter', 'pending')
     
     # Query requests
-    from sqlalchemy.orm import joinedload
+    from app.db.loader_profiles import loader_options, REQUEST_SUMMARY
     
-    base_query = ReliefRqst.query.options(
-        joinedload(ReliefRqst.agency),
-        joinedload(ReliefRqst.items),
-        joinedload(ReliefRqst.status),
-        joinedload(ReliefRqst.eligible_event)
-    )
+    base_query = ReliefRqst.query.options(*loader_options(REQUEST_SUMMARY))
     
     # Apply filters
     if current_filter == 'pending':
@@ -259,13 +244,13 @@ def director_dashboard():
         requests = base_query.order_by(desc(ReliefRqst.request_date)).all()
     
     # Calculate counts
-    global_counts = {
-        'pending': base_query.filter_by(status_code=1).count(),
-        'approved': base_query.filter_by(status_code=3).count(),
-        'in_progress': base_query.filter(ReliefRqst.status_code.in_([1, 3, 5])).count(),
-        'completed': base_query.filter_by(status_code=7).count(),
-    }
-    global_counts['all'] = base_query.count()
+    global_counts = fan_out({
+        'pending': lambda s: s.query(ReliefRqst).filter_by(status_code=1).count(),
+        'approved': lambda s: s.query(ReliefRqst).filter_by(status_code=3).count(),
+        'in_progress': lambda s: s.query(ReliefRqst).filter(ReliefRqst.status_code.in_([1, 3, 5])).count(),
+        'completed': lambda s: s.query(ReliefRqst).filter_by(status_code=7).count(),
+        'all': lambda s: s.query(ReliefRqst).count(),
+    })
     
     context = {
         **dashboard_data,
@@ -356,39 +341,63 @@ def general_dashboard():
     return render_template('dashboard/general.html', **context)
 
 
+# Map status codes to labels (using actual package status codes)
+LO_PACKAGE_STATUS_LABELS = {
+    'P': 'Pending (Being Prepared)',
+    'D': 'Dispatched (Approved)',
+    'C': 'Closed (Received)',
+    'X': 'Cancelled'
+}
+
+# Recent activity badge: status code -> (css class, label)
+LO_ACTIVITY_BADGES = {
+    rr_service.PKG_STATUS_PENDING: ('being-prepared', 'Being Prepared'),
+    rr_service.PKG_STATUS_DISPATCHED: ('approved', 'Approved'),
+    rr_service.PKG_STATUS_COMPLETED: ('completed', 'Completed')
+}
+
+
+def _lo_packages(user_name):
+    """Packages the LO created or updated"""
+    return or_(
+        ReliefPkg.create_by_id == user_name,
+        ReliefPkg.update_by_id == user_name
+    )
+
+
 @dashboard_bp.route('/lo')
 @login_required
 def lo_dashboard():
     """
     Logistics Officer-specific dashboard with charts and activity metrics.
     Shows only data related to the current LO's work.
+    
+    Renders the page shell only; each card is loaded from a lo_widget_* endpoint.
     """
     from app.core.rbac import is_logistics_officer
     if not is_logistics_officer():
-        from flask import flash, redirect, url_for, abort
         abort(403)
     
+    return render_template('dashboard/lo.html')
+
+
+@dashboard_bp.route('/lo/widgets/kpis')
+@login_required
+@role_required('LOGISTICS_OFFICER')
+@read_only
+@widget_endpoint(ttl=60, scope=SCOPE_USER)
+def lo_widget_kpis():
+    """The LO's request, package and item totals"""
     current_user_name = current_user.user_name
     now = jamaica_now()
     
     # Date ranges
-    today = now.date()
     seven_days_ago = now - timedelta(days=7)
     thirty_days_ago = now - timedelta(days=30)
     
-    # ========== KPI METRICS ==========
+    worked_on = _lo_packages(current_user_name)
     
-    # Total relief requests the LO has worked on (via packages they created/updated)
-    total_requests_worked = db.session.query(
-        func.count(func.distinct(ReliefPkg.reliefrqst_id))
-    ).filter(
-        or_(
-            ReliefPkg.create_by_id == current_user_name,
-            ReliefPkg.update_by_id == current_user_name
-        )
-    ).scalar() or 0
-    
-    # Relief requests prepared in last 7 days
+    # Relief requests prepared in a window
     # Count distinct requests where LO's last activity (create or update by them) was within the window
     # Use CASE to select timestamp based on what the LO did:
     #  - If LO updated: use update_dtime
@@ -402,68 +411,50 @@ def lo_dashboard():
         else_=None  # If LO didn't create or update, don't count
     )
     
-    requests_last_7_days = db.session.query(
-        func.count(func.distinct(ReliefPkg.reliefrqst_id))
-    ).filter(
-        or_(
-            ReliefPkg.create_by_id == current_user_name,
-            ReliefPkg.update_by_id == current_user_name
-        ),
-        lo_activity_timestamp.isnot(None),  # Ensure valid timestamp
-        lo_activity_timestamp >= seven_days_ago
-    ).scalar() or 0
-    
-    # Relief requests prepared in last 30 days (using same logic)
-    requests_last_30_days = db.session.query(
-        func.count(func.distinct(ReliefPkg.reliefrqst_id))
-    ).filter(
-        or_(
-            ReliefPkg.create_by_id == current_user_name,
-            ReliefPkg.update_by_id == current_user_name
-        ),
-        lo_activity_timestamp.isnot(None),  # Ensure valid timestamp
-        lo_activity_timestamp >= thirty_days_ago
-    ).scalar() or 0
-    
-    # Total packages created/updated by LO
-    total_packages = ReliefPkg.query.filter(
-        or_(
-            ReliefPkg.create_by_id == current_user_name,
-            ReliefPkg.update_by_id == current_user_name
-        )
-    ).count()
-    
-    # Total items allocated by LO (sum of all item quantities in packages LO worked on)
-    total_items_allocated = db.session.query(
-        func.coalesce(func.sum(ReliefPkgItem.item_qty), 0)
-    ).join(ReliefPkg).filter(
-        or_(
-            ReliefPkg.create_by_id == current_user_name,
-            ReliefPkg.update_by_id == current_user_name
-        )
-    ).scalar() or 0
-    
-    # ========== PACKAGE STATUS BREAKDOWN ==========
-    
-    # Count packages by status that LO worked on
+    def requests_since(since):
+        return lambda s: s.query(
+            func.count(func.distinct(ReliefPkg.reliefrqst_id))
+        ).filter(
+            worked_on,
+            lo_activity_timestamp.isnot(None),  # Ensure valid timestamp
+            lo_activity_timestamp >= since
+        ).scalar() or 0
+    
+    results = fan_out({
+        # Total relief requests the LO has worked on (via packages they created/updated)
+        'total_requests_worked': lambda s: s.query(
+            func.count(func.distinct(ReliefPkg.reliefrqst_id))
+        ).filter(worked_on).scalar() or 0,
+        
+        'requests_last_7_days': requests_since(seven_days_ago),
+        'requests_last_30_days': requests_since(thirty_days_ago),
+        
+        # Total packages created/updated by LO
+        'total_packages': lambda s: s.query(ReliefPkg).filter(worked_on).count(),
+        
+        # Total items allocated by LO (sum of all item quantities in packages LO worked on)
+        'total_items_allocated': lambda s: s.query(
+            func.coalesce(func.sum(ReliefPkgItem.item_qty), 0)
+        ).join(ReliefPkg).filter(worked_on).scalar() or 0,
+    })
+    results['total_items_allocated'] = int(results['total_items_allocated'])
+    return results
+
+
+@dashboard_bp.route('/lo/widgets/status-breakdown')
+@login_required
+@role_required('LOGISTICS_OFFICER')
+@read_only
+@widget_endpoint(ttl=60, scope=SCOPE_USER)
+def lo_widget_status_breakdown():
+    """Packages the LO worked on, by status"""
     package_statuses = db.session.query(
         ReliefPkg.status_code,
         func.count(ReliefPkg.reliefpkg_id).label('count')
     ).filter(
-        or_(
-            ReliefPkg.create_by_id == current_user_name,
-            ReliefPkg.update_by_id == current_user_name
-        )
+        _lo_packages(current_user.user_name)
     ).group_by(ReliefPkg.status_code).all()
     
-    # Map status codes to labels (using actual package status codes)
-    status_labels_map = {
-        'P': 'Pending (Being Prepared)',
-        'D': 'Dispatched (Approved)',
-        'C': 'Closed (Received)',
-        'X': 'Cancelled'
-    }
-    
     status_breakdown = {
         'labels': [],
         'data': [],
@@ -471,12 +462,21 @@ def lo_dashboard():
     }
     
     for status_code, count in package_statuses:
-        status_breakdown['labels'].append(status_labels_map.get(status_code, status_code))
+        status_breakdown['labels'].append(LO_PACKAGE_STATUS_LABELS.get(status_code, status_code))
         status_breakdown['data'].append(count)
         status_breakdown['total'] += count
     
-    # ========== ACTIVITY TIMELINE (Last 14 days) ==========
-    
+    return {'status_breakdown': status_breakdown}
+
+
+@dashboard_bp.route('/lo/widgets/timeline')
+@login_required
+@role_required('LOGISTICS_OFFICER')
+@read_only
+@widget_endpoint(ttl=120, scope=SCOPE_USER)
+def lo_widget_timeline():
+    """Packages created per day over the last 14 days"""
+    now = jamaica_now()
     fourteen_days_ago = now - timedelta(days=14)
     
     # Query packages created by day in last 14 days
@@ -484,29 +484,40 @@ def lo_dashboard():
         func.date(ReliefPkg.create_dtime).label('date'),
         func.count(ReliefPkg.reliefpkg_id).label('count')
     ).filter(
-        or_(
-            ReliefPkg.create_by_id == current_user_name,
-            ReliefPkg.update_by_id == current_user_name
-        ),
+        _lo_packages(current_user.user_name),
         ReliefPkg.create_dtime >= fourteen_days_ago
     ).group_by(func.date(ReliefPkg.create_dtime)).all()
     
     # Build complete timeline with zeros for missing days
     timeline_data = defaultdict(int)
     for pkg_date, count in daily_packages:
-        timeline_data[pkg_date.strftime('%Y-%m-%d')] = count
+        # func.date() returns a date on PostgreSQL and a string on SQLite
+        day_key = pkg_date.strftime('%Y-%m-%d') if hasattr(pkg_date, 'strftime') else str(pkg_date)
+        timeline_data[day_key] = count
     
     # Fill in all 14 days
-    timeline_labels = []
-    timeline_values = []
+    timeline = {
+        'labels': [],
+        'values': [],
+        'total': 0
+    }
     for i in range(13, -1, -1):  # 14 days, newest first
         day = (now - timedelta(days=i)).date()
-        day_str = day.strftime('%Y-%m-%d')
-        timeline_labels.append(day.strftime('%b %d'))
-        timeline_values.append(timeline_data.get(day_str, 0))
-    
-    # ========== TOP ITEMS ALLOCATED ==========
+        count = timeline_data.get(day.strftime('%Y-%m-%d'), 0)
+        timeline['labels'].append(day.strftime('%b %d'))
+        timeline['values'].append(count)
+        timeline['total'] += count
     
+    return {'timeline': timeline}
+
+
+@dashboard_bp.route('/lo/widgets/top-items')
+@login_required
+@role_required('LOGISTICS_OFFICER')
+@read_only
+@widget_endpoint(ttl=300, scope=SCOPE_USER)
+def lo_widget_top_items():
+    """Top 10 items allocated by the LO"""
     # Query top items allocated by LO (properly join ReliefPkgItem -> Item -> ReliefPkg)
     top_items = db.session.query(
         Item.item_name,
@@ -516,60 +527,58 @@ def lo_dashboard():
     ).join(
         ReliefPkg, ReliefPkgItem.reliefpkg_id == ReliefPkg.reliefpkg_id
     ).filter(
-        or_(
-            ReliefPkg.create_by_id == current_user_name,
-            ReliefPkg.update_by_id == current_user_name
-        )
+        _lo_packages(current_user.user_name)
     ).group_by(Item.item_name).order_by(desc('total_qty')).limit(10).all()
     
-    top_items_data = {
-        'labels': [item[0] for item in top_items],
-        'data': [float(item[1]) for item in top_items]
+    return {
+        'top_items': {
+            'labels': [item[0] for item in top_items],
+            'data': [float(item[1]) for item in top_items]
+        }
     }
-    
-    # ========== RECENT ACTIVITY ==========
-    
+
+
+@dashboard_bp.route('/lo/widgets/recent')
+@login_required
+@role_required('LOGISTICS_OFFICER')
+@read_only
+@widget_endpoint(ttl=30, scope=SCOPE_USER)
+def lo_widget_recent():
+    """The LO's five most recent packages"""
     recent_packages = ReliefPkg.query.options(
         db.joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.agency)
     ).filter(
-        or_(
-            ReliefPkg.create_by_id == current_user_name,
-            ReliefPkg.update_by_id == current_user_name
-        )
+        _lo_packages(current_user.user_name)
     ).order_by(desc(ReliefPkg.create_dtime)).limit(5).all()
     
-    context = {
-        # KPIs
-        'total_requests_worked': total_requests_worked,
-        'total_packages': total_packages,
-        'total_items_allocated': int(total_items_allocated),
-        'requests_last_7_days': requests_last_7_days,
-        'requests_last_30_days': requests_last_30_days,
-        
-        # Charts data
-        'status_breakdown': status_breakdown,
-        'timeline_labels': timeline_labels,
-        'timeline_values': timeline_values,
-        'top_items': top_items_data,
-        
-        # Recent activity
-        'recent_packages': recent_packages,
-        
-        # Status labels for rendering
-        'status_labels_map': status_labels_map,
-        
-        # Service constants
-        'PKG_STATUS_PENDING': rr_service.PKG_STATUS_PENDING,
-        'PKG_STATUS_DISPATCHED': rr_service.PKG_STATUS_DISPATCHED,
-        'PKG_STATUS_COMPLETED': rr_service.PKG_STATUS_COMPLETED
-    }
-    
-    return render_template('dashboard/lo.html', **context)
+    packages = []
+    for pkg in recent_packages:
+        status_class, status_label = LO_ACTIVITY_BADGES.get(
+            pkg.status_code, ('', LO_PACKAGE_STATUS_LABELS.get(pkg.status_code, pkg.status_code))
+        )
+        packages.append({
+            'agency_name': pkg.relief_request.agency.agency_name if pkg.relief_request and pkg.relief_request.agency else 'Unknown Agency',
+            'reliefpkg_id': pkg.reliefpkg_id,
+            'created': pkg.create_dtime.strftime('%b %d, %Y') if pkg.create_dtime else 'N/A',
+            'status_class': status_class,
+            'status_label': status_label
+        })
+    
+    return {'recent_packages': packages}
+
+
+DONATIONS_ANALYTICS_ROLES = ('ODPEM_DG', 'ODPEM_DDG', 'ODPEM_DIR_PEOD', 'LOGISTICS_MANAGER')
+
+DONATION_STATUS_LABELS = {
+    'E': 'Entered',
+    'V': 'Verified',
+    'P': 'Processed'
+}
 
 
 @dashboard_bp.route('/donations-analytics')
 @login_required
-@role_required('ODPEM_DG', 'ODPEM_DDG', 'ODPEM_DIR_PEOD', 'LOGISTICS_MANAGER')
+@role_required(*DONATIONS_ANALYTICS_ROLES)
 def donations_analytics():
     """
     Donations Analytics Dashboard - Executive view of donation metrics and trends.
@@ -579,31 +588,49 @@ def donations_analytics():
     Displays:
     - KPIs: Total donations, total value, unique donors, countries
     - Charts: Donations by donor, by country, over time, distribution
-    """
-    now = jamaica_now()
-    
-    # ========== KPI METRICS ==========
-    
-    # Total donations count
-    total_donations = Donation.query.count()
-    
-    # Total donation value (sum of tot_item_cost)
-    total_value = db.session.query(
-        func.coalesce(func.sum(Donation.tot_item_cost), 0)
-    ).scalar() or 0
-    
-    # Unique donors count
-    unique_donors = db.session.query(
-        func.count(func.distinct(Donation.donor_id))
-    ).scalar() or 0
-    
-    # Number of countries donations came from
-    countries_count = db.session.query(
-        func.count(func.distinct(Donation.origin_country_id))
-    ).scalar() or 0
-    
-    # ========== DONATIONS BY DONOR (Top 10) ==========
     
+    Renders the page shell only; each card is loaded from a donations_widget_* endpoint.
+    """
+    return render_template('dashboard/donations_analytics.html')
+
+
+@dashboard_bp.route('/donations-analytics/widgets/kpis')
+@login_required
+@role_required(*DONATIONS_ANALYTICS_ROLES)
+@read_only
+@widget_endpoint(ttl=60)
+def donations_widget_kpis():
+    """Donation KPIs: total donations, total value, unique donors, countries"""
+    results = fan_out({
+        # Total donations count
+        'total_donations': lambda s: s.query(Donation).count(),
+        
+        # Total donation value (sum of tot_item_cost)
+        'total_value': lambda s: s.query(
+            func.coalesce(func.sum(Donation.tot_item_cost), 0)
+        ).scalar() or 0,
+        
+        # Unique donors count
+        'unique_donors': lambda s: s.query(
+            func.count(func.distinct(Donation.donor_id))
+        ).scalar() or 0,
+        
+        # Number of countries donations came from
+        'countries_count': lambda s: s.query(
+            func.count(func.distinct(Donation.origin_country_id))
+        ).scalar() or 0,
+    })
+    results['total_value'] = float(results['total_value'])
+    return results
+
+
+@dashboard_bp.route('/donations-analytics/widgets/by-donor')
+@login_required
+@role_required(*DONATIONS_ANALYTICS_ROLES)
+@read_only
+@widget_endpoint(ttl=300)
+def donations_widget_by_donor():
+    """Donations by donor (top 10 by value)"""
     donations_by_donor = db.session.query(
         Donor.donor_name,
         func.sum(Donation.tot_item_cost).label('total_amount'),
@@ -616,14 +643,22 @@ def donations_analytics():
         desc('total_amount')
     ).limit(10).all()
     
-    donor_chart_data = {
-        'labels': [d.donor_name[:30] + '...' if len(d.donor_name) > 30 else d.donor_name for d in donations_by_donor],
-        'amounts': [float(d.total_amount) for d in donations_by_donor],
-        'counts': [d.donation_count for d in donations_by_donor]
+    return {
+        'donor_chart_data': {
+            'labels': [d.donor_name[:30] + '...' if len(d.donor_name) > 30 else d.donor_name for d in donations_by_donor],
+            'amounts': [float(d.total_amount or 0) for d in donations_by_donor],
+            'counts': [d.donation_count for d in donations_by_donor]
+        }
     }
-    
-    # ========== DONATIONS BY COUNTRY ==========
-    
+
+
+@dashboard_bp.route('/donations-analytics/widgets/by-country')
+@login_required
+@role_required(*DONATIONS_ANALYTICS_ROLES)
+@read_only
+@widget_endpoint(ttl=300)
+def donations_widget_by_country():
+    """Donations by country of origin (top 10 by value)"""
     donations_by_country = db.session.query(
         Country.country_name,
         func.sum(Donation.tot_item_cost).label('total_amount'),
@@ -636,15 +671,23 @@ def donations_analytics():
         desc('total_amount')
     ).limit(10).all()
     
-    country_chart_data = {
-        'labels': [c.country_name for c in donations_by_country],
-        'amounts': [float(c.total_amount) for c in donations_by_country],
-        'counts': [c.donation_count for c in donations_by_country]
+    return {
+        'country_chart_data': {
+            'labels': [c.country_name for c in donations_by_country],
+            'amounts': [float(c.total_amount or 0) for c in donations_by_country],
+            'counts': [c.donation_count for c in donations_by_country]
+        }
     }
-    
-    # ========== DONATIONS OVER TIME (Last 12 months) ==========
-    
-    twelve_months_ago = now - timedelta(days=365)
+
+
+@dashboard_bp.route('/donations-analytics/widgets/timeline')
+@login_required
+@role_required(*DONATIONS_ANALYTICS_ROLES)
+@read_only
+@widget_endpoint(ttl=300)
+def donations_widget_timeline():
+    """Donations over time (last 12 months, by month)"""
+    twelve_months_ago = jamaica_now() - timedelta(days=365)
     
     donations_over_time = db.session.query(
         extract('year', Donation.received_date).label('year'),
@@ -673,11 +716,19 @@ def donations_analytics():
     for row in donations_over_time:
         month_label = f"{month_names[int(row.month) - 1]} {int(row.year)}"
         timeline_data['labels'].append(month_label)
-        timeline_data['amounts'].append(float(row.total_amount))
+        timeline_data['amounts'].append(float(row.total_amount or 0))
         timeline_data['counts'].append(row.donation_count)
     
-    # ========== DONATIONS BY STATUS ==========
-    
+    return {'timeline_data': timeline_data}
+
+
+@dashboard_bp.route('/donations-analytics/widgets/by-status')
+@login_required
+@role_required(*DONATIONS_ANALYTICS_ROLES)
+@read_only
+@widget_endpoint(ttl=120)
+def donations_widget_by_status():
+    """Donations by status"""
     donations_by_status = db.session.query(
         Donation.status_code,
         func.count(Donation.donation_id).label('count'),
@@ -686,20 +737,22 @@ def donations_analytics():
         Donation.status_code
     ).all()
     
-    status_labels_map = {
-        'E': 'Entered',
-        'V': 'Verified',
-        'P': 'Processed'
-    }
-    
-    status_chart_data = {
-        'labels': [status_labels_map.get(s.status_code, s.status_code) for s in donations_by_status],
-        'counts': [s.count for s in donations_by_status],
-        'amounts': [float(s.total_amount) if s.total_amount else 0 for s in donations_by_status]
+    return {
+        'status_chart_data': {
+            'labels': [DONATION_STATUS_LABELS.get(s.status_code, s.status_code) for s in donations_by_status],
+            'counts': [s.count for s in donations_by_status],
+            'amounts': [float(s.total_amount) if s.total_amount else 0 for s in donations_by_status]
+        }
     }
-    
-    # ========== DONATIONS BY EVENT (Distribution) ==========
-    
+
+
+@dashboard_bp.route('/donations-analytics/widgets/by-event')
+@login_required
+@role_required(*DONATIONS_ANALYTICS_ROLES)
+@read_only
+@widget_endpoint(ttl=300)
+def donations_widget_by_event():
+    """Donations by event (top 10 by value)"""
     donations_by_event = db.session.query(
         Event.event_name,
         func.sum(Donation.tot_item_cost).label('total_amount'),
@@ -712,41 +765,37 @@ def donations_analytics():
         desc('total_amount')
     ).limit(10).all()
     
-    event_chart_data = {
-        'labels': [e.event_name[:25] + '...' if len(e.event_name) > 25 else e.event_name for e in donations_by_event],
-        'amounts': [float(e.total_amount) for e in donations_by_event],
-        'counts': [e.donation_count for e in donations_by_event]
+    return {
+        'event_chart_data': {
+            'labels': [e.event_name[:25] + '...' if len(e.event_name) > 25 else e.event_name for e in donations_by_event],
+            'amounts': [float(e.total_amount or 0) for e in donations_by_event],
+            'counts': [e.donation_count for e in donations_by_event]
+        }
     }
-    
-    # ========== RECENT DONATIONS ==========
-    
+
+
+@dashboard_bp.route('/donations-analytics/widgets/recent')
+@login_required
+@role_required(*DONATIONS_ANALYTICS_ROLES)
+@read_only
+@widget_endpoint(ttl=60)
+def donations_widget_recent():
+    """Five most recently received donations"""
     recent_donations = Donation.query.options(
         db.joinedload(Donation.donor),
-        db.joinedload(Donation.origin_country),
-        db.joinedload(Donation.event)
+        db.joinedload(Donation.origin_country)
     ).order_by(
         desc(Donation.received_date)
     ).limit(5).all()
     
-    context = {
-        # KPIs
-        'total_donations': total_donations,
-        'total_value': float(total_value),
-        'unique_donors': unique_donors,
-        'countries_count': countries_count,
-        
-        # Chart data
-        'donor_chart_data': donor_chart_data,
-        'country_chart_data': country_chart_data,
-        'timeline_data': timeline_data,
-        'status_chart_data': status_chart_data,
-        'event_chart_data': event_chart_data,
-        
-        # Recent donations
-        'recent_donations': recent_donations,
-        
-        # Status labels
-        'status_labels_map': status_labels_map
+    return {
+        'recent_donations': [
+            {
+                'donor_name': donation.donor.donor_name if donation.donor else 'Unknown Donor',
+                'received_date': donation.received_date.strftime('%d %b %Y') if donation.received_date else 'N/A',
+                'country_name': donation.origin_country.country_name if donation.origin_country else 'N/A',
+                'amount': float(donation.tot_item_cost or 0)
+            }
+            for donation in recent_donations
+        ]
     }
-    
-    return render_template('dashboard/donations_analytics.html', **context)
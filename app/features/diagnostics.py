@@ -0,0 +1,166 @@
+"""
+Admin Diagnostics
+Runtime performance information for system administrators
+
+Template statistics are collected in each worker process, so that page
+shows the worker that served the request. Request profiles and the sampling
+rule are files shared by all workers.
+"""
+import os
+from datetime import datetime, timezone
+
+from flask import Blueprint, render_template, redirect, url_for, flash, current_app, request, abort, Response
+from flask_login import login_required, current_user
+
+from app.core.rbac import role_required
+from app.core.template_profiling import template_profile, reset_template_profile, profiling_enabled
+from app.core import request_profiler
+
+diagnostics_bp = Blueprint('diagnostics', __name__)
+
+
+@diagnostics_bp.route('/templates')
+@login_required
+@role_required('SYSTEM_ADMINISTRATOR')
+def templates():
+    """Template render times, macro times and helper calls per render"""
+    threshold = current_app.config['TEMPLATE_HELPER_CALL_THRESHOLD']
+    return render_template(
+        'diagnostics/templates.html',
+        profile=template_profile(threshold),
+        profiling_enabled=profiling_enabled(current_app),
+        bytecode_cache=current_app.jinja_env.bytecode_cache,
+        threshold=threshold,
+        worker_pid=os.getpid()
+    )
+
+
+@diagnostics_bp.route('/templates/reset', methods=['POST'])
+@login_required
+@role_required('SYSTEM_ADMINISTRATOR')
+def reset_templates():
+    """Clear this worker's template statistics"""
+    reset_template_profile()
+    flash('Template statistics cleared for this worker.', 'success')
+    return redirect(url_for('diagnostics.templates'))
+
+
+def _utc(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def _profiles_page(token=None):
+    rule = request_profiler.sampling_rule(current_app)
+    profiles = request_profiler.list_profiles(current_app)
+    for summary in profiles:
+        summary['started'] = _utc(summary['started_at'])
+    endpoints = sorted(e for e in current_app.view_functions if e != 'static' and not e.startswith('diagnostics.'))
+    return render_template(
+        'diagnostics/profiles.html',
+        profiles=profiles,
+        profiler_enabled=current_app.config.get('PROFILER_ENABLED', True),
+        rule=rule,
+        rule_expires=_utc(rule['expires_at']) if rule else None,
+        endpoints=endpoints,
+        token=token,
+        token_minutes=current_app.config.get('PROFILER_TOKEN_MAX_AGE', 900) // 60,
+        header=request_profiler.PROFILE_HEADER,
+        query_flag=request_profiler.PROFILE_QUERY_FLAG,
+        profile_dir=request_profiler.profile_dir(current_app)
+    )
+
+
+@diagnostics_bp.route('/profiles')
+@login_required
+@role_required('SYSTEM_ADMINISTRATOR')
+def profiles():
+    """Stored request profiles, the sampling rule and profiling tokens"""
+    return _profiles_page()
+
+
+@diagnostics_bp.route('/profiles/token', methods=['POST'])
+@login_required
+@role_required('SYSTEM_ADMINISTRATOR')
+def issue_profile_token():
+    """Issue a token that profiles the requests sent with it"""
+    token = request_profiler.issue_token(current_app, current_user.user_id)
+    return _profiles_page(token=token)
+
+
+@diagnostics_bp.route('/profiles/sampling', methods=['POST'])
+@login_required
+@role_required('SYSTEM_ADMINISTRATOR')
+def set_profile_sampling():
+    """Profile a random fraction of the requests to one endpoint"""
+    endpoint = request.form.get('endpoint', '')
+    try:
+        percent = float(request.form.get('percent', ''))
+        minutes = int(request.form.get('minutes', ''))
+    except ValueError:
+        flash('Sample percentage and duration must be numbers.', 'danger')
+        return redirect(url_for('diagnostics.profiles'))
+
+    if endpoint not in current_app.view_functions or endpoint == 'static':
+        flash('Select an endpoint to sample.', 'danger')
+    elif not 0 < percent <= 100:
+        flash('Sample percentage must be greater than 0 and at most 100.', 'danger')
+    elif not 1 <= minutes <= 120:
+        flash('Duration must be between 1 and 120 minutes.', 'danger')
+    else:
+        try:
+            request_profiler.set_sampling_rule(current_app, endpoint, percent / 100, minutes, current_user.user_id)
+            flash(f'Profiling {percent:g}% of requests to {endpoint} for {minutes} minutes.', 'success')
+        except OSError as e:
+            current_app.logger.error(f'Could not save profiler sampling rule: {e}')
+            flash('Could not save the sampling rule. Check the profile directory.', 'danger')
+    return redirect(url_for('diagnostics.profiles'))
+
+
+@diagnostics_bp.route('/profiles/sampling/stop', methods=['POST'])
+@login_required
+@role_required('SYSTEM_ADMINISTRATOR')
+def stop_profile_sampling():
+    """Stop sampling requests"""
+    request_profiler.clear_sampling_rule(current_app)
+    flash('Request sampling stopped.', 'success')
+    return redirect(url_for('diagnostics.profiles'))
+
+
+@diagnostics_bp.route('/profiles/clear', methods=['POST'])
+@login_required
+@role_required('SYSTEM_ADMINISTRATOR')
+def clear_profiles():
+    """Delete all stored profiles"""
+    request_profiler.clear_profiles(current_app)
+    flash('Request profiles deleted.', 'success')
+    return redirect(url_for('diagnostics.profiles'))
+
+
+@diagnostics_bp.route('/profiles/<profile_id>')
+@login_required
+@role_required('SYSTEM_ADMINISTRATOR')
+def profile_detail(profile_id):
+    """Hot functions and SQL timeline of one profile"""
+    profile = request_profiler.load_profile(current_app, profile_id)
+    if profile is None:
+        abort(404)
+    return render_template(
+        'diagnostics/profile_detail.html',
+        profile=profile,
+        started_at=_utc(profile['started_at']),
+        functions=request_profiler.function_summary(profile['stacks'])
+    )
+
+
+@diagnostics_bp.route('/profiles/<profile_id>/collapsed')
+@login_required
+@role_required('SYSTEM_ADMINISTRATOR')
+def profile_collapsed(profile_id):
+    """Collapsed stacks for flamegraph.pl or speedscope"""
+    profile = request_profiler.load_profile(current_app, profile_id)
+    if profile is None:
+        abort(404)
+    body = ''.join(f'{stack} {count}\n' for stack, count in profile['stacks'].items())
+    return Response(body, mimetype='text/plain', headers={
+        'Content-Disposition': f'attachment; filename=profile-{profile_id}.collapsed.txt'
+    })
@@ -21,13 +21,14 @@ Updated: 2025-11-25 - Added Entry/Verification workflow separation
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, tuple_
+from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import StaleDataError
 from decimal import Decimal, InvalidOperation
 from datetime import datetime, date, timedelta
 
-from app.db import db
+from app.db import db, stock_ledger
 from app.utils.timezone import now as jamaica_now
 from app.db.models import (
     Donation, DonationItem, DonationIntake, DonationIntakeItem,
@@ -35,6 +36,7 @@ from app.db.models import (
 )
 from app.core.decorators import feature_required
 from app.core.audit import add_audit_fields
+from app.services.batch_creation_service import BatchCreationService
 
 
 donation_intake_bp = Blueprint('donation_intake', __name__, url_prefix='/donation-intake')
@@ -609,14 +611,30 @@ def _process_verification_submission(intake, donation, warehouse):
     Process intake verification submission.
     Updates intake status to V, creates/updates itembatch, updates inventory.
     All operations in a single atomic transaction with optimistic locking.
+    
+    Donation items, intake items, existing batches and inventory rows are each
+    loaded with one query for the whole intake; the new state is computed in
+    memory and flushed together, so large intakes do not issue several queries
+    per line while the transaction is open.
     """
     errors = []
     
-    intake_items = DonationIntakeItem.query.filter_by(
+    intake_items = DonationIntakeItem.query.options(
+        joinedload(DonationIntakeItem.item)
+    ).filter_by(
         donation_id=intake.donation_id,
         inventory_id=intake.inventory_id
     ).all()
     
+    donation_items = {}
+    item_ids = sorted({intake_item.item_id for intake_item in intake_items})
+    if item_ids:
+        for donation_item in DonationItem.query.filter(
+            DonationItem.donation_id == donation.donation_id,
+            DonationItem.item_id.in_(item_ids)
+        ).all():
+            donation_items.setdefault(donation_item.item_id, donation_item)
+    
     verified_items_data = []
     
     for intake_item in intake_items:
@@ -639,10 +657,7 @@ def _process_verification_submission(intake, donation, warehouse):
                 errors.append(f'{item.item_name}: Quantities cannot be negative')
                 continue
             
-            donation_item = DonationItem.query.filter_by(
-                donation_id=donation.donation_id,
-                item_id=item_id
-            ).first()
+            donation_item = donation_items.get(item_id)
             
             if not donation_item:
                 errors.append(f'{item.item_name}: Donation item not found')
@@ -663,7 +678,13 @@ def _process_verification_submission(intake, donation, warehouse):
             errors.append(f'{item.item_name}: Invalid quantity values')
             continue
         
-        batch_no = batch_no_raw if batch_no_raw else intake_item.batch_no
+        # A batched item whose batch number was cleared gets a generated one on commit
+        if batch_no_raw:
+            batch_no = batch_no_raw
+        elif item.is_batched_flag:
+            batch_no = None
+        else:
+            batch_no = intake_item.batch_no
         
         batch_date = intake_item.batch_date
         if batch_date_str:
@@ -716,22 +737,54 @@ def _process_verification_submission(intake, donation, warehouse):
         intake.verify_dtime = current_timestamp
         add_audit_fields(intake, current_user, is_new=False)
         
+        _assign_generated_batch_numbers(verified_items_data, warehouse.warehouse_id)
+        
+        # Intake lines whose batch number changed are replaced (batch_no is part of the PK)
+        renamed = [d for d in verified_items_data if d['intake_item'].batch_no != d['batch_no']]
+        if renamed:
+            DonationIntakeItem.query.filter(
+                DonationIntakeItem.donation_id == intake.donation_id,
+                DonationIntakeItem.inventory_id == intake.inventory_id,
+                tuple_(DonationIntakeItem.item_id, DonationIntakeItem.batch_no).in_(
+                    [(d['intake_item'].item_id, d['intake_item'].batch_no) for d in renamed]
+                )
+            ).delete(synchronize_session=False)
+            for item_data in renamed:
+                db.session.expunge(item_data['intake_item'])
+        
+        # Lock and load every existing batch and inventory row for the intake at once
+        batch_keys = sorted({(d['item'].item_id, d['batch_no']) for d in verified_items_data})
+        existing_batches = {}
+        if batch_keys:
+            for item_batch in ItemBatch.query.filter(
+                ItemBatch.inventory_id == warehouse.warehouse_id,
+                tuple_(ItemBatch.item_id, ItemBatch.batch_no).in_(batch_keys)
+            ).order_by(ItemBatch.item_id, ItemBatch.batch_no).with_for_update().all():
+                existing_batches.setdefault((item_batch.item_id, item_batch.batch_no), item_batch)
+        
+        inventory_item_ids = sorted({d['item'].item_id for d in verified_items_data})
+        inventories = {}
+        if inventory_item_ids:
+            inventories = {
+                inventory.item_id: inventory
+                for inventory in Inventory.query.filter(
+                    Inventory.inventory_id == warehouse.warehouse_id,
+                    Inventory.item_id.in_(inventory_item_ids)
+                ).order_by(Inventory.item_id).with_for_update().all()
+            }
+        
+        stock_ledger.set_movement(db.session, stock_ledger.MOVEMENT_RECEIPT, 'donation', intake.donation_id)
+        
+        new_rows = []
         for item_data in verified_items_data:
             intake_item = item_data['intake_item']
             item = item_data['item']
             
             if intake_item.batch_no != item_data['batch_no']:
-                DonationIntakeItem.query.filter_by(
-                    donation_id=intake.donation_id,
-                    inventory_id=intake.inventory_id,
-                    item_id=intake_item.item_id,
-                    batch_no=intake_item.batch_no
-                ).delete()
-                
                 new_intake_item = DonationIntakeItem()
                 new_intake_item.donation_id = intake.donation_id
                 new_intake_item.inventory_id = intake.inventory_id
-                new_intake_item.item_id = item_data['item'].item_id
+                new_intake_item.item_id = item.item_id
                 new_intake_item.batch_no = item_data['batch_no']
                 new_intake_item.batch_date = item_data['batch_date']
                 new_intake_item.expiry_date = item_data['expiry_date']
@@ -744,7 +797,7 @@ def _process_verification_submission(intake, donation, warehouse):
                 new_intake_item.status_code = 'V'
                 new_intake_item.comments_text = item_data['comments_text']
                 add_audit_fields(new_intake_item, current_user, is_new=True)
-                db.session.add(new_intake_item)
+                new_rows.append(new_intake_item)
                 intake_item = new_intake_item
             else:
                 intake_item.batch_date = item_data['batch_date']
@@ -757,11 +810,7 @@ def _process_verification_submission(intake, donation, warehouse):
                 intake_item.comments_text = item_data['comments_text']
                 add_audit_fields(intake_item, current_user, is_new=False)
             
-            existing_batch = ItemBatch.query.filter_by(
-                inventory_id=warehouse.warehouse_id,
-                item_id=item_data['item'].item_id,
-                batch_no=item_data['batch_no']
-            ).with_for_update().first()
+            existing_batch = existing_batches.get((item.item_id, item_data['batch_no']))
             
             if existing_batch:
                 existing_batch.usable_qty = (existing_batch.usable_qty or Decimal('0')) + item_data['usable_qty']
@@ -773,7 +822,7 @@ def _process_verification_submission(intake, donation, warehouse):
             else:
                 item_batch = ItemBatch()
                 item_batch.inventory_id = warehouse.warehouse_id
-                item_batch.item_id = item_data['item'].item_id
+                item_batch.item_id = item.item_id
                 item_batch.batch_no = item_data['batch_no']
                 item_batch.batch_date = item_data['batch_date']
                 item_batch.expiry_date = item_data['expiry_date']
@@ -786,12 +835,10 @@ def _process_verification_submission(intake, donation, warehouse):
                 item_batch.status_code = 'A'
                 item_batch.comments_text = item_data['comments_text']
                 add_audit_fields(item_batch, current_user, is_new=True)
-                db.session.add(item_batch)
+                existing_batches[(item.item_id, item_data['batch_no'])] = item_batch
+                new_rows.append(item_batch)
             
-            inventory = Inventory.query.filter_by(
-                inventory_id=warehouse.warehouse_id,
-                item_id=item_data['item'].item_id
-            ).with_for_update().first()
+            inventory = inventories.get(item.item_id)
             
             if inventory:
                 inventory.usable_qty = (inventory.usable_qty or Decimal('0')) + item_data['usable_qty']
@@ -801,7 +848,7 @@ def _process_verification_submission(intake, donation, warehouse):
             else:
                 inventory = Inventory()
                 inventory.inventory_id = warehouse.warehouse_id
-                inventory.item_id = item_data['item'].item_id
+                inventory.item_id = item.item_id
                 inventory.uom_code = intake_item.uom_code
                 inventory.usable_qty = item_data['usable_qty']
                 inventory.defective_qty = item_data['defective_qty']
@@ -809,7 +856,11 @@ def _process_verification_submission(intake, donation, warehouse):
                 inventory.reserved_qty = Decimal('0')
                 inventory.status_code = 'A'
                 add_audit_fields(inventory, current_user, is_new=True)
-                db.session.add(inventory)
+                inventories[item.item_id] = inventory
+                new_rows.append(inventory)
+        
+        # New rows of each table are flushed as multi-row INSERTs, updates as executemany
+        db.session.add_all(new_rows)
         
         donation.status_code = 'P'
         add_audit_fields(donation, current_user, is_new=False)
@@ -830,6 +881,25 @@ def _process_verification_submission(intake, donation, warehouse):
         return {'success': False, 'errors': [f'Database error: {str(e)}'], 'message': None}
 
 
+def _assign_generated_batch_numbers(verified_items_data, inventory_id):
+    """
+    Fill in batch numbers for lines submitted without one, reserving one block
+    of sequence numbers per item code and batch date rather than one per line.
+    """
+    pending = {}
+    for item_data in verified_items_data:
+        if not item_data['batch_no']:
+            key = (item_data['item'].item_code, item_data['batch_date'])
+            pending.setdefault(key, []).append(item_data)
+    
+    for (item_code, batch_date), lines in pending.items():
+        batch_nos = BatchCreationService.reserve_batch_numbers(
+            item_code, inventory_id, batch_date, count=len(lines)
+        )
+        for item_data, batch_no in zip(lines, batch_nos):
+            item_data['batch_no'] = batch_no
+
+
 # =============================================================================
 # API ENDPOINTS
 # =============================================================================
@@ -17,6 +17,7 @@ from app.db.models import (Donation, DonationItem, DonationDoc, Donor, Event, Cu
                           Item, UnitOfMeasure, Country, Currency, ItemCostDef)
 from app.core.audit import add_audit_fields, add_verify_fields
 from app.core.decorators import feature_required
+from app.db.routing import read_only
 import os
 from werkzeug.utils import secure_filename
 import mimetypes
@@ -64,6 +65,7 @@ def _get_donation_form_data():
 @donations_bp.route('/')
 @login_required
 @feature_required('donation_management')
+@read_only
 def list_donations():
     """List all donations with filter and search capabilities"""
     status_filter = request.args.get('status', 'all')
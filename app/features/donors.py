@@ -23,6 +23,7 @@ from datetime import datetime
 import re
 from app.db.models import db, Donor, Donation
 from app.core.decorators import feature_required
+from app.db.routing import read_only
 from app.core.audit import add_audit_fields
 from app.core.phone_utils import validate_phone_format, get_phone_validation_error
 
@@ -144,6 +145,7 @@ def validate_donor_data(form_data, is_update=False, donor_id=None):
 @donors_bp.route('/')
 @login_required
 @feature_required('donor_management')
+@read_only
 def list_donors():
     """List all donors with search and filter capabilities"""
     # Get filter and search parameters
@@ -7,11 +7,50 @@ from flask_login import login_required, current_user
 
 from app.db import db
 from app.core.rbac import permission_required, has_permission
+from app.core.etag import etag_validated, version_aggregate, fetch_versions
 from app.services import relief_request_service as rr_service
 
 eligibility_bp = Blueprint('eligibility', __name__, url_prefix='/eligibility')
 
 
+def _pending_list_version():
+    """ETag validator for the pending eligibility list"""
+    from app.db.models import ReliefRqst, Agency
+    
+    return fetch_versions(
+        version_aggregate(
+            ReliefRqst,
+            ReliefRqst.status_code == rr_service.STATUS_AWAITING_APPROVAL,
+            ReliefRqst.review_by_id.is_(None),
+            time_col=ReliefRqst.create_dtime
+        ),
+        version_aggregate(Agency)
+    )
+
+
+def _request_version(request_id):
+    """ETag validator for a single request's eligibility details"""
+    from app.db.models import ReliefRqst, ReliefRqstItem, Item
+    from sqlalchemy import select
+    
+    return fetch_versions(
+        version_aggregate(
+            ReliefRqst,
+            ReliefRqst.reliefrqst_id == request_id,
+            time_col=ReliefRqst.review_dtime
+        ),
+        version_aggregate(
+            ReliefRqstItem,
+            ReliefRqstItem.reliefrqst_id == request_id,
+            time_col=ReliefRqstItem.action_dtime
+        ),
+        version_aggregate(
+            Item,
+            Item.item_id.in_(select(ReliefRqstItem.item_id).where(ReliefRqstItem.reliefrqst_id == request_id))
+        )
+    )
+
+
 @eligibility_bp.route('/pending')
 @login_required
 @permission_required('reliefrqst', 'approve_eligibility')
@@ -20,8 +59,8 @@ def pending_list():
     List all relief requests pending eligibility review.
     Only accessible to users with reliefrqst.approve_eligibility permission.
     """
-    from app.db.models import ReliefRqst, ReliefRqstItem, Item
-    from sqlalchemy.orm import joinedload
+    from app.db.models import ReliefRqst
+    from app.db.loader_profiles import loader_options, REQUEST_LINES
     
     # Get priority filter from query params
     priority_filter = request.args.get('priority', 'all')
@@ -31,12 +70,7 @@ def pending_list():
         status_code=rr_service.STATUS_AWAITING_APPROVAL
     ).filter(
         ReliefRqst.review_by_id.is_(None)
-    ).options(
-        joinedload(ReliefRqst.agency),
-        joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.default_uom),
-        joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.category),
-        joinedload(ReliefRqst.eligible_event)
-    )
+    ).options(*loader_options(REQUEST_LINES))
     
     # Get all pending for metrics
     all_pending = base_query.order_by(
@@ -70,18 +104,12 @@ def review_request(request_id):
     """
     View full details of a relief request for eligibility review.
     """
-    from app.db.models import ReliefRqst, ReliefRqstItem, Item
-    from sqlalchemy.orm import joinedload
+    from app.db.models import ReliefRqst
+    from app.db.loader_profiles import loader_options, REQUEST_LINES
     from flask import abort
     
     # Get request with eager loading to prevent N+1 queries
-    relief_request = ReliefRqst.query.options(
-        joinedload(ReliefRqst.agency),
-        joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.default_uom),
-        joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.category),
-        joinedload(ReliefRqst.eligible_event),
-        joinedload(ReliefRqst.status)
-    ).get(request_id)
+    relief_request = ReliefRqst.query.options(*loader_options(REQUEST_LINES)).get(request_id)
     
     if not relief_request:
         flash('Relief request not found.', 'danger')
@@ -154,6 +182,7 @@ def submit_decision(request_id):
 @eligibility_bp.route('/api/pending', methods=['GET'])
 @login_required
 @permission_required('reliefrqst', 'approve_eligibility')
+@etag_validated(_pending_list_version)
 def api_pending_list():
     """
     API endpoint: Get pending eligibility requests as JSON.
@@ -178,6 +207,7 @@ def api_pending_list():
 @eligibility_bp.route('/api/<int:request_id>', methods=['GET'])
 @login_required
 @permission_required('reliefrqst', 'approve_eligibility')
+@etag_validated(_request_version)
 def api_get_request(request_id):
     """
     API endpoint: Get full request details for eligibility review.
@@ -28,6 +28,7 @@ from sqlalchemy.exc import IntegrityError
 from app.db import db
 from app.db.models import Event
 from app.core.decorators import feature_required
+from app.db.routing import read_only
 from app.core.audit import add_audit_fields
 
 events_bp = Blueprint('events', __name__, url_prefix='/events')
@@ -129,6 +130,7 @@ def validate_event_data(form_data, is_update=False):
 @events_bp.route('/')
 @login_required
 @feature_required('event_management')
+@read_only
 def list_events():
     """List all events with filtering and summary counts"""
     # Get filter parameters
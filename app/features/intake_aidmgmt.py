@@ -2,7 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from sqlalchemy import func
 from datetime import datetime, date
-from app.db import db
+from app.db import db, stock_ledger
 from app.db.models import (DBIntake, DBIntakeItem, ReliefPkg, Inventory, Item, 
                           Warehouse, UnitOfMeasure, ReliefPkgItem)
 from app.services.batch_creation_service import BatchCreationService
@@ -64,6 +64,8 @@ def create_intake():
             
             first_inventory_id = None
             
+            stock_ledger.set_movement(db.session, stock_ledger.MOVEMENT_RECEIPT, 'reliefpkg', package.reliefpkg_id)
+            
             for item_id, usable_qty, defective_qty, expired_qty in zip(item_ids, usable_qtys, defective_qtys, expired_qtys):
                 if item_id:
                     usable = float(usable_qty) if usable_qty else 0
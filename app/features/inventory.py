@@ -7,11 +7,27 @@ from sqlalchemy import func
 
 from app.db import db
 from app.db.models import Inventory, Warehouse, Item
+from app.db.routing import read_only
+from app.core.etag import etag_validated, version_aggregate, fetch_versions
 
 inventory_bp = Blueprint('inventory', __name__, url_prefix='/inventory')
 
+def _stock_check_version():
+    """ETag validator for stock_check: the inventory row's version"""
+    warehouse_id = request.args.get('warehouse_id', type=int)
+    item_id = request.args.get('item_id', type=int)
+    if not warehouse_id or not item_id:
+        return None
+    return fetch_versions(version_aggregate(
+        Inventory,
+        Inventory.inventory_id == warehouse_id,
+        Inventory.item_id == item_id,
+        Inventory.status_code == 'A'
+    ))
+
 @inventory_bp.route('/api/stock_check')
 @login_required
+@etag_validated(_stock_check_version)
 def stock_check():
     """API endpoint to check available stock for an item at a warehouse"""
     warehouse_id = request.args.get('warehouse_id', type=int)
@@ -41,6 +57,7 @@ def stock_check():
 
 @inventory_bp.route('/')
 @login_required
+@read_only
 def list_inventory():
     """List inventory summary"""
     from app.core.rbac import has_role
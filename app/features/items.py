@@ -19,6 +19,7 @@ from app.db import db
 from app.db.models import Item, ItemCategory, UnitOfMeasure, Inventory
 from app.core.audit import add_audit_fields
 from app.core.decorators import feature_required
+from app.db.routing import read_only
 
 items_bp = Blueprint('items', __name__, url_prefix='/items')
 
@@ -160,6 +161,7 @@ def check_uniqueness(item_id, item_code, item_name, sku_code):
 @items_bp.route('/')
 @login_required
 @feature_required('item_management')
+@read_only
 def list_items():
     """List items with search, filters, and pagination (CUSTODIAN only)"""
     # Get filter parameters
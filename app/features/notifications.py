@@ -1,11 +1,27 @@
 from flask import Blueprint, render_template, jsonify, request, redirect, url_for
 from flask_login import login_required, current_user
-from sqlalchemy import func
+from sqlalchemy import func, select
 from app.db.models import db, Inventory, Item, Notification
 from app.services.notification_service import NotificationService
+from app.core.etag import etag_validated, version_aggregate, fetch_versions
 
 notifications_bp = Blueprint('notifications', __name__)
 
+def _notification_list_version():
+    """
+    ETag validator for the notification panel.
+    Notifications have no version_nbr: new, deleted or archived rows change
+    the count/max id, and marking read changes the unread count.
+    """
+    criteria = (Notification.user_id == current_user.user_id, Notification.is_archived == False)
+    unread_count = select(func.count()).select_from(Notification).where(
+        *criteria, Notification.status == 'unread'
+    ).scalar_subquery()
+    return fetch_versions(
+        version_aggregate(Notification, *criteria, version_col=Notification.id, time_col=Notification.created_at),
+        unread_count
+    )
+
 @notifications_bp.route('/api/unread_count')
 @login_required
 def unread_count():
@@ -15,6 +31,7 @@ def unread_count():
 
 @notifications_bp.route('/api/list')
 @login_required
+@etag_validated(_notification_list_version)
 def notification_list():
     """Get notifications as JSON for offcanvas panel"""
     notifications = NotificationService.get_recent_notifications(current_user.user_id, limit=10)
@@ -5,11 +5,13 @@ pending eligibility reviews, and pending fulfillments in one place.
 """
 from flask import Blueprint, render_template, request
 from flask_login import login_required
-from sqlalchemy.orm import joinedload
 
 from app.db import db
-from app.db.models import ReliefRqst, ReliefRqstItem, Item
+from app.db.models import ReliefRqst
+from app.db.loader_profiles import loader_options, REQUEST_LINES
 from app.core.rbac import role_required
+from app.db.routing import read_only
+from app.db.fanout import fan_out
 from app.services import relief_request_service as rr_service
 
 director_bp = Blueprint('director', __name__, url_prefix='/director')
@@ -18,6 +20,7 @@ director_bp = Blueprint('director', __name__, url_prefix='/director')
 @director_bp.route('/dashboard')
 @login_required
 @role_required('ODPEM_DG', 'ODPEM_DDG', 'ODPEM_DIR_PEOD')
+@read_only
 def dashboard():
     """
     Unified dashboard for ODPEM directors showing all relief requests
@@ -26,44 +29,38 @@ def dashboard():
     # Get filter from query params
     view_filter = request.args.get('filter', 'pending_review')
     
-    # Calculate counts using independent queries (avoid cumulative filter issue)
-    counts = {
-        'pending_review': ReliefRqst.query.filter_by(
+    # Calculate counts using independent queries (avoid cumulative filter issue),
+    # run concurrently by fan_out
+    counts = fan_out({
+        'pending_review': lambda s: s.query(ReliefRqst).filter_by(
             status_code=rr_service.STATUS_AWAITING_APPROVAL
         ).filter(
             ReliefRqst.review_by_id.is_(None)
         ).count(),
-        'pending_fulfillment': ReliefRqst.query.filter(
+        'pending_fulfillment': lambda s: s.query(ReliefRqst).filter(
             ReliefRqst.status_code.in_([
                 rr_service.STATUS_SUBMITTED,
                 rr_service.STATUS_PART_FILLED
             ])
         ).count(),
-        'in_progress': ReliefRqst.query.filter(
+        'in_progress': lambda s: s.query(ReliefRqst).filter(
             ReliefRqst.status_code.in_([
                 rr_service.STATUS_AWAITING_APPROVAL,
                 rr_service.STATUS_SUBMITTED,
                 rr_service.STATUS_PART_FILLED
             ])
         ).count(),
-        'completed': ReliefRqst.query.filter_by(
+        'completed': lambda s: s.query(ReliefRqst).filter_by(
             status_code=rr_service.STATUS_FILLED
-        ).count()
-    }
-    
-    # Total includes all statuses
-    counts['total'] = ReliefRqst.query.count()
+        ).count(),
+        # Total includes all statuses
+        'total': lambda s: s.query(ReliefRqst).count()
+    })
     
     # Build query with comprehensive eager loading (independent for each filter)
     def build_query():
         """Create a fresh query with all eager loading"""
-        return ReliefRqst.query.options(
-            joinedload(ReliefRqst.agency),
-            joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.default_uom),
-            joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.category),
-            joinedload(ReliefRqst.eligible_event),
-            joinedload(ReliefRqst.status)
-        )
+        return ReliefRqst.query.options(*loader_options(REQUEST_LINES))
     
     # Apply filter with independent queries
     if view_filter == 'pending_review':
@@ -7,7 +7,8 @@ Provides high-level operational metrics and visualizations for:
 - Director, PEOD
 
 Shows system-wide operational performance for donations and relief fulfillment.
-Read-only dashboard with KPIs and charts.
+Read-only dashboard with KPIs and charts, each loaded from its own cached
+JSON widget endpoint (see app/core/widget_cache.py).
 """
 
 from flask import Blueprint, render_template, jsonify, request
@@ -18,6 +19,9 @@ from app.db.models import (
     ReliefPkgItem, Agency, Event
 )
 from app.core.rbac import role_required
+from app.db.routing import read_only
+from app.db.fanout import fan_out
+from app.core.widget_cache import widget_endpoint, DEFAULT_PERIOD_DAYS, MAX_PERIOD_DAYS
 from app.services import relief_request_service as rr_service
 from datetime import datetime, timedelta
 from collections import defaultdict
@@ -25,77 +29,232 @@ from app.utils.timezone import now as jamaica_now
 
 operations_dashboard_bp = Blueprint('operations_dashboard', __name__)
 
+EXECUTIVE_ROLES = ('ODPEM_DG', 'ODPEM_DDG', 'ODPEM_DIR_PEOD')
+
+# Readable labels using canonical status constants
+STATUS_LABELS = {
+    rr_service.STATUS_DRAFT: 'Draft',
+    rr_service.STATUS_AWAITING_APPROVAL: 'Awaiting Approval',
+    rr_service.STATUS_CANCELLED: 'Cancelled',
+    rr_service.STATUS_SUBMITTED: 'Submitted',
+    rr_service.STATUS_DENIED: 'Denied',
+    rr_service.STATUS_PART_FILLED: 'Partly Filled',
+    rr_service.STATUS_CLOSED: 'Closed',
+    rr_service.STATUS_FILLED: 'Filled',
+    rr_service.STATUS_INELIGIBLE: 'Ineligible'
+}
+
+
+def _period_start(period_days):
+    return jamaica_now() - timedelta(days=period_days)
+
+
+def _weekly_series(rows):
+    """Convert (week, count) rows to JSON-serializable chart data"""
+    return {
+        'labels': [row.week.strftime('%Y-%m-%d') if row.week else '' for row in rows],
+        'values': [int(row.count) for row in rows]
+    }
+
+
 @operations_dashboard_bp.route('/executive/operations')
 @login_required
-@role_required('ODPEM_DG', 'ODPEM_DDG', 'ODPEM_DIR_PEOD')
+@role_required(*EXECUTIVE_ROLES)
 def index():
     """
     Executive Operations Dashboard showing system-wide operational metrics.
     Access restricted to DG, Deputy DG, and Director PEOD only.
+
+    Renders the page shell only; KPIs and charts are loaded by
+    dashboard-widgets.js from the widget endpoints below.
     """
     # Get time period from query parameter (default: 30 days)
-    period_days = int(request.args.get('period', 30))
-    start_date = jamaica_now() - timedelta(days=period_days)
+    try:
+        period_days = int(request.args.get('period', DEFAULT_PERIOD_DAYS))
+    except ValueError:
+        period_days = DEFAULT_PERIOD_DAYS
+    if not 1 <= period_days <= MAX_PERIOD_DAYS:
+        period_days = DEFAULT_PERIOD_DAYS
     
-    # =======================
-    # DONATION METRICS
-    # =======================
+    return render_template('operations_dashboard/index.html', period_days=period_days)
+
+
+# =======================
+# WIDGET ENDPOINTS
+# =======================
+
+@operations_dashboard_bp.route('/executive/operations/widgets/kpis')
+@login_required
+@role_required(*EXECUTIVE_ROLES)
+@read_only
+@widget_endpoint(ttl=60, period=True)
+def widget_kpis(period_days):
+    """Donation, request and package totals for the period"""
+    start_date = _period_start(period_days)
+    since = start_date.date()
     
-    # Total donations in period
-    total_donations = Donation.query.filter(
-        Donation.received_date >= start_date.date()
-    ).count()
+    return fan_out({
+        # Total donations in period
+        'total_donations': lambda s: s.query(Donation).filter(
+            Donation.received_date >= since
+        ).count(),
+        
+        # Total donation items
+        'total_donation_items': lambda s: s.query(func.count(DonationItem.donation_id)).join(
+            Donation
+        ).filter(
+            Donation.received_date >= since
+        ).scalar() or 0,
+        
+        # Total relief requests in period
+        'total_requests': lambda s: s.query(ReliefRqst).filter(
+            ReliefRqst.create_dtime >= start_date
+        ).count(),
+        
+        # Packages dispatched in period
+        'packages_dispatched': lambda s: s.query(ReliefPkg).filter(
+            ReliefPkg.dispatch_dtime >= start_date,
+            ReliefPkg.status_code == 'D'
+        ).count(),
+        
+        # Packages received in period
+        'packages_received': lambda s: s.query(ReliefPkg).filter(
+            ReliefPkg.received_dtime >= start_date,
+            ReliefPkg.status_code == 'R'
+        ).count(),
+    })
+
+
+@operations_dashboard_bp.route('/executive/operations/widgets/cycle-times')
+@login_required
+@role_required(*EXECUTIVE_ROLES)
+@read_only
+@widget_endpoint(ttl=300, period=True)
+def widget_cycle_times(period_days):
+    """Average approval and dispatch times (days) for the period"""
+    start_date = _period_start(period_days)
     
-    # Total donation items
-    total_donation_items = db.session.query(func.count(DonationItem.donation_id)).join(
-        Donation
-    ).filter(
-        Donation.received_date >= start_date.date()
-    ).scalar() or 0
+    results = fan_out({
+        # Average time from submission to approval (days)
+        'avg_approval_time': lambda s: s.query(
+            func.avg(
+                func.extract('epoch', ReliefRqst.review_dtime - ReliefRqst.create_dtime) / 86400
+            )
+        ).filter(
+            ReliefRqst.review_dtime.isnot(None),
+            ReliefRqst.create_dtime >= start_date
+        ).scalar(),
+        
+        # Average time from approval to dispatch (days)
+        'avg_dispatch_time': lambda s: s.query(
+            func.avg(
+                func.extract('epoch', ReliefPkg.dispatch_dtime - ReliefRqst.review_dtime) / 86400
+            )
+        ).join(
+            ReliefRqst, ReliefPkg.reliefrqst_id == ReliefRqst.reliefrqst_id
+        ).filter(
+            ReliefPkg.dispatch_dtime.isnot(None),
+            ReliefRqst.review_dtime.isnot(None),
+            ReliefPkg.dispatch_dtime >= start_date
+        ).scalar(),
+    })
     
-    # Donations by donor (top 10)
-    from app.db.models import Donor
-    donations_by_donor = db.session.query(
-        Donor.donor_name,
-        func.count(Donation.donation_id).label('count')
-    ).join(
-        Donation, Donor.donor_id == Donation.donor_id
-    ).filter(
-        Donation.received_date >= start_date.date()
-    ).group_by(
-        Donor.donor_name
-    ).order_by(
-        desc('count')
-    ).limit(10).all()
+    return {
+        key: round(float(value), 1) if value else None
+        for key, value in results.items()
+    }
+
+
+@operations_dashboard_bp.route('/executive/operations/widgets/current-status')
+@login_required
+@role_required(*EXECUTIVE_ROLES)
+@read_only
+@widget_endpoint(ttl=30)
+def widget_current_status():
+    """Current operational counts (all-time, not just period)"""
+    return fan_out({
+        'awaiting_filling': lambda s: s.query(ReliefRqst).filter_by(status_code=3).count(),
+        'being_prepared': lambda s: s.query(ReliefRqst).filter_by(status_code=5).count(),
+        'awaiting_approval': lambda s: s.query(ReliefRqst).filter_by(status_code=6).count(),
+        'approved_dispatch': lambda s: s.query(ReliefPkg).filter(
+            ReliefPkg.status_code == 'D',
+            ReliefPkg.received_dtime.is_(None)
+        ).count(),
+        'completed': lambda s: s.query(ReliefRqst).filter_by(status_code=7).count(),
+    })
+
+
+@operations_dashboard_bp.route('/executive/operations/widgets/donations-timeline')
+@login_required
+@role_required(*EXECUTIVE_ROLES)
+@read_only
+@widget_endpoint(ttl=300, period=True)
+def widget_donations_timeline(period_days):
+    """Donations timeline (by week)"""
+    since = _period_start(period_days).date()
     
-    # Donations timeline (by week)
-    donations_timeline_raw = db.session.query(
+    rows = db.session.query(
         func.date_trunc('week', Donation.received_date).label('week'),
         func.count(Donation.donation_id).label('count')
     ).filter(
-        Donation.received_date >= start_date.date()
+        Donation.received_date >= since
     ).group_by(
         'week'
     ).order_by(
         'week'
     ).all()
     
-    # Convert to JSON-serializable format
-    donations_timeline = {
-        'labels': [row.week.strftime('%Y-%m-%d') if row.week else '' for row in donations_timeline_raw],
-        'values': [int(row.count) for row in donations_timeline_raw]
-    }
+    return {'donations_timeline': _weekly_series(rows)}
+
+
+@operations_dashboard_bp.route('/executive/operations/widgets/requests-timeline')
+@login_required
+@role_required(*EXECUTIVE_ROLES)
+@read_only
+@widget_endpoint(ttl=300, period=True)
+def widget_requests_timeline(period_days):
+    """Submitted and fulfilled relief requests (by week)"""
+    start_date = _period_start(period_days)
     
-    # =======================
-    # RELIEF REQUEST METRICS
-    # =======================
+    results = fan_out({
+        # Relief requests timeline (by week)
+        'requests_timeline': lambda s: s.query(
+            func.date_trunc('week', ReliefRqst.create_dtime).label('week'),
+            func.count(ReliefRqst.reliefrqst_id).label('count')
+        ).filter(
+            ReliefRqst.create_dtime >= start_date
+        ).group_by(
+            'week'
+        ).order_by(
+            'week'
+        ).all(),
+        
+        # Fulfilled requests timeline (by week)
+        'fulfilled_timeline': lambda s: s.query(
+            func.date_trunc('week', ReliefRqst.action_dtime).label('week'),
+            func.count(ReliefRqst.reliefrqst_id).label('count')
+        ).filter(
+            ReliefRqst.status_code == 7,
+            ReliefRqst.action_dtime >= start_date
+        ).group_by(
+            'week'
+        ).order_by(
+            'week'
+        ).all(),
+    })
     
-    # Total relief requests in period
-    total_requests = ReliefRqst.query.filter(
-        ReliefRqst.create_dtime >= start_date
-    ).count()
+    return {key: _weekly_series(rows) for key, rows in results.items()}
+
+
+@operations_dashboard_bp.route('/executive/operations/widgets/status-breakdown')
+@login_required
+@role_required(*EXECUTIVE_ROLES)
+@read_only
+@widget_endpoint(ttl=120, period=True)
+def widget_status_breakdown(period_days):
+    """Relief requests created in the period by status"""
+    start_date = _period_start(period_days)
     
-    # Requests by status
     requests_by_status = db.session.query(
         ReliefRqst.status_code,
         func.count(ReliefRqst.reliefrqst_id).label('count')
@@ -105,59 +264,24 @@ def index():
         ReliefRqst.status_code
     ).all()
     
-    # Convert to dict with readable labels using canonical status constants
-    status_labels = {
-        rr_service.STATUS_DRAFT: 'Draft',
-        rr_service.STATUS_AWAITING_APPROVAL: 'Awaiting Approval',
-        rr_service.STATUS_CANCELLED: 'Cancelled',
-        rr_service.STATUS_SUBMITTED: 'Submitted',
-        rr_service.STATUS_DENIED: 'Denied',
-        rr_service.STATUS_PART_FILLED: 'Partly Filled',
-        rr_service.STATUS_CLOSED: 'Closed',
-        rr_service.STATUS_FILLED: 'Filled',
-        rr_service.STATUS_INELIGIBLE: 'Ineligible'
+    return {
+        'status_breakdown': {
+            'labels': [STATUS_LABELS.get(status, f'Status {status}') for status, count in requests_by_status],
+            'values': [count for status, count in requests_by_status]
+        }
     }
+
+
+@operations_dashboard_bp.route('/executive/operations/widgets/top-agencies')
+@login_required
+@role_required(*EXECUTIVE_ROLES)
+@read_only
+@widget_endpoint(ttl=300, period=True)
+def widget_top_agencies(period_days):
+    """Top requesting agencies (by fulfilled requests)"""
+    start_date = _period_start(period_days)
     
-    status_breakdown = {
-        'labels': [status_labels.get(status, f'Status {status}') for status, count in requests_by_status],
-        'values': [count for status, count in requests_by_status]
-    }
-    
-    # Current operational counts (all-time, not just period)
-    current_counts = {
-        'awaiting_filling': ReliefRqst.query.filter_by(status_code=3).count(),
-        'being_prepared': ReliefRqst.query.filter_by(status_code=5).count(),
-        'awaiting_approval': ReliefRqst.query.filter_by(status_code=6).count(),
-        'approved_dispatch': ReliefPkg.query.filter(
-            ReliefPkg.status_code == 'D',
-            ReliefPkg.received_dtime.is_(None)
-        ).count(),
-        'completed': ReliefRqst.query.filter_by(status_code=7).count()
-    }
-    
-    # =======================
-    # FULFILLMENT METRICS
-    # =======================
-    
-    # Total packages created in period
-    total_packages = ReliefPkg.query.filter(
-        ReliefPkg.create_dtime >= start_date
-    ).count()
-    
-    # Packages dispatched in period
-    packages_dispatched = ReliefPkg.query.filter(
-        ReliefPkg.dispatch_dtime >= start_date,
-        ReliefPkg.status_code == 'D'
-    ).count()
-    
-    # Packages received in period
-    packages_received = ReliefPkg.query.filter(
-        ReliefPkg.received_dtime >= start_date,
-        ReliefPkg.status_code == 'R'
-    ).count()
-    
-    # Top requesting agencies (by fulfilled requests)
-    top_agencies_raw = db.session.query(
+    rows = db.session.query(
         Agency.agency_name,
         func.count(ReliefRqst.reliefrqst_id).label('count')
     ).join(
@@ -171,95 +295,9 @@ def index():
         desc('count')
     ).limit(10).all()
     
-    # Convert to JSON-serializable format
-    top_agencies = {
-        'labels': [row.agency_name for row in top_agencies_raw],
-        'values': [int(row.count) for row in top_agencies_raw]
-    }
-    
-    # Relief requests timeline (by week)
-    requests_timeline_raw = db.session.query(
-        func.date_trunc('week', ReliefRqst.create_dtime).label('week'),
-        func.count(ReliefRqst.reliefrqst_id).label('count')
-    ).filter(
-        ReliefRqst.create_dtime >= start_date
-    ).group_by(
-        'week'
-    ).order_by(
-        'week'
-    ).all()
-    
-    # Fulfilled requests timeline (by week)
-    fulfilled_timeline_raw = db.session.query(
-        func.date_trunc('week', ReliefRqst.action_dtime).label('week'),
-        func.count(ReliefRqst.reliefrqst_id).label('count')
-    ).filter(
-        ReliefRqst.status_code == 7,
-        ReliefRqst.action_dtime >= start_date
-    ).group_by(
-        'week'
-    ).order_by(
-        'week'
-    ).all()
-    
-    # Convert to JSON-serializable format
-    requests_timeline = {
-        'labels': [row.week.strftime('%Y-%m-%d') if row.week else '' for row in requests_timeline_raw],
-        'values': [int(row.count) for row in requests_timeline_raw]
+    return {
+        'top_agencies': {
+            'labels': [row.agency_name for row in rows],
+            'values': [int(row.count) for row in rows]
+        }
     }
-    
-    fulfilled_timeline = {
-        'labels': [row.week.strftime('%Y-%m-%d') if row.week else '' for row in fulfilled_timeline_raw],
-        'values': [int(row.count) for row in fulfilled_timeline_raw]
-    }
-    
-    # =======================
-    # AVERAGE TIME METRICS
-    # =======================
-    
-    # Average time from submission to approval (days)
-    avg_approval_time = db.session.query(
-        func.avg(
-            func.extract('epoch', ReliefRqst.review_dtime - ReliefRqst.create_dtime) / 86400
-        )
-    ).filter(
-        ReliefRqst.review_dtime.isnot(None),
-        ReliefRqst.create_dtime >= start_date
-    ).scalar()
-    
-    # Average time from approval to dispatch (days)
-    avg_dispatch_time = db.session.query(
-        func.avg(
-            func.extract('epoch', ReliefPkg.dispatch_dtime - ReliefRqst.review_dtime) / 86400
-        )
-    ).join(
-        ReliefRqst, ReliefPkg.reliefrqst_id == ReliefRqst.reliefrqst_id
-    ).filter(
-        ReliefPkg.dispatch_dtime.isnot(None),
-        ReliefRqst.review_dtime.isnot(None),
-        ReliefPkg.dispatch_dtime >= start_date
-    ).scalar()
-    
-    context = {
-        'period_days': period_days,
-        # Donation KPIs
-        'total_donations': total_donations,
-        'total_donation_items': total_donation_items,
-        'donations_timeline': donations_timeline,
-        # Relief Request KPIs
-        'total_requests': total_requests,
-        'status_breakdown': status_breakdown,
-        'current_counts': current_counts,
-        'requests_timeline': requests_timeline,
-        'fulfilled_timeline': fulfilled_timeline,
-        # Fulfillment KPIs
-        'total_packages': total_packages,
-        'packages_dispatched': packages_dispatched,
-        'packages_received': packages_received,
-        'top_agencies': top_agencies,
-        # Time metrics
-        'avg_approval_time': round(avg_approval_time, 1) if avg_approval_time else None,
-        'avg_dispatch_time': round(avg_dispatch_time, 1) if avg_dispatch_time else None,
-    }
-    
-    return render_template('operations_dashboard/index.html', **context)
@@ -2,29 +2,39 @@
 Relief Request Packaging Blueprint
 Allows Logistics Officers/Managers to prepare relief packages from approved requests
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort
+import logging
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort, current_app
 from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 from sqlalchemy.orm import joinedload
 import uuid
 
 from app.db import db
+from app.db.loader_profiles import (
+    loader_options, REQUEST_QUEUE, REQUEST_LINES, REQUEST_PACKAGING,
+    PACKAGE_DISPATCH, PACKAGE_DISPATCH_REQUEST_LINES
+)
 from app.utils.timezone import now as jamaica_now
 from app.db.models import (
     ReliefRqst, ReliefRqstItem, Item, Warehouse, Inventory, ItemBatch,
-    User, Notification,
+    User,
     ReliefPkg, ReliefPkgItem, ReliefRqstItemStatus
 )
 from app.core.rbac import has_permission, permission_required
 from app.services import relief_request_service as rr_service
 from app.services import item_status_service
 from app.services import inventory_reservation_service as reservation_service
+from app.services import notification_outbox_service as outbox
+from app.services import dispatch_manifest_service as manifest_service
 from app.services.batch_allocation_service import BatchAllocationService, safe_decimal
 from app.core.audit import add_audit_fields
+from app.core.etag import etag_validated, version_aggregate, fetch_versions
 from app.core.exceptions import OptimisticLockError
 
+logger = logging.getLogger(__name__)
+
 
 def _validate_version_nbr(entity_name, expected_version, actual_version):
     """
@@ -69,13 +79,7 @@ def pending_approval():
     # Find all relief requests with packages awaiting LM approval
     # IMPORTANT: Include both SUBMITTED and PART_FILLED to support multi-batch fulfillment
     # (After first dispatch, status becomes PART_FILLED but may need additional batches)
-    all_requests = ReliefRqst.query.options(
-        joinedload(ReliefRqst.agency),
-        joinedload(ReliefRqst.eligible_event),
-        joinedload(ReliefRqst.status),
-        joinedload(ReliefRqst.items),
-        joinedload(ReliefRqst.packages)
-    ).filter(
+    all_requests = ReliefRqst.query.options(*loader_options(REQUEST_QUEUE)).filter(
         ReliefRqst.status_code.in_([rr_service.STATUS_SUBMITTED, rr_service.STATUS_PART_FILLED])
     ).order_by(ReliefRqst.create_dtime.desc()).all()
     
@@ -118,14 +122,7 @@ def review_approval(reliefrqst_id):
         flash('Access denied. Only Logistics Managers can review and approve packages.', 'danger')
         abort(403)
     
-    relief_request = ReliefRqst.query.options(
-        joinedload(ReliefRqst.agency),
-        joinedload(ReliefRqst.eligible_event),
-        joinedload(ReliefRqst.status),
-        joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.category),
-        joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.default_uom),
-        joinedload(ReliefRqst.packages)
-    ).get_or_404(reliefrqst_id)
+    relief_request = ReliefRqst.query.options(*loader_options(REQUEST_PACKAGING)).get_or_404(reliefrqst_id)
     
     # Get the pending ReliefPkg
     relief_pkg = next((pkg for pkg in relief_request.packages if pkg.status_code == rr_service.PKG_STATUS_PENDING), None)
@@ -232,37 +229,26 @@ def review_approval(reliefrqst_id):
             if not success:
                 raise ValueError(f'Inventory commit failed: {error_msg}')
             
+            # Snapshot the dispatched contents for the summary, dispatch slip and handover pages
+            manifest_service.create_manifest(relief_pkg, current_user.user_name)
+            
             # Update relief request status
             relief_request.action_by_id = current_user.user_name
             relief_request.action_dtime = jamaica_now()
             relief_request.status_code = rr_service.STATUS_PART_FILLED
             relief_request.version_nbr += 1
             
-            # Notify logistics officers and agency users about package approval
-            try:
-                from app.services.notification_service import NotificationService
-                
-                # Notify logistics officers
-                lo_users = NotificationService.get_active_users_by_role_codes(['LOGISTICS_OFFICER'])
-                
-                # Notify agency users
-                agency_users = []
-                if relief_request.agency_id:
-                    agency_users = NotificationService.get_agency_active_users(relief_request.agency_id)
-                
-                all_recipients = lo_users + agency_users
-                approver_name = f"{current_user.first_name} {current_user.last_name}" if current_user.first_name else current_user.email.split('@')[0]
-                
-                NotificationService.create_package_approved_notification(
-                    relief_pkg=relief_pkg,
-                    recipient_users=all_recipients,
-                    approver_name=approver_name
-                )
-            except Exception as e:
-                # Don't fail dispatch if notification fails
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.warning(f'Failed to send approval notification: {str(e)}')
+            # Queue notifications for logistics officers and agency users about package approval
+            approver_name = f"{current_user.first_name} {current_user.last_name}" if current_user.first_name else current_user.email.split('@')[0]
+            outbox.enqueue(
+                outbox.EVENT_PACKAGE_APPROVED,
+                {
+                    'reliefpkg_id': relief_pkg.reliefpkg_id,
+                    'approver_name': approver_name,
+                    'role_codes': ['LOGISTICS_OFFICER']
+                },
+                f"{outbox.EVENT_PACKAGE_APPROVED}:{relief_pkg.reliefpkg_id}:{relief_request.version_nbr}"
+            )
             
             db.session.commit()
             
@@ -354,14 +340,7 @@ def approve_package(reliefrqst_id):
         flash('Access denied. Only Logistics Managers can approve packages.', 'danger')
         abort(403)
     
-    relief_request = ReliefRqst.query.options(
-        joinedload(ReliefRqst.agency),
-        joinedload(ReliefRqst.eligible_event),
-        joinedload(ReliefRqst.status),
-        joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.category),
-        joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.default_uom),
-        joinedload(ReliefRqst.packages)
-    ).get_or_404(reliefrqst_id)
+    relief_request = ReliefRqst.query.options(*loader_options(REQUEST_PACKAGING)).get_or_404(reliefrqst_id)
     
     # Get the pending package
     relief_pkg = next((pkg for pkg in relief_request.packages if pkg.status_code == rr_service.PKG_STATUS_PENDING), None)
@@ -645,37 +624,26 @@ def _approve_and_dispatch(relief_request, relief_pkg, relief_request_version, pa
         if not success:
             raise ValueError(f'Inventory commit failed: {error_msg}')
         
+        # Snapshot the dispatched contents for the summary, dispatch slip and handover pages
+        manifest_service.create_manifest(relief_pkg, current_user.user_name)
+        
         # Update relief request status
         relief_request.action_by_id = current_user.user_name
         relief_request.action_dtime = jamaica_now()
         relief_request.status_code = rr_service.STATUS_PART_FILLED
         relief_request.version_nbr += 1
         
-        # Notify Inventory Clerk and agency users
-        try:
-            from app.services.notification_service import NotificationService
-            
-            # Notify logistics officers (inventory clerks)
-            lo_users = NotificationService.get_active_users_by_role_codes(['LOGISTICS_OFFICER', 'INVENTORY_CLERK'])
-            
-            # Notify agency users
-            agency_users = []
-            if relief_request.agency_id:
-                agency_users = NotificationService.get_agency_active_users(relief_request.agency_id)
-            
-            all_recipients = lo_users + agency_users
-            approver_name = f"{current_user.first_name} {current_user.last_name}" if current_user.first_name else current_user.email.split('@')[0]
-            
-            NotificationService.create_package_approved_notification(
-                relief_pkg=relief_pkg,
-                recipient_users=all_recipients,
-                approver_name=approver_name
-            )
-        except Exception as e:
-            # Don't fail dispatch if notification fails
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f'Failed to send approval notification: {str(e)}')
+        # Queue notifications for Inventory Clerk and agency users
+        approver_name = f"{current_user.first_name} {current_user.last_name}" if current_user.first_name else current_user.email.split('@')[0]
+        outbox.enqueue(
+            outbox.EVENT_PACKAGE_APPROVED,
+            {
+                'reliefpkg_id': relief_pkg.reliefpkg_id,
+                'approver_name': approver_name,
+                'role_codes': ['LOGISTICS_OFFICER', 'INVENTORY_CLERK']
+            },
+            f"{outbox.EVENT_PACKAGE_APPROVED}:{relief_pkg.reliefpkg_id}:{relief_request.version_nbr}"
+        )
         
         db.session.commit()
         
@@ -711,69 +679,17 @@ def transaction_summary(reliefpkg_id):
     # Get the tab the user came from (for proper back navigation)
     from_tab = request.args.get('from_tab', 'approved_for_dispatch')
     
-    # Load package with all related data
-    relief_pkg = ReliefPkg.query.options(
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.agency),
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.eligible_event),
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.default_uom),
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item_status),
-        joinedload(ReliefPkg.items)
-    ).get_or_404(reliefpkg_id)
-    
-    # Get package creator and approver info
-    creator = User.query.filter_by(user_name=relief_pkg.create_by_id).first() if relief_pkg.create_by_id else None
-    approver = User.query.filter_by(user_name=relief_pkg.verify_by_id).first() if relief_pkg.verify_by_id else None
-    
-    # Organize items by batch with warehouse info
-    items_with_batches = []
-    for req_item in relief_pkg.relief_request.items:
-        # Get all package items (batches) for this request item
-        pkg_items = [pi for pi in relief_pkg.items if pi.item_id == req_item.item_id]
-        
-        batches_info = []
-        for pkg_item in pkg_items:
-            # Load batch and warehouse info
-            batch = ItemBatch.query.get(pkg_item.batch_id) if pkg_item.batch_id else None
-            warehouse = Warehouse.query.get(pkg_item.fr_inventory_id) if pkg_item.fr_inventory_id else None
-            
-            batches_info.append({
-                'warehouse_name': warehouse.warehouse_name if warehouse else 'Unknown',
-                'batch_no': batch.batch_no if batch else 'N/A',
-                'batch_date': batch.batch_date if batch else None,
-                'expiry_date': batch.expiry_date if batch else None,
-                'qty': pkg_item.item_qty
-            })
-        
-        total_issued = sum(b['qty'] for b in batches_info)
-        
-        items_with_batches.append({
-            'item': req_item.item,
-            'requested_qty': req_item.request_qty,
-            'issued_qty': total_issued,
-            'batches': batches_info,
-            'status_code': req_item.status_code,
-            'status_desc': req_item.item_status.status_desc if req_item.item_status else None,
-            'status_reason': req_item.status_reason_desc
-        })
-    
-    # Calculate summary totals
-    total_items = len(items_with_batches)
-    total_batches = sum(len(item['batches']) for item in items_with_batches)
-    unique_warehouses = set()
-    for item in items_with_batches:
-        for batch in item['batches']:
-            unique_warehouses.add(batch['warehouse_name'])
-    warehouses_used = len(unique_warehouses)
+    # Load package and its dispatch manifest in one lookup
+    relief_pkg, manifest = manifest_service.get_package_with_manifest(reliefpkg_id)
     
     return render_template('packaging/transaction_summary.html',
                          relief_pkg=relief_pkg,
-                         relief_request=relief_pkg.relief_request,
-                         items_with_batches=items_with_batches,
-                         creator=creator,
-                         approver=approver,
-                         total_items=total_items,
-                         total_batches=total_batches,
-                         warehouses_used=warehouses_used,
+                         relief_request=manifest['request'],
+                         manifest=manifest,
+                         items_with_batches=manifest['items'],
+                         total_items=manifest['totals']['total_items'],
+                         total_batches=manifest['totals']['total_batches'],
+                         warehouses_used=manifest['totals']['warehouses_used'],
                          generated_at=jamaica_now(),
                          from_tab=from_tab)
 
@@ -933,13 +849,7 @@ def pending_fulfillment():
     # Tab-specific dataset builders - each returns the EXACT dataset to be displayed
     def get_awaiting_requests():
         """Get requests awaiting to be filled (SUBMITTED status)."""
-        all_requests = ReliefRqst.query.options(
-            joinedload(ReliefRqst.agency),
-            joinedload(ReliefRqst.eligible_event),
-            joinedload(ReliefRqst.status),
-            joinedload(ReliefRqst.items),
-            joinedload(ReliefRqst.packages)
-        ).filter(
+        all_requests = ReliefRqst.query.options(*loader_options(REQUEST_QUEUE)).filter(
             ReliefRqst.status_code == rr_service.STATUS_SUBMITTED
         ).order_by(ReliefRqst.create_dtime.desc()).all()
         
@@ -954,13 +864,7 @@ def pending_fulfillment():
     
     def get_in_progress_requests():
         """Get requests being prepared (PART_FILLED status)."""
-        all_requests = ReliefRqst.query.options(
-            joinedload(ReliefRqst.agency),
-            joinedload(ReliefRqst.eligible_event),
-            joinedload(ReliefRqst.status),
-            joinedload(ReliefRqst.items),
-            joinedload(ReliefRqst.packages)
-        ).filter(
+        all_requests = ReliefRqst.query.options(*loader_options(REQUEST_QUEUE)).filter(
             ReliefRqst.status_code == rr_service.STATUS_PART_FILLED
         ).order_by(ReliefRqst.create_dtime.desc()).all()
         
@@ -975,13 +879,7 @@ def pending_fulfillment():
     
     def get_pending_approval_requests():
         """Get requests with packages awaiting LM approval."""
-        all_requests = ReliefRqst.query.options(
-            joinedload(ReliefRqst.agency),
-            joinedload(ReliefRqst.eligible_event),
-            joinedload(ReliefRqst.status),
-            joinedload(ReliefRqst.items),
-            joinedload(ReliefRqst.packages)
-        ).filter(
+        all_requests = ReliefRqst.query.options(*loader_options(REQUEST_QUEUE)).filter(
             ReliefRqst.status_code.in_([rr_service.STATUS_SUBMITTED, rr_service.STATUS_PART_FILLED])
         ).order_by(ReliefRqst.create_dtime.desc()).all()
         
@@ -995,11 +893,7 @@ def pending_fulfillment():
     
     def get_approved_packages_with_items():
         """Get approved packages WITH items allocated (total quantity > 0)."""
-        all_packages = ReliefPkg.query.options(
-            joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.agency),
-            joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.eligible_event),
-            joinedload(ReliefPkg.items).joinedload(ReliefPkgItem.item)
-        ).filter(
+        all_packages = ReliefPkg.query.options(*loader_options(PACKAGE_DISPATCH)).filter(
             ReliefPkg.status_code == rr_service.PKG_STATUS_DISPATCHED,
             ReliefPkg.received_dtime.is_(None)
         ).order_by(ReliefPkg.dispatch_dtime.desc()).all()
@@ -1017,12 +911,7 @@ def pending_fulfillment():
     
     def get_approved_packages_no_items():
         """Get approved packages WITHOUT items allocated (total quantity == 0)."""
-        all_packages = ReliefPkg.query.options(
-            joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.agency),
-            joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.eligible_event),
-            joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.items),
-            joinedload(ReliefPkg.items).joinedload(ReliefPkgItem.item)
-        ).filter(
+        all_packages = ReliefPkg.query.options(*loader_options(PACKAGE_DISPATCH_REQUEST_LINES)).filter(
             ReliefPkg.status_code == rr_service.PKG_STATUS_DISPATCHED,
             ReliefPkg.received_dtime.is_(None)
         ).order_by(ReliefPkg.dispatch_dtime.desc()).all()
@@ -1125,13 +1014,7 @@ def prepare_package(reliefrqst_id):
     if not (is_logistics_officer() or is_logistics_manager()):
         flash('Access denied. Only Logistics Officers and Managers can prepare packages.', 'danger')
         abort(403)
-    relief_request = ReliefRqst.query.options(
-        joinedload(ReliefRqst.agency),
-        joinedload(ReliefRqst.eligible_event),
-        joinedload(ReliefRqst.status),
-        joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.category),
-        joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.default_uom)
-    ).get_or_404(reliefrqst_id)
+    relief_request = ReliefRqst.query.options(*loader_options(REQUEST_LINES)).get_or_404(reliefrqst_id)
     
     if relief_request.status_code not in [rr_service.STATUS_SUBMITTED, rr_service.STATUS_PART_FILLED]:
         flash(f'Only SUBMITTED or PART FILLED requests can be packaged. Current status: {relief_request.status.status_desc}', 'danger')
@@ -1441,28 +1324,12 @@ def _submit_for_approval(relief_request, relief_request_version, package_version
         # Notify all Logistics Managers about the pending approval
         # Only send notifications if this is a NEW submission (not a resubmission)
         if not was_already_pending:
-            try:
-                from app.services.notification_service import NotificationService
-                import logging
-                logger = logging.getLogger(__name__)
-                
-                lm_users = NotificationService.get_active_users_by_role_codes(['LOGISTICS_MANAGER'])
-                logger.info(f'Found {len(lm_users)} Logistics Manager(s) to notify for relief request #{relief_request.reliefrqst_id}')
-                
-                if lm_users:
-                    preparer_name = f"{current_user.first_name} {current_user.last_name}" if current_user.first_name else current_user.email.split('@')[0]
-                    notifications = NotificationService.create_package_ready_for_approval_notification(
-                        relief_pkg=relief_pkg,
-                        recipient_users=lm_users,
-                        preparer_name=preparer_name
-                    )
-                    logger.info(f'Created {len(notifications)} notification(s) for LM approval of relief request #{relief_request.reliefrqst_id}')
-                else:
-                    logger.warning(f'No Logistics Managers found to notify for relief request #{relief_request.reliefrqst_id}')
-            except Exception as e:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f'Failed to send LM approval notification: {str(e)}', exc_info=True)
+            preparer_name = f"{current_user.first_name} {current_user.last_name}" if current_user.first_name else current_user.email.split('@')[0]
+            outbox.enqueue(
+                outbox.EVENT_PACKAGE_READY_FOR_APPROVAL,
+                {'reliefpkg_id': relief_pkg.reliefpkg_id, 'preparer_name': preparer_name},
+                f"{outbox.EVENT_PACKAGE_READY_FOR_APPROVAL}:{relief_pkg.reliefpkg_id}:{relief_pkg.version_nbr}"
+            )
         
         db.session.commit()
         
@@ -1520,37 +1387,22 @@ def _send_for_dispatch(relief_request, relief_request_version, package_version):
         if not success:
             raise ValueError(f'Inventory commit failed: {error_msg}')
         
+        # Snapshot the dispatched contents for the summary, dispatch slip and handover pages
+        manifest_service.create_manifest(relief_pkg, current_user.user_name)
+        
         # Update relief request status
         relief_request.action_by_id = current_user.user_name
         relief_request.action_dtime = jamaica_now()
         relief_request.status_code = rr_service.STATUS_PART_FILLED
         relief_request.version_nbr += 1
         
-        # Notify agency users and logistics managers about dispatch
-        try:
-            from app.services.notification_service import NotificationService
-            
-            # Notify agency users
-            agency_users = []
-            if relief_request.agency_id:
-                agency_users = NotificationService.get_agency_active_users(relief_request.agency_id)
-            
-            # Optionally notify logistics managers
-            lm_users = NotificationService.get_active_users_by_role_codes(['LOGISTICS_MANAGER'])
-            
-            all_recipients = agency_users + lm_users
-            dispatcher_name = f"{current_user.first_name} {current_user.last_name}" if current_user.first_name else current_user.email.split('@')[0]
-            
-            NotificationService.create_package_dispatched_notification(
-                relief_pkg=relief_pkg,
-                recipient_users=all_recipients,
-                dispatcher_name=dispatcher_name
-            )
-        except Exception as e:
-            # Don't fail dispatch if notification fails
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f'Failed to send dispatch notification: {str(e)}')
+        # Queue notifications for agency users and logistics managers about dispatch
+        dispatcher_name = f"{current_user.first_name} {current_user.last_name}" if current_user.first_name else current_user.email.split('@')[0]
+        outbox.enqueue(
+            outbox.EVENT_PACKAGE_DISPATCHED,
+            {'reliefpkg_id': relief_pkg.reliefpkg_id, 'dispatcher_name': dispatcher_name},
+            f"{outbox.EVENT_PACKAGE_DISPATCHED}:{relief_pkg.reliefpkg_id}:{relief_request.version_nbr}"
+        )
         
         db.session.commit()
         
@@ -1895,8 +1747,81 @@ def get_inventory(item_id, warehouse_id):
         })
 
 
+def _format_drawer_batches(item, limited_batches, total_available, shortfall, current_allocations):
+    """
+    Build the batch drawer payload for one item: batches with priority groups
+    plus totals. Shared by the single-item and whole-request batch endpoints.
+    """
+    # Assign priority groups
+    batch_groups = BatchAllocationService.assign_priority_groups(limited_batches, item)
+    
+    # Format batches with priority groups
+    result = []
+    for batch, priority_group in batch_groups:
+        # Calculate available_qty: release current package's allocations from reserved_qty
+        released_qty = current_allocations.get(batch.batch_id, Decimal('0'))
+        available_qty = safe_decimal(batch.usable_qty) - (safe_decimal(batch.reserved_qty) - released_qty)
+        
+        # SQL drawer mode returns lightweight rows that carry the warehouse columns directly
+        if isinstance(batch, ItemBatch):
+            warehouse_id = batch.inventory.inventory_id
+            warehouse_name = batch.inventory.warehouse.warehouse_name
+            is_expired = batch.is_expired
+        else:
+            warehouse_id = batch.warehouse_id
+            warehouse_name = batch.warehouse_name
+            is_expired = bool(batch.expiry_date and batch.expiry_date < date.today())
+        
+        result.append({
+            'batch_id': batch.batch_id,
+            'batch_no': batch.batch_no,
+            'batch_date': batch.batch_date.isoformat() if batch.batch_date else None,
+            'expiry_date': batch.expiry_date.isoformat() if batch.expiry_date else None,
+            'warehouse_id': warehouse_id,
+            'warehouse_name': warehouse_name,
+            'inventory_id': batch.inventory_id,
+            'usable_qty': float(safe_decimal(batch.usable_qty)),
+            'reserved_qty': float(safe_decimal(batch.reserved_qty)),
+            'available_qty': float(available_qty),
+            'defective_qty': float(safe_decimal(batch.defective_qty)),
+            'expired_qty': float(safe_decimal(batch.expired_qty)),
+            'uom_code': batch.uom_code,
+            'size_spec': batch.size_spec,
+            'is_expired': is_expired,
+            'status_code': batch.status_code,
+            'priority_group': priority_group
+        })
+    
+    return {
+        'item_id': item.item_id,
+        'item_name': item.item_name,
+        'is_batched': item.is_batched_flag,
+        'can_expire': item.can_expire_flag,
+        'issuance_order': item.issuance_order,
+        'batches': result,
+        'total_available': float(safe_decimal(total_available)),
+        'shortfall': float(safe_decimal(shortfall)),
+        'can_fulfill': safe_decimal(shortfall) == 0
+    }
+
+
+def _item_batches_version(item_id):
+    """
+    ETag validator for get_item_batches: versions of the item, its batches and
+    inventory rows, and warehouses. Includes today's date because expired
+    batches drop out of the drawer.
+    """
+    return fetch_versions(
+        version_aggregate(Item, Item.item_id == item_id),
+        version_aggregate(ItemBatch, ItemBatch.item_id == item_id),
+        version_aggregate(Inventory, Inventory.item_id == item_id),
+        version_aggregate(Warehouse)
+    ) + (date.today(),)
+
+
 @packaging_bp.route('/api/item/<int:item_id>/batches')
 @login_required
+@etag_validated(_item_batches_version)
 def get_item_batches(item_id):
     """
     API endpoint to get available batches for an item.
@@ -1937,7 +1862,12 @@ def get_item_batches(item_id):
         # Use new method to get limited batches if remaining_qty provided
         # Include remaining_qty=0 case for editing existing allocations
         if remaining_qty is not None:
-            limited_batches, total_available, shortfall = BatchAllocationService.get_limited_batches_for_drawer(
+            if current_app.config.get('DRAWER_QUERY_MODE') == 'sql':
+                get_drawer_batches = BatchAllocationService.get_limited_batches_for_drawer_sql
+            else:
+                get_drawer_batches = BatchAllocationService.get_limited_batches_for_drawer
+            
+            limited_batches, total_available, shortfall = get_drawer_batches(
                 item_id,
                 safe_decimal(remaining_qty),
                 required_uom,
@@ -1945,54 +1875,19 @@ def get_item_batches(item_id):
                 current_allocations
             )
             
-            # Debug logging
-            print(f"DEBUG get_item_batches: item_id={item_id}, remaining_qty={remaining_qty}")
-            print(f"DEBUG get_item_batches: allocated_batch_ids={allocated_batch_ids}")
-            print(f"DEBUG get_item_batches: limited_batches count={len(limited_batches)}")
-            print(f"DEBUG get_item_batches: total_available={total_available}, shortfall={shortfall}")
-            
-            # Assign priority groups
-            batch_groups = BatchAllocationService.assign_priority_groups(limited_batches, item)
-            
-            # Format batches with priority groups
-            result = []
-            for batch, priority_group in batch_groups:
-                # Calculate available_qty: release current package's allocations from reserved_qty
-                released_qty = current_allocations.get(batch.batch_id, Decimal('0'))
-                available_qty = safe_decimal(batch.usable_qty) - (safe_decimal(batch.reserved_qty) - released_qty)
-                batch_info = {
-                    'batch_id': batch.batch_id,
-                    'batch_no': batch.batch_no,
-                    'batch_date': batch.batch_date.isoformat() if batch.batch_date else None,
-                    'expiry_date': batch.expiry_date.isoformat() if batch.expiry_date else None,
-                    'warehouse_id': batch.inventory.inventory_id,
-                    'warehouse_name': batch.inventory.warehouse.warehouse_name,
-                    'inventory_id': batch.inventory_id,
-                    'usable_qty': float(safe_decimal(batch.usable_qty)),
-                    'reserved_qty': float(safe_decimal(batch.reserved_qty)),
-                    'available_qty': float(available_qty),
-                    'defective_qty': float(safe_decimal(batch.defective_qty)),
-                    'expired_qty': float(safe_decimal(batch.expired_qty)),
-                    'uom_code': batch.uom_code,
-                    'size_spec': batch.size_spec,
-                    'is_expired': batch.is_expired,
-                    'status_code': batch.status_code,
-                    'priority_group': priority_group
-                }
-                result.append(batch_info)
-                print(f"DEBUG batch: {batch.batch_id} ({batch.batch_no}) - warehouse={batch_info['warehouse_name']}, expiry={batch_info['expiry_date']}, batch_date={batch_info['batch_date']}, available={available_qty}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug('Drawer batches loaded', extra={
+                    'item_id': item_id,
+                    'remaining_qty': remaining_qty,
+                    'allocated_batch_ids': allocated_batch_ids,
+                    'batch_count': len(limited_batches),
+                    'total_available': total_available,
+                    'shortfall': shortfall
+                })
             
-            return jsonify({
-                'item_id': item_id,
-                'item_name': item.item_name,
-                'is_batched': item.is_batched_flag,
-                'can_expire': item.can_expire_flag,
-                'issuance_order': item.issuance_order,
-                'batches': result,
-                'total_available': float(safe_decimal(total_available)),
-                'shortfall': float(safe_decimal(shortfall)),
-                'can_fulfill': safe_decimal(shortfall) == 0
-            })
+            return jsonify(_format_drawer_batches(
+                item, limited_batches, total_available, shortfall, current_allocations
+            ))
         else:
             # Legacy mode: return all batches grouped by warehouse (for backward compatibility)
             warehouse_batches = BatchAllocationService.get_batches_by_warehouse(item_id)
@@ -2034,6 +1929,97 @@ def get_item_batches(item_id):
         return jsonify({'error': str(e)}), 500
 
 
+@packaging_bp.route('/api/request/<int:reliefrqst_id>/batches', methods=['POST'])
+@login_required
+def get_request_batches(reliefrqst_id):
+    """
+    API endpoint returning batch drawer data for every line of a relief request
+    in one call. Items and batches are loaded once for all lines.
+    
+    Expected JSON payload:
+    {
+        "lines": [
+            {
+                "item_id": 1,
+                "remaining_qty": 100,
+                "required_uom": "EA",             # optional
+                "allocated_batch_ids": [10, 11],  # optional
+                "current_allocations": {"10": 5}  # optional, batch_id -> qty
+            },
+            ...
+        ]
+    }
+    
+    Returns {"reliefrqst_id": ..., "items": {"<item_id>": <same payload as /api/item/<id>/batches>}}
+    """
+    from app.core.rbac import is_logistics_officer, is_logistics_manager
+    if not (is_logistics_officer() or is_logistics_manager()):
+        return jsonify({'error': 'Access denied'}), 403
+    
+    try:
+        relief_request = ReliefRqst.query.options(
+            joinedload(ReliefRqst.items)
+        ).get(reliefrqst_id)
+        if not relief_request:
+            return jsonify({'error': 'Relief request not found'}), 404
+        
+        request_item_ids = {item.item_id for item in relief_request.items}
+        data = request.get_json(silent=True) or {}
+        
+        lines = []
+        for line in data.get('lines') or []:
+            try:
+                item_id = int(line.get('item_id'))
+                allocated_batch_ids = [int(bid) for bid in (line.get('allocated_batch_ids') or [])]
+                current_allocations = {
+                    int(k): safe_decimal(v) for k, v in (line.get('current_allocations') or {}).items()
+                }
+            except (TypeError, ValueError, AttributeError):
+                return jsonify({'error': 'Invalid line in request payload'}), 400
+            
+            # Only lines that belong to this request can be queried
+            if item_id not in request_item_ids:
+                continue
+            
+            lines.append({
+                'item_id': item_id,
+                'remaining_qty': safe_decimal(line.get('remaining_qty')),
+                'required_uom': line.get('required_uom') or None,
+                'allocated_batch_ids': allocated_batch_ids,
+                'current_allocations': current_allocations
+            })
+        
+        drawer_data = BatchAllocationService.get_drawer_batches_for_request(lines)
+        
+        items = {}
+        for line in lines:
+            line_data = drawer_data.get(line['item_id'])
+            if not line_data:
+                continue
+            items[str(line['item_id'])] = _format_drawer_batches(
+                line_data['item'],
+                line_data['batches'],
+                line_data['total_available'],
+                line_data['shortfall'],
+                line['current_allocations']
+            )
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Request drawer batches loaded', extra={
+                'reliefrqst_id': reliefrqst_id,
+                'line_count': len(lines),
+                'item_count': len(items)
+            })
+        
+        return jsonify({
+            'reliefrqst_id': reliefrqst_id,
+            'items': items
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @packaging_bp.route('/api/item/<int:item_id>/auto-allocate', methods=['POST'])
 @login_required
 def auto_allocate_item(item_id):
@@ -2077,8 +2063,134 @@ def auto_allocate_item(item_id):
         return jsonify({'error': str(e)}), 500
 
 
+@packaging_bp.route('/api/request/<int:reliefrqst_id>/auto-allocate', methods=['POST'])
+@login_required
+def auto_allocate_request(reliefrqst_id):
+    """
+    API endpoint to auto-allocate every line of a relief request in one call.
+    Returns a complete plan that minimizes the number of source warehouses.
+
+    Optional JSON payload (defaults to all non-denied request lines):
+    {
+        "lines": {"<item_id>": 100, ...},
+        "required_uoms": {"<item_id>": "EA", ...}   # optional, defaults to the item's UOM
+    }
+    """
+    from app.core.rbac import is_logistics_officer, is_logistics_manager
+    if not (is_logistics_officer() or is_logistics_manager()):
+        return jsonify({'error': 'Access denied'}), 403
+
+    try:
+        relief_request = ReliefRqst.query.options(
+            joinedload(ReliefRqst.items)
+        ).get(reliefrqst_id)
+        if not relief_request:
+            return jsonify({'error': 'Relief request not found'}), 404
+
+        if relief_request.status_code not in [rr_service.STATUS_SUBMITTED, rr_service.STATUS_PART_FILLED]:
+            return jsonify({'error': 'Only SUBMITTED or PART FILLED requests can be packaged'}), 400
+
+        data = request.get_json(silent=True) or {}
+        request_items = {item.item_id: item for item in relief_request.items}
+
+        payload_lines = data.get('lines') or {}
+        payload_uoms = data.get('required_uoms') or {}
+        if not isinstance(payload_lines, dict) or not isinstance(payload_uoms, dict):
+            return jsonify({'error': 'lines and required_uoms must be objects keyed by item_id'}), 400
+        try:
+            payload_lines = {int(item_id): qty for item_id, qty in payload_lines.items()}
+            required_uoms = {int(item_id): uom for item_id, uom in payload_uoms.items()}
+        except (TypeError, ValueError):
+            return jsonify({'error': 'lines and required_uoms must be keyed by numeric item_id'}), 400
+
+        if payload_lines:
+            lines = {
+                item_id: safe_decimal(qty)
+                for item_id, qty in payload_lines.items()
+                if item_id in request_items
+            }
+        else:
+            lines = {
+                item.item_id: safe_decimal(item.request_qty)
+                for item in relief_request.items
+                if item.status_code != 'D'
+            }
+
+        # Release this request's own draft allocations so they can be re-planned
+        current_allocations = {}
+        existing_package = ReliefPkg.query.filter_by(
+            reliefrqst_id=reliefrqst_id,
+            status_code=rr_service.PKG_STATUS_PENDING
+        ).first()
+        if existing_package:
+            for pkg_item in ReliefPkgItem.query.filter_by(reliefpkg_id=existing_package.reliefpkg_id).all():
+                item_allocations = current_allocations.setdefault(pkg_item.item_id, {})
+                item_allocations[pkg_item.batch_id] = (
+                    item_allocations.get(pkg_item.batch_id, Decimal('0')) + safe_decimal(pkg_item.item_qty)
+                )
+
+        plan = BatchAllocationService.auto_allocate_request(lines, current_allocations, required_uoms)
+
+        for line in plan['lines']:
+            for allocation in line['allocations']:
+                if allocation.get('batch_date'):
+                    allocation['batch_date'] = allocation['batch_date'].isoformat()
+                if allocation.get('expiry_date'):
+                    allocation['expiry_date'] = allocation['expiry_date'].isoformat()
+
+        plan['reliefrqst_id'] = reliefrqst_id
+        return jsonify(plan)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@packaging_bp.route('/api/fair-share-plan')
+@login_required
+def fair_share_plan():
+    """
+    API endpoint returning an event-wide fair-share plan for all SUBMITTED requests.
+    Divides scarce stock across requests instead of first-come-first-served.
+
+    Query parameters:
+        event_id: Optional event filter
+        mode: 'proportional' (default) or 'urgency' (weighted by urgency_ind)
+    """
+    from app.core.rbac import is_logistics_manager
+    from app.services import fair_share_service
+
+    if not is_logistics_manager():
+        return jsonify({'error': 'Access denied'}), 403
+
+    event_id = request.args.get('event_id', type=int)
+    mode = request.args.get('mode', fair_share_service.MODE_PROPORTIONAL)
+    if mode not in (fair_share_service.MODE_PROPORTIONAL, fair_share_service.MODE_URGENCY):
+        return jsonify({'error': f'Invalid mode: {mode}'}), 400
+
+    try:
+        plan = fair_share_service.build_plan(event_id, mode)
+        result = fair_share_service.plan_to_dict(plan)
+        result.update({'event_id': event_id, 'mode': mode})
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _batch_details_version(batch_id):
+    """ETag validator for get_batch_details: the batch, its item and warehouse"""
+    batch_item_id = select(ItemBatch.item_id).where(ItemBatch.batch_id == batch_id).scalar_subquery()
+    batch_warehouse_id = select(ItemBatch.inventory_id).where(ItemBatch.batch_id == batch_id).scalar_subquery()
+    return fetch_versions(
+        version_aggregate(ItemBatch, ItemBatch.batch_id == batch_id),
+        version_aggregate(Item, Item.item_id == batch_item_id),
+        version_aggregate(Warehouse, Warehouse.warehouse_id == batch_warehouse_id)
+    ) + (date.today(),)
+
+
 @packaging_bp.route('/api/batch/<int:batch_id>')
 @login_required
+@etag_validated(_batch_details_version)
 def get_batch_details(batch_id):
     """API endpoint to get detailed information about a specific batch"""
     try:
@@ -2133,11 +2245,7 @@ def awaiting_dispatch():
     # Filter to show only packages with items from clerk's warehouse(s)
     from sqlalchemy import func, exists
     
-    base_query = db.session.query(ReliefPkg).options(
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.agency),
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.eligible_event),
-        joinedload(ReliefPkg.items)
-    ).join(ReliefRqst).filter(
+    base_query = db.session.query(ReliefPkg).options(*loader_options(PACKAGE_DISPATCH)).join(ReliefRqst).filter(
         ReliefPkg.status_code == rr_service.PKG_STATUS_DISPATCHED,
         # Only show packages with items from clerk's warehouses
         exists().where(
@@ -2214,47 +2322,28 @@ def dispatch_details(reliefpkg_id):
         flash('You have not been assigned to any warehouses.', 'warning')
         return redirect(url_for('packaging.awaiting_dispatch'))
     
-    # Load package with all necessary relationships
-    relief_pkg = ReliefPkg.query.options(
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.agency),
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.eligible_event),
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item),
-        joinedload(ReliefPkg.items).joinedload(ReliefPkgItem.item),
-        joinedload(ReliefPkg.items).joinedload(ReliefPkgItem.batch)
-    ).get_or_404(reliefpkg_id)
+    # Load package and its dispatch manifest in one lookup
+    relief_pkg, manifest = manifest_service.get_package_with_manifest(reliefpkg_id)
     
     # Verify package is dispatched
     if relief_pkg.status_code != rr_service.PKG_STATUS_DISPATCHED:
         flash('This package is not in dispatched status.', 'warning')
         return redirect(url_for('packaging.awaiting_dispatch'))
     
-    # Filter items to only those from clerk's warehouses
-    warehouse_items = [item for item in relief_pkg.items if item.fr_inventory_id in user_warehouse_ids]
+    # Only the sections for the clerk's warehouses
+    sections = manifest_service.warehouse_sections(manifest, user_warehouse_ids)
     
-    if not warehouse_items:
+    if not sections:
         flash('This package has no items allocated from your assigned warehouses.', 'warning')
         return redirect(url_for('packaging.awaiting_dispatch'))
     
-    # Group items by warehouse for display
-    from collections import defaultdict
-    items_by_warehouse = defaultdict(list)
-    for item in warehouse_items:
-        items_by_warehouse[item.fr_inventory_id].append(item)
-    
-    # Get warehouse objects
-    warehouses = {w.warehouse_id: w for w in Warehouse.query.filter(
-        Warehouse.warehouse_id.in_(user_warehouse_ids)
-    ).all()}
-    
     # Check if print mode
     print_mode = request.args.get('print', '0') == '1'
     
     return render_template('packaging/dispatch_details.html',
                          relief_pkg=relief_pkg,
-                         relief_request=relief_pkg.relief_request,
-                         warehouse_items=warehouse_items,
-                         items_by_warehouse=items_by_warehouse,
-                         warehouses=warehouses,
+                         relief_request=manifest['request'],
+                         warehouse_sections=sections,
                          print_mode=print_mode)
 
 
@@ -2267,7 +2356,6 @@ def mark_handover(reliefpkg_id):
     Updates status, triggers notifications to LO/LM.
     """
     from app.core.rbac import has_role
-    from app.services.notification_service import NotificationService
     
     if not has_role('INVENTORY_CLERK'):
         flash('Access denied. Only Inventory Clerks can mark handovers.', 'danger')
@@ -2280,11 +2368,8 @@ def mark_handover(reliefpkg_id):
         flash('You have not been assigned to any warehouses.', 'warning')
         return redirect(url_for('packaging.awaiting_dispatch'))
     
-    # Load package
-    relief_pkg = ReliefPkg.query.options(
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.agency),
-        joinedload(ReliefPkg.items)
-    ).get_or_404(reliefpkg_id)
+    # Load package and its dispatch manifest in one lookup
+    relief_pkg, manifest = manifest_service.get_package_with_manifest(reliefpkg_id)
     
     # Verify package is dispatched and not already handed over
     if relief_pkg.status_code != rr_service.PKG_STATUS_DISPATCHED:
@@ -2296,9 +2381,7 @@ def mark_handover(reliefpkg_id):
         return redirect(url_for('packaging.dispatch_details', reliefpkg_id=reliefpkg_id))
     
     # Verify clerk has items from their warehouse in this package
-    warehouse_items = [item for item in relief_pkg.items if item.fr_inventory_id in user_warehouse_ids]
-    
-    if not warehouse_items:
+    if not manifest_service.warehouse_sections(manifest, user_warehouse_ids):
         flash('This package has no items from your assigned warehouses.', 'warning')
         return redirect(url_for('packaging.awaiting_dispatch'))
     
@@ -2312,45 +2395,17 @@ def mark_handover(reliefpkg_id):
         # Note: Status remains 'D' (Dispatched). We use received_dtime to track handover.
         # Status changes to 'C' (Completed) when agency signs off, if needed.
         
-        db.session.commit()
+        # Queue notifications to LO and LM
+        outbox.enqueue(
+            outbox.EVENT_PACKAGE_HANDOVER,
+            {'reliefpkg_id': relief_pkg.reliefpkg_id, 'warehouse_ids': user_warehouse_ids},
+            f"{outbox.EVENT_PACKAGE_HANDOVER}:{relief_pkg.reliefpkg_id}"
+        )
         
-        # Send notifications to LO and LM
-        try:
-            # Get all logistics officers and managers
-            lo_users = User.query.filter(User.roles.like('%LOGISTICS_OFFICER%')).all()
-            lm_users = User.query.filter(User.roles.like('%LOGISTICS_MANAGER%')).all()
-            all_recipients = lo_users + lm_users
-            
-            if all_recipients:
-                # Get warehouse names for notification
-                warehouse_names = [w.warehouse_name for w in Warehouse.query.filter(
-                    Warehouse.warehouse_id.in_(user_warehouse_ids)
-                ).all()]
-                warehouse_list = ', '.join(warehouse_names)
-                
-                agency_name = relief_pkg.relief_request.agency.agency_name if relief_pkg.relief_request.agency else 'Unknown Agency'
-                
-                for user in all_recipients:
-                    notification = Notification(
-                        user_id=user.user_id,
-                        reliefrqst_id=relief_pkg.reliefrqst_id,
-                        title='Package Handed Over to Agency',
-                        message=f'Package for {agency_name} (RR-{relief_pkg.reliefrqst_id:06d}) has been handed over from warehouse: {warehouse_list}',
-                        type='package_handover',
-                        status='unread',
-                        link_url=url_for('packaging.dispatch_received_details', reliefpkg_id=relief_pkg.reliefpkg_id, _external=False),
-                        is_archived=False
-                    )
-                    db.session.add(notification)
-                
-                db.session.commit()
-        except Exception as e:
-            # Log error but don't fail the handover
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f'Failed to send handover notification: {str(e)}')
+        db.session.commit()
         
-        flash(f'Package successfully marked as handed over to {relief_pkg.relief_request.agency.agency_name if relief_pkg.relief_request.agency else "agency"}.', 'success')
+        agency = manifest['request']['agency']
+        flash(f'Package successfully marked as handed over to {agency["agency_name"] if agency else "agency"}.', 'success')
         return redirect(url_for('packaging.awaiting_dispatch', filter='completed'))
         
     except Exception as e:
@@ -2379,12 +2434,7 @@ def dispatch_received():
     current_filter = request.args.get('filter', 'recent')
     
     # Query packages that have been handed over (have received_dtime)
-    base_query = db.session.query(ReliefPkg).options(
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.agency),
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.eligible_event),
-        joinedload(ReliefPkg.items).joinedload(ReliefPkgItem.item),
-        joinedload(ReliefPkg.items).joinedload(ReliefPkgItem.batch)
-    ).join(ReliefRqst).filter(
+    base_query = db.session.query(ReliefPkg).options(*loader_options(PACKAGE_DISPATCH)).join(ReliefRqst).filter(
         ReliefPkg.status_code == rr_service.PKG_STATUS_DISPATCHED,
         ReliefPkg.received_dtime != None  # Has been handed over
     )
@@ -2446,35 +2496,15 @@ def dispatch_received_details(reliefpkg_id):
         flash('Access denied. This page is for Logistics Officers and Managers only.', 'danger')
         abort(403)
     
-    # Load package with all relationships
-    relief_pkg = ReliefPkg.query.options(
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.agency),
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.eligible_event),
-        joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item),
-        joinedload(ReliefPkg.items).joinedload(ReliefPkgItem.item),
-        joinedload(ReliefPkg.items).joinedload(ReliefPkgItem.batch)
-    ).get_or_404(reliefpkg_id)
+    # Load package and its dispatch manifest in one lookup
+    relief_pkg, manifest = manifest_service.get_package_with_manifest(reliefpkg_id)
     
     # Verify package has been handed over
     if not relief_pkg.received_dtime:
         flash('This package has not been handed over yet.', 'warning')
         return redirect(url_for('packaging.dispatch_received'))
     
-    # Group items by warehouse
-    from collections import defaultdict
-    items_by_warehouse = defaultdict(list)
-    for item in relief_pkg.items:
-        if item.fr_inventory_id:
-            items_by_warehouse[item.fr_inventory_id].append(item)
-    
-    # Get warehouse objects
-    warehouse_ids = set(item.fr_inventory_id for item in relief_pkg.items if item.fr_inventory_id)
-    warehouses = {w.warehouse_id: w for w in Warehouse.query.filter(
-        Warehouse.warehouse_id.in_(warehouse_ids)
-    ).all()} if warehouse_ids else {}
-    
     return render_template('packaging/dispatch_received_details.html',
                          relief_pkg=relief_pkg,
-                         relief_request=relief_pkg.relief_request,
-                         items_by_warehouse=items_by_warehouse,
-                         warehouses=warehouses)
+                         relief_request=manifest['request'],
+                         warehouse_sections=manifest['warehouses'])
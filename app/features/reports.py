@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, Response
 from flask_login import login_required
 from sqlalchemy import func
 from app.db.models import db, Inventory, Item, Warehouse, Event, Donor, Donation, DonationIntakeItem
+from app.db.routing import read_only
 from datetime import datetime
 import csv
 from io import StringIO
@@ -11,11 +12,13 @@ reports_bp = Blueprint('reports', __name__)
 
 @reports_bp.route('/')
 @login_required
+@read_only
 def index():
     return render_template('reports/index.html')
 
 @reports_bp.route('/inventory_summary')
 @login_required
+@read_only
 def inventory_summary():
     summary = db.session.query(
         Warehouse.warehouse_name,
@@ -36,6 +39,7 @@ def inventory_summary():
 
 @reports_bp.route('/inventory_summary/export')
 @login_required
+@read_only
 def export_inventory():
     summary = db.session.query(
         Warehouse.warehouse_name,
@@ -72,6 +76,7 @@ def export_inventory():
 
 @reports_bp.route('/donations_summary')
 @login_required
+@read_only
 def donations_summary():
     # Calculate total value from DonationIntakeItem (quantity * unit value)
     donations = db.session.query(
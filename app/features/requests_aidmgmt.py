@@ -10,6 +10,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.db import db
 from app.db.models import ReliefRqst, ReliefRqstItem, Agency, Item, Event, UnitOfMeasure
+from app.db.loader_profiles import loader_options, REQUEST_LINES
 from app.core.rbac import agency_user_required, is_admin, is_logistics_manager, is_logistics_officer, can_access_relief_request, is_director_level
 from app.core.decorators import feature_required
 from app.core.exceptions import OptimisticLockError
@@ -42,18 +43,10 @@ def list_requests():
     # Base query with eager loading
     if is_logistics_manager() or is_logistics_officer() or is_director_level():
         # Logistics users and director-level executives see all requests
-        base_query = ReliefRqst.query.options(
-            db.joinedload(ReliefRqst.agency),
-            db.joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.default_uom),
-            db.joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.category)
-        )
+        base_query = ReliefRqst.query.options(*loader_options(REQUEST_LINES))
     elif current_user.agency_id:
         # Agency users see only their agency's requests
-        base_query = ReliefRqst.query.filter_by(agency_id=current_user.agency_id).options(
-            db.joinedload(ReliefRqst.agency),
-            db.joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.default_uom),
-            db.joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.category)
-        )
+        base_query = ReliefRqst.query.filter_by(agency_id=current_user.agency_id).options(*loader_options(REQUEST_LINES))
     else:
         # User has no agency and no logistics role - should not happen
         flash('You do not have permission to view relief requests.', 'danger')
@@ -168,11 +161,7 @@ def create_request():
 @login_required
 def view_request(request_id):
     """View relief request details"""
-    relief_request = ReliefRqst.query.options(
-        db.joinedload(ReliefRqst.agency),
-        db.joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.default_uom),
-        db.joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.category)
-    ).get(request_id)
+    relief_request = ReliefRqst.query.options(*loader_options(REQUEST_LINES)).get(request_id)
     
     if not relief_request:
         abort(404)
@@ -245,11 +234,7 @@ def view_request(request_id):
 @login_required
 def edit_request(request_id):
     """Edit relief request header (only for drafts)"""
-    relief_request = ReliefRqst.query.options(
-        db.joinedload(ReliefRqst.agency),
-        db.joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.default_uom),
-        db.joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.category)
-    ).get(request_id)
+    relief_request = ReliefRqst.query.options(*loader_options(REQUEST_LINES)).get(request_id)
     
     if not relief_request:
         abort(404)
@@ -32,6 +32,7 @@ import re
 from app.db import db
 from app.db.models import Warehouse, Parish, Custodian
 from app.core.decorators import feature_required
+from app.db.routing import read_only
 from app.core.audit import add_audit_fields
 from app.core.phone_utils import validate_phone_format, get_phone_validation_error, PHONE_FORMAT_EXAMPLE
 
@@ -166,6 +167,7 @@ def validate_warehouse_data(form_data, is_update=False, warehouse_id=None):
 @warehouses_bp.route('/')
 @login_required
 @feature_required('warehouse_management')
+@read_only
 def list_warehouses():
     """List all warehouses with filtering and summary counts"""
     # Get filter parameters
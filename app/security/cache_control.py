@@ -6,6 +6,15 @@ from flask import request
 from flask_login import current_user
 
 
+# Cache-Control for responses that carry a validator (ETag): the browser may keep
+# a private copy but must revalidate it with the server before every use
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+
+# Cache-Control for fingerprinted static files (app/core/static_assets.py): the
+# name changes whenever the content does, so a copy never needs revalidating
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
 def should_apply_no_cache(response):
     """
     Determine if no-cache headers should be applied to this response
@@ -64,6 +73,9 @@ def add_no_cache_headers(response):
     Returns:
         Modified response with cache-control headers
     """
+    if getattr(response, 'allow_revalidation', False):
+        return response
+    
     if should_apply_no_cache(response):
         response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate'
         response.headers['Pragma'] = 'no-cache'
@@ -72,6 +84,25 @@ def add_no_cache_headers(response):
     return response
 
 
+def allow_revalidation(response):
+    """
+    Use private revalidation instead of no-store for a response with an ETag
+    (see app/core/etag.py). Nothing is cached without a round trip to the
+    server; an unchanged resource is answered with an empty 304.
+    
+    Args:
+        response: Flask response object carrying an ETag
+        
+    Returns:
+        The response, exempt from add_no_cache_headers
+    """
+    response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+    response.headers['Pragma'] = 'no-cache'
+    response.headers['Expires'] = '0'
+    response.allow_revalidation = True
+    return response
+
+
 def init_cache_control(app):
     """
     Initialize cache-control middleware for Flask application
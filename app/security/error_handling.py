@@ -2,19 +2,22 @@
 Error Handling and Logging Configuration for DMIS
 Provides production-safe error pages and comprehensive server-side logging
 """
-import logging
-import sys
 from flask import render_template, request
 from werkzeug.exceptions import HTTPException
 from flask_wtf.csrf import CSRFError
 
+from app.core.structured_logging import init_logging
+
 
 def configure_logging(app):
     """
     Configure application logging for production and development
     
+    All records go through the non-blocking pipeline in
+    app/core/structured_logging.py: JSON lines in production, readable
+    lines in development, each tagged with the request and user ID.
+    
     In production (DEBUG=False):
-    - Errors logged to stderr and optionally to file
     - Detailed stack traces logged server-side only
     - Never shown to users
     
@@ -25,22 +28,9 @@ def configure_logging(app):
     Args:
         app: Flask application instance
     """
+    init_logging(app)
+    
     if not app.debug and not app.testing:
-        if app.config.get('LOG_TO_STDOUT'):
-            stream_handler = logging.StreamHandler(sys.stdout)
-            stream_handler.setLevel(logging.INFO)
-        else:
-            stream_handler = logging.StreamHandler(sys.stderr)
-            stream_handler.setLevel(logging.ERROR)
-        
-        formatter = logging.Formatter(
-            '[%(asctime)s] %(levelname)s in %(module)s: %(message)s'
-        )
-        stream_handler.setFormatter(formatter)
-        
-        app.logger.addHandler(stream_handler)
-        app.logger.setLevel(logging.INFO)
-        
         app.logger.info('DMIS application startup (Production Mode)')
     else:
         app.logger.info('DMIS application startup (Development Mode)')
@@ -7,7 +7,7 @@ First In First Out (FIFO) for non-expirable items based on item configuration.
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
 from typing import List, Dict, Tuple, Optional
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, case, false, func, literal, select
 from sqlalchemy.orm import joinedload
 
 from app.db import db
@@ -289,6 +289,233 @@ class BatchAllocationService:
         
         return allocations
     
+    @staticmethod
+    def get_available_batches_for_items(
+        item_ids: List[int],
+        include_batch_ids: List[int] = None
+    ) -> Dict[int, List[ItemBatch]]:
+        """
+        Get available batches for several items in a single query.
+
+        Args:
+            item_ids: Items to get batches for
+            include_batch_ids: Batch IDs to include even if they have no free quantity
+                               (e.g. batches already allocated to the package being edited)
+
+        Returns:
+            Dict mapping item_id to list of ItemBatch objects
+        """
+        batches_by_item = {item_id: [] for item_id in item_ids}
+        if not item_ids:
+            return batches_by_item
+
+        has_free_qty = ItemBatch.usable_qty > ItemBatch.reserved_qty
+        if include_batch_ids:
+            has_free_qty = or_(has_free_qty, ItemBatch.batch_id.in_(list(include_batch_ids)))
+
+        batches = ItemBatch.query.options(
+            joinedload(ItemBatch.inventory).joinedload(Inventory.warehouse)
+        ).join(
+            Inventory,
+            and_(
+                ItemBatch.inventory_id == Inventory.inventory_id,
+                ItemBatch.item_id == Inventory.item_id
+            )
+        ).join(
+            Warehouse,
+            Inventory.inventory_id == Warehouse.warehouse_id
+        ).filter(
+            ItemBatch.item_id.in_(list(item_ids)),
+            ItemBatch.status_code == 'A',
+            Inventory.status_code == 'A',
+            Warehouse.status_code == 'A',
+            has_free_qty
+        ).all()
+
+        for batch in batches:
+            batches_by_item[batch.item_id].append(batch)
+
+        return batches_by_item
+
+    @staticmethod
+    def auto_allocate_request(
+        lines: Dict[int, Decimal],
+        current_allocations: Dict[int, Dict[int, Decimal]] = None,
+        required_uoms: Dict[int, str] = None
+    ) -> Dict:
+        """
+        Auto-allocate every line of a relief request at once, preferring plans
+        that draw from as few warehouses as possible.
+
+        All candidate batches are loaded in one query. Warehouses are then picked
+        greedily: each round takes the warehouse that fully covers the most
+        outstanding lines (then the largest share of outstanding quantity), and
+        allocates from it in the item's FEFO/FIFO/LIFO order. Rounds continue until
+        every line is covered or no warehouse has stock left for the open lines.
+
+        Args:
+            lines: Dict mapping item_id -> quantity to allocate
+            current_allocations: Dict mapping item_id -> {batch_id: qty} for the
+                                 package being edited; these are "released" from
+                                 reserved_qty when calculating availability
+            required_uoms: Dict mapping item_id -> UOM the line is requested in
+                           (defaults to the item's default UOM). Only batches
+                           held in that UOM are allocated, as in get_available_batches().
+
+        Returns:
+            Dict with keys:
+                - lines: List of per-item dicts (item_id, item_name, required_uom,
+                  requested_qty, allocated_qty, shortfall, allocations) where allocations use the
+                  same format as auto_allocate_batches()
+                - warehouses: List of {warehouse_id, warehouse_name} used, in pick order
+                - warehouse_count: Number of source warehouses
+                - can_fulfill: True if no line has a shortfall
+        """
+        today = date.today()
+        current_allocations = current_allocations or {}
+        needs = {item_id: safe_decimal(qty) for item_id, qty in lines.items() if safe_decimal(qty) > 0}
+
+        items = {
+            item.item_id: item
+            for item in Item.query.filter(Item.item_id.in_(list(needs.keys()))).all()
+        } if needs else {}
+        needs = {item_id: qty for item_id, qty in needs.items() if item_id in items}
+        required_uoms = {
+            item_id: (required_uoms or {}).get(item_id) or items[item_id].default_uom_code
+            for item_id in needs
+        }
+
+        released_batch_ids = [
+            batch_id
+            for item_allocations in current_allocations.values()
+            for batch_id in item_allocations
+        ]
+        batches_by_item = BatchAllocationService.get_available_batches_for_items(
+            list(needs.keys()),
+            include_batch_ids=released_batch_ids
+        )
+
+        def calc_available_qty(batch):
+            released_qty = safe_decimal(current_allocations.get(batch.item_id, {}).get(batch.batch_id))
+            return safe_decimal(batch.usable_qty) - (safe_decimal(batch.reserved_qty) - released_qty)
+
+        # Candidate batches per warehouse per item, sorted by the item's allocation rule
+        available = {}
+        stock = {}
+        warehouse_names = {}
+        for item_id, batches in batches_by_item.items():
+            item = items[item_id]
+            for batch in batches:
+                if item.can_expire_flag and batch.expiry_date and batch.expiry_date < today:
+                    continue
+                if batch.uom_code != required_uoms[item_id]:
+                    continue
+                qty = calc_available_qty(batch)
+                if qty <= 0:
+                    continue
+                available[batch.batch_id] = qty
+                warehouse_id = batch.inventory.inventory_id
+                warehouse_names[warehouse_id] = batch.inventory.warehouse.warehouse_name
+                stock.setdefault(warehouse_id, {}).setdefault(item_id, []).append(batch)
+
+        for warehouse_id, item_batches in stock.items():
+            for item_id, batches in item_batches.items():
+                batches.sort(key=BatchAllocationService._allocation_sort_key(items[item_id], available))
+
+        outstanding = dict(needs)
+        allocations = {item_id: [] for item_id in needs}
+        picked_warehouses = []
+
+        while any(qty > 0 for qty in outstanding.values()):
+            best_warehouse_id = None
+            best_score = None
+            for warehouse_id in sorted(stock):
+                if warehouse_id in picked_warehouses:
+                    continue
+                full_lines = 0
+                covered_share = Decimal('0')
+                for item_id, qty in outstanding.items():
+                    if qty <= 0:
+                        continue
+                    warehouse_qty = sum(available[b.batch_id] for b in stock[warehouse_id].get(item_id, []))
+                    if warehouse_qty >= qty:
+                        full_lines += 1
+                    covered_share += min(warehouse_qty, qty) / qty
+                score = (full_lines, covered_share)
+                if covered_share > 0 and (best_score is None or score > best_score):
+                    best_warehouse_id, best_score = warehouse_id, score
+
+            if best_warehouse_id is None:
+                break
+
+            picked_warehouses.append(best_warehouse_id)
+            for item_id, batches in stock[best_warehouse_id].items():
+                for batch in batches:
+                    if outstanding[item_id] <= 0:
+                        break
+                    allocated_qty = min(available[batch.batch_id], outstanding[item_id])
+                    allocations[item_id].append({
+                        'batch_id': batch.batch_id,
+                        'batch_no': batch.batch_no,
+                        'warehouse_id': best_warehouse_id,
+                        'warehouse_name': warehouse_names[best_warehouse_id],
+                        'inventory_id': batch.inventory_id,
+                        'batch_date': batch.batch_date,
+                        'expiry_date': batch.expiry_date,
+                        'available_qty': float(available[batch.batch_id]),
+                        'allocated_qty': float(allocated_qty),
+                        'uom_code': batch.uom_code,
+                        'size_spec': batch.size_spec
+                    })
+                    outstanding[item_id] -= allocated_qty
+
+        result_lines = []
+        for item_id, requested_qty in needs.items():
+            allocated_qty = requested_qty - outstanding[item_id]
+            result_lines.append({
+                'item_id': item_id,
+                'item_name': items[item_id].item_name,
+                'required_uom': required_uoms[item_id],
+                'requested_qty': float(requested_qty),
+                'allocated_qty': float(allocated_qty),
+                'shortfall': float(outstanding[item_id]),
+                'allocations': allocations[item_id]
+            })
+
+        return {
+            'lines': result_lines,
+            'warehouses': [
+                {'warehouse_id': wh_id, 'warehouse_name': warehouse_names[wh_id]}
+                for wh_id in picked_warehouses
+            ],
+            'warehouse_count': len(picked_warehouses),
+            'can_fulfill': all(qty <= 0 for qty in outstanding.values())
+        }
+
+    @staticmethod
+    def _allocation_sort_key(item: Item, available: Dict[int, Decimal]):
+        """
+        Build a sort key implementing the same FEFO/LIFO/FIFO ordering as
+        sort_batches_by_allocation_rule(), using precomputed available quantities.
+        """
+        if item.issuance_order == 'FEFO' and item.can_expire_flag:
+            return lambda b: (
+                b.expiry_date is None,
+                b.expiry_date if b.expiry_date else date.max,
+                b.batch_date if b.batch_date else date.max,
+                -available[b.batch_id]
+            )
+        elif item.issuance_order == 'LIFO':
+            return lambda b: (
+                -(b.batch_date.toordinal() if b.batch_date else 0),
+                -available[b.batch_id]
+            )
+        else:
+            return lambda b: (
+                b.batch_date if b.batch_date else date.min,
+                -available[b.batch_id]
+            )
+
     @staticmethod
     def get_batch_details(batch_id: int) -> Optional[Dict]:
         """
@@ -490,6 +717,32 @@ class BatchAllocationService:
                 if allocated_batch.batch_id not in existing_batch_ids:
                     all_batches.append(allocated_batch)
         
+        return BatchAllocationService.limit_batches_for_drawer(
+            item, all_batches, remaining_qty, allocated_batch_ids_set, current_allocations
+        )
+    
+    @staticmethod
+    def limit_batches_for_drawer(
+        item: Item,
+        all_batches: List[ItemBatch],
+        remaining_qty: Decimal,
+        allocated_batch_ids_set: set,
+        current_allocations: dict
+    ) -> Tuple[List[ItemBatch], Decimal, Decimal]:
+        """
+        Apply drawer warehouse filtering, sorting and early stopping to batches
+        that have already been loaded (see get_limited_batches_for_drawer()).
+        
+        Args:
+            item: Item the batches belong to
+            all_batches: Available batches plus any allocated batches for the item
+            remaining_qty: Remaining quantity to fulfill
+            allocated_batch_ids_set: Set of batch IDs already allocated
+            current_allocations: Dict mapping batch_id -> qty released from reserved_qty
+            
+        Returns:
+            Same tuple as get_limited_batches_for_drawer()
+        """
         # Helper function to calculate effective available quantity
         # This "releases" current package's allocations from reserved_qty
         def calc_available_qty(batch):
@@ -579,6 +832,191 @@ class BatchAllocationService:
         
         return limited_batches, cumulative_available, shortfall
     
+    @staticmethod
+    def get_drawer_batches_for_request(lines: List[Dict]) -> Dict[int, Dict]:
+        """
+        Compute drawer data for several request lines sharing one item query
+        and one batch query.
+        
+        Args:
+            lines: List of dicts with keys item_id, remaining_qty and optionally
+                   required_uom, allocated_batch_ids and current_allocations
+                   (same meaning as get_limited_batches_for_drawer() arguments)
+                   
+        Returns:
+            Dict mapping item_id -> {'item', 'batches', 'total_available', 'shortfall'}
+            (items that do not exist are omitted)
+        """
+        item_ids = [line['item_id'] for line in lines]
+        items = {item.item_id: item for item in Item.query.filter(Item.item_id.in_(item_ids)).all()} if item_ids else {}
+        
+        include_batch_ids = [
+            batch_id
+            for line in lines
+            for batch_id in (line.get('allocated_batch_ids') or [])
+        ]
+        batches_by_item = BatchAllocationService.get_available_batches_for_items(
+            list(items.keys()),
+            include_batch_ids=include_batch_ids
+        )
+        
+        results = {}
+        for line in lines:
+            item = items.get(line['item_id'])
+            if not item:
+                continue
+            
+            required_uom = line.get('required_uom')
+            allocated_batch_ids_set = set(line.get('allocated_batch_ids') or [])
+            
+            # Mirror get_available_batches() filters; allocated batches are always kept
+            candidates = [
+                b for b in batches_by_item.get(item.item_id, [])
+                if b.batch_id in allocated_batch_ids_set
+                or (safe_decimal(b.usable_qty) > safe_decimal(b.reserved_qty)
+                    and (not required_uom or b.uom_code == required_uom))
+            ]
+            
+            batches, total_available, shortfall = BatchAllocationService.limit_batches_for_drawer(
+                item,
+                candidates,
+                safe_decimal(line.get('remaining_qty')),
+                allocated_batch_ids_set,
+                line.get('current_allocations') or {}
+            )
+            results[item.item_id] = {
+                'item': item,
+                'batches': batches,
+                'total_available': total_available,
+                'shortfall': shortfall
+            }
+        
+        return results
+    
+    @staticmethod
+    def get_limited_batches_for_drawer_sql(
+        item_id: int,
+        remaining_qty: Decimal,
+        required_uom: str = None,
+        allocated_batch_ids: List[int] = None,
+        current_allocations: dict = None
+    ) -> Tuple[list, Decimal, Decimal]:
+        """
+        Window-function implementation of get_limited_batches_for_drawer().
+
+        Per-warehouse FEFO/FIFO ranking and early stopping are computed in the
+        database with a running SUM(available) OVER (PARTITION BY warehouse ...),
+        so only the rows the drawer displays are returned - as lightweight rows
+        rather than mapped ItemBatch entities.
+
+        A non-allocated batch is kept while no earlier batch in its warehouse has
+        brought the running total to remaining_qty; allocated batches are always
+        kept. Batches with equal sort keys are ordered by batch_id.
+
+        Args/Returns: same as get_limited_batches_for_drawer(). Each row exposes
+        batch_id, batch_no, batch_date, expiry_date, warehouse_id, warehouse_name,
+        inventory_id, usable_qty, reserved_qty, defective_qty, expired_qty,
+        uom_code, size_spec, status_code, available_qty and is_allocated.
+        """
+        item = db.session.get(Item, item_id)
+        if not item:
+            return [], Decimal('0'), remaining_qty
+
+        allocated_batch_ids = list(set(allocated_batch_ids or []))
+        current_allocations = current_allocations or {}
+
+        if current_allocations:
+            released_qty = case(
+                {batch_id: qty for batch_id, qty in current_allocations.items()},
+                value=ItemBatch.batch_id,
+                else_=0
+            )
+        else:
+            released_qty = literal(0)
+        available_qty = ItemBatch.usable_qty - (ItemBatch.reserved_qty - released_qty)
+        is_allocated = ItemBatch.batch_id.in_(allocated_batch_ids) if allocated_batch_ids else false()
+
+        has_free_qty = ItemBatch.usable_qty > ItemBatch.reserved_qty
+        if required_uom:
+            has_free_qty = and_(has_free_qty, ItemBatch.uom_code == required_uom)
+
+        conditions = [
+            ItemBatch.item_id == item_id,
+            ItemBatch.status_code == 'A',
+            Inventory.status_code == 'A',
+            Warehouse.status_code == 'A',
+            or_(has_free_qty, is_allocated),
+            or_(available_qty > 0, is_allocated)
+        ]
+
+        # Same ordering as sort_batches_for_drawer(): FEFO if the item can expire, else FIFO
+        if item.can_expire_flag:
+            conditions.append(or_(ItemBatch.expiry_date.is_(None), ItemBatch.expiry_date >= date.today()))
+            sort_order = [
+                ItemBatch.expiry_date.is_(None), ItemBatch.expiry_date,
+                ItemBatch.batch_date.is_(None), ItemBatch.batch_date,
+                ItemBatch.batch_id
+            ]
+        else:
+            sort_order = [ItemBatch.batch_date.isnot(None), ItemBatch.batch_date, ItemBatch.batch_id]
+
+        ranked = select(
+            ItemBatch.batch_id,
+            ItemBatch.batch_no,
+            ItemBatch.batch_date,
+            ItemBatch.expiry_date,
+            Inventory.inventory_id.label('warehouse_id'),
+            Warehouse.warehouse_name,
+            ItemBatch.inventory_id,
+            ItemBatch.usable_qty,
+            ItemBatch.reserved_qty,
+            ItemBatch.defective_qty,
+            ItemBatch.expired_qty,
+            ItemBatch.uom_code,
+            ItemBatch.size_spec,
+            ItemBatch.status_code,
+            available_qty.label('available_qty'),
+            is_allocated.label('is_allocated'),
+            func.row_number().over(
+                partition_by=Inventory.inventory_id, order_by=sort_order
+            ).label('drawer_rank'),
+            func.sum(available_qty).over(
+                partition_by=Inventory.inventory_id, order_by=sort_order, rows=(None, 0)
+            ).label('running_qty')
+        ).join(
+            Inventory,
+            and_(
+                ItemBatch.inventory_id == Inventory.inventory_id,
+                ItemBatch.item_id == Inventory.item_id
+            )
+        ).join(
+            Warehouse,
+            Inventory.inventory_id == Warehouse.warehouse_id
+        ).where(*conditions).subquery('ranked')
+
+        # Highest running total reached by the batches before this one
+        prior_peak = func.max(ranked.c.running_qty).over(
+            partition_by=ranked.c.warehouse_id, order_by=ranked.c.drawer_rank, rows=(None, -1)
+        )
+        peaked = select(ranked, prior_peak.label('prior_peak')).subquery('peaked')
+
+        rows = db.session.execute(
+            select(
+                *[column for column in peaked.c if column.key not in ('running_qty', 'prior_peak', 'drawer_rank')]
+            ).where(
+                or_(
+                    peaked.c.is_allocated,
+                    peaked.c.prior_peak.is_(None),
+                    peaked.c.prior_peak < remaining_qty
+                )
+            ).order_by(peaked.c.warehouse_id, peaked.c.drawer_rank)
+        ).all()
+
+        cumulative_available = sum((safe_decimal(row.available_qty) for row in rows), Decimal('0'))
+        shortfall = max(Decimal('0'), remaining_qty - cumulative_available)
+
+        return rows, cumulative_available, shortfall
+
     @staticmethod
     def assign_priority_groups(batches: List[ItemBatch], item: Item) -> List[Tuple[ItemBatch, int]]:
         """
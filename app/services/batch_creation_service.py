@@ -5,9 +5,9 @@ Ensures batch-level traceability for inventory management.
 """
 
 from datetime import date
-from sqlalchemy import func
-from app import db
-from app.db.models import ItemBatch, Item
+from sqlalchemy.dialects.postgresql import insert
+from app.db import db
+from app.db.models import BatchNoCounter, ItemBatch, Item
 from app.utils.timezone import now
 
 
@@ -15,35 +15,71 @@ class BatchCreationService:
     """Service for automatic batch creation during inventory intake"""
     
     @staticmethod
-    def generate_batch_number(item_code, inventory_id, batch_date=None):
-        """Generate unique batch number: ITEM-WH-YYYYMMDD-SEQ
+    def reserve_batch_numbers(item_code, inventory_id, batch_date=None, count=1):
+        """Reserve a block of consecutive batch numbers: ITEM-WH-YYYYMMDD-SEQ
+        
+        Sequences come from the batch_no_counter row for the prefix, created or
+        advanced by a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING.
+        The row stays locked until the caller's transaction ends, so concurrent
+        intakes for the same prefix queue up instead of producing duplicates,
+        and a rolled-back intake hands its numbers back.
         
         Args:
             item_code: Item code
             inventory_id: Warehouse/inventory ID
             batch_date: Batch date (defaults to today)
+            count: Number of batch numbers to reserve
             
         Returns:
-            str: Generated batch number (e.g., RICE-001-20250117-001)
+            list: Reserved batch numbers in sequence order
         """
         if batch_date is None:
             batch_date = date.today()
         
-        date_str = batch_date.strftime('%Y%m%d')
-        prefix = f"{item_code}-{inventory_id:03d}-{date_str}"
+        if count < 1:
+            return []
         
-        max_batch = db.session.query(
-            func.max(ItemBatch.batch_no)
-        ).filter(
-            ItemBatch.batch_no.like(f"{prefix}%")
-        ).scalar()
+        # Batch numbers are stored upper-cased (see create_batch_for_intake), and
+        # migration 018 seeds the counters from them with UPPER(item_code)
+        item_code = item_code.upper()
         
-        if max_batch:
-            seq = int(max_batch.split('-')[-1]) + 1
-        else:
-            seq = 1
+        stmt = insert(BatchNoCounter).values(
+            item_code=item_code,
+            inventory_id=inventory_id,
+            batch_date=batch_date,
+            last_seq=count,
+            update_dtime=now()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                BatchNoCounter.item_code,
+                BatchNoCounter.inventory_id,
+                BatchNoCounter.batch_date
+            ],
+            set_={
+                'last_seq': BatchNoCounter.last_seq + count,
+                'update_dtime': stmt.excluded.update_dtime
+            }
+        ).returning(BatchNoCounter.last_seq)
+        
+        last_seq = db.session.execute(stmt).scalar_one()
+        
+        prefix = f"{item_code}-{inventory_id:03d}-{batch_date.strftime('%Y%m%d')}"
+        return [f"{prefix}-{seq:03d}" for seq in range(last_seq - count + 1, last_seq + 1)]
+    
+    @staticmethod
+    def generate_batch_number(item_code, inventory_id, batch_date=None):
+        """Generate unique batch number: ITEM-WH-YYYYMMDD-SEQ
         
-        return f"{prefix}-{seq:03d}"
+        Args:
+            item_code: Item code
+            inventory_id: Warehouse/inventory ID
+            batch_date: Batch date (defaults to today)
+            
+        Returns:
+            str: Generated batch number (e.g., RICE-001-20250117-001)
+        """
+        return BatchCreationService.reserve_batch_numbers(item_code, inventory_id, batch_date)[0]
     
     @staticmethod
     def create_batch_for_intake(
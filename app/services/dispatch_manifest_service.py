@@ -0,0 +1,263 @@
+"""
+Dispatch Manifest Service
+Immutable snapshots of relief package contents, written once at dispatch
+
+After dispatch a package's items, batches and quantities never change, yet the
+transaction summary, dispatch slip, handover and received-details pages each
+re-joined reliefpkg_item, itembatch, item, warehouse and agency to rebuild the
+same view. create_manifest() captures that view once, in the dispatching
+transaction, as a JSON document pre-split by source warehouse. The pages then
+load the package and its manifest with a single primary-key lookup.
+
+Document layout (manifest_version 1):
+    request:    reliefrqst_id, tracking_no, request_date, agency{...}, eligible_event{...}
+    package:    reliefpkg_id, creator/approver names
+    items:      one entry per request item with requested/issued qty, status and batches
+    warehouses: one section per source warehouse with its lines and totals
+    totals:     total_items, total_batches, warehouses_used
+
+Values are decoded by key suffix: *_date -> date, *_dtime -> datetime,
+*_qty -> Decimal.
+"""
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import joinedload
+
+from app.db import db
+from app.db.loader_profiles import loader_options, REQUEST_MANIFEST
+from app.db.models import ReliefPkg, ReliefPkgItem, ReliefPkgManifest, ReliefRqst, User, Warehouse
+from app.utils.timezone import now
+
+
+MANIFEST_VERSION = 1
+
+# create_by_id of manifests written by scripts/backfill_dispatch_manifests.py
+# for packages dispatched before manifests existed
+BACKFILL_USER = 'BACKFILL'
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_object(obj: dict) -> dict:
+    for key, value in obj.items():
+        if value is None or not isinstance(value, str):
+            continue
+        if key.endswith('_dtime'):
+            obj[key] = datetime.fromisoformat(value)
+        elif key.endswith('_date'):
+            obj[key] = date.fromisoformat(value)
+        elif key.endswith('_qty'):
+            obj[key] = Decimal(value)
+    return obj
+
+
+def encode_manifest(manifest: dict) -> str:
+    return json.dumps(manifest, default=_encode_value, separators=(',', ':'))
+
+
+def decode_manifest(manifest_json: str) -> dict:
+    return json.loads(manifest_json, object_hook=_decode_object)
+
+
+def _display_name(user: Optional[User]) -> Optional[str]:
+    if not user:
+        return None
+    if user.first_name:
+        return f"{user.first_name} {user.last_name}"
+    return user.email
+
+
+def build_manifest(relief_pkg: ReliefPkg) -> dict:
+    """
+    Build the manifest document for a package from live data.
+
+    Args:
+        relief_pkg: Package whose items and request items are flushed
+
+    Returns:
+        JSON-ready manifest dict (dates, datetimes and Decimals are encoded
+        by encode_manifest)
+    """
+    relief_request = ReliefRqst.query.options(*loader_options(REQUEST_MANIFEST)).filter(ReliefRqst.reliefrqst_id == relief_pkg.reliefrqst_id).one()
+
+    pkg_items = ReliefPkgItem.query.options(
+        joinedload(ReliefPkgItem.item),
+        joinedload(ReliefPkgItem.batch)
+    ).filter(
+        ReliefPkgItem.reliefpkg_id == relief_pkg.reliefpkg_id
+    ).order_by(
+        ReliefPkgItem.fr_inventory_id, ReliefPkgItem.item_id, ReliefPkgItem.batch_id
+    ).all()
+
+    warehouse_ids = {pkg_item.fr_inventory_id for pkg_item in pkg_items if pkg_item.fr_inventory_id}
+    warehouse_names = {w.warehouse_id: w.warehouse_name for w in Warehouse.query.filter(
+        Warehouse.warehouse_id.in_(warehouse_ids)
+    ).all()} if warehouse_ids else {}
+
+    user_names = {name for name in (relief_pkg.create_by_id, relief_pkg.verify_by_id) if name}
+    users = {u.user_name: u for u in User.query.filter(User.user_name.in_(user_names)).all()} if user_names else {}
+
+    request_items = {req_item.item_id: req_item for req_item in relief_request.items}
+
+    # Per-warehouse sections (dispatch slip / received details)
+    sections = OrderedDict()
+    for pkg_item in pkg_items:
+        warehouse_id = pkg_item.fr_inventory_id
+        if warehouse_id not in sections:
+            sections[warehouse_id] = {
+                'warehouse_id': warehouse_id,
+                'warehouse_name': warehouse_names.get(warehouse_id, 'Unknown Warehouse'),
+                'lines': [],
+                'total_qty': Decimal('0')
+            }
+        req_item = request_items.get(pkg_item.item_id)
+        batch = pkg_item.batch
+        sections[warehouse_id]['lines'].append({
+            'item_id': pkg_item.item_id,
+            'item_name': pkg_item.item.item_name if pkg_item.item else None,
+            'batch_id': pkg_item.batch_id,
+            'batch_no': batch.batch_no if batch else None,
+            'batch_date': batch.batch_date if batch else None,
+            'expiry_date': batch.expiry_date if batch else None,
+            'request_qty': req_item.request_qty if req_item else None,
+            'item_qty': pkg_item.item_qty,
+            'uom_code': pkg_item.uom_code
+        })
+        sections[warehouse_id]['total_qty'] += pkg_item.item_qty or Decimal('0')
+
+    # Per-request-item view (transaction summary)
+    items = []
+    for req_item in relief_request.items:
+        batches = [
+            {
+                'warehouse_id': section['warehouse_id'],
+                'warehouse_name': section['warehouse_name'],
+                'batch_no': line['batch_no'] or 'N/A',
+                'batch_date': line['batch_date'],
+                'expiry_date': line['expiry_date'],
+                'issued_qty': line['item_qty']
+            }
+            for section in sections.values()
+            for line in section['lines']
+            if line['item_id'] == req_item.item_id
+        ]
+        item = req_item.item
+        items.append({
+            'item_id': req_item.item_id,
+            'item_name': item.item_name if item else None,
+            'item_desc': item.item_desc if item else None,
+            'sku_code': item.sku_code if item else None,
+            'uom_desc': item.default_uom.uom_desc if item and item.default_uom else None,
+            'requested_qty': req_item.request_qty,
+            'issued_qty': sum((b['issued_qty'] for b in batches), Decimal('0')),
+            'status_code': req_item.status_code,
+            'status_desc': req_item.item_status.status_desc if req_item.item_status else None,
+            'status_reason': req_item.status_reason_desc,
+            'batches': batches
+        })
+
+    agency = relief_request.agency
+    event = relief_request.eligible_event
+
+    return {
+        'manifest_version': MANIFEST_VERSION,
+        'request': {
+            'reliefrqst_id': relief_request.reliefrqst_id,
+            'tracking_no': relief_request.tracking_no,
+            'request_date': relief_request.request_date,
+            'agency': {
+                'agency_id': agency.agency_id,
+                'agency_name': agency.agency_name,
+                'contact_name': agency.contact_name,
+                'phone_no': agency.phone_no,
+                'email_text': agency.email_text,
+                'parish_name': agency.parish.parish_name if agency.parish else None
+            } if agency else None,
+            'eligible_event': {
+                'event_id': event.event_id,
+                'event_name': event.event_name,
+                'event_desc': event.event_desc
+            } if event else None
+        },
+        'package': {
+            'reliefpkg_id': relief_pkg.reliefpkg_id,
+            'creator_name': _display_name(users.get(relief_pkg.create_by_id)),
+            'approver_name': _display_name(users.get(relief_pkg.verify_by_id))
+        },
+        'items': items,
+        'warehouses': list(sections.values()),
+        'totals': {
+            'total_items': len(items),
+            'total_batches': len(pkg_items),
+            'warehouses_used': len(sections)
+        }
+    }
+
+
+def create_manifest(relief_pkg: ReliefPkg, user_name: str, created_at: Optional[datetime] = None) -> bool:
+    """
+    Write the package's manifest in the caller's (dispatching) transaction.
+    A manifest is never rewritten: if one already exists it is kept.
+
+    Args:
+        relief_pkg: The package being dispatched
+        user_name: User performing the dispatch (audit)
+        created_at: Time of the dispatch (defaults to now; the backfill passes
+                    the package's own timestamp)
+
+    Returns:
+        True if a manifest was written, False if one already existed
+    """
+    db.session.flush()
+    stmt = insert(ReliefPkgManifest).values(
+        reliefpkg_id=relief_pkg.reliefpkg_id,
+        reliefrqst_id=relief_pkg.reliefrqst_id,
+        manifest_version=MANIFEST_VERSION,
+        manifest_json=encode_manifest(build_manifest(relief_pkg)),
+        create_by_id=user_name,
+        create_dtime=created_at or now()
+    ).on_conflict_do_nothing(
+        index_elements=[ReliefPkgManifest.reliefpkg_id]
+    )
+    return db.session.execute(stmt).rowcount > 0
+
+
+def get_package_with_manifest(reliefpkg_id: int) -> Tuple[ReliefPkg, dict]:
+    """
+    Load a package and its manifest in one primary-key lookup.
+
+    Packages without a stored manifest (not yet dispatched, or dispatched
+    before manifests existed) get one built from live data; it is not saved.
+
+    Returns:
+        Tuple of (relief_pkg, decoded manifest dict); 404 if the package does not exist
+    """
+    relief_pkg = ReliefPkg.query.options(
+        joinedload(ReliefPkg.manifest)
+    ).get_or_404(reliefpkg_id)
+
+    if relief_pkg.manifest:
+        return relief_pkg, decode_manifest(relief_pkg.manifest.manifest_json)
+
+    return relief_pkg, decode_manifest(encode_manifest(build_manifest(relief_pkg)))
+
+
+def warehouse_sections(manifest: dict, warehouse_ids: Optional[Iterable[int]] = None) -> List[dict]:
+    """
+    Manifest sections for the given source warehouses (all when None).
+    """
+    if warehouse_ids is None:
+        return manifest['warehouses']
+    warehouse_ids = set(warehouse_ids)
+    return [section for section in manifest['warehouses'] if section['warehouse_id'] in warehouse_ids]
@@ -0,0 +1,383 @@
+"""
+Fair-Share Allocation Planner
+Computes event-wide draft allocations for scarce items across all open relief requests
+
+When one event produces many SUBMITTED requests for the same items, preparing them
+one at a time lets whoever goes first drain stock. This planner reads every open
+request line and all available batch stock, and divides each item's supply across
+the lines in one vectorized pass:
+
+- proportional: each line's share is proportional to its outstanding quantity
+- urgency: shares are weighted by the line's urgency_ind (C > H > M > L)
+
+Shares are capped at each line's need and freed capacity is redistributed
+(water-filling), then rounded down to whole units with the leftover units handed
+out by largest remainder. Finally each line's share is mapped onto concrete
+batches in the item's FEFO/FIFO/LIFO order.
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_
+
+from app.db import db
+from app.db.models import ReliefRqst, ReliefRqstItem, Item, ItemBatch, Inventory, Warehouse
+from app.services import relief_request_service as rr_service
+
+MODE_PROPORTIONAL = 'proportional'
+MODE_URGENCY = 'urgency'
+
+# Relative weight of a line's outstanding quantity in urgency mode
+URGENCY_WEIGHTS = {
+    rr_service.URGENCY_CRITICAL: 4.0,
+    rr_service.URGENCY_HIGH: 3.0,
+    rr_service.URGENCY_MEDIUM: 2.0,
+    rr_service.URGENCY_LOW: 1.0,
+}
+
+# Line statuses that no longer take part in allocation
+CLOSED_ITEM_STATUSES = [rr_service.ITEM_STATUS_DENIED, rr_service.ITEM_STATUS_FILLED]
+
+# Redistribution rounds after capping shares at each line's need
+MAX_WATER_FILL_ROUNDS = 20
+
+LINE_COLUMNS = ['reliefrqst_id', 'item_id', 'need', 'urgency_ind', 'request_date']
+STOCK_COLUMNS = ['batch_id', 'batch_no', 'warehouse_id', 'item_id', 'available',
+                 'batch_date', 'expiry_date', 'can_expire', 'issuance_order']
+
+
+def load_open_lines(event_id: Optional[int] = None) -> pd.DataFrame:
+    """
+    Load outstanding request lines for all SUBMITTED relief requests.
+
+    Args:
+        event_id: Optional filter on the request's eligible event
+
+    Returns:
+        DataFrame with columns reliefrqst_id, item_id, need, urgency_ind, request_date
+    """
+    query = db.session.query(
+        ReliefRqstItem.reliefrqst_id,
+        ReliefRqstItem.item_id,
+        (ReliefRqstItem.request_qty - ReliefRqstItem.issue_qty).label('need'),
+        ReliefRqstItem.urgency_ind,
+        ReliefRqst.request_date
+    ).join(
+        ReliefRqst, ReliefRqstItem.reliefrqst_id == ReliefRqst.reliefrqst_id
+    ).filter(
+        ReliefRqst.status_code == rr_service.STATUS_SUBMITTED,
+        ReliefRqstItem.status_code.notin_(CLOSED_ITEM_STATUSES),
+        ReliefRqstItem.request_qty > ReliefRqstItem.issue_qty
+    )
+
+    if event_id:
+        query = query.filter(ReliefRqst.eligible_event_id == event_id)
+
+    lines = pd.DataFrame.from_records(query.all(), columns=LINE_COLUMNS)
+    lines['need'] = lines['need'].astype(float)
+    return lines
+
+
+def load_available_stock(item_ids: List[int]) -> pd.DataFrame:
+    """
+    Load free batch stock (usable - reserved) for the given items, excluding
+    expired batches of expirable items.
+
+    Args:
+        item_ids: Items to load stock for
+
+    Returns:
+        DataFrame with one row per batch
+    """
+    if not item_ids:
+        return pd.DataFrame(columns=STOCK_COLUMNS)
+
+    rows = db.session.query(
+        ItemBatch.batch_id,
+        ItemBatch.batch_no,
+        ItemBatch.inventory_id,
+        ItemBatch.item_id,
+        (ItemBatch.usable_qty - ItemBatch.reserved_qty).label('available'),
+        ItemBatch.batch_date,
+        ItemBatch.expiry_date,
+        Item.can_expire_flag,
+        Item.issuance_order
+    ).join(
+        Item, ItemBatch.item_id == Item.item_id
+    ).join(
+        Inventory,
+        and_(
+            ItemBatch.inventory_id == Inventory.inventory_id,
+            ItemBatch.item_id == Inventory.item_id
+        )
+    ).join(
+        Warehouse, Inventory.inventory_id == Warehouse.warehouse_id
+    ).filter(
+        ItemBatch.item_id.in_(list(item_ids)),
+        ItemBatch.status_code == 'A',
+        Inventory.status_code == 'A',
+        Warehouse.status_code == 'A',
+        ItemBatch.usable_qty > ItemBatch.reserved_qty
+    ).all()
+
+    stock = pd.DataFrame.from_records(rows, columns=STOCK_COLUMNS)
+    stock['available'] = stock['available'].astype(float)
+
+    today = date.today()
+    expired = stock['can_expire'].astype(bool) & stock['expiry_date'].notna() & (
+        stock['expiry_date'].map(lambda d: d is not None and d < today)
+    )
+    return stock[~expired].reset_index(drop=True)
+
+
+def compute_line_shares(lines: pd.DataFrame, supply: pd.Series, mode: str = MODE_PROPORTIONAL) -> pd.Series:
+    """
+    Divide each item's supply across its lines.
+
+    Args:
+        lines: DataFrame with item_id, need and urgency_ind
+        supply: Series mapping item_id -> total free quantity
+        mode: MODE_PROPORTIONAL or MODE_URGENCY
+
+    Returns:
+        Series (aligned with lines) of whole-unit planned quantities
+    """
+    need = lines['need'].to_numpy(dtype=float)
+    item_ids = lines['item_id'].to_numpy()
+    item_supply = lines['item_id'].map(supply).fillna(0).to_numpy(dtype=float)
+
+    if mode == MODE_URGENCY:
+        weight = need * lines['urgency_ind'].map(URGENCY_WEIGHTS).fillna(1.0).to_numpy(dtype=float)
+    else:
+        weight = need.copy()
+
+    share = np.zeros(len(lines))
+    remaining_supply = item_supply.copy()
+    open_mask = need > 0
+
+    # Water-filling: lines capped at their need release capacity to the others
+    for _ in range(MAX_WATER_FILL_ROUNDS):
+        active_weight = np.where(open_mask, weight, 0.0)
+        weight_total = pd.Series(active_weight).groupby(item_ids).transform('sum').to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            offer = np.where(weight_total > 0, remaining_supply * active_weight / weight_total, 0.0)
+
+        headroom = need - share
+        grant = np.minimum(offer, headroom)
+        share += grant
+
+        granted_per_item = pd.Series(grant).groupby(item_ids).transform('sum').to_numpy()
+        remaining_supply = np.maximum(remaining_supply - granted_per_item, 0.0)
+
+        newly_capped = open_mask & (offer >= headroom)
+        open_mask = open_mask & ~newly_capped
+        if not newly_capped.any() or not (remaining_supply > 1e-9).any():
+            break
+
+    # Round down to whole units, then hand out leftover units by largest remainder
+    whole = np.floor(share + 1e-9)
+    fraction = np.where(whole + 1 <= need + 1e-9, share - whole, 0.0)
+    leftover = (
+        np.floor(pd.Series(share).groupby(item_ids).transform('sum').to_numpy() + 1e-9)
+        - pd.Series(whole).groupby(item_ids).transform('sum').to_numpy()
+    )
+
+    remainder_rank = pd.Series(fraction).groupby(item_ids).rank(method='first', ascending=False).to_numpy()
+    bonus = (remainder_rank <= leftover) & (fraction > 1e-9)
+    whole = whole + bonus.astype(float)
+
+    return pd.Series(whole, index=lines.index)
+
+
+def _sort_stock(stock: pd.DataFrame) -> pd.DataFrame:
+    """Sort batches per item in FEFO/LIFO/FIFO order (same rules as BatchAllocationService)"""
+    far_future = date.max.toordinal()
+    fefo = (stock['issuance_order'] == 'FEFO') & stock['can_expire'].astype(bool)
+    lifo = stock['issuance_order'] == 'LIFO'
+
+    expiry_ord = stock['expiry_date'].map(lambda d: d.toordinal() if d else far_future)
+    batch_ord = stock['batch_date'].map(lambda d: d.toordinal() if d else None)
+
+    keyed = stock.assign(
+        _k1=np.where(fefo, expiry_ord, 0),
+        _k2=np.where(
+            fefo, batch_ord.fillna(far_future),
+            np.where(lifo, -batch_ord.fillna(0), batch_ord.fillna(0))
+        ),
+        _k3=-stock['available']
+    )
+    return keyed.sort_values(['item_id', '_k1', '_k2', '_k3', 'batch_id'], kind='mergesort').drop(
+        columns=['_k1', '_k2', '_k3']
+    )
+
+
+def assign_batches(lines: pd.DataFrame, stock: pd.DataFrame) -> pd.DataFrame:
+    """
+    Map each line's planned quantity onto batches.
+
+    Lines and batches are laid end to end per item on a single quantity axis
+    (lines in priority order, batches in issuance order). Each segment between
+    consecutive breakpoints belongs to exactly one line and one batch.
+
+    Args:
+        lines: DataFrame with reliefrqst_id, item_id, planned_qty and priority columns
+        stock: DataFrame from load_available_stock()
+
+    Returns:
+        DataFrame with reliefrqst_id, item_id, batch_id, batch_no, warehouse_id, qty
+    """
+    empty = pd.DataFrame(columns=['reliefrqst_id', 'item_id', 'batch_id', 'batch_no', 'warehouse_id', 'qty'])
+    planned = lines[lines['planned_qty'] > 0]
+    if planned.empty or stock.empty:
+        return empty
+
+    planned = planned.sort_values(
+        ['item_id', '_priority', 'request_date', 'reliefrqst_id'],
+        ascending=[True, False, True, True],
+        kind='mergesort'
+    )
+    stock = _sort_stock(stock[stock['item_id'].isin(planned['item_id'].unique())])
+
+    # Integer hundredths avoid float drift on the shared axis
+    line_qty = np.rint(planned['planned_qty'].to_numpy() * 100).astype(np.int64)
+    line_end = np.cumsum(line_qty)
+
+    item_total = pd.Series(line_qty, index=planned['item_id'].to_numpy()).groupby(level=0).sum()
+    item_start = item_total.cumsum() - item_total
+
+    batch_qty = np.rint(stock['available'].to_numpy() * 100).astype(np.int64)
+    batch_item = stock['item_id'].to_numpy()
+    batch_cum = pd.Series(batch_qty).groupby(batch_item).cumsum().to_numpy()
+    batch_start_offset = item_start.reindex(batch_item).fillna(0).to_numpy().astype(np.int64)
+    batch_cap = item_total.reindex(batch_item).fillna(0).to_numpy().astype(np.int64)
+    batch_end = batch_start_offset + np.minimum(batch_cum, batch_cap)
+
+    breakpoints = np.unique(np.concatenate([line_end, batch_end]))
+    breakpoints = breakpoints[breakpoints > 0]
+    seg_start = np.concatenate([[0], breakpoints[:-1]])
+    seg_qty = breakpoints - seg_start
+
+    line_idx = np.searchsorted(line_end, breakpoints, side='left')
+    batch_idx = np.searchsorted(batch_end, breakpoints, side='left')
+    valid = (seg_qty > 0) & (line_idx < len(line_end)) & (batch_idx < len(batch_end))
+
+    segments = pd.DataFrame({
+        'reliefrqst_id': planned['reliefrqst_id'].to_numpy()[line_idx[valid]],
+        'item_id': planned['item_id'].to_numpy()[line_idx[valid]],
+        'batch_id': stock['batch_id'].to_numpy()[batch_idx[valid]],
+        'batch_no': stock['batch_no'].to_numpy()[batch_idx[valid]],
+        'warehouse_id': stock['warehouse_id'].to_numpy()[batch_idx[valid]],
+        'qty': seg_qty[valid],
+    })
+
+    allocations = segments.groupby(
+        ['reliefrqst_id', 'item_id', 'batch_id', 'batch_no', 'warehouse_id'], sort=False, as_index=False
+    )['qty'].sum()
+    allocations['qty'] = allocations['qty'] / 100.0
+    return allocations
+
+
+def compute_plan(lines: pd.DataFrame, stock: pd.DataFrame, mode: str = MODE_PROPORTIONAL) -> Dict[str, pd.DataFrame]:
+    """
+    Compute a fair-share plan from preloaded lines and stock.
+
+    Args:
+        lines: DataFrame from load_open_lines()
+        stock: DataFrame from load_available_stock()
+        mode: MODE_PROPORTIONAL or MODE_URGENCY
+
+    Returns:
+        Dict with:
+            - lines: input lines plus planned_qty and shortfall
+            - allocations: per-batch draft allocations
+            - items: per-item demand, supply and fill ratio
+    """
+    lines = lines.copy()
+    supply = stock.groupby('item_id')['available'].sum() if not stock.empty else pd.Series(dtype=float)
+
+    lines['planned_qty'] = compute_line_shares(lines, supply, mode) if not lines.empty else pd.Series(dtype=float)
+    lines['shortfall'] = lines['need'] - lines['planned_qty']
+    lines['_priority'] = lines['urgency_ind'].map(URGENCY_WEIGHTS).fillna(1.0) if mode == MODE_URGENCY else 0.0
+
+    allocations = assign_batches(lines, stock)
+    lines = lines.drop(columns=['_priority'])
+
+    items = lines.groupby('item_id').agg(
+        demand=('need', 'sum'),
+        planned=('planned_qty', 'sum'),
+        line_count=('reliefrqst_id', 'count')
+    )
+    items['supply'] = supply.reindex(items.index).fillna(0)
+    items['fill_ratio'] = np.where(items['demand'] > 0, items['planned'] / items['demand'], 1.0)
+
+    return {'lines': lines, 'allocations': allocations, 'items': items.reset_index()}
+
+
+def build_plan(event_id: Optional[int] = None, mode: str = MODE_PROPORTIONAL) -> Dict[str, pd.DataFrame]:
+    """
+    Load all open lines and stock and compute an event-wide fair-share plan.
+
+    Args:
+        event_id: Optional event filter
+        mode: MODE_PROPORTIONAL or MODE_URGENCY
+
+    Returns:
+        Plan dict as returned by compute_plan()
+    """
+    if mode not in (MODE_PROPORTIONAL, MODE_URGENCY):
+        raise ValueError(f'Unknown fair-share mode: {mode}')
+
+    lines = load_open_lines(event_id)
+    stock = load_available_stock(lines['item_id'].unique().tolist())
+    return compute_plan(lines, stock, mode)
+
+
+def plan_to_dict(plan: Dict[str, pd.DataFrame]) -> Dict:
+    """
+    Convert a plan into a JSON-serializable structure grouped by relief request.
+    Batch allocations use the same keys as the prepare page (batch_id, warehouse_id,
+    allocated_qty) so a request's share can be applied to its package draft.
+
+    Returns:
+        Dict with 'requests' (list per reliefrqst_id) and 'items' summary
+    """
+    allocations_by_line = {}
+    for row in plan['allocations'].itertuples(index=False):
+        allocations_by_line.setdefault((int(row.reliefrqst_id), int(row.item_id)), []).append({
+            'batch_id': int(row.batch_id),
+            'batch_no': row.batch_no,
+            'warehouse_id': int(row.warehouse_id),
+            'allocated_qty': float(row.qty),
+        })
+
+    requests = {}
+    for row in plan['lines'].itertuples(index=False):
+        reliefrqst_id = int(row.reliefrqst_id)
+        requests.setdefault(reliefrqst_id, []).append({
+            'item_id': int(row.item_id),
+            'urgency_ind': row.urgency_ind,
+            'need': float(row.need),
+            'planned_qty': float(row.planned_qty),
+            'shortfall': float(row.shortfall),
+            'allocations': allocations_by_line.get((reliefrqst_id, int(row.item_id)), []),
+        })
+
+    return {
+        'requests': [
+            {'reliefrqst_id': reliefrqst_id, 'lines': request_lines}
+            for reliefrqst_id, request_lines in requests.items()
+        ],
+        'items': [
+            {
+                'item_id': int(row.item_id),
+                'demand': float(row.demand),
+                'supply': float(row.supply),
+                'planned': float(row.planned),
+                'fill_ratio': round(float(row.fill_ratio), 4),
+                'line_count': int(row.line_count),
+            }
+            for row in plan['items'].itertuples(index=False)
+        ],
+    }
@@ -3,6 +3,7 @@ Fulfillment Lock Service
 Manages exclusive access to relief requests during packaging/fulfillment
 Integrated with inventory reservation service to release reservations on lock expiry/release
 """
+import logging
 from datetime import timedelta
 from typing import Optional, Tuple
 from sqlalchemy.exc import IntegrityError
@@ -11,6 +12,8 @@ from app.db import db
 from app.db.models import ReliefRequestFulfillmentLock, User, ReliefRqst
 from app.utils.timezone import now
 
+logger = logging.getLogger(__name__)
+
 
 DEFAULT_LOCK_EXPIRY_HOURS = 24
 
@@ -95,7 +98,10 @@ def release_lock(reliefrqst_id: int, user_id: int, force: bool = False, release_
         success, error_msg = reservation_service.release_all_reservations(reliefrqst_id)
         if not success:
             # Log error but continue with lock release
-            print(f"Warning: Failed to release reservations for request {reliefrqst_id}: {error_msg}")
+            logger.warning(
+                "Failed to release reservations for request %s: %s", reliefrqst_id, error_msg,
+                extra={'reliefrqst_id': reliefrqst_id}
+            )
     
     db.session.delete(lock)
     db.session.commit()
@@ -0,0 +1,284 @@
+"""
+Inventory Reconciliation Service
+Set-based consistency check between itembatch and inventory totals
+
+inventory.usable_qty/reserved_qty/defective_qty/expired_qty are meant to equal
+the sums over the warehouse's batches of the item. Reservation, dispatch and
+intake keep them in step, but paths that only update inventory (e.g. transfer
+execution) or failed partial updates leave them drifting.
+
+find_discrepancies() compares every (warehouse, item) pair with one grouped
+query: batch totals are aggregated once and full-outer-joined to inventory, so
+the cost is a single scan of itembatch regardless of how many pairs drift.
+
+repair_discrepancies() brings inventory back in line with its batches for the
+discrepancy classes the caller selects. Batches are authoritative for drift
+from failed partial updates, because allocation and dispatch work on batches.
+They are not for pairs touched by transfers executed before transfers moved
+batches: there the inventory figure is right and the batches are stale, so
+such pairs are flagged for manual review and left alone unless the caller
+includes them explicitly. Repairs go through the ORM, so they are versioned
+and recorded in the stock ledger as adjustments with ref_type 'reconcile'.
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, func, literal, or_, select, tuple_
+
+from app.db import db, stock_ledger
+from app.db.models import Inventory, ItemBatch, Item, Transfer, TransferItem
+from app.utils.timezone import now
+
+
+QTY_KEYS = ('usable_qty', 'reserved_qty', 'defective_qty', 'expired_qty')
+
+# Discrepancy classes
+CLASS_MISSING_INVENTORY = 'missing_inventory'  # Batches without an inventory row
+CLASS_MISSING_BATCHES = 'missing_batches'      # Batched item stocked without batches
+CLASS_USABLE_DRIFT = 'usable_drift'
+CLASS_RESERVED_DRIFT = 'reserved_drift'
+CLASS_DEFECTIVE_DRIFT = 'defective_drift'
+CLASS_EXPIRED_DRIFT = 'expired_drift'
+CLASS_OVER_RESERVED = 'over_reserved'          # reserved_qty > usable_qty
+CLASS_NEGATIVE = 'negative_qty'
+
+DRIFT_CLASSES = {
+    'usable_qty': CLASS_USABLE_DRIFT,
+    'reserved_qty': CLASS_RESERVED_DRIFT,
+    'defective_qty': CLASS_DEFECTIVE_DRIFT,
+    'expired_qty': CLASS_EXPIRED_DRIFT,
+}
+
+# Classes fixed by setting inventory to its batch totals
+REPAIRABLE_CLASSES = {CLASS_MISSING_INVENTORY, *DRIFT_CLASSES.values()}
+
+REPAIR_CHUNK_SIZE = 1000
+
+TRANSFER_STATUS_DRAFT = 'D'
+
+
+def _batch_totals(warehouse_id: Optional[int] = None, item_id: Optional[int] = None,
+                  keys: Optional[List[tuple]] = None):
+    query = select(
+        ItemBatch.inventory_id,
+        ItemBatch.item_id,
+        func.count().label('batch_count'),
+        func.min(ItemBatch.uom_code).label('uom_code'),
+        *[func.coalesce(func.sum(getattr(ItemBatch, key)), 0).label(key) for key in QTY_KEYS]
+    )
+    if warehouse_id is not None:
+        query = query.where(ItemBatch.inventory_id == warehouse_id)
+    if item_id is not None:
+        query = query.where(ItemBatch.item_id == item_id)
+    if keys is not None:
+        query = query.where(tuple_(ItemBatch.inventory_id, ItemBatch.item_id).in_(keys))
+    return query.group_by(ItemBatch.inventory_id, ItemBatch.item_id)
+
+
+def _transfer_pairs(warehouse_id: Optional[int] = None, item_id: Optional[int] = None) -> set:
+    """(warehouse_id, item_id) pairs moved by an executed transfer, either side"""
+    pairs = set()
+    for side in (Transfer.fr_inventory_id, Transfer.to_inventory_id):
+        query = select(side, TransferItem.item_id).distinct().join(
+            TransferItem, TransferItem.transfer_id == Transfer.transfer_id
+        ).where(Transfer.status_code != TRANSFER_STATUS_DRAFT)
+        if warehouse_id is not None:
+            query = query.where(side == warehouse_id)
+        if item_id is not None:
+            query = query.where(TransferItem.item_id == item_id)
+        pairs.update(tuple(row) for row in db.session.execute(query))
+    return pairs
+
+
+def find_discrepancies(warehouse_id: Optional[int] = None, item_id: Optional[int] = None) -> List[dict]:
+    """
+    Compare batch totals with inventory totals for every (warehouse, item)
+    pair in scope, in a single grouped query.
+
+    Args:
+        warehouse_id: Restrict to one warehouse
+        item_id: Restrict to one item
+
+    Returns:
+        List of dicts with warehouse_id, item_id, classes (list of CLASS_*),
+        inventory and batches (quantities; None when the side is missing),
+        batch_count, repairable and transfer_history (the pair was moved by an
+        executed transfer and needs manual review), ordered by warehouse and item
+    """
+    batches = _batch_totals(warehouse_id, item_id).subquery()
+
+    inventory_query = select(Inventory.inventory_id, Inventory.item_id, *[getattr(Inventory, key) for key in QTY_KEYS])
+    if warehouse_id is not None:
+        inventory_query = inventory_query.where(Inventory.inventory_id == warehouse_id)
+    if item_id is not None:
+        inventory_query = inventory_query.where(Inventory.item_id == item_id)
+    inventory = inventory_query.subquery()
+
+    pair_item_id = func.coalesce(inventory.c.item_id, batches.c.item_id)
+    inventory_qty_nonzero = or_(*[inventory.c[key] != 0 for key in QTY_KEYS])
+
+    stmt = select(
+        func.coalesce(inventory.c.inventory_id, batches.c.inventory_id).label('warehouse_id'),
+        pair_item_id.label('item_id'),
+        inventory.c.inventory_id.isnot(None).label('has_inventory'),
+        func.coalesce(batches.c.batch_count, 0).label('batch_count'),
+        func.coalesce(Item.is_batched_flag, literal(True)).label('is_batched'),
+        *[inventory.c[key].label(f'inventory_{key}') for key in QTY_KEYS],
+        *[batches.c[key].label(f'batch_{key}') for key in QTY_KEYS]
+    ).select_from(
+        inventory.join(
+            batches,
+            and_(inventory.c.inventory_id == batches.c.inventory_id, inventory.c.item_id == batches.c.item_id),
+            full=True
+        ).outerjoin(Item, Item.item_id == pair_item_id)
+    ).where(or_(
+        # Batches without inventory, or totals that differ
+        and_(batches.c.inventory_id.isnot(None), or_(
+            inventory.c.inventory_id.is_(None),
+            *[inventory.c[key] != batches.c[key] for key in QTY_KEYS]
+        )),
+        # Stock on a batched item that has no batches
+        and_(batches.c.inventory_id.is_(None), Item.is_batched_flag.is_(True), inventory_qty_nonzero),
+        inventory.c.reserved_qty > inventory.c.usable_qty,
+        *[inventory.c[key] < 0 for key in QTY_KEYS]
+    )).order_by('warehouse_id', 'item_id')
+
+    rows = db.session.execute(stmt).all()
+    transfer_pairs = _transfer_pairs(warehouse_id, item_id) if rows else set()
+
+    discrepancies = []
+    for row in rows:
+        inventory_qty = {key: Decimal(getattr(row, f'inventory_{key}')) for key in QTY_KEYS} if row.has_inventory else None
+        batch_qty = {key: Decimal(getattr(row, f'batch_{key}')) for key in QTY_KEYS} if row.batch_count else None
+
+        classes = []
+        if inventory_qty is None:
+            classes.append(CLASS_MISSING_INVENTORY)
+        elif batch_qty is None:
+            if row.is_batched and any(inventory_qty.values()):
+                classes.append(CLASS_MISSING_BATCHES)
+        else:
+            classes.extend(DRIFT_CLASSES[key] for key in QTY_KEYS if inventory_qty[key] != batch_qty[key])
+
+        for qty in (inventory_qty, batch_qty):
+            if qty is None:
+                continue
+            if qty['reserved_qty'] > qty['usable_qty'] and CLASS_OVER_RESERVED not in classes:
+                classes.append(CLASS_OVER_RESERVED)
+            if any(value < 0 for value in qty.values()) and CLASS_NEGATIVE not in classes:
+                classes.append(CLASS_NEGATIVE)
+
+        if not classes:
+            continue
+        discrepancies.append({
+            'warehouse_id': row.warehouse_id,
+            'item_id': row.item_id,
+            'classes': classes,
+            'inventory': inventory_qty,
+            'batches': batch_qty,
+            'batch_count': row.batch_count,
+            'repairable': bool(REPAIRABLE_CLASSES.intersection(classes)),
+            'transfer_history': (row.warehouse_id, row.item_id) in transfer_pairs
+        })
+    return discrepancies
+
+
+def summarize(discrepancies: Iterable[dict]) -> Dict[str, int]:
+    """Count of discrepancies per class"""
+    counts = {}
+    for discrepancy in discrepancies:
+        for cls in discrepancy['classes']:
+            counts[cls] = counts.get(cls, 0) + 1
+    return counts
+
+
+def repair_discrepancies(discrepancies: Iterable[dict], user_name: str, classes: Iterable[str],
+                         include_transfer_history: bool = False) -> int:
+    """
+    Set inventory totals to their batch totals for the selected repairable
+    classes, creating missing inventory rows. The caller commits.
+
+    Only the quantities whose drift class is selected are changed, so
+    repairing reserved_drift leaves a drifted usable_qty for review.
+    Pairs with transfer history are skipped unless include_transfer_history.
+
+    Inventory rows are locked (in key order) before the batch totals are
+    re-read, so a pair changed since find_discrepancies() is repaired with
+    current figures, and one that has since come back in line is left alone.
+
+    Args:
+        discrepancies: Result of find_discrepancies()
+        user_name: Recorded as update_by_id and in the stock ledger
+        classes: CLASS_* values to repair (subset of REPAIRABLE_CLASSES)
+        include_transfer_history: Also repair pairs moved by executed transfers
+
+    Returns:
+        Number of inventory rows updated or created
+    """
+    classes = set(classes)
+    unknown = classes - REPAIRABLE_CLASSES
+    if unknown:
+        raise ValueError(f"Not repairable: {', '.join(sorted(unknown))}")
+
+    repair_keys = {}
+    for d in discrepancies:
+        if d['transfer_history'] and not include_transfer_history:
+            continue
+        if CLASS_MISSING_INVENTORY in d['classes']:
+            if CLASS_MISSING_INVENTORY in classes:
+                repair_keys[(d['warehouse_id'], d['item_id'])] = QTY_KEYS
+            continue
+        qty_keys = tuple(key for key in QTY_KEYS if DRIFT_CLASSES[key] in classes and DRIFT_CLASSES[key] in d['classes'])
+        if qty_keys:
+            repair_keys[(d['warehouse_id'], d['item_id'])] = qty_keys
+
+    keys = sorted(repair_keys)
+    if not keys:
+        return 0
+
+    audit_id = user_name.upper().strip()[:20]
+    stock_ledger.set_movement(db.session, stock_ledger.MOVEMENT_ADJUSTMENT, 'reconcile')
+
+    repaired = 0
+    for start in range(0, len(keys), REPAIR_CHUNK_SIZE):
+        chunk = keys[start:start + REPAIR_CHUNK_SIZE]
+
+        inventories = {
+            (inventory.inventory_id, inventory.item_id): inventory
+            for inventory in Inventory.query.filter(
+                tuple_(Inventory.inventory_id, Inventory.item_id).in_(chunk)
+            ).order_by(Inventory.inventory_id, Inventory.item_id).with_for_update().all()
+        }
+
+        current_time = now()
+        for totals in db.session.execute(_batch_totals(keys=chunk)):
+            key = (totals.inventory_id, totals.item_id)
+            qty_keys = repair_keys[key]
+            inventory = inventories.get(key)
+
+            if inventory is None:
+                if qty_keys != QTY_KEYS:
+                    # Deleted since the check; the next run classifies the pair afresh
+                    continue
+                inventory = Inventory(
+                    inventory_id=totals.inventory_id,
+                    item_id=totals.item_id,
+                    uom_code=totals.uom_code,
+                    status_code='A',
+                    create_by_id=audit_id,
+                    create_dtime=current_time,
+                    version_nbr=1
+                )
+                db.session.add(inventory)
+            elif all(getattr(inventory, qty_key) == getattr(totals, qty_key) for qty_key in qty_keys):
+                continue
+
+            for qty_key in qty_keys:
+                setattr(inventory, qty_key, getattr(totals, qty_key))
+            inventory.update_by_id = audit_id
+            inventory.update_dtime = current_time
+            repaired += 1
+
+        db.session.flush()
+
+    return repaired
@@ -16,6 +16,8 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import func
 from app.db import db
 from app.db.models import Inventory, ReliefPkgItem, ItemBatch
+from app.db import stock_ledger
+from app.core.metrics import timed_operation
 
 
 def get_current_reservations(reliefrqst_id: int) -> Dict[Tuple[int, int], Decimal]:
@@ -69,6 +71,7 @@ def get_current_batch_reservations(reliefrqst_id: int) -> Dict[Tuple[int, int, i
     return batch_reservations
 
 
+@timed_operation('reserve')
 def reserve_inventory(reliefrqst_id: int, new_allocations: List[Dict], old_allocations: Optional[Dict[Tuple[int, int, int], Decimal]] = None) -> Tuple[bool, str]:
     """
     Reserve inventory for package allocations at BOTH batch and warehouse levels.
@@ -199,6 +202,7 @@ def reserve_inventory(reliefrqst_id: int, new_allocations: List[Dict], old_alloc
         return False, f'Database error during reservation: {str(e)}'
 
 
+@timed_operation('release')
 def release_all_reservations(reliefrqst_id: int) -> Tuple[bool, str]:
     """
     Release all inventory reservations for a relief request at BOTH batch and warehouse levels.
@@ -289,6 +293,7 @@ def release_all_reservations(reliefrqst_id: int) -> Tuple[bool, str]:
         return False, f'Database error during release: {str(e)}'
 
 
+@timed_operation('commit')
 def commit_inventory(reliefrqst_id: int) -> Tuple[bool, str]:
     """
     Commit inventory allocations on package dispatch at BATCH LEVEL.
@@ -314,6 +319,8 @@ def commit_inventory(reliefrqst_id: int) -> Tuple[bool, str]:
         if not pkg:
             return False, 'No package found for this relief request'
         
+        stock_ledger.set_movement(db.session, stock_ledger.MOVEMENT_DISPATCH, 'reliefpkg', pkg.reliefpkg_id)
+        
         pkg_items = ReliefPkgItem.query.filter_by(reliefpkg_id=pkg.reliefpkg_id).all()
         
         # Track affected (item_id, inventory_id) combinations for inventory table update
@@ -377,6 +384,7 @@ def commit_inventory(reliefrqst_id: int) -> Tuple[bool, str]:
         return False, f'Database error during commit: {str(e)}'
 
 
+@timed_operation('cancel')
 def cancel_relief_package(reliefpkg_id: int, current_user_name: str) -> Tuple[bool, str]:
     """
     Cancel a relief package and fully reverse all reservations with optimistic locking.
@@ -6,6 +6,7 @@ from decimal import Decimal
 from typing import Dict, List, Tuple
 from app.db import db
 from app.db.models import ReliefRqstItemStatus
+from app.core.metrics import record_cache_lookup
 
 # Cache for active status lookup
 _status_cache = None
@@ -29,6 +30,7 @@ def load_status_map(force_reload: bool = False) -> Dict[str, Dict[str, str]]:
     if force_reload:
         clear_status_cache()
     
+    record_cache_lookup('item_status', _status_cache is not None)
     if _status_cache is None:
         statuses = ReliefRqstItemStatus.query.filter_by(active_flag=True).all()
         _status_cache = {
@@ -0,0 +1,193 @@
+"""
+Notification Outbox Service
+Transactional outbox for notifications and other post-commit side effects
+
+Business code calls enqueue() inside its own transaction to append one compact
+event row to notification_outbox. The event commits (or rolls back) together
+with the business change, and recipient lookups and Notification inserts no
+longer run while inventory rows are locked.
+
+The notification worker (scripts/notification_worker.py) calls process_pending()
+after commit. Each event type has a handler, registered with @handler(...),
+that expands the payload into Notification rows (and any future email/SMS).
+Handlers run in the worker's transaction, so the notifications and the event's
+status change commit atomically; failures are retried with exponential backoff.
+"""
+import json
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db import db
+from app.db.models import NotificationOutbox
+from app.utils.timezone import now
+
+
+# Event types
+EVENT_RELIEFRQST_SUBMITTED = 'reliefrqst_submitted'
+EVENT_RELIEFRQST_ELIGIBLE = 'reliefrqst_eligible'
+EVENT_RELIEFRQST_INELIGIBLE = 'reliefrqst_ineligible'
+EVENT_RELIEFRQST_CLOSED = 'reliefrqst_closed'
+EVENT_PACKAGE_READY_FOR_APPROVAL = 'package_ready_for_approval'
+EVENT_PACKAGE_APPROVED = 'package_approved'
+EVENT_PACKAGE_DISPATCHED = 'package_dispatched'
+EVENT_PACKAGE_HANDOVER = 'package_handover'
+
+# Status codes
+STATUS_PENDING = 'P'
+STATUS_DONE = 'D'
+STATUS_FAILED = 'F'
+
+DEFAULT_BATCH_SIZE = 100
+MAX_ATTEMPTS = 8
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+_handlers: Dict[str, Callable[[dict], None]] = {}
+
+
+def handler(event_type: str):
+    """
+    Register the function that expands events of this type.
+    The function receives the decoded payload dict.
+    """
+    def decorator(func):
+        _handlers[event_type] = func
+        return func
+    return decorator
+
+
+def enqueue(event_type: str, payload: dict, idempotency_key: str) -> bool:
+    """
+    Append an event to the outbox in the caller's transaction.
+
+    Args:
+        event_type: One of the EVENT_* constants
+        payload: JSON-serializable event data (IDs and display values, not objects)
+        idempotency_key: Unique key for this occurrence; a repeated key is ignored
+
+    Returns:
+        True if the event was added, False if the key was already present
+    """
+    current_time = now()
+    stmt = insert(NotificationOutbox).values(
+        event_type=event_type,
+        idempotency_key=idempotency_key,
+        payload=json.dumps(payload),
+        status_code=STATUS_PENDING,
+        attempt_count=0,
+        available_at=current_time,
+        created_at=current_time
+    ).on_conflict_do_nothing(
+        index_elements=[NotificationOutbox.idempotency_key]
+    )
+    return db.session.execute(stmt).rowcount > 0
+
+
+def _retry_delay(attempt_count: int) -> timedelta:
+    """Exponential backoff: 30s, 60s, 120s, ... capped at RETRY_MAX_SECONDS"""
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * (2 ** (attempt_count - 1)), RETRY_MAX_SECONDS))
+
+
+def process_pending(batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Claim and expand up to batch_size due events, then commit.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so several workers can run
+    side by side without handling the same event twice. Each event runs in a
+    savepoint: a failing handler only rolls back its own notifications.
+
+    Returns:
+        Dict with counts: processed, retried, failed
+    """
+    counts = {'processed': 0, 'retried': 0, 'failed': 0}
+
+    events = NotificationOutbox.query.filter(
+        NotificationOutbox.status_code == STATUS_PENDING,
+        NotificationOutbox.available_at <= now()
+    ).order_by(
+        NotificationOutbox.available_at, NotificationOutbox.outbox_id
+    ).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    for event in events:
+        try:
+            event_handler = _handlers.get(event.event_type)
+            if event_handler is None:
+                raise LookupError(f"No handler registered for event type '{event.event_type}'")
+
+            with db.session.begin_nested():
+                event_handler(json.loads(event.payload))
+
+            event.status_code = STATUS_DONE
+            event.processed_at = now()
+            event.last_error = None
+            counts['processed'] += 1
+        except Exception as e:
+            event.attempt_count += 1
+            event.last_error = f"{type(e).__name__}: {e}"[:2000]
+            if event.attempt_count >= MAX_ATTEMPTS:
+                event.status_code = STATUS_FAILED
+                event.processed_at = now()
+                counts['failed'] += 1
+            else:
+                event.available_at = now() + _retry_delay(event.attempt_count)
+                counts['retried'] += 1
+
+    db.session.commit()
+
+    return counts
+
+
+def get_outbox_metrics() -> Dict[str, Optional[float]]:
+    """
+    Outbox backlog and lag, for monitoring the worker.
+
+    Returns:
+        Dict with pending, retrying and failed counts and oldest_pending_seconds
+        (age of the oldest undelivered event, None when the backlog is empty)
+    """
+    pending, retrying, failed, oldest_created_at = db.session.query(
+        db.func.count(NotificationOutbox.outbox_id).filter(
+            NotificationOutbox.status_code == STATUS_PENDING
+        ),
+        db.func.count(NotificationOutbox.outbox_id).filter(
+            NotificationOutbox.status_code == STATUS_PENDING,
+            NotificationOutbox.attempt_count > 0
+        ),
+        db.func.count(NotificationOutbox.outbox_id).filter(
+            NotificationOutbox.status_code == STATUS_FAILED
+        ),
+        db.func.min(NotificationOutbox.created_at).filter(
+            NotificationOutbox.status_code == STATUS_PENDING
+        )
+    ).one()
+
+    oldest_pending_seconds = None
+    if oldest_created_at is not None:
+        oldest_pending_seconds = max((now() - oldest_created_at).total_seconds(), 0.0)
+
+    return {
+        'pending': pending,
+        'retrying': retrying,
+        'failed': failed,
+        'oldest_pending_seconds': oldest_pending_seconds
+    }
+
+
+def retry_failed() -> int:
+    """
+    Return failed events to the queue (e.g. after fixing the cause).
+    The caller commits.
+
+    Returns:
+        Number of events requeued
+    """
+    return NotificationOutbox.query.filter(
+        NotificationOutbox.status_code == STATUS_FAILED
+    ).update({
+        NotificationOutbox.status_code: STATUS_PENDING,
+        NotificationOutbox.attempt_count: 0,
+        NotificationOutbox.available_at: now(),
+        NotificationOutbox.processed_at: None
+    }, synchronize_session=False)
@@ -20,8 +20,10 @@ Usage Example:
 """
 
 from flask import url_for
-from app.db.models import Notification, User, ReliefRqst, ReliefPkg, Role
+from app.db.models import Notification, User, ReliefRqst, ReliefPkg, Role, Warehouse
 from app.db import db
+from app.db.change_feed import record_change, OP_UPDATE
+from app.services import notification_outbox_service as outbox
 from typing import List, Optional
 from datetime import datetime
 
@@ -37,6 +39,7 @@ class NotificationService:
     TYPE_PACKAGE_APPROVED = 'package_approved'
     TYPE_PACKAGE_DISPATCHED = 'package_dispatched'
     TYPE_PACKAGE_RECEIVED = 'package_received'
+    TYPE_PACKAGE_HANDOVER = 'package_handover'
     TYPE_LOW_STOCK = 'low_stock'
     
     @staticmethod
@@ -380,6 +383,45 @@ class NotificationService:
         
         return notifications
     
+    @staticmethod
+    def create_package_handover_notification(
+        relief_pkg: ReliefPkg,
+        recipient_users: List[User],
+        warehouse_names: List[str]
+    ) -> List[Notification]:
+        """
+        Create notifications when a dispatched package is handed over to the agency.
+        Deep-links to the dispatch received details page.
+        
+        Args:
+            relief_pkg: The handed over relief package
+            recipient_users: List of users to notify (logistics officers and managers)
+            warehouse_names: Names of the warehouses the package left from
+            
+        Returns:
+            List of created Notification objects
+        """
+        relief_request = relief_pkg.relief_request
+        agency_name = relief_request.agency.agency_name if relief_request.agency else 'Unknown Agency'
+        warehouse_list = ', '.join(warehouse_names)
+        
+        # Deep-link to dispatch received details
+        link_url = url_for('packaging.dispatch_received_details', reliefpkg_id=relief_pkg.reliefpkg_id, _external=False)
+        
+        notifications = []
+        for user in recipient_users:
+            notification = NotificationService.create_notification(
+                user_id=user.user_id,
+                title='Package Handed Over to Agency',
+                message=f'Package for {agency_name} (RR-{relief_request.reliefrqst_id:06d}) has been handed over from warehouse: {warehouse_list}',
+                notification_type=NotificationService.TYPE_PACKAGE_HANDOVER,
+                link_url=link_url,
+                reliefrqst_id=relief_request.reliefrqst_id
+            )
+            notifications.append(notification)
+        
+        return notifications
+    
     @staticmethod
     def mark_as_read(notification_id: int, user_id: int) -> bool:
         """
@@ -416,10 +458,22 @@ class NotificationService:
         Returns:
             Number of notifications marked as read
         """
-        count = Notification.query.filter_by(
+        unread_ids = [row.id for row in db.session.query(Notification.id).filter_by(
             user_id=user_id,
             status='unread'
-        ).update({'status': 'read'})
+        ).all()]
+        if not unread_ids:
+            return 0
+        
+        count = Notification.query.filter(
+            Notification.id.in_(unread_ids),
+            Notification.status == 'unread'
+        ).update({'status': 'read'}, synchronize_session=False)
+        
+        # Bulk UPDATE bypasses flush capture; record the changes for /api/changes
+        for notification_id in unread_ids:
+            record_change(db.session, 'notification', str(notification_id), OP_UPDATE, user_id=user_id)
+        
         db.session.commit()
         return count
     
@@ -506,3 +560,66 @@ class NotificationService:
         
         db.session.commit()
         return count
+
+
+# Outbox handlers for package workflow events.
+# Packaging routes enqueue these in the same transaction as the status change;
+# the notification worker expands them into Notification rows after commit.
+
+def _get_event_package(payload: dict) -> ReliefPkg:
+    relief_pkg = ReliefPkg.query.get(payload['reliefpkg_id'])
+    if not relief_pkg:
+        raise LookupError(f"Relief package #{payload['reliefpkg_id']} not found")
+    return relief_pkg
+
+
+def _get_agency_users(relief_pkg: ReliefPkg) -> List[User]:
+    agency_id = relief_pkg.relief_request.agency_id
+    return NotificationService.get_agency_active_users(agency_id) if agency_id else []
+
+
+@outbox.handler(outbox.EVENT_PACKAGE_READY_FOR_APPROVAL)
+def _handle_package_ready_for_approval_event(payload: dict) -> None:
+    relief_pkg = _get_event_package(payload)
+    lm_users = NotificationService.get_active_users_by_role_codes(['LOGISTICS_MANAGER'])
+    NotificationService.create_package_ready_for_approval_notification(
+        relief_pkg=relief_pkg,
+        recipient_users=lm_users,
+        preparer_name=payload['preparer_name']
+    )
+
+
+@outbox.handler(outbox.EVENT_PACKAGE_APPROVED)
+def _handle_package_approved_event(payload: dict) -> None:
+    relief_pkg = _get_event_package(payload)
+    role_users = NotificationService.get_active_users_by_role_codes(payload['role_codes'])
+    NotificationService.create_package_approved_notification(
+        relief_pkg=relief_pkg,
+        recipient_users=role_users + _get_agency_users(relief_pkg),
+        approver_name=payload['approver_name']
+    )
+
+
+@outbox.handler(outbox.EVENT_PACKAGE_DISPATCHED)
+def _handle_package_dispatched_event(payload: dict) -> None:
+    relief_pkg = _get_event_package(payload)
+    lm_users = NotificationService.get_active_users_by_role_codes(['LOGISTICS_MANAGER'])
+    NotificationService.create_package_dispatched_notification(
+        relief_pkg=relief_pkg,
+        recipient_users=_get_agency_users(relief_pkg) + lm_users,
+        dispatcher_name=payload['dispatcher_name']
+    )
+
+
+@outbox.handler(outbox.EVENT_PACKAGE_HANDOVER)
+def _handle_package_handover_event(payload: dict) -> None:
+    relief_pkg = _get_event_package(payload)
+    recipients = NotificationService.get_active_users_by_role_codes(['LOGISTICS_OFFICER', 'LOGISTICS_MANAGER'])
+    warehouse_names = [w.warehouse_name for w in Warehouse.query.filter(
+        Warehouse.warehouse_id.in_(payload['warehouse_ids'])
+    ).all()]
+    NotificationService.create_package_handover_notification(
+        relief_pkg=relief_pkg,
+        recipient_users=recipients,
+        warehouse_names=warehouse_names
+    )
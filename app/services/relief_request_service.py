@@ -13,6 +13,8 @@ from app.db.models import (
     ReliefPkg, ReliefPkgItem, DBIntake, DBIntakeItem, Role
 )
 from app.core.exceptions import OptimisticLockError
+from app.db.change_feed import record_change, OP_UPDATE
+from app.services import notification_outbox_service as outbox
 from app.utils.timezone import now as jamaica_now
 
 
@@ -234,8 +236,12 @@ def submit_request(reliefrqst_id: int, current_version: int, user_email: str) ->
     
     db.session.flush()
     
-    # Create notifications for ODPEM users (admin users)
-    _create_odpem_notifications(relief_request)
+    # Queue notifications for ODPEM users (admin users); expanded by the notification worker
+    outbox.enqueue(
+        outbox.EVENT_RELIEFRQST_SUBMITTED,
+        {'reliefrqst_id': relief_request.reliefrqst_id},
+        f"{outbox.EVENT_RELIEFRQST_SUBMITTED}:{relief_request.reliefrqst_id}:{relief_request.version_nbr}"
+    )
     
     # TODO: Send emails to ODPEM distribution list
     
@@ -306,6 +312,74 @@ def create_dispatch_notifications(relief_request: ReliefRqst) -> None:
         # )
 
 
+def _autoclose_status_query(*request_filters):
+    """
+    Grouped query giving, per relief request, the number of items whose received
+    usable_qty is still below issue_qty and the number of packages still pending
+    dispatch/receipt (status P or D). A request can be auto-closed when both are 0.
+    
+    Args:
+        request_filters: Criteria on ReliefRqst limiting the requests evaluated
+        
+    Returns:
+        Subquery with columns reliefrqst_id, unsatisfied_items, pending_packages
+    """
+    requests_in_scope = db.session.query(ReliefRqst.reliefrqst_id).filter(*request_filters)
+    
+    # Total received usable quantity per (request, item) across all packages
+    received = db.session.query(
+        ReliefPkg.reliefrqst_id.label('reliefrqst_id'),
+        DBIntakeItem.item_id.label('item_id'),
+        db.func.sum(DBIntakeItem.usable_qty).label('received_qty')
+    ).join(
+        DBIntake,
+        db.and_(
+            DBIntakeItem.reliefpkg_id == DBIntake.reliefpkg_id,
+            DBIntakeItem.inventory_id == DBIntake.inventory_id
+        )
+    ).join(
+        ReliefPkg, DBIntake.reliefpkg_id == ReliefPkg.reliefpkg_id
+    ).filter(
+        ReliefPkg.reliefrqst_id.in_(requests_in_scope)
+    ).group_by(
+        ReliefPkg.reliefrqst_id, DBIntakeItem.item_id
+    ).subquery()
+    
+    pending_packages = db.session.query(db.func.count(ReliefPkg.reliefpkg_id)).filter(
+        ReliefPkg.reliefrqst_id == ReliefRqst.reliefrqst_id,
+        ReliefPkg.status_code.in_(['P', 'D'])
+    ).correlate(ReliefRqst).scalar_subquery()
+    
+    unsatisfied = db.case(
+        (
+            db.and_(
+                ReliefRqstItem.item_id.isnot(None),
+                db.func.coalesce(received.c.received_qty, 0) < db.func.coalesce(ReliefRqstItem.issue_qty, 0)
+            ),
+            1
+        ),
+        else_=0
+    )
+    
+    return db.session.query(
+        ReliefRqst.reliefrqst_id.label('reliefrqst_id'),
+        db.func.coalesce(db.func.sum(unsatisfied), 0).label('unsatisfied_items'),
+        pending_packages.label('pending_packages')
+    ).outerjoin(
+        ReliefRqstItem, ReliefRqstItem.reliefrqst_id == ReliefRqst.reliefrqst_id
+    ).outerjoin(
+        received,
+        db.and_(
+            received.c.reliefrqst_id == ReliefRqstItem.reliefrqst_id,
+            received.c.item_id == ReliefRqstItem.item_id
+        )
+    ).filter(
+        *request_filters
+    ).group_by(
+        ReliefRqst.reliefrqst_id
+    ).subquery()
+
+
 def check_and_autoclose_request(reliefrqst_id: int) -> Tuple[bool, str]:
     """
     Check if all allocated goods for a request have been received and auto-close if satisfied.
@@ -316,6 +390,8 @@ def check_and_autoclose_request(reliefrqst_id: int) -> Tuple[bool, str]:
     - Request is fully received when all items are satisfied AND no pending packages
     - Update status to DELIVERED (80) when conditions are met
     
+    Issued and received quantities for all items are compared in a single grouped query.
+    
     Args:
         reliefrqst_id: Relief request ID to check
         
@@ -330,34 +406,15 @@ def check_and_autoclose_request(reliefrqst_id: int) -> Tuple[bool, str]:
     if relief_request.status_code == STATUS_FILLED:
         return False, "Request already closed"
     
-    # Check for pending packages (status P or D)
-    pending_packages = ReliefPkg.query.filter_by(reliefrqst_id=reliefrqst_id).filter(
-        ReliefPkg.status_code.in_(['P', 'D'])
-    ).count()
+    status = _autoclose_status_query(ReliefRqst.reliefrqst_id == reliefrqst_id)
+    unsatisfied_items, pending_packages = db.session.query(
+        status.c.unsatisfied_items, status.c.pending_packages
+    ).one()
     
     if pending_packages > 0:
         return False, f"{pending_packages} package(s) still pending dispatch/receipt"
     
-    # Check each item to see if received quantity >= issued quantity
-    all_items_satisfied = True
-    for req_item in relief_request.items:
-        issued_qty = req_item.issue_qty or Decimal('0.00')
-        
-        # Calculate total received usable quantity for this item across all packages
-        received_qty = db.session.query(db.func.sum(DBIntakeItem.usable_qty)).join(
-            DBIntake
-        ).join(
-            ReliefPkg
-        ).filter(
-            ReliefPkg.reliefrqst_id == reliefrqst_id,
-            DBIntakeItem.item_id == req_item.item_id
-        ).scalar() or Decimal('0.00')
-        
-        if received_qty < issued_qty:
-            all_items_satisfied = False
-            break
-    
-    if not all_items_satisfied:
+    if unsatisfied_items > 0:
         return False, "Not all items have been fully received"
     
     # All conditions met - auto-close the request
@@ -366,12 +423,59 @@ def check_and_autoclose_request(reliefrqst_id: int) -> Tuple[bool, str]:
     
     db.session.flush()
     
-    # Create notification for agency confirming closure
-    _create_closure_notification(relief_request)
+    # Queue notification for agency confirming closure
+    _enqueue_closure_event(relief_request.reliefrqst_id)
     
     return True, f"Relief request #{reliefrqst_id} automatically closed - all goods received"
 
 
+def sweep_autoclose_requests() -> List[int]:
+    """
+    Auto-close every PART_FILLED request whose goods have all been received.
+    Catches intakes recorded through paths that do not call
+    check_and_autoclose_request(). Should be called periodically by a
+    background job/cron (see scripts/autoclose_requests.py).
+    
+    Eligible requests are found and closed by a single UPDATE; the caller commits.
+    
+    Returns:
+        List of closed relief request IDs
+    """
+    status = _autoclose_status_query(ReliefRqst.status_code == STATUS_PART_FILLED)
+    eligible = db.session.query(status.c.reliefrqst_id).filter(
+        status.c.unsatisfied_items == 0,
+        status.c.pending_packages == 0
+    )
+    
+    closed_rows = db.session.execute(
+        db.update(ReliefRqst).where(
+            ReliefRqst.status_code == STATUS_PART_FILLED,
+            ReliefRqst.reliefrqst_id.in_(eligible)
+        ).values(
+            status_code=STATUS_FILLED,
+            version_nbr=ReliefRqst.version_nbr + 1
+        ).returning(ReliefRqst.reliefrqst_id, ReliefRqst.agency_id),
+        execution_options={'synchronize_session': False}
+    ).all()
+    closed_ids = [row.reliefrqst_id for row in closed_rows]
+    
+    # Bulk UPDATE bypasses flush capture; record the changes for /api/changes
+    for row in closed_rows:
+        record_change(db.session, 'reliefrqst', str(row.reliefrqst_id), OP_UPDATE, agency_id=row.agency_id)
+        _enqueue_closure_event(row.reliefrqst_id)
+    
+    return closed_ids
+
+
+def _enqueue_closure_event(reliefrqst_id: int) -> None:
+    """Queue the agency closure notification for a request"""
+    outbox.enqueue(
+        outbox.EVENT_RELIEFRQST_CLOSED,
+        {'reliefrqst_id': reliefrqst_id},
+        f"{outbox.EVENT_RELIEFRQST_CLOSED}:{reliefrqst_id}"
+    )
+
+
 def _create_closure_notification(relief_request: ReliefRqst) -> None:
     """Create notification for agency when request is auto-closed"""
     agency_users = User.query.filter_by(
@@ -531,7 +635,11 @@ def submit_eligibility_decision(reliefrqst_id: int, decision: str, reason: Optio
         db.session.flush()
         
         # Notify the requester (agency)
-        _create_ineligible_notification(relief_request, reason.strip() if reason else '')
+        outbox.enqueue(
+            outbox.EVENT_RELIEFRQST_INELIGIBLE,
+            {'reliefrqst_id': relief_request.reliefrqst_id, 'reason': reason.strip() if reason else ''},
+            f"{outbox.EVENT_RELIEFRQST_INELIGIBLE}:{relief_request.reliefrqst_id}:{relief_request.version_nbr}"
+        )
         
         return True, f"Request #{reliefrqst_id} marked as INELIGIBLE. Requester has been notified."
     
@@ -544,7 +652,11 @@ def submit_eligibility_decision(reliefrqst_id: int, decision: str, reason: Optio
         
         # Notify logistics team (LO and LM) that request is eligible and ready for fulfillment
         approver_name = f"{reviewer.first_name} {reviewer.last_name}" if reviewer and reviewer.first_name else "ODPEM Director"
-        _create_eligible_notification(relief_request, approver_name)
+        outbox.enqueue(
+            outbox.EVENT_RELIEFRQST_ELIGIBLE,
+            {'reliefrqst_id': relief_request.reliefrqst_id, 'approver_name': approver_name},
+            f"{outbox.EVENT_RELIEFRQST_ELIGIBLE}:{relief_request.reliefrqst_id}:{relief_request.version_nbr}"
+        )
         
         return True, f"Request #{reliefrqst_id} marked as ELIGIBLE. Logistics team has been notified."
 
@@ -610,6 +722,35 @@ def _create_eligible_notification(relief_request: ReliefRqst, approver_name: str
     )
 
 
+# Outbox handlers: expand queued events into notifications (run by the notification worker)
+
+def _get_event_request(payload: dict) -> ReliefRqst:
+    relief_request = ReliefRqst.query.get(payload['reliefrqst_id'])
+    if not relief_request:
+        raise LookupError(f"Relief request #{payload['reliefrqst_id']} not found")
+    return relief_request
+
+
+@outbox.handler(outbox.EVENT_RELIEFRQST_SUBMITTED)
+def _handle_submitted_event(payload: dict) -> None:
+    _create_odpem_notifications(_get_event_request(payload))
+
+
+@outbox.handler(outbox.EVENT_RELIEFRQST_INELIGIBLE)
+def _handle_ineligible_event(payload: dict) -> None:
+    _create_ineligible_notification(_get_event_request(payload), payload.get('reason', ''))
+
+
+@outbox.handler(outbox.EVENT_RELIEFRQST_ELIGIBLE)
+def _handle_eligible_event(payload: dict) -> None:
+    _create_eligible_notification(_get_event_request(payload), payload['approver_name'])
+
+
+@outbox.handler(outbox.EVENT_RELIEFRQST_CLOSED)
+def _handle_closed_event(payload: dict) -> None:
+    _create_closure_notification(_get_event_request(payload))
+
+
 def can_process_request(reliefrqst_id: int) -> Tuple[bool, str]:
     """
     Check if a relief request can be processed for fulfillment/dispatch.
@@ -0,0 +1,292 @@
+"""
+Stock Ledger Service
+Point-in-time stock balances, period movements and ledger verification
+
+Every change to inventory/itembatch quantities is appended to stock_movement
+(app/db/stock_ledger.py). stock_snapshot holds the balance of each
+(warehouse, item, batch) key at the end of a day, built by
+scripts/stock_ledger.py from the previous snapshot plus that day's movements.
+
+A balance at time T is the latest snapshot ending at or before T plus the
+movements between the snapshot and T, so with daily snapshots a query reads one
+snapshot and at most about a day of ledger rows.
+
+batch_id 0 keys are warehouse-level (inventory) balances; other keys are
+itembatch balances. The two levels are recorded independently and are never
+added together.
+"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, insert, literal, or_, select, union_all
+
+from app.db import db
+from app.db.models import Inventory, ItemBatch, StockMovement, StockSnapshot
+from app.db.stock_ledger import INVENTORY_LEVEL_BATCH_ID
+from app.utils.timezone import now
+
+
+QTY_KEYS = ('usable_qty', 'defective_qty', 'expired_qty')
+
+StockKey = Tuple[int, int, int]
+
+
+def _snapshot_end(snapshot_date: date) -> datetime:
+    """Movements before this instant are included in the snapshot"""
+    return datetime.combine(snapshot_date + timedelta(days=1), time.min)
+
+
+def _latest_snapshot_date(as_of: Optional[datetime]) -> Optional[date]:
+    """Latest snapshot whose end is at or before as_of (None = any)"""
+    query = db.session.query(func.max(StockSnapshot.snapshot_date))
+    if as_of is not None:
+        query = query.filter(StockSnapshot.snapshot_date <= (as_of - timedelta(days=1)).date())
+    return query.scalar()
+
+
+def _key_criteria(model, warehouse_id: Optional[int], item_id: Optional[int],
+                  batch_level: Optional[bool]) -> list:
+    criteria = []
+    if warehouse_id is not None:
+        criteria.append(model.inventory_id == warehouse_id)
+    if item_id is not None:
+        criteria.append(model.item_id == item_id)
+    if batch_level is True:
+        criteria.append(model.batch_id != INVENTORY_LEVEL_BATCH_ID)
+    elif batch_level is False:
+        criteria.append(model.batch_id == INVENTORY_LEVEL_BATCH_ID)
+    return criteria
+
+
+def _balance_select(as_of: Optional[datetime], warehouse_id: Optional[int] = None,
+                    item_id: Optional[int] = None, batch_level: Optional[bool] = False,
+                    snapshot_date: Optional[date] = None):
+    """
+    SELECT of (inventory_id, item_id, batch_id, usable_qty, defective_qty,
+    expired_qty) balances at as_of: snapshot rows plus later movements.
+    """
+    parts = []
+    movement_criteria = _key_criteria(StockMovement, warehouse_id, item_id, batch_level)
+    if as_of is not None:
+        movement_criteria.append(StockMovement.moved_at < as_of)
+
+    if snapshot_date is not None:
+        parts.append(select(
+            StockSnapshot.inventory_id, StockSnapshot.item_id, StockSnapshot.batch_id,
+            StockSnapshot.usable_qty.label('usable_qty'),
+            StockSnapshot.defective_qty.label('defective_qty'),
+            StockSnapshot.expired_qty.label('expired_qty')
+        ).where(
+            StockSnapshot.snapshot_date == snapshot_date,
+            *_key_criteria(StockSnapshot, warehouse_id, item_id, batch_level)
+        ))
+        movement_criteria.append(StockMovement.moved_at >= _snapshot_end(snapshot_date))
+
+    parts.append(select(
+        StockMovement.inventory_id, StockMovement.item_id, StockMovement.batch_id,
+        StockMovement.usable_delta.label('usable_qty'),
+        StockMovement.defective_delta.label('defective_qty'),
+        StockMovement.expired_delta.label('expired_qty')
+    ).where(*movement_criteria))
+
+    rows = union_all(*parts).subquery() if len(parts) > 1 else parts[0].subquery()
+    return select(
+        rows.c.inventory_id, rows.c.item_id, rows.c.batch_id,
+        func.sum(rows.c.usable_qty).label('usable_qty'),
+        func.sum(rows.c.defective_qty).label('defective_qty'),
+        func.sum(rows.c.expired_qty).label('expired_qty')
+    ).group_by(rows.c.inventory_id, rows.c.item_id, rows.c.batch_id)
+
+
+def _qty(row) -> Dict[str, Decimal]:
+    return {key: Decimal(getattr(row, key) or 0) for key in QTY_KEYS}
+
+
+def get_balances(as_of: Optional[datetime] = None, warehouse_id: Optional[int] = None,
+                 item_id: Optional[int] = None, batch_level: bool = False) -> Dict[StockKey, Dict[str, Decimal]]:
+    """
+    Stock balances at a point in time.
+
+    Args:
+        as_of: Point in time (Jamaica time); None for the current ledger balance
+        warehouse_id: Restrict to one warehouse
+        item_id: Restrict to one item
+        batch_level: Itembatch balances instead of warehouse-level balances
+
+    Returns:
+        Dict mapping (warehouse_id, item_id, batch_id) to usable_qty,
+        defective_qty and expired_qty. Keys without stock are omitted.
+    """
+    stmt = _balance_select(as_of, warehouse_id, item_id, batch_level, _latest_snapshot_date(as_of))
+    balances = {}
+    for row in db.session.execute(stmt):
+        qty = _qty(row)
+        if any(qty.values()):
+            balances[(row.inventory_id, row.item_id, row.batch_id)] = qty
+    return balances
+
+
+def get_movement_summary(start: datetime, end: datetime, warehouse_id: Optional[int] = None,
+                         item_id: Optional[int] = None, batch_level: bool = False) -> List[dict]:
+    """
+    Opening balance, movements by type and closing balance for a period.
+
+    Args:
+        start: Period start (inclusive)
+        end: Period end (exclusive)
+        warehouse_id, item_id, batch_level: As for get_balances()
+
+    Returns:
+        List of dicts with warehouse_id, item_id, batch_id, opening,
+        movements ({movement_type: quantities}) and closing, ordered by key
+    """
+    opening = get_balances(start, warehouse_id, item_id, batch_level)
+
+    period = db.session.query(
+        StockMovement.inventory_id, StockMovement.item_id, StockMovement.batch_id,
+        StockMovement.movement_type,
+        func.sum(StockMovement.usable_delta).label('usable_qty'),
+        func.sum(StockMovement.defective_delta).label('defective_qty'),
+        func.sum(StockMovement.expired_delta).label('expired_qty')
+    ).filter(
+        StockMovement.moved_at >= start,
+        StockMovement.moved_at < end,
+        *_key_criteria(StockMovement, warehouse_id, item_id, batch_level)
+    ).group_by(
+        StockMovement.inventory_id, StockMovement.item_id, StockMovement.batch_id,
+        StockMovement.movement_type
+    ).all()
+
+    movements = {}
+    for row in period:
+        movements.setdefault((row.inventory_id, row.item_id, row.batch_id), {})[row.movement_type] = _qty(row)
+
+    summary = []
+    for key in sorted(set(opening) | set(movements)):
+        opening_qty = opening.get(key, {qty_key: Decimal('0') for qty_key in QTY_KEYS})
+        closing_qty = dict(opening_qty)
+        for qty in movements.get(key, {}).values():
+            for qty_key in QTY_KEYS:
+                closing_qty[qty_key] += qty[qty_key]
+        summary.append({
+            'warehouse_id': key[0],
+            'item_id': key[1],
+            'batch_id': key[2],
+            'opening': opening_qty,
+            'movements': movements.get(key, {}),
+            'closing': closing_qty
+        })
+    return summary
+
+
+def build_snapshot(snapshot_date: date) -> int:
+    """
+    Write the end-of-day balances for snapshot_date from the previous snapshot
+    plus that day's movements. The caller commits.
+
+    Run for a day only after it has ended; an existing snapshot is kept.
+
+    Returns:
+        Number of snapshot rows written
+    """
+    exists = db.session.query(StockSnapshot.snapshot_date).filter(
+        StockSnapshot.snapshot_date == snapshot_date
+    ).first()
+    if exists:
+        return 0
+
+    previous_date = db.session.query(func.max(StockSnapshot.snapshot_date)).filter(
+        StockSnapshot.snapshot_date < snapshot_date
+    ).scalar()
+
+    balances = _balance_select(
+        _snapshot_end(snapshot_date), batch_level=None, snapshot_date=previous_date
+    ).subquery()
+    stmt = insert(StockSnapshot).from_select(
+        ['snapshot_date', 'inventory_id', 'item_id', 'batch_id',
+         'usable_qty', 'defective_qty', 'expired_qty', 'create_dtime'],
+        select(
+            literal(snapshot_date, StockSnapshot.snapshot_date.type),
+            balances.c.inventory_id, balances.c.item_id, balances.c.batch_id,
+            balances.c.usable_qty, balances.c.defective_qty, balances.c.expired_qty,
+            literal(now(), StockSnapshot.create_dtime.type)
+        ).where(or_(
+            balances.c.usable_qty != 0, balances.c.defective_qty != 0, balances.c.expired_qty != 0
+        ))
+    )
+    return db.session.execute(stmt).rowcount
+
+
+def get_pending_snapshot_dates(through_date: date) -> List[date]:
+    """
+    Days up to through_date that still need a snapshot, oldest first:
+    from the day after the latest snapshot (or the first movement) onwards.
+    """
+    latest = db.session.query(func.max(StockSnapshot.snapshot_date)).scalar()
+    if latest is not None:
+        first = latest + timedelta(days=1)
+    else:
+        first_moved_at = db.session.query(func.min(StockMovement.moved_at)).scalar()
+        if first_moved_at is None:
+            return []
+        first = first_moved_at.date()
+
+    return [first + timedelta(days=offset) for offset in range((through_date - first).days + 1)]
+
+
+def verify_ledger(warehouse_id: Optional[int] = None) -> List[dict]:
+    """
+    Compare current ledger balances (latest snapshot + later movements) with
+    the live inventory and itembatch quantities, in a single statement so
+    both sides are read from the same database snapshot.
+
+    Returns:
+        List of discrepancies: warehouse_id, item_id, batch_id, ledger and
+        live quantities. Empty when the ledger reconciles.
+    """
+    ledger = _balance_select(
+        None, warehouse_id, batch_level=None, snapshot_date=_latest_snapshot_date(None)
+    ).subquery()
+
+    inventory_rows = select(
+        Inventory.inventory_id, Inventory.item_id,
+        literal(INVENTORY_LEVEL_BATCH_ID).label('batch_id'),
+        Inventory.usable_qty, Inventory.defective_qty, Inventory.expired_qty
+    )
+    batch_rows = select(
+        ItemBatch.inventory_id, ItemBatch.item_id, ItemBatch.batch_id,
+        ItemBatch.usable_qty, ItemBatch.defective_qty, ItemBatch.expired_qty
+    )
+    if warehouse_id is not None:
+        inventory_rows = inventory_rows.where(Inventory.inventory_id == warehouse_id)
+        batch_rows = batch_rows.where(ItemBatch.inventory_id == warehouse_id)
+    live = union_all(inventory_rows, batch_rows).subquery()
+
+    on_key = and_(
+        ledger.c.inventory_id == live.c.inventory_id,
+        ledger.c.item_id == live.c.item_id,
+        ledger.c.batch_id == live.c.batch_id
+    )
+    stmt = select(
+        func.coalesce(ledger.c.inventory_id, live.c.inventory_id).label('inventory_id'),
+        func.coalesce(ledger.c.item_id, live.c.item_id).label('item_id'),
+        func.coalesce(ledger.c.batch_id, live.c.batch_id).label('batch_id'),
+        *[func.coalesce(ledger.c[key], 0).label(f'ledger_{key}') for key in QTY_KEYS],
+        *[func.coalesce(live.c[key], 0).label(f'live_{key}') for key in QTY_KEYS]
+    ).select_from(
+        ledger.join(live, on_key, full=True)
+    ).where(or_(*[
+        func.coalesce(ledger.c[key], 0) != func.coalesce(live.c[key], 0) for key in QTY_KEYS
+    ])).order_by('inventory_id', 'item_id', 'batch_id')
+
+    return [
+        {
+            'warehouse_id': row.inventory_id,
+            'item_id': row.item_id,
+            'batch_id': row.batch_id,
+            'ledger': {key: Decimal(getattr(row, f'ledger_{key}')) for key in QTY_KEYS},
+            'live': {key: Decimal(getattr(row, f'live_{key}')) for key in QTY_KEYS}
+        }
+        for row in db.session.execute(stmt)
+    ]
@@ -0,0 +1,322 @@
+"""
+Transfer Service
+Batch-aware creation and execution of multi-line warehouse transfers
+
+A transfer carries any number of item lines. Each line is allocated to source
+batches in FEFO order (FIFO for items that cannot expire, expired batches
+skipped - the same ordering as the package drawer) and stored as one
+transfer_item per source batch.
+
+Execution locks every affected batch in batch_id order and then the inventory
+rows in (warehouse, item) order, re-allocates against the locked quantities
+(stock may have been reserved or dispatched since the draft), and applies all
+deltas in one flush: source batches are decremented, the moved quantity lands
+in the destination batch with the same batch number (created when missing, so
+a partially moved batch is split across the two warehouses), and both
+warehouses' inventory totals move by the same amounts. Nothing is written if
+any line is short.
+"""
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.db import db, stock_ledger
+from app.db.models import Transfer, TransferItem, Inventory, ItemBatch, Item, Warehouse
+from app.core.audit import add_audit_fields, add_verify_fields
+from app.services.batch_allocation_service import BatchAllocationService
+from app.utils.timezone import now
+
+
+STATUS_DRAFT = 'D'
+STATUS_COMPLETED = 'C'
+
+
+def merge_lines(lines: Iterable[Tuple[object, object]]) -> Tuple[Dict[int, Decimal], List[str]]:
+    """
+    Validate (item_id, quantity) form lines and total them per item.
+
+    Returns:
+        (OrderedDict item_id -> quantity, list of error messages)
+    """
+    merged = OrderedDict()
+    errors = []
+    for line_no, (item_id, qty) in enumerate(lines, start=1):
+        if not item_id and not qty:
+            continue
+        try:
+            item_id = int(item_id)
+            qty = Decimal(str(qty))
+        except (TypeError, ValueError, InvalidOperation):
+            errors.append(f'Line {line_no}: item and a numeric quantity are required')
+            continue
+        if not qty.is_finite() or qty <= 0:
+            errors.append(f'Line {line_no}: quantity must be greater than zero')
+            continue
+        merged[item_id] = merged.get(item_id, Decimal('0')) + qty
+    if not merged and not errors:
+        errors.append('At least one item line is required')
+    return merged, errors
+
+
+def _allocate(batches: List[ItemBatch], item: Item, qty: Decimal) -> Tuple[List[Tuple[ItemBatch, Decimal]], Decimal]:
+    """
+    Take qty from batches in FEFO/FIFO order.
+
+    Returns:
+        ([(batch, qty taken)], shortfall)
+    """
+    picks = []
+    remaining = qty
+    for batch in BatchAllocationService.sort_batches_for_drawer(batches, item):
+        if remaining <= 0:
+            break
+        available = Decimal(batch.usable_qty or 0) - Decimal(batch.reserved_qty or 0)
+        take = min(available, remaining)
+        if take > 0:
+            picks.append((batch, take))
+            remaining -= take
+    return picks, max(remaining, Decimal('0'))
+
+
+def _shortage_message(item: Item, requested: Decimal, shortfall: Decimal) -> str:
+    available = requested - shortfall
+    return f'Insufficient stock for {item.item_name}: requested {requested:.2f}, available {available:.2f}'
+
+
+def _source_batches(from_warehouse_id: int, item_ids: Iterable[int]) -> Dict[int, List[ItemBatch]]:
+    batches = {}
+    for batch in ItemBatch.query.filter(
+        ItemBatch.inventory_id == from_warehouse_id,
+        ItemBatch.item_id.in_(list(item_ids)),
+        ItemBatch.status_code == 'A'
+    ).order_by(ItemBatch.batch_id).all():
+        batches.setdefault(batch.item_id, []).append(batch)
+    return batches
+
+
+def create_transfer(from_warehouse_id: int, to_warehouse_id: int, lines: Dict[int, Decimal], user,
+                    reason_text: Optional[str] = None) -> Tuple[bool, str, Optional[Transfer]]:
+    """
+    Create a draft transfer with its lines allocated to source batches.
+    Nothing is reserved; execute_transfer() re-allocates under lock.
+    The caller commits.
+
+    Args:
+        from_warehouse_id: Source warehouse
+        to_warehouse_id: Destination warehouse
+        lines: item_id -> quantity (see merge_lines())
+        user: Current user (audit fields)
+        reason_text: Optional reason for the transfer
+
+    Returns:
+        (success, error_message, transfer)
+    """
+    if from_warehouse_id == to_warehouse_id:
+        return False, 'Cannot transfer to the same warehouse.', None
+
+    warehouses = Warehouse.query.filter(
+        Warehouse.warehouse_id.in_([from_warehouse_id, to_warehouse_id]),
+        Warehouse.status_code == 'A'
+    ).count()
+    if warehouses != 2:
+        return False, 'Both warehouses must exist and be active.', None
+
+    items = {item.item_id: item for item in Item.query.filter(Item.item_id.in_(list(lines))).all()}
+    missing = [str(item_id) for item_id in lines if item_id not in items]
+    if missing:
+        return False, f'Unknown item(s): {", ".join(missing)}', None
+
+    batches = _source_batches(from_warehouse_id, lines)
+    allocations = []
+    errors = []
+    for item_id, qty in lines.items():
+        picks, shortfall = _allocate(batches.get(item_id, []), items[item_id], qty)
+        if shortfall:
+            errors.append(_shortage_message(items[item_id], qty, shortfall))
+        allocations.extend(picks)
+    if errors:
+        return False, '; '.join(errors), None
+
+    transfer = Transfer(
+        fr_inventory_id=from_warehouse_id,
+        to_inventory_id=to_warehouse_id,
+        transfer_date=now().date(),
+        reason_text=reason_text or None,
+        status_code=STATUS_DRAFT
+    )
+    add_audit_fields(transfer, user)
+    add_verify_fields(transfer, user)
+    db.session.add(transfer)
+    db.session.flush()
+
+    for batch, qty in allocations:
+        transfer_item = TransferItem(
+            transfer_id=transfer.transfer_id,
+            item_id=batch.item_id,
+            batch_id=batch.batch_id,
+            inventory_id=from_warehouse_id,
+            item_qty=qty,
+            uom_code=batch.uom_code
+        )
+        add_audit_fields(transfer_item, user)
+        db.session.add(transfer_item)
+
+    return True, '', transfer
+
+
+def _destination_batch(source: ItemBatch, to_warehouse_id: int, existing: Dict[Tuple[int, str], ItemBatch], user) -> ItemBatch:
+    """Batch at the destination receiving stock from source (created when missing)"""
+    key = (source.item_id, source.batch_no)
+    if source.batch_no and key in existing:
+        return existing[key]
+
+    batch = ItemBatch(
+        inventory_id=to_warehouse_id,
+        item_id=source.item_id,
+        batch_no=source.batch_no,
+        batch_date=source.batch_date,
+        expiry_date=source.expiry_date,
+        uom_code=source.uom_code,
+        size_spec=source.size_spec,
+        avg_unit_value=source.avg_unit_value,
+        usable_qty=Decimal('0'),
+        reserved_qty=Decimal('0'),
+        defective_qty=Decimal('0'),
+        expired_qty=Decimal('0'),
+        status_code='A'
+    )
+    add_audit_fields(batch, user)
+    db.session.add(batch)
+    if source.batch_no:
+        existing[key] = batch
+    return batch
+
+
+def execute_transfer(transfer_id: int, user) -> Tuple[bool, str]:
+    """
+    Move the transfer's stock between warehouses in the caller's transaction.
+    The caller commits on success and rolls back on failure.
+
+    Lock order: transfer row, then all source and destination batches of the
+    transfer's items by batch_id, then inventory rows by (warehouse, item).
+
+    Returns:
+        (success, error_message)
+    """
+    # populate_existing: a copy the caller loaded before the lock would
+    # otherwise hide a status change committed while we waited for it
+    transfer = Transfer.query.filter_by(
+        transfer_id=transfer_id
+    ).with_for_update().populate_existing().first()
+    if not transfer:
+        return False, 'Transfer not found.'
+    if transfer.status_code != STATUS_DRAFT:
+        return False, 'Only draft transfers can be executed.'
+
+    requested = OrderedDict()
+    for transfer_item in sorted(transfer.items, key=lambda t: (t.item_id, t.batch_id)):
+        requested[transfer_item.item_id] = requested.get(transfer_item.item_id, Decimal('0')) + transfer_item.item_qty
+    if not requested:
+        return False, 'Transfer has no items.'
+
+    from_id, to_id = transfer.fr_inventory_id, transfer.to_inventory_id
+    item_ids = sorted(requested)
+    items = {item.item_id: item for item in Item.query.filter(Item.item_id.in_(item_ids)).all()}
+
+    stock_ledger.set_movement(db.session, stock_ledger.MOVEMENT_TRANSFER, 'transfer', transfer.transfer_id)
+
+    locked_batches = ItemBatch.query.filter(
+        ItemBatch.inventory_id.in_([from_id, to_id]),
+        ItemBatch.item_id.in_(item_ids)
+    ).order_by(ItemBatch.batch_id).with_for_update().populate_existing().all()
+
+    inventories = {
+        (inventory.inventory_id, inventory.item_id): inventory
+        for inventory in Inventory.query.filter(
+            Inventory.inventory_id.in_([from_id, to_id]),
+            Inventory.item_id.in_(item_ids)
+        ).order_by(Inventory.inventory_id, Inventory.item_id).with_for_update().populate_existing().all()
+    }
+
+    source_batches = {}
+    destination_batches = {}
+    for batch in locked_batches:
+        if batch.inventory_id == from_id:
+            if batch.status_code == 'A':
+                source_batches.setdefault(batch.item_id, []).append(batch)
+        elif batch.batch_no:
+            destination_batches.setdefault((batch.item_id, batch.batch_no), batch)
+
+    allocations = []
+    errors = []
+    for item_id, qty in requested.items():
+        picks, shortfall = _allocate(source_batches.get(item_id, []), items[item_id], qty)
+        if shortfall:
+            errors.append(_shortage_message(items[item_id], qty, shortfall))
+        allocations.extend(picks)
+    if errors:
+        return False, '; '.join(errors)
+
+    # Batch deltas
+    moved = {}
+    for source, qty in allocations:
+        destination = _destination_batch(source, to_id, destination_batches, user)
+        source.usable_qty -= qty
+        destination.usable_qty += qty
+        add_audit_fields(source, user, is_new=False)
+        if destination.batch_id is not None:
+            add_audit_fields(destination, user, is_new=False)
+        moved[(source.item_id, source.batch_id)] = (source, qty)
+
+    # Inventory deltas
+    for item_id, qty in requested.items():
+        source_inventory = inventories.get((from_id, item_id))
+        if source_inventory is None:
+            return False, f'No inventory record for {items[item_id].item_name} at the source warehouse'
+        source_inventory.usable_qty -= qty
+        add_audit_fields(source_inventory, user, is_new=False)
+
+        destination_inventory = inventories.get((to_id, item_id))
+        if destination_inventory is None:
+            destination_inventory = Inventory(
+                inventory_id=to_id,
+                item_id=item_id,
+                uom_code=source_inventory.uom_code,
+                usable_qty=Decimal('0'),
+                reserved_qty=Decimal('0'),
+                defective_qty=Decimal('0'),
+                expired_qty=Decimal('0'),
+                status_code='A'
+            )
+            add_audit_fields(destination_inventory, user)
+            db.session.add(destination_inventory)
+        else:
+            add_audit_fields(destination_inventory, user, is_new=False)
+        destination_inventory.usable_qty += qty
+
+    # Transfer lines record the batches actually moved
+    for transfer_item in list(transfer.items):
+        picked = moved.pop((transfer_item.item_id, transfer_item.batch_id), None)
+        if picked is None:
+            db.session.delete(transfer_item)
+        elif transfer_item.item_qty != picked[1]:
+            transfer_item.item_qty = picked[1]
+            add_audit_fields(transfer_item, user, is_new=False)
+    for source, qty in moved.values():
+        transfer_item = TransferItem(
+            transfer_id=transfer.transfer_id,
+            item_id=source.item_id,
+            batch_id=source.batch_id,
+            inventory_id=from_id,
+            item_qty=qty,
+            uom_code=source.uom_code
+        )
+        add_audit_fields(transfer_item, user)
+        db.session.add(transfer_item)
+
+    transfer.status_code = STATUS_COMPLETED
+    add_audit_fields(transfer, user, is_new=False)
+    add_verify_fields(transfer, user)
+
+    db.session.flush()
+    return True, ''
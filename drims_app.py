@@ -17,16 +17,32 @@ from app.security.header_sanitization import init_header_sanitization
 from app.security.error_handling import init_error_handling
 from app.security.query_string_protection import init_query_string_protection
 from app.security.csrf_validation import init_csrf_origin_validation
+from app.core.url_rules import LazyBuilderRule
+from app.core.warmup import init_warmup, run_warmup
+from app.core.template_profiling import init_template_profiling
+from app.core.compression import init_compression
+from app.core.static_assets import init_static_assets
+from app.core.metrics import init_metrics
+from app.core.request_profiler import init_request_profiler
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.url_rule_class = LazyBuilderRule
+init_template_profiling(app)
+init_static_assets(app)
+# Registered first so it runs after every other after_request handler
+init_compression(app)
 
 init_db(app)
+# WSGI middleware: covers every request hook and removes the profiling flag before Flask parses the query string
+init_request_profiler(app)
 init_csp(app)
 init_cache_control(app)
 init_header_sanitization(app)
 init_error_handling(app)
 init_query_string_protection(app)
+init_warmup(app)
+init_metrics(app)
 
 csrf = CSRFProtect(app)
 init_csrf_origin_validation(app)
@@ -66,6 +82,8 @@ from app.features.eligibility import eligibility_bp
 from app.features.odpem_director import director_bp
 from app.features.profile import profile_bp
 from app.features.operations_dashboard import operations_dashboard_bp
+from app.features.changes import changes_bp
+from app.features.diagnostics import diagnostics_bp
 from app.core.status import get_status_label, get_status_badge_class
 from app.core.rbac import (
     has_role, has_all_roles, has_warehouse_access,
@@ -103,6 +121,7 @@ app.jinja_env.globals.update(
     get_dashboard_features=lambda: FeatureRegistry.get_dashboard_features(current_user),
     get_navigation_features=lambda group=None: FeatureRegistry.get_navigation_features(current_user, group),
     get_user_features=lambda: FeatureRegistry.get_accessible_features(current_user),
+    get_sidebar_sections=lambda: FeatureRegistry.get_sidebar_sections(current_user),
     get_user_primary_role=lambda: FeatureRegistry.get_primary_role(current_user),
     get_role_display_name=FeatureRegistry.get_role_display_name,
     get_feature_details=get_feature_details
@@ -134,6 +153,8 @@ app.register_blueprint(eligibility_bp)
 app.register_blueprint(director_bp)
 app.register_blueprint(profile_bp)
 app.register_blueprint(operations_dashboard_bp)
+app.register_blueprint(changes_bp)
+app.register_blueprint(diagnostics_bp, url_prefix='/admin/diagnostics')
 
 @app.template_filter('status_badge')
 def status_badge_filter(status_code, entity_type):
@@ -227,4 +248,5 @@ def logout():
     return redirect(url_for('login'))
 
 if __name__ == '__main__':
+    run_warmup(app)
     app.run(host='0.0.0.0', port=5000, debug=app.config['DEBUG'])
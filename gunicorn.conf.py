@@ -0,0 +1,34 @@
+# Gunicorn configuration for DRIMS
+#
+# Bind address, worker count and logging are passed on the command line, e.g.
+#   gunicorn -c gunicorn.conf.py --bind 0.0.0.0:5000 --workers 4 drims_app:app
+#
+# For /metrics with several workers, export PROMETHEUS_MULTIPROC_DIR pointing
+# to a directory used only by this server (see app/core/metrics.py).
+import glob
+import os
+
+
+def on_starting(server):
+    """Remove metric files left by a previous run of this server"""
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(multiproc_dir, '*.db')):
+            os.remove(path)
+
+
+def post_worker_init(worker):
+    """
+    Warm up each worker before it accepts traffic (app/core/warmup.py).
+    Runs before the worker's accept loop, so /health/ready never sees a cold worker.
+    """
+    from app.core.warmup import run_warmup
+    run_warmup(worker.wsgi)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of an exited worker from /metrics"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,85 @@
+-- Migration: Create batch_no_counter table for generated batch numbers
+-- Date: 2026-10-19
+-- Migration ID: 018
+-- Purpose: Replace the MAX(batch_no) LIKE 'PREFIX%' scan in
+--          BatchCreationService.generate_batch_number with a per-prefix counter
+--          advanced atomically by INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+-- Safety: New table only; seeded from existing generated batch numbers
+
+-- ==============================================================================
+-- TRANSACTION START
+-- ==============================================================================
+BEGIN;
+
+-- ==============================================================================
+-- STEP 1: Create batch_no_counter
+-- ==============================================================================
+-- One row per generated batch number prefix ITEM-WH-YYYYMMDD.
+-- last_seq is the last SEQ handed out for that prefix.
+
+CREATE TABLE IF NOT EXISTS batch_no_counter
+(
+    item_code VARCHAR(16) NOT NULL,
+    inventory_id INTEGER NOT NULL,
+    batch_date DATE NOT NULL,
+
+    last_seq INTEGER NOT NULL DEFAULT 0
+        CONSTRAINT c_batch_no_counter_1 CHECK (last_seq >= 0),
+
+    update_dtime TIMESTAMP(0) WITHOUT TIME ZONE NOT NULL,
+
+    CONSTRAINT pk_batch_no_counter PRIMARY KEY (item_code, inventory_id, batch_date)
+);
+
+-- ==============================================================================
+-- STEP 2: Seed counters from existing generated batch numbers
+-- ==============================================================================
+-- Batch numbers have the form ITEM-WH-YYYYMMDD-SEQ (e.g. RICE-001-20250117-001).
+-- Manually entered batch numbers that do not match the pattern are ignored.
+-- Counters are keyed by the upper-cased item code, as in
+-- BatchCreationService.reserve_batch_numbers(): intake stores batch numbers
+-- upper-cased, and any mixed-case rows are merged into the same counter.
+
+INSERT INTO batch_no_counter (item_code, inventory_id, batch_date, last_seq, update_dtime)
+SELECT
+    UPPER(parts[1]),
+    parts[2]::INTEGER,
+    TO_DATE(parts[3], 'YYYYMMDD'),
+    MAX(parts[4]::INTEGER),
+    NOW()
+FROM (
+    SELECT REGEXP_MATCH(
+        batch_no,
+        '^(.+)-([0-9]{3,})-([0-9]{4}(?:0[1-9]|1[0-2])(?:0[1-9]|[12][0-9]|3[01]))-([0-9]+)$'
+    ) AS parts
+    FROM itembatch
+    WHERE batch_no IS NOT NULL
+) matched
+WHERE parts IS NOT NULL
+GROUP BY UPPER(parts[1]), parts[2]::INTEGER, TO_DATE(parts[3], 'YYYYMMDD')
+ON CONFLICT (item_code, inventory_id, batch_date) DO UPDATE
+    SET last_seq = GREATEST(batch_no_counter.last_seq, EXCLUDED.last_seq);
+
+-- ==============================================================================
+-- STEP 3: Merge mixed-case counters
+-- ==============================================================================
+-- An earlier version of this migration kept the item code's original casing.
+-- Re-running it folds such rows into the upper-case counter.
+
+INSERT INTO batch_no_counter (item_code, inventory_id, batch_date, last_seq, update_dtime)
+SELECT UPPER(item_code), inventory_id, batch_date, MAX(last_seq), NOW()
+FROM batch_no_counter
+WHERE item_code <> UPPER(item_code)
+GROUP BY UPPER(item_code), inventory_id, batch_date
+ON CONFLICT (item_code, inventory_id, batch_date) DO UPDATE
+    SET last_seq = GREATEST(batch_no_counter.last_seq, EXCLUDED.last_seq);
+
+DELETE FROM batch_no_counter WHERE item_code <> UPPER(item_code);
+
+COMMIT;
+
+-- ==============================================================================
+-- VERIFICATION
+-- ==============================================================================
+-- SELECT COUNT(*) FROM batch_no_counter;
+-- SELECT * FROM batch_no_counter ORDER BY update_dtime DESC LIMIT 10;
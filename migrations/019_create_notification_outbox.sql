@@ -0,0 +1,47 @@
+-- Migration: Create notification_outbox table
+-- Date: 2026-10-19
+-- Migration ID: 019
+-- Purpose: Transactional outbox for notifications. Business transactions insert
+--          one event row; scripts/notification_worker.py expands it into
+--          notification rows after commit, with retries
+-- Safety: New table only
+
+-- ==============================================================================
+-- TRANSACTION START
+-- ==============================================================================
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS notification_outbox
+(
+    outbox_id SERIAL NOT NULL,
+    event_type VARCHAR(50) NOT NULL,
+
+    idempotency_key VARCHAR(120) NOT NULL
+        CONSTRAINT uk_notification_outbox_1 UNIQUE,
+
+    payload TEXT NOT NULL,
+
+    status_code CHAR(1) NOT NULL DEFAULT 'P'
+        CONSTRAINT c_notification_outbox_1 CHECK (status_code IN ('P', 'D', 'F')),
+
+    attempt_count INTEGER NOT NULL DEFAULT 0
+        CONSTRAINT c_notification_outbox_2 CHECK (attempt_count >= 0),
+
+    last_error TEXT,
+    available_at TIMESTAMP(0) WITHOUT TIME ZONE NOT NULL,
+    created_at TIMESTAMP(0) WITHOUT TIME ZONE NOT NULL,
+    processed_at TIMESTAMP(0) WITHOUT TIME ZONE,
+
+    CONSTRAINT pk_notification_outbox PRIMARY KEY (outbox_id)
+);
+
+-- Worker claims pending events in order of availability
+CREATE INDEX IF NOT EXISTS dk_notification_outbox_1
+    ON notification_outbox (status_code, available_at);
+
+COMMIT;
+
+-- ==============================================================================
+-- VERIFICATION
+-- ==============================================================================
+-- SELECT status_code, COUNT(*) FROM notification_outbox GROUP BY status_code;
@@ -0,0 +1,43 @@
+-- Migration: Create reliefpkg_manifest table for immutable dispatch manifests
+-- Date: 2026-10-19
+-- Migration ID: 020
+-- Purpose: Store a snapshot of each relief package's contents, pre-split by
+--          source warehouse, written once at dispatch. Transaction summary,
+--          dispatch slip, handover and received-details pages read it by
+--          primary key instead of re-joining reliefpkg_item, itembatch, item,
+--          warehouse and agency
+-- Safety: New table only. Packages dispatched before this migration have no
+--         manifest and are rendered from live data until backfilled with
+--         scripts/backfill_dispatch_manifests.py
+
+-- ==============================================================================
+-- TRANSACTION START
+-- ==============================================================================
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS reliefpkg_manifest
+(
+    reliefpkg_id INTEGER NOT NULL,
+    reliefrqst_id INTEGER NOT NULL,
+
+    manifest_version SMALLINT NOT NULL DEFAULT 1
+        CONSTRAINT c_reliefpkg_manifest_1 CHECK (manifest_version > 0),
+
+    manifest_json TEXT NOT NULL,
+    create_by_id VARCHAR(20) NOT NULL,
+    create_dtime TIMESTAMP(0) WITHOUT TIME ZONE NOT NULL,
+
+    CONSTRAINT pk_reliefpkg_manifest PRIMARY KEY (reliefpkg_id),
+    CONSTRAINT fk_reliefpkg_manifest_reliefpkg FOREIGN KEY (reliefpkg_id)
+        REFERENCES reliefpkg (reliefpkg_id)
+);
+
+COMMIT;
+
+-- ==============================================================================
+-- VERIFICATION
+-- ==============================================================================
+-- SELECT COUNT(*) FROM reliefpkg_manifest;
+-- SELECT p.reliefpkg_id FROM reliefpkg p
+-- LEFT JOIN reliefpkg_manifest m ON m.reliefpkg_id = p.reliefpkg_id
+-- WHERE p.status_code = 'D' AND m.reliefpkg_id IS NULL;
@@ -0,0 +1,45 @@
+-- Migration: Create change_log table for the /api/changes feed
+-- Date: 2026-10-19
+-- Migration ID: 021
+-- Purpose: Incremental change feed for offline-capable field clients. Inserts,
+--          updates and deletes of inventory, itembatch, reliefrqst, reliefpkg
+--          and notification rows are captured on flush and written at commit
+--          (under a transaction advisory lock, so change_seq order matches
+--          commit order). Clients page through it with /api/changes?since=<cursor>
+-- Safety: New table only
+
+-- ==============================================================================
+-- TRANSACTION START
+-- ==============================================================================
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS change_log
+(
+    change_seq BIGSERIAL NOT NULL,
+    table_name VARCHAR(30) NOT NULL,
+    row_key VARCHAR(60) NOT NULL,
+
+    op_code CHAR(1) NOT NULL
+        CONSTRAINT c_change_log_1 CHECK (op_code IN ('I', 'U', 'D')),
+
+    -- RBAC scope of the changed row
+    warehouse_id INTEGER,
+    agency_id INTEGER,
+    user_id INTEGER,
+
+    changed_at TIMESTAMP(0) WITHOUT TIME ZONE NOT NULL,
+
+    CONSTRAINT pk_change_log PRIMARY KEY (change_seq)
+);
+
+-- Retention purge (scripts/purge_change_log.py)
+CREATE INDEX IF NOT EXISTS dk_change_log_1
+    ON change_log (changed_at);
+
+COMMIT;
+
+-- ==============================================================================
+-- VERIFICATION
+-- ==============================================================================
+-- SELECT table_name, op_code, COUNT(*) FROM change_log GROUP BY table_name, op_code;
+-- SELECT MIN(change_seq), MAX(change_seq) FROM change_log;
@@ -0,0 +1,102 @@
+-- Migration: Create stock_movement ledger and stock_snapshot tables
+-- Date: 2026-10-19
+-- Migration ID: 022
+-- Purpose: Append-only record of every usable/defective/expired quantity
+--          change on inventory and itembatch (captured by the application on
+--          flush, see app/db/stock_ledger.py), plus daily per-(warehouse,
+--          item, batch) balances so "what did warehouse X hold on date D"
+--          costs one snapshot read and a bounded ledger scan
+-- Safety: New tables only. Current quantities are seeded as OPEN (opening
+--         balance) movements while inventory and itembatch are locked
+--         against writes, so ledger totals equal live quantities from the
+--         start
+
+-- ==============================================================================
+-- TRANSACTION START
+-- ==============================================================================
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS stock_movement
+(
+    movement_id BIGSERIAL NOT NULL,
+    inventory_id INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+
+    -- 0 = warehouse-level (inventory) movement
+    batch_id INTEGER NOT NULL DEFAULT 0,
+
+    movement_type VARCHAR(4) NOT NULL
+        CONSTRAINT c_stock_movement_1 CHECK (movement_type IN ('OPEN', 'RCPT', 'XFER', 'DSPT', 'ADJ')),
+
+    ref_type VARCHAR(20),
+    ref_id INTEGER,
+
+    usable_delta DECIMAL(15,4) NOT NULL DEFAULT 0,
+    defective_delta DECIMAL(15,4) NOT NULL DEFAULT 0,
+    expired_delta DECIMAL(15,4) NOT NULL DEFAULT 0,
+
+    moved_by_id VARCHAR(20),
+    moved_at TIMESTAMP(0) WITHOUT TIME ZONE NOT NULL,
+
+    CONSTRAINT pk_stock_movement PRIMARY KEY (movement_id)
+);
+
+-- Point-in-time and period queries for a warehouse/item
+CREATE INDEX IF NOT EXISTS dk_stock_movement_1
+    ON stock_movement (inventory_id, item_id, moved_at);
+
+-- Snapshot building (movements of one day)
+CREATE INDEX IF NOT EXISTS dk_stock_movement_2
+    ON stock_movement (moved_at);
+
+CREATE TABLE IF NOT EXISTS stock_snapshot
+(
+    snapshot_date DATE NOT NULL,
+    inventory_id INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    batch_id INTEGER NOT NULL,
+
+    usable_qty DECIMAL(15,4) NOT NULL DEFAULT 0,
+    defective_qty DECIMAL(15,4) NOT NULL DEFAULT 0,
+    expired_qty DECIMAL(15,4) NOT NULL DEFAULT 0,
+
+    create_dtime TIMESTAMP(0) WITHOUT TIME ZONE NOT NULL,
+
+    CONSTRAINT pk_stock_snapshot PRIMARY KEY (snapshot_date, inventory_id, item_id, batch_id)
+);
+
+-- Opening balances
+-- moved_at uses the application clock (app.utils.timezone.now(): Jamaica time,
+-- naive) rather than the server's LOCALTIMESTAMP, so the opening rows sort
+-- before the first movement recorded by the application on any server timezone.
+LOCK TABLE inventory, itembatch IN SHARE MODE;
+
+INSERT INTO stock_movement
+    (inventory_id, item_id, batch_id, movement_type, usable_delta, defective_delta, expired_delta,
+     moved_by_id, moved_at)
+SELECT inventory_id, item_id, 0, 'OPEN', usable_qty, defective_qty, expired_qty,
+       'SYSTEM', (NOW() AT TIME ZONE 'America/Jamaica')::TIMESTAMP(0)
+FROM inventory
+WHERE NOT EXISTS (SELECT 1 FROM stock_movement);
+
+INSERT INTO stock_movement
+    (inventory_id, item_id, batch_id, movement_type, usable_delta, defective_delta, expired_delta,
+     moved_by_id, moved_at)
+SELECT inventory_id, item_id, batch_id, 'OPEN', usable_qty, defective_qty, expired_qty,
+       'SYSTEM', (NOW() AT TIME ZONE 'America/Jamaica')::TIMESTAMP(0)
+FROM itembatch
+WHERE NOT EXISTS (SELECT 1 FROM stock_movement WHERE batch_id <> 0);
+
+COMMIT;
+
+-- ==============================================================================
+-- VERIFICATION
+-- ==============================================================================
+-- SELECT movement_type, COUNT(*) FROM stock_movement GROUP BY movement_type;
+-- Ledger totals must equal live quantities (also: python scripts/stock_ledger.py verify)
+-- SELECT i.inventory_id, i.item_id, i.usable_qty, SUM(m.usable_delta)
+-- FROM inventory i
+-- LEFT JOIN stock_movement m
+--   ON m.inventory_id = i.inventory_id AND m.item_id = i.item_id AND m.batch_id = 0
+-- GROUP BY i.inventory_id, i.item_id, i.usable_qty
+-- HAVING i.usable_qty <> COALESCE(SUM(m.usable_delta), 0);
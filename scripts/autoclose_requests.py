@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Auto-Close Fully Received Relief Requests
+
+Periodic job that closes (status FILLED) every PART_FILLED relief request
+whose issued goods have all been received and that has no packages still
+pending dispatch/receipt. Covers intakes recorded through paths that do not
+call relief_request_service.check_and_autoclose_request().
+
+Intended to run from cron, e.g. every 15 minutes:
+    */15 * * * * cd /path/to/drims && python scripts/autoclose_requests.py
+
+Usage:
+    python scripts/autoclose_requests.py [--dry-run]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from drims_app import app
+from app.db import db
+from app.services import relief_request_service as rr_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Auto-close fully received relief requests')
+    parser.add_argument('--dry-run', action='store_true', help='Report requests that would close without committing')
+    args = parser.parse_args()
+
+    # Closure notifications build links with url_for, which needs a request context
+    with app.app_context(), app.test_request_context():
+        try:
+            closed_ids = rr_service.sweep_autoclose_requests()
+            if args.dry_run:
+                db.session.rollback()
+            else:
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"ERROR: auto-close sweep failed: {e}")
+            sys.exit(1)
+
+    action = 'Would close' if args.dry_run else 'Closed'
+    print(f"{action} {len(closed_ids)} relief request(s)")
+    for reliefrqst_id in closed_ids:
+        print(f"  - #{reliefrqst_id}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Backfill Dispatch Manifests
+
+Writes the immutable dispatch manifest (reliefpkg_manifest) for packages that
+were dispatched before manifests were introduced (migration 020), including
+those received since then (status C). Until a package is backfilled, its
+post-dispatch pages are rendered from live data.
+
+Backfilled manifests are recorded as created by BACKFILL at the package's
+dispatch (or, for received packages, receipt) time rather than now, and the
+dispatch metrics in app/core/metrics.py leave them out, so running the
+backfill does not show up as a burst of dispatches.
+
+Usage:
+    python scripts/backfill_dispatch_manifests.py [--batch-size N] [--dry-run]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from drims_app import app
+from app.db import db
+from app.db.models import ReliefPkg, ReliefPkgManifest
+from app.services import relief_request_service as rr_service
+from app.services import dispatch_manifest_service as manifest_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill dispatch manifests for dispatched and completed packages')
+    parser.add_argument('--batch-size', type=int, default=200, help='Packages per transaction (default: 200)')
+    parser.add_argument('--dry-run', action='store_true', help='Count packages without a manifest and exit')
+    args = parser.parse_args()
+
+    with app.app_context():
+        missing_query = db.session.query(ReliefPkg.reliefpkg_id).outerjoin(
+            ReliefPkgManifest, ReliefPkgManifest.reliefpkg_id == ReliefPkg.reliefpkg_id
+        ).filter(
+            ReliefPkg.status_code.in_([rr_service.PKG_STATUS_DISPATCHED, rr_service.PKG_STATUS_COMPLETED]),
+            ReliefPkgManifest.reliefpkg_id == None
+        ).order_by(ReliefPkg.reliefpkg_id)
+
+        if args.dry_run:
+            print(f"{missing_query.count()} dispatched or completed package(s) without a manifest")
+            return
+
+        written = 0
+        while True:
+            package_ids = [row.reliefpkg_id for row in missing_query.limit(args.batch_size).all()]
+            if not package_ids:
+                break
+            try:
+                for relief_pkg in ReliefPkg.query.filter(ReliefPkg.reliefpkg_id.in_(package_ids)).all():
+                    created_at = relief_pkg.dispatch_dtime or relief_pkg.received_dtime or relief_pkg.update_dtime
+                    if manifest_service.create_manifest(relief_pkg, manifest_service.BACKFILL_USER, created_at):
+                        written += 1
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"ERROR: backfill failed: {e}")
+                sys.exit(1)
+            print(f"  ... {written} manifest(s) written")
+
+    print(f"Backfilled {written} dispatch manifest(s)")
+
+
+if __name__ == '__main__':
+    main()
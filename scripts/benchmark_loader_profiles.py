@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Loader Profile Benchmark
+
+Runs the queries of the request and package list views twice: with the
+joinedload chains they used before app/db/loader_profiles.py, and with their
+loader profile. For each it reports the statements issued, the rows the
+database returned (counted by re-running each captured statement as
+SELECT count(*)), and the median wall time including object loading.
+
+Run against a copy of production data; the numbers depend on how many items
+and packages the requests have.
+
+Usage:
+    python scripts/benchmark_loader_profiles.py [--scenario NAME] [--repeat N] [--limit N]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload
+
+from drims_app import app
+from app.db import db
+from app.db.loader_profiles import (
+    loader_options, REQUEST_QUEUE, REQUEST_LINES, REQUEST_PACKAGING, REQUEST_FULFILLMENT,
+    PACKAGE_DISPATCH_REQUEST_LINES
+)
+from app.db.models import Item, ReliefPkg, ReliefPkgItem, ReliefRequestFulfillmentLock, ReliefRqst, ReliefRqstItem
+from app.services import relief_request_service as rr_service
+
+
+def _request_header():
+    return [joinedload(ReliefRqst.agency), joinedload(ReliefRqst.eligible_event), joinedload(ReliefRqst.status)]
+
+
+def _request_item_chains():
+    return [
+        joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.default_uom),
+        joinedload(ReliefRqst.items).joinedload(ReliefRqstItem.item).joinedload(Item.category)
+    ]
+
+
+def _open_requests(query):
+    return query.filter(
+        ReliefRqst.status_code.in_([rr_service.STATUS_SUBMITTED, rr_service.STATUS_PART_FILLED])
+    ).order_by(ReliefRqst.create_dtime.desc())
+
+
+def _all_requests(query):
+    return query.order_by(ReliefRqst.create_dtime.desc())
+
+
+def _dispatched_packages(query):
+    return query.filter(
+        ReliefPkg.status_code == rr_service.PKG_STATUS_DISPATCHED,
+        ReliefPkg.received_dtime.is_(None)
+    ).order_by(ReliefPkg.dispatch_dtime.desc())
+
+
+def _scenarios():
+    """name -> (model, criteria, joinedload options before, loader profile)"""
+    return {
+        'packaging.pending_fulfillment': (
+            ReliefRqst, _open_requests,
+            _request_header() + [joinedload(ReliefRqst.items), joinedload(ReliefRqst.packages)],
+            REQUEST_QUEUE
+        ),
+        'packaging.review_approval': (
+            ReliefRqst, _open_requests,
+            _request_header() + _request_item_chains() + [joinedload(ReliefRqst.packages)],
+            REQUEST_PACKAGING
+        ),
+        'director.dashboard': (
+            ReliefRqst, _all_requests,
+            _request_header() + _request_item_chains(),
+            REQUEST_LINES
+        ),
+        'dashboard.logistics': (
+            ReliefRqst, _all_requests,
+            [
+                joinedload(ReliefRqst.agency),
+                joinedload(ReliefRqst.items),
+                joinedload(ReliefRqst.status),
+                joinedload(ReliefRqst.fulfillment_lock).joinedload(ReliefRequestFulfillmentLock.fulfiller)
+            ],
+            REQUEST_FULFILLMENT
+        ),
+        'packaging.approved_no_items': (
+            ReliefPkg, _dispatched_packages,
+            [
+                joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.agency),
+                joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.eligible_event),
+                joinedload(ReliefPkg.relief_request).joinedload(ReliefRqst.items),
+                joinedload(ReliefPkg.items).joinedload(ReliefPkgItem.item)
+            ],
+            PACKAGE_DISPATCH_REQUEST_LINES
+        ),
+    }
+
+
+class StatementRecorder:
+    """Captures the statements and parameters sent to the database"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, 'after_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'after_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+
+def _rows_returned(statements):
+    connection = db.session.connection()
+    return sum(
+        connection.exec_driver_sql(f"SELECT count(*) FROM ({statement}) AS counted", parameters).scalar()
+        for statement, parameters in statements
+    )
+
+
+def measure(model, criteria, options, repeat, limit):
+    """Median time, statement count, rows returned and root objects of one loading strategy"""
+    timings = []
+    for _ in range(max(repeat, 1)):
+        db.session.expunge_all()
+        query = criteria(model.query.options(*options))
+        if limit:
+            query = query.limit(limit)
+        with StatementRecorder(db.engine) as recorder:
+            started = time.perf_counter()
+            objects = query.all()
+            timings.append(time.perf_counter() - started)
+        statements = list(recorder.statements)
+
+    return {
+        'statements': len(statements),
+        'rows': _rows_returned(statements),
+        'ms': statistics.median(timings) * 1000,
+        'objects': len(objects)
+    }
+
+
+def main():
+    scenarios = _scenarios()
+    parser = argparse.ArgumentParser(description='Compare joinedload chains with loader profiles')
+    parser.add_argument('--scenario', choices=sorted(scenarios), help='Only this view query')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per strategy, median reported (default: 5)')
+    parser.add_argument('--limit', type=int, help='Limit root rows, as a paginated view would')
+    args = parser.parse_args()
+
+    names = [args.scenario] if args.scenario else list(scenarios)
+
+    with app.app_context():
+        print(f"{'Query':<32} {'Loading':<30} {'Stmts':>5} {'Rows':>9} {'Median ms':>10} {'Objects':>8}")
+        try:
+            for name in names:
+                model, criteria, before_options, profile = scenarios[name]
+                before = measure(model, criteria, before_options, args.repeat, args.limit)
+                after = measure(model, criteria, loader_options(profile), args.repeat, args.limit)
+                for label, result in (('joinedload', before), (profile, after)):
+                    print(f"{name:<32} {label:<30} {result['statements']:>5} {result['rows']:>9} "
+                          f"{result['ms']:>10.1f} {result['objects']:>8}")
+                if before['objects'] != after['objects']:
+                    print(f"ERROR: {name} loaded {before['objects']} objects before and {after['objects']} after")
+                    sys.exit(1)
+        finally:
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    main()
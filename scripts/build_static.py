@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Static Asset Build
+
+Copies every file under static/ to static/dist/ with a content hash in its
+name, writes gzip (.gz) and Brotli (.br) siblings for text assets, and
+records source -> hashed path in static/dist/manifest.json.
+
+Run it as part of each deploy, after the code is in place and before workers
+start. With the manifest present, url_for('static', ...) builds the hashed
+URLs and the files are served with Cache-Control: immutable (see
+app/core/static_assets.py). .br files are written only when the Brotli
+package is installed.
+
+Files of earlier builds are kept, so pages rendered by workers still running
+the previous release keep loading their assets during a rolling deploy.
+static/dist/builds.json lists the files of each build; files used by none of
+the last --keep builds are deleted. Every file, including the manifest, is
+written to a temporary name and renamed into place, so a worker never reads a
+partly written file.
+
+Usage:
+    python scripts/build_static.py [--min-size BYTES] [--keep N] [--quiet]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from app.core.static_assets import DIST_DIR, MANIFEST_NAME
+
+STATIC_DIR = project_root / 'static'
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.json', '.svg', '.txt', '.html', '.map', '.xml'}
+
+HASH_LENGTH = 12
+
+# Build history used for pruning: [{"built_at": ..., "files": [...]}], oldest first
+BUILDS_NAME = 'builds.json'
+LEGACY_BUILD = 'unrecorded'
+
+
+def write_atomic(target: Path, data: bytes):
+    """Write target through a temporary file renamed into place"""
+    temporary = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, target)
+
+
+def hashed_name(relative_path: Path, data: bytes) -> Path:
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    return relative_path.with_name(f"{relative_path.stem}.{digest}{relative_path.suffix}")
+
+
+def _write_if_smaller(target: Path, suffix: str, compressed: bytes, original: bytes):
+    if len(compressed) >= len(original):
+        return None
+    write_atomic(target.with_name(target.name + suffix), compressed)
+    return len(compressed)
+
+
+def write_precompressed(target: Path, data: bytes):
+    """
+    Write .gz/.br next to target when they are smaller than the original.
+
+    Returns:
+        (gzip size or None, brotli size or None)
+    """
+    # mtime=0 keeps builds of the same content byte-identical
+    gz_size = _write_if_smaller(target, '.gz', gzip.compress(data, compresslevel=9, mtime=0), data)
+    br_size = None
+    if brotli is not None:
+        br_size = _write_if_smaller(target, '.br', brotli.compress(data, quality=11), data)
+    return gz_size, br_size
+
+
+def _dist_files(dist: Path):
+    """Paths relative to dist of every built file (not the manifest or history)"""
+    files = set()
+    for root, _, names in os.walk(dist):
+        for name in names:
+            relative = (Path(root) / name).relative_to(dist).as_posix()
+            if relative not in (MANIFEST_NAME, BUILDS_NAME) and not name.endswith('.tmp'):
+                files.add(relative)
+    return files
+
+
+def load_builds(dist: Path):
+    """
+    Build history from builds.json. A dist/ written before the history existed
+    is recorded as one unrecorded build, so its files survive the next prune.
+    """
+    path = dist / BUILDS_NAME
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    if dist.exists():
+        return [{'built_at': LEGACY_BUILD, 'files': sorted(_dist_files(dist))}]
+    return []
+
+
+def prune(dist: Path, builds, keep: int):
+    """
+    Delete files used by none of the last `keep` builds and directories left
+    empty. Returns the number of files deleted.
+    """
+    kept = {name for build in builds[-keep:] for name in build['files']}
+    removed = 0
+    for name in sorted(_dist_files(dist) - kept):
+        (dist / name).unlink()
+        removed += 1
+    for root, dirs, names in os.walk(dist, topdown=False):
+        if Path(root) != dist and not dirs and not names:
+            os.rmdir(root)
+    return removed
+
+
+def build(min_size: int, keep: int, quiet: bool):
+    dist = STATIC_DIR / DIST_DIR
+    builds = load_builds(dist)
+    dist.mkdir(exist_ok=True)
+
+    manifest = {}
+    files = []
+    rows = []
+    for root, dirs, names in os.walk(STATIC_DIR):
+        root_path = Path(root)
+        if root_path == STATIC_DIR:
+            dirs[:] = [d for d in dirs if d != DIST_DIR]
+        dirs.sort()
+
+        for name in sorted(names):
+            source = root_path / name
+            relative = source.relative_to(STATIC_DIR)
+            data = source.read_bytes()
+
+            hashed = hashed_name(relative, data)
+            target = dist / hashed
+            target.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(target, data)
+            shutil.copystat(source, target)
+            manifest[relative.as_posix()] = f"{DIST_DIR}/{hashed.as_posix()}"
+            files.append(hashed.as_posix())
+
+            gz_size = br_size = None
+            if relative.suffix.lower() in COMPRESSIBLE_EXTENSIONS and len(data) >= min_size:
+                gz_size, br_size = write_precompressed(target, data)
+            for suffix, size in (('.gz', gz_size), ('.br', br_size)):
+                if size is not None:
+                    files.append(hashed.as_posix() + suffix)
+            rows.append((relative.as_posix(), len(data), gz_size, br_size))
+
+    # The manifest switches new workers to this build's files; earlier builds stay
+    write_atomic(dist / MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode())
+
+    builds.append({'built_at': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'files': files})
+    builds = builds[-keep:]
+    write_atomic(dist / BUILDS_NAME, json.dumps(builds, indent=2).encode())
+    removed = prune(dist, builds, keep)
+
+    if not quiet:
+        print(f"{'Asset':<45} {'Bytes':>9} {'gzip':>9} {'brotli':>9}")
+        for name, size, gz_size, br_size in rows:
+            print(f"{name:<45} {size:>9} {gz_size or '-':>9} {br_size or '-':>9}")
+
+    total = sum(r[1] for r in rows)
+    compressed = sum(min(s for s in r[1:] if s is not None) for r in rows)
+    print(f"\nBuilt {len(rows)} assets into {dist}: {total} bytes, {compressed} bytes as best encoding")
+    print(f"Kept files of the last {len(builds)} build(s), deleted {removed} older file(s)")
+    if brotli is None:
+        print("Brotli is not installed; wrote .gz files only")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fingerprint and precompress static assets')
+    parser.add_argument('--min-size', type=int, default=256,
+                        help='Smallest text asset in bytes to precompress (default: 256)')
+    parser.add_argument('--keep', type=int, default=3,
+                        help='Builds whose files are kept for workers still on an older release (default: 3)')
+    parser.add_argument('--quiet', action='store_true', help='Only print the summary')
+    args = parser.parse_args()
+
+    if args.keep < 2:
+        parser.error('--keep must be at least 2 so the previous build survives a rolling deploy')
+
+    if not STATIC_DIR.is_dir():
+        print(f"ERROR: Static directory not found: {STATIC_DIR}")
+        sys.exit(1)
+
+    try:
+        build(args.min_size, args.keep, args.quiet)
+    except OSError as e:
+        print(f"ERROR: Static build failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Startup Check
+
+Measures how long `import drims_app` (creating the app, registering every
+blueprint) takes in fresh interpreters and fails when the median exceeds the
+startup budget, so a regression in worker boot time is caught before deploy.
+
+It also fails when:
+- A module listed in DEFERRED_MODULES (pandas, numpy) is imported at startup;
+  these must be imported inside the functions that use them
+- A model has a version_nbr column but does not declare it as
+  version_id_col in __mapper_args__ (see app/core/optimistic_locking.py)
+- The app.features modules together take longer to import than the feature
+  import budget. Blueprints are imported eagerly rather than through lazy
+  views because their own code is a few percent of startup; when this check
+  fails, defer the heaviest feature module (see docs/STARTUP_PERFORMANCE.md)
+
+With --importtime it prints a report of the slowest imports, parsed from
+`python -X importtime`.
+
+Usage:
+    python scripts/check_startup.py [--budget SECONDS] [--feature-budget MS] [--runs N] [--importtime] [--top N]
+
+Environment:
+    STARTUP_BUDGET_SECONDS: Default budget (default: 2.0)
+    STARTUP_FEATURE_BUDGET_MS: Default feature import budget (default: 60)
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+DEFERRED_MODULES = ('pandas', 'numpy')
+
+FEATURE_PACKAGE = 'app.features'
+
+BOOT_SNIPPET = (
+    "import time; started = time.perf_counter(); import drims_app; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def _run(args):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=str(project_root),
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True
+    )
+
+
+def measure_boot(runs):
+    """Boot time in seconds of each run, each in a fresh interpreter"""
+    timings = []
+    for _ in range(runs):
+        result = _run(['-c', BOOT_SNIPPET])
+        if result.returncode != 0:
+            print(result.stderr)
+            print("ERROR: Application failed to start")
+            sys.exit(1)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def import_times():
+    """
+    Parse `python -X importtime` for the application.
+
+    Returns:
+        List of (module, self microseconds, cumulative microseconds)
+    """
+    result = _run(['-X', 'importtime', '-c', 'import drims_app'])
+    if result.returncode != 0:
+        print(result.stderr)
+        print("ERROR: Application failed to start")
+        sys.exit(1)
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def feature_import_times(rows):
+    """Self time in microseconds of each app.features module, slowest first"""
+    return sorted(
+        ((module, self_us) for module, self_us, _ in rows if module.startswith(FEATURE_PACKAGE + '.')),
+        key=lambda r: r[1],
+        reverse=True
+    )
+
+
+def print_report(rows, top):
+    print(f"\nSlowest imports by cumulative time (top {top})")
+    print(f"{'Module':<60} {'Self ms':>9} {'Total ms':>9}")
+    for module, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:top]:
+        print(f"{module:<60} {self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}")
+
+    packages = {}
+    for module, self_us, _ in rows:
+        package = module.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    print(f"\nSelf time by top-level package (top {top})")
+    print(f"{'Package':<60} {'Self ms':>9}")
+    for package, self_us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top]:
+        print(f"{package:<60} {self_us / 1000:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check application startup time against a budget')
+    parser.add_argument('--budget', type=float, default=float(os.environ.get('STARTUP_BUDGET_SECONDS', 2.0)),
+                        help='Maximum median boot time in seconds (default: STARTUP_BUDGET_SECONDS or 2.0)')
+    parser.add_argument('--feature-budget', type=float,
+                        default=float(os.environ.get('STARTUP_FEATURE_BUDGET_MS', 60)),
+                        help='Maximum total self import time of app.features modules in ms '
+                             '(default: STARTUP_FEATURE_BUDGET_MS or 60)')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to time, median reported (default: 5)')
+    parser.add_argument('--importtime', action='store_true', help='Print the slowest imports')
+    parser.add_argument('--top', type=int, default=25, help='Rows in the import report (default: 25)')
+    args = parser.parse_args()
+
+    failures = []
+
+    rows = import_times()
+    if args.importtime:
+        print_report(rows, args.top)
+        print()
+
+    imported = {module for module, _, _ in rows}
+    for module in DEFERRED_MODULES:
+        if module in imported:
+            failures.append(f"{module} is imported at startup; import it where it is used")
+
+    features = feature_import_times(rows)
+    feature_ms = sum(self_us for _, self_us in features) / 1000
+    slowest = ', '.join(f"{module[len(FEATURE_PACKAGE) + 1:]} {self_us / 1000:.1f}ms" for module, self_us in features[:3])
+    print(f"Feature modules: {feature_ms:.1f}ms import self time over {len(features)} modules "
+          f"(slowest: {slowest}), budget {args.feature_budget:.0f}ms")
+    if feature_ms > args.feature_budget:
+        failures.append(f"app.features modules took {feature_ms:.1f}ms to import, over the "
+                        f"{args.feature_budget:.0f}ms budget; register the heaviest through a lazy view")
+
+    from drims_app import app
+    from app.db import db
+    from app.core.optimistic_locking import unversioned_models
+    with app.app_context():
+        unversioned = unversioned_models(db)
+    if unversioned:
+        failures.append(f"version_nbr not declared as version_id_col on: {', '.join(unversioned)}")
+
+    timings = measure_boot(max(args.runs, 1))
+    median = statistics.median(timings)
+    print(f"Startup: median {median:.3f}s over {len(timings)} runs "
+          f"(min {min(timings):.3f}s, max {max(timings):.3f}s), budget {args.budget:.3f}s")
+    if median > args.budget:
+        failures.append(f"Startup took {median:.3f}s, over the {args.budget:.3f}s budget")
+
+    if failures:
+        for failure in failures:
+            print(f"ERROR: {failure}")
+        sys.exit(1)
+
+    print("Startup check passed")
+
+
+if __name__ == '__main__':
+    main()
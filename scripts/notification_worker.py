@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Notification Outbox Worker
+
+Expands pending notification_outbox events into in-app notifications after the
+business transaction that queued them has committed. Failed events are retried
+with exponential backoff (see app/services/notification_outbox_service.py).
+
+Several workers may run at once; events are claimed with FOR UPDATE SKIP LOCKED.
+
+Run continuously (e.g. under systemd/supervisor):
+    python scripts/notification_worker.py
+
+Or drain the queue once from cron, e.g. every minute:
+    * * * * * cd /path/to/drims && python scripts/notification_worker.py --once
+
+Usage:
+    python scripts/notification_worker.py [--once] [--interval SECONDS] [--batch-size N] [--retry-failed]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from drims_app import app
+from app.db import db
+from app.services import notification_outbox_service as outbox
+# Importing these modules registers their outbox handlers
+from app.services import notification_service  # noqa: F401
+from app.services import relief_request_service  # noqa: F401
+
+
+def drain(batch_size):
+    """Process due events until the queue is empty; return total counts"""
+    totals = {'processed': 0, 'retried': 0, 'failed': 0}
+    while True:
+        counts = outbox.process_pending(batch_size=batch_size)
+        for key, value in counts.items():
+            totals[key] += value
+        if sum(counts.values()) < batch_size:
+            return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Deliver queued notifications from the outbox')
+    parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+    parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls (default: 5)')
+    parser.add_argument('--batch-size', type=int, default=outbox.DEFAULT_BATCH_SIZE,
+                        help=f'Events claimed per transaction (default: {outbox.DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--retry-failed', action='store_true', help='Requeue failed events before processing')
+    args = parser.parse_args()
+
+    # Notification builders generate links with url_for, which needs a request context
+    with app.app_context(), app.test_request_context():
+        if args.retry_failed:
+            requeued = outbox.retry_failed()
+            db.session.commit()
+            print(f"Requeued {requeued} failed event(s)")
+
+        while True:
+            try:
+                totals = drain(args.batch_size)
+                if any(totals.values()):
+                    metrics = outbox.get_outbox_metrics()
+                    lag = metrics['oldest_pending_seconds']
+                    lag_text = f"lag {lag:.0f}s" if lag is not None else "queue empty"
+                    print(f"Processed {totals['processed']}, retried {totals['retried']}, "
+                          f"failed {totals['failed']} event(s); pending {metrics['pending']}, {lag_text}")
+            except Exception as e:
+                db.session.rollback()
+                print(f"ERROR: outbox processing failed: {e}")
+                if args.once:
+                    sys.exit(1)
+            finally:
+                db.session.remove()
+
+            if args.once:
+                break
+            time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Change Log Purge
+
+Deletes change_log entries older than the retention window. Field clients
+whose /api/changes cursor predates the remaining history receive 410 Gone and
+resync, so keep the window longer than a device is expected to stay offline.
+
+Run daily from cron, e.g.:
+    30 2 * * * cd /path/to/drims && python scripts/purge_change_log.py --days 30
+
+Usage:
+    python scripts/purge_change_log.py [--days N] [--dry-run]
+"""
+
+import argparse
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from drims_app import app
+from app.db import db
+from app.db.change_feed import purge_changes
+from app.db.models import ChangeLog
+from app.utils.timezone import now
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Delete change feed entries older than the retention window')
+    parser.add_argument('--days', type=int, default=30, help='Days of change history to keep (default: 30)')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted without deleting')
+    args = parser.parse_args()
+
+    if args.days < 1:
+        parser.error('--days must be at least 1')
+
+    cutoff = now() - timedelta(days=args.days)
+
+    with app.app_context():
+        if args.dry_run:
+            head_seq = db.session.query(db.func.max(ChangeLog.change_seq)).scalar()
+            count = ChangeLog.query.filter(
+                ChangeLog.changed_at < cutoff,
+                ChangeLog.change_seq < (head_seq or 0)
+            ).count()
+            print(f"Would delete {count} change_log entr{'y' if count == 1 else 'ies'} older than {cutoff:%Y-%m-%d %H:%M}")
+            return
+
+        try:
+            count = purge_changes(db.session, cutoff)
+            db.session.commit()
+            print(f"Deleted {count} change_log entr{'y' if count == 1 else 'ies'} older than {cutoff:%Y-%m-%d %H:%M}")
+        except Exception as e:
+            db.session.rollback()
+            print(f"ERROR: change_log purge failed: {e}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
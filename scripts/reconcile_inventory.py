@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Inventory Reconciliation
+
+Compares itembatch totals with inventory totals for every warehouse/item pair
+(one grouped query) and reports the discrepancies by class. Nothing is changed
+unless --repair names the classes to fix: inventory totals are then set to their
+batch totals for those classes only, and the changes are recorded in the stock
+ledger as 'reconcile' adjustments.
+
+Pairs moved by an executed transfer are listed for manual review and never
+repaired unless --include-transferred is given: transfers executed before they
+moved batches left the batches stale, not the inventory.
+
+Exits with status 1 when discrepancies remain, so a scheduled run can alert.
+
+Intended to run from cron as a nightly report:
+    15 1 * * * cd /path/to/drims && python scripts/reconcile_inventory.py
+
+Usage:
+    python scripts/reconcile_inventory.py [--warehouse ID] [--item ID]
+        [--repair CLASS [CLASS ...]] [--include-transferred] [--user NAME] [--limit N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from drims_app import app
+from app.db import db
+from app.services import inventory_reconciliation_service as reconciler
+
+
+def _format_qty(qty):
+    if qty is None:
+        return 'none'
+    return '/'.join(f"{qty[key]:g}" for key in reconciler.QTY_KEYS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcile inventory totals with item batch totals')
+    parser.add_argument('--warehouse', type=int, help='Only this warehouse')
+    parser.add_argument('--item', type=int, help='Only this item')
+    parser.add_argument('--repair', nargs='+', metavar='CLASS', default=[],
+                        choices=sorted(reconciler.REPAIRABLE_CLASSES),
+                        help='Set inventory totals to batch totals for these classes: '
+                             + ', '.join(sorted(reconciler.REPAIRABLE_CLASSES)))
+    parser.add_argument('--include-transferred', action='store_true',
+                        help='Also repair pairs moved by executed transfers')
+    parser.add_argument('--user', default='SYSTEM', help='User name recorded on repaired rows (default: SYSTEM)')
+    parser.add_argument('--limit', type=int, default=50, help='Discrepancies to list (default: 50, 0 for all)')
+    args = parser.parse_args()
+
+    with app.app_context():
+        started = time.monotonic()
+        discrepancies = reconciler.find_discrepancies(args.warehouse, args.item)
+        elapsed = time.monotonic() - started
+
+        print(f"Checked in {elapsed:.2f}s: {len(discrepancies)} discrepanc{'y' if len(discrepancies) == 1 else 'ies'}")
+        for cls, count in sorted(reconciler.summarize(discrepancies).items()):
+            print(f"  {cls}: {count}")
+
+        listed = discrepancies if args.limit == 0 else discrepancies[:args.limit]
+        if listed:
+            print("Warehouse/item: classes (inventory vs batches as usable/reserved/defective/expired)")
+        for d in listed:
+            print(f"  {d['warehouse_id']}/{d['item_id']}: {', '.join(d['classes'])} "
+                  f"({_format_qty(d['inventory'])} vs {_format_qty(d['batches'])}, {d['batch_count']} batch(es))"
+                  f"{' [transfer history: review manually]' if d['transfer_history'] else ''}")
+        if len(listed) < len(discrepancies):
+            print(f"  ... {len(discrepancies) - len(listed)} more")
+
+        if not discrepancies:
+            return
+
+        review = sum(1 for d in discrepancies if d['transfer_history'] and d['repairable'])
+        if review:
+            print(f"{review} repairable pair(s) have transfer history and are left for manual review")
+
+        if args.repair:
+            try:
+                repaired = reconciler.repair_discrepancies(
+                    discrepancies, args.user, args.repair, args.include_transferred
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"ERROR: repair failed: {e}")
+                sys.exit(1)
+            print(f"Repaired {repaired} inventory row(s)")
+            discrepancies = reconciler.find_discrepancies(args.warehouse, args.item)
+            print(f"{len(discrepancies)} discrepanc{'y' if len(discrepancies) == 1 else 'ies'} remaining")
+        else:
+            print("Dry run: nothing changed. Use --repair CLASS ... to fix the listed classes")
+
+        if discrepancies:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
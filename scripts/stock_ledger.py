@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Stock Ledger Maintenance
+
+snapshot: writes the end-of-day stock_snapshot for every finished day that
+          does not have one yet (through yesterday by default). Run daily
+          after midnight, e.g.:
+              30 0 * * * cd /path/to/drims && python scripts/stock_ledger.py snapshot
+
+verify:   checks that the ledger (latest snapshot + later movements) equals
+          the live inventory and itembatch quantities. Exits with status 1
+          when they differ.
+
+balance:  prints warehouse-level balances at a point in time.
+
+Usage:
+    python scripts/stock_ledger.py snapshot [--through YYYY-MM-DD]
+    python scripts/stock_ledger.py verify [--warehouse ID]
+    python scripts/stock_ledger.py balance --as-of "YYYY-MM-DD HH:MM" [--warehouse ID] [--item ID] [--batches]
+"""
+
+import argparse
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from drims_app import app
+from app.db import db
+from app.services import stock_ledger_service as ledger
+from app.utils.timezone import now
+
+
+def run_snapshot(args):
+    through = date.fromisoformat(args.through) if args.through else now().date() - timedelta(days=1)
+    if through >= now().date():
+        print("ERROR: --through must be a day that has already ended")
+        return 1
+
+    pending = ledger.get_pending_snapshot_dates(through)
+    if not pending:
+        print("Snapshots are up to date")
+        return 0
+
+    for snapshot_date in pending:
+        try:
+            count = ledger.build_snapshot(snapshot_date)
+            db.session.commit()
+            print(f"{snapshot_date}: {count} balance(s)")
+        except Exception as e:
+            db.session.rollback()
+            print(f"ERROR: snapshot for {snapshot_date} failed: {e}")
+            return 1
+    return 0
+
+
+def run_verify(args):
+    discrepancies = ledger.verify_ledger(args.warehouse)
+    if not discrepancies:
+        print("Ledger reconciles with live quantities")
+        return 0
+
+    for d in discrepancies:
+        level = 'inventory' if d['batch_id'] == 0 else f"batch {d['batch_id']}"
+        changes = ', '.join(
+            f"{key} ledger {d['ledger'][key]} live {d['live'][key]}"
+            for key in ledger.QTY_KEYS if d['ledger'][key] != d['live'][key]
+        )
+        print(f"Warehouse {d['warehouse_id']} item {d['item_id']} ({level}): {changes}")
+    print(f"{len(discrepancies)} discrepanc{'y' if len(discrepancies) == 1 else 'ies'}")
+    return 1
+
+
+def run_balance(args):
+    as_of = datetime.fromisoformat(args.as_of)
+    balances = ledger.get_balances(as_of, args.warehouse, args.item, batch_level=args.batches)
+    for (warehouse_id, item_id, batch_id), qty in sorted(balances.items()):
+        batch_text = f" batch {batch_id}" if args.batches else ''
+        print(f"Warehouse {warehouse_id} item {item_id}{batch_text}: usable {qty['usable_qty']}, "
+              f"defective {qty['defective_qty']}, expired {qty['expired_qty']}")
+    print(f"{len(balances)} balance(s) as of {as_of:%Y-%m-%d %H:%M}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stock ledger snapshots and verification')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help='Write missing end-of-day snapshots')
+    snapshot_parser.add_argument('--through', help='Last day to snapshot (default: yesterday)')
+
+    verify_parser = subparsers.add_parser('verify', help='Compare the ledger with live quantities')
+    verify_parser.add_argument('--warehouse', type=int, help='Only this warehouse')
+
+    balance_parser = subparsers.add_parser('balance', help='Balances at a point in time')
+    balance_parser.add_argument('--as-of', required=True, help='Point in time, e.g. "2026-10-01 18:00"')
+    balance_parser.add_argument('--warehouse', type=int, help='Only this warehouse')
+    balance_parser.add_argument('--item', type=int, help='Only this item')
+    balance_parser.add_argument('--batches', action='store_true', help='Batch-level balances')
+
+    args = parser.parse_args()
+    commands = {'snapshot': run_snapshot, 'verify': run_verify, 'balance': run_balance}
+
+    with app.app_context():
+        sys.exit(commands[args.command](args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Verify SQL Drawer Query Equivalence
+
+Compares BatchAllocationService.get_limited_batches_for_drawer_sql() (window
+functions, DRAWER_QUERY_MODE=sql) against the in-memory implementation
+get_limited_batches_for_drawer() for every active item, using a range of
+remaining quantities. Reports any item where the two differ in:
+- the set and per-warehouse order of batches returned
+- total available
+- shortfall
+
+Batches with identical sort keys (same expiry/batch dates) may be returned in
+a different order by the Python implementation, so ties are compared as sets.
+
+Usage:
+    python scripts/verify_drawer_query.py [--item ITEM_ID] [--limit N]
+"""
+
+import argparse
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from drims_app import app
+from app.db import db
+from app.db.models import Item, ItemBatch
+from app.services.batch_allocation_service import BatchAllocationService
+
+REMAINING_QTYS = [Decimal('0'), Decimal('1'), Decimal('10'), Decimal('100'), Decimal('1000'), Decimal('100000')]
+
+
+def _warehouse_of(batch):
+    if isinstance(batch, ItemBatch):
+        return batch.inventory.inventory_id
+    return batch.warehouse_id
+
+
+def _normalize(batches, can_expire):
+    """Group by warehouse, collapsing batches with equal sort keys into sets"""
+    result = {}
+    for batch in batches:
+        key = (batch.expiry_date, batch.batch_date) if can_expire else (batch.batch_date,)
+        groups = result.setdefault(_warehouse_of(batch), [])
+        if groups and groups[-1][0] == key:
+            groups[-1][1].add(batch.batch_id)
+        else:
+            groups.append((key, {batch.batch_id}))
+    return result
+
+
+def verify_item(item, remaining_qty):
+    """Return a description of the mismatch, or None if both implementations agree"""
+    py_batches, py_total, py_shortfall = BatchAllocationService.get_limited_batches_for_drawer(
+        item.item_id, remaining_qty
+    )
+    sql_batches, sql_total, sql_shortfall = BatchAllocationService.get_limited_batches_for_drawer_sql(
+        item.item_id, remaining_qty
+    )
+
+    if _normalize(py_batches, item.can_expire_flag) != _normalize(sql_batches, item.can_expire_flag):
+        return (f"batches differ: python={[b.batch_id for b in py_batches]} "
+                f"sql={[b.batch_id for b in sql_batches]}")
+    if py_total != sql_total:
+        return f"total_available differs: python={py_total} sql={sql_total}"
+    if py_shortfall != sql_shortfall:
+        return f"shortfall differs: python={py_shortfall} sql={sql_shortfall}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify SQL drawer query equivalence')
+    parser.add_argument('--item', type=int, help='Only verify this item')
+    parser.add_argument('--limit', type=int, help='Maximum number of items to verify')
+    args = parser.parse_args()
+
+    with app.app_context():
+        query = Item.query.filter_by(status_code='A').order_by(Item.item_id)
+        if args.item:
+            query = query.filter_by(item_id=args.item)
+        if args.limit:
+            query = query.limit(args.limit)
+        items = query.all()
+
+        print("=" * 70)
+        print(f"Verifying drawer query for {len(items)} item(s)")
+        print("=" * 70)
+
+        mismatches = 0
+        for item in items:
+            for remaining_qty in REMAINING_QTYS:
+                problem = verify_item(item, remaining_qty)
+                if problem:
+                    mismatches += 1
+                    print(f"MISMATCH item {item.item_id} ({item.item_name}) remaining={remaining_qty}: {problem}")
+            db.session.expire_all()
+
+        print("-" * 70)
+        if mismatches:
+            print(f"FAILED: {mismatches} mismatch(es)")
+            sys.exit(1)
+        print(f"OK: SQL and Python drawer queries agree for {len(items)} item(s)")
+
+
+if __name__ == '__main__':
+    main()
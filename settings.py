@@ -10,11 +10,54 @@ class Config:
     DATABASE_URL = os.environ.get('DATABASE_URL')
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Optional read replica for @read_only routes (dashboards, reports, lists)
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', '5'))
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', '10'))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL', '5'))
+    
+    # Concurrent dashboard aggregates (app/db/fanout.py); 0 workers runs them serially
+    QUERY_FANOUT_WORKERS = int(os.environ.get('QUERY_FANOUT_WORKERS', '4'))
+    QUERY_FANOUT_TIMEOUT_SECONDS = float(os.environ.get('QUERY_FANOUT_TIMEOUT_SECONDS', '10'))
+    QUERY_FANOUT_MIN_FREE_CONNECTIONS = int(os.environ.get('QUERY_FANOUT_MIN_FREE_CONNECTIONS', '2'))
+    
+    # Worker warm-up before accepting traffic (app/core/warmup.py)
+    WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', 'True').lower() == 'true'
+    WARMUP_DB_CONNECTIONS = int(os.environ.get('WARMUP_DB_CONNECTIONS', '2'))
+    
+    # Shared compiled-template cache and render profiling (app/core/template_profiling.py)
+    # Without JINJA_BYTECODE_CACHE_DIR, Jinja uses a private per-user directory under the system temp dir
+    JINJA_BYTECODE_CACHE = os.environ.get('JINJA_BYTECODE_CACHE', 'True').lower() == 'true'
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR') or None
+    TEMPLATE_PROFILING = os.environ.get('TEMPLATE_PROFILING', 'False').lower() == 'true'
+    TEMPLATE_HELPER_CALL_THRESHOLD = int(os.environ.get('TEMPLATE_HELPER_CALL_THRESHOLD', '25'))
+    
+    # Prometheus metrics at /metrics (app/core/metrics.py); set PROMETHEUS_MULTIPROC_DIR for multiple workers
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    # Required outside debug mode: without it /metrics returns 404
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # On-demand request profiling from /admin/diagnostics/profiles (app/core/request_profiler.py)
+    # Without PROFILER_DIR, profiles are stored in instance/profiles
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'True').lower() == 'true'
+    PROFILER_DIR = os.environ.get('PROFILER_DIR') or None
+    PROFILER_INTERVAL_MS = float(os.environ.get('PROFILER_INTERVAL_MS', '5'))
+    PROFILER_MAX_SECONDS = float(os.environ.get('PROFILER_MAX_SECONDS', '30'))
+    PROFILER_MAX_PROFILES = int(os.environ.get('PROFILER_MAX_PROFILES', '200'))
+    PROFILER_TOKEN_MAX_AGE = int(os.environ.get('PROFILER_TOKEN_MAX_AGE', '900'))
     WORKFLOW_MODE = os.environ.get('WORKFLOW_MODE', 'AIDMGMT')
     
     DEBUG = os.environ.get('FLASK_DEBUG', '1') == '1'
     TESTING = os.environ.get('TESTING', 'False').lower() == 'true'
     
+    # Response compression (app/core/compression.py)
+    COMPRESS_RESPONSES = os.environ.get('COMPRESS_RESPONSES', 'True').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))
+    # Serve static/dist/ output of scripts/build_static.py; off in debug so edited assets show up
+    STATIC_FINGERPRINTING = os.environ.get('STATIC_FINGERPRINTING', 'False' if DEBUG else 'True').lower() == 'true'
+    
     TIMEZONE = 'America/Jamaica'
     TIMEZONE_OFFSET = -5
     
@@ -30,4 +73,13 @@ class Config:
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     
+    # Batch drawer query implementation: 'python' (ORM + in-memory sort) or 'sql' (window functions)
+    DRAWER_QUERY_MODE = os.environ.get('DRAWER_QUERY_MODE', 'python')
+    
     LOG_TO_STDOUT = os.environ.get('LOG_TO_STDOUT', 'False').lower() == 'true'
+    # Queue-based logging (app/core/structured_logging.py)
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text' if DEBUG else 'json')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO' if DEBUG or LOG_TO_STDOUT else 'WARNING')
+    # Per-module overrides, e.g. "app.features.packaging=DEBUG,sqlalchemy.engine=WARNING"
+    LOG_LEVELS = os.environ.get('LOG_LEVELS', '')
+    LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '1.0'))
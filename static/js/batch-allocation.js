@@ -10,6 +10,13 @@ const BatchAllocation = (function() {
     let currentBatches = {};
     let currentAllocations = {};
     
+    // Drawer data for every request line, fetched in one call per page
+    const DRAWER_CACHE_MAX_AGE_MS = 60000;
+    let reliefrqstId = null;
+    let drawerCache = {};
+    let drawerCacheLoadedAt = 0;
+    let drawerPrefetch = null;
+    
     // DOM elements
     const elements = {
         overlay: null,
@@ -67,6 +74,110 @@ const BatchAllocation = (function() {
         
         // Expose open function globally (for backwards compatibility)
         window.openBatchDrawer = openDrawer;
+        
+        // Fetch drawer data for all request lines up front
+        reliefrqstId = elements.drawer ? parseInt(elements.drawer.dataset.reliefrqstId) || null : null;
+        if (reliefrqstId) {
+            prefetchRequestBatches().catch(error => {
+                console.warn('Batch prefetch failed, drawer will load per item:', error);
+            });
+        }
+    }
+    
+    /**
+     * Read allocations for an item from the hidden inputs in the main form
+     * @param {number} itemId - Item ID
+     * @returns {Object} batch_id -> allocated quantity
+     */
+    function readAllocationInputs(itemId) {
+        const allocations = {};
+        document.querySelectorAll(`input[name^="batch_allocation_${itemId}_"]`).forEach(input => {
+            const parts = input.name.split('_');
+            if (parts.length >= 4) {
+                const batchId = parseInt(parts[3]);
+                const qty = parseFloat(input.value) || 0;
+                if (qty > 0) {
+                    allocations[batchId] = qty;
+                }
+            }
+        });
+        return allocations;
+    }
+    
+    /**
+     * Cache key for a line: the drawer result depends on these inputs only
+     */
+    function drawerSignature(remainingQty, requiredUom, allocations) {
+        return JSON.stringify([remainingQty, requiredUom || null, allocations]);
+    }
+    
+    /**
+     * Fetch drawer data for every line of the request in a single call
+     * and cache it per item
+     */
+    function prefetchRequestBatches() {
+        if (drawerPrefetch) {
+            return drawerPrefetch;
+        }
+        
+        const lines = [];
+        const signatures = {};
+        document.querySelectorAll('.select-batches-btn').forEach(btn => {
+            const itemId = parseInt(btn.dataset.itemId);
+            if (!itemId || signatures[itemId] !== undefined) {
+                return;
+            }
+            const requestedQty = parseFloat(btn.dataset.requestedQty || btn.dataset.requestQty) || 0;
+            const requiredUom = btn.dataset.requiredUom || null;
+            const allocations = readAllocationInputs(itemId);
+            const allocated = Object.values(allocations).reduce((sum, qty) => sum + qty, 0);
+            const remainingQty = requestedQty - allocated;
+            
+            signatures[itemId] = drawerSignature(remainingQty, requiredUom, allocations);
+            lines.push({
+                item_id: itemId,
+                remaining_qty: remainingQty,
+                required_uom: requiredUom,
+                allocated_batch_ids: Object.keys(allocations).map(Number),
+                current_allocations: allocations
+            });
+        });
+        
+        if (lines.length === 0) {
+            return Promise.resolve();
+        }
+        
+        drawerPrefetch = csrfFetch(`/packaging/api/request/${reliefrqstId}/batches`, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({lines: lines})
+        }).then(async response => {
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.error || 'Failed to load batches');
+            }
+            drawerCache = {};
+            for (const [itemId, itemData] of Object.entries(data.items || {})) {
+                drawerCache[itemId] = {signature: signatures[itemId], data: itemData};
+            }
+            drawerCacheLoadedAt = Date.now();
+        }).finally(() => {
+            drawerPrefetch = null;
+        });
+        
+        return drawerPrefetch;
+    }
+    
+    /**
+     * Return cached drawer data for an item if it is fresh and was computed
+     * for the same remaining quantity and allocations
+     */
+    function getCachedBatches(itemId, signature) {
+        const entry = drawerCache[itemId];
+        if (!entry || Date.now() - drawerCacheLoadedAt > DRAWER_CACHE_MAX_AGE_MS) {
+            return null;
+        }
+        return entry.signature === signature ? entry.data : null;
     }
     
     /**
@@ -129,33 +240,7 @@ const BatchAllocation = (function() {
             const alreadyAllocated = getTotalAllocated();
             const remainingQty = currentItemData.requestedQty - alreadyAllocated;
             
-            // Build API URL with query parameters
-            const params = new URLSearchParams();
-            // Always include remaining_qty, even if 0 (for consistent API response format)
-            params.append('remaining_qty', remainingQty);
-            if (currentItemData.requiredUom) {
-                params.append('required_uom', currentItemData.requiredUom);
-            }
-            // Include allocated batch IDs so they're always shown for editing
-            const allocatedBatchIds = Object.keys(currentAllocations);
-            if (allocatedBatchIds.length > 0) {
-                params.append('allocated_batch_ids', allocatedBatchIds.join(','));
-            }
-            // Include current allocations so API can "release" them when calculating available qty
-            if (Object.keys(currentAllocations).length > 0) {
-                params.append('current_allocations', JSON.stringify(currentAllocations));
-            }
-            
-            const url = `/packaging/api/item/${itemId}/batches?${params.toString()}`;
-            console.log('Fetching batches from:', url);
-            const response = await fetch(url);
-            console.log('Response status:', response.status, response.statusText);
-            const data = await response.json();
-            console.log('Response data:', data);
-            
-            if (!response.ok) {
-                throw new Error(data.error || 'Failed to load batches');
-            }
+            const data = await fetchBatches(itemId, remainingQty);
             
             // Store item configuration
             currentItemData.issuanceOrder = data.issuance_order || 'FIFO';
@@ -202,6 +287,61 @@ const BatchAllocation = (function() {
         }
     }
     
+    /**
+     * Get drawer data for an item, from the request-wide cache when possible
+     * @param {number} itemId - Item ID
+     * @param {number} remainingQty - Quantity still to allocate
+     */
+    async function fetchBatches(itemId, remainingQty) {
+        const signature = drawerSignature(remainingQty, currentItemData.requiredUom, currentAllocations);
+        
+        if (reliefrqstId) {
+            let cached = getCachedBatches(itemId, signature);
+            if (!cached) {
+                // Stale or computed for different allocations: refresh every line in one call
+                try {
+                    await prefetchRequestBatches();
+                    cached = getCachedBatches(itemId, signature);
+                } catch (error) {
+                    console.warn('Batch prefetch failed, loading item only:', error);
+                }
+            }
+            if (cached) {
+                return cached;
+            }
+        }
+        
+        // Build API URL with query parameters
+        const params = new URLSearchParams();
+        // Always include remaining_qty, even if 0 (for consistent API response format)
+        params.append('remaining_qty', remainingQty);
+        if (currentItemData.requiredUom) {
+            params.append('required_uom', currentItemData.requiredUom);
+        }
+        // Include allocated batch IDs so they're always shown for editing
+        const allocatedBatchIds = Object.keys(currentAllocations);
+        if (allocatedBatchIds.length > 0) {
+            params.append('allocated_batch_ids', allocatedBatchIds.join(','));
+        }
+        // Include current allocations so API can "release" them when calculating available qty
+        if (Object.keys(currentAllocations).length > 0) {
+            params.append('current_allocations', JSON.stringify(currentAllocations));
+        }
+        
+        const url = `/packaging/api/item/${itemId}/batches?${params.toString()}`;
+        console.log('Fetching batches from:', url);
+        const response = await fetch(url);
+        console.log('Response status:', response.status, response.statusText);
+        const data = await response.json();
+        console.log('Response data:', data);
+        
+        if (!response.ok) {
+            throw new Error(data.error || 'Failed to load batches');
+        }
+        
+        return data;
+    }
+    
     /**
      * Load existing allocations from the main form
      */
@@ -691,6 +831,76 @@ const BatchAllocation = (function() {
         closeDrawer();
     }
     
+    /**
+     * Apply a whole-request allocation plan (from the request auto-allocate API)
+     * to the main form, one line at a time, without opening the drawer
+     * @param {Object} plan - Plan returned by /packaging/api/request/<id>/auto-allocate
+     */
+    function applyPlan(plan) {
+        const form = document.querySelector('form');
+        
+        (plan.lines || []).forEach(line => {
+            const selectBtn = document.querySelector(`.select-batches-btn[data-item-id="${line.item_id}"]`);
+            
+            currentItemId = line.item_id;
+            currentItemData = {
+                itemId: line.item_id,
+                itemName: line.item_name,
+                requestedQty: selectBtn ? parseFloat(selectBtn.dataset.requestedQty) : line.requested_qty
+            };
+            currentAllocations = {};
+            currentBatches = {};
+            
+            line.allocations.forEach(allocation => {
+                currentAllocations[allocation.batch_id] = allocation.allocated_qty;
+                currentBatches[allocation.batch_id] = {
+                    ...allocation,
+                    warehouseId: allocation.warehouse_id
+                };
+            });
+            
+            document.querySelectorAll(`input[name^="batch_allocation_${currentItemId}_"]`)
+                .forEach(input => input.remove());
+            
+            for (const [batchId, qty] of Object.entries(currentAllocations)) {
+                if (qty > 0) {
+                    const input = document.createElement('input');
+                    input.type = 'hidden';
+                    input.name = `batch_allocation_${currentItemId}_${batchId}`;
+                    input.value = qty;
+                    form.appendChild(input);
+                }
+            }
+            
+            updateMainPageDisplay();
+        });
+        
+        currentItemId = null;
+        currentItemData = null;
+        currentBatches = {};
+        currentAllocations = {};
+    }
+    
+    /**
+     * Auto-allocate every line of a relief request in one round trip
+     * @param {number} reliefrqstId - Relief request ID
+     */
+    async function autoAllocateRequest(reliefrqstId) {
+        const response = await csrfFetch(`/packaging/api/request/${reliefrqstId}/auto-allocate`, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({})
+        });
+        const plan = await response.json();
+        
+        if (!response.ok) {
+            throw new Error(plan.error || 'Failed to auto-allocate request');
+        }
+        
+        applyPlan(plan);
+        return plan;
+    }
+    
     /**
      * Update the main page to show allocated quantities
      */
@@ -921,6 +1131,8 @@ const BatchAllocation = (function() {
     // Public API
     return {
         openDrawer: openDrawer,
-        closeDrawer: closeDrawer
+        closeDrawer: closeDrawer,
+        applyPlan: applyPlan,
+        autoAllocateRequest: autoAllocateRequest
     };
 })();
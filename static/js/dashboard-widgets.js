@@ -0,0 +1,143 @@
+/**
+ * Dashboard Widgets - lazy-loaded dashboard cards
+ *
+ * Dashboards render a shell; every element with data-widget-url is filled from
+ * its JSON endpoint once the page is shown. All widgets load in parallel and
+ * fail independently: a failed widget shows its error message, the rest of the
+ * page is unaffected.
+ *
+ * Inside a widget element:
+ *   data-widget-field="key"       text set from the payload (dotted paths allowed);
+ *                                 data-widget-format="number|currency|days"
+ *   data-widget-render="name"     passed to the renderer registered under name
+ *   data-widget-if="key"          shown only when payload.key is non-empty
+ *   data-widget-unless="key"      shown only when payload.key is empty
+ *   data-widget-error             shown when the request fails
+ *
+ * Renderers are registered by the page, before DOMContentLoaded:
+ *   DashboardWidgets.register('donorChart', function(element, data) { ... });
+ */
+
+(function() {
+    const renderers = {};
+
+    function register(name, renderer) {
+        renderers[name] = renderer;
+    }
+
+    function lookup(data, path) {
+        return path.split('.').reduce(function(value, key) {
+            return value === null || value === undefined ? undefined : value[key];
+        }, data);
+    }
+
+    function isEmpty(value) {
+        if (Array.isArray(value)) {
+            return value.length === 0;
+        }
+        if (value && Array.isArray(value.labels)) {
+            return value.labels.length === 0;
+        }
+        return value === null || value === undefined || value === 0 || value === '';
+    }
+
+    function format(value, style) {
+        if (value === null || value === undefined) {
+            return 'N/A';
+        }
+        if (style === 'number') {
+            return Number(value).toLocaleString();
+        }
+        if (style === 'currency') {
+            return 'J$' + Number(value).toLocaleString(undefined, {
+                minimumFractionDigits: 2,
+                maximumFractionDigits: 2
+            });
+        }
+        if (style === 'days') {
+            return value + ' days';
+        }
+        return String(value);
+    }
+
+    function setVisible(element, visible) {
+        element.classList.toggle('d-none', !visible);
+    }
+
+    function fill(container, data) {
+        container.querySelectorAll('[data-widget-field]').forEach(function(element) {
+            element.textContent = format(lookup(data, element.dataset.widgetField), element.dataset.widgetFormat);
+        });
+        container.querySelectorAll('[data-widget-if]').forEach(function(element) {
+            setVisible(element, !isEmpty(lookup(data, element.dataset.widgetIf)));
+        });
+        container.querySelectorAll('[data-widget-unless]').forEach(function(element) {
+            setVisible(element, isEmpty(lookup(data, element.dataset.widgetUnless)));
+        });
+        container.querySelectorAll('[data-widget-render]').forEach(function(element) {
+            const renderer = renderers[element.dataset.widgetRender];
+            // Renderers inside a hidden data-widget-if element have no data to draw
+            if (renderer && !element.classList.contains('d-none')) {
+                renderer(element, data);
+            }
+        });
+    }
+
+    function fail(container) {
+        container.querySelectorAll('[data-widget-field]').forEach(function(element) {
+            element.textContent = '—';
+        });
+        container.querySelectorAll('[data-widget-if], [data-widget-unless], [data-widget-render]').forEach(function(element) {
+            setVisible(element, false);
+        });
+        container.querySelectorAll('[data-widget-error]').forEach(function(element) {
+            setVisible(element, true);
+        });
+    }
+
+    function load(url, containers) {
+        return fetch(url, {
+            credentials: 'same-origin',
+            headers: { 'Accept': 'application/json' }
+        })
+            .then(function(response) {
+                if (!response.ok) {
+                    throw new Error('Widget ' + url + ' returned ' + response.status);
+                }
+                return response.json();
+            })
+            .then(function(data) {
+                containers.forEach(function(container) {
+                    try {
+                        fill(container, data);
+                    } catch (error) {
+                        console.error(error);
+                        fail(container);
+                    }
+                });
+            })
+            .catch(function(error) {
+                console.error(error);
+                containers.forEach(fail);
+            });
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        // Widgets sharing an endpoint are filled from a single request
+        const byUrl = new Map();
+        document.querySelectorAll('[data-widget-url]').forEach(function(container) {
+            const url = container.dataset.widgetUrl;
+            if (!byUrl.has(url)) {
+                byUrl.set(url, []);
+            }
+            byUrl.get(url).push(container);
+        });
+        byUrl.forEach(function(containers, url) {
+            load(url, containers);
+        });
+    });
+
+    window.DashboardWidgets = {
+        register: register
+    };
+})();
@@ -83,6 +83,12 @@ document.addEventListener('DOMContentLoaded', function() {
         jumpBtn.addEventListener('click', jumpToFirstUnallocated);
     }
     
+    // Auto-allocate all lines of the request in one round trip
+    const autoAllocateBtn = document.querySelector('[data-action="auto-allocate-request"]');
+    if (autoAllocateBtn) {
+        autoAllocateBtn.addEventListener('click', autoAllocateRequest);
+    }
+    
     // Select batches buttons (event delegation)
     document.addEventListener('click', function(e) {
         const btn = e.target.closest('.select-batches-btn');
@@ -379,6 +385,33 @@ function filterItems() {
     });
 }
 
+async function autoAllocateRequest() {
+    const btn = this;
+    const reliefrqstId = btn.dataset.reliefrqstId;
+    
+    if (!confirm('Replace the current batch allocations for all items with an automatic plan?')) {
+        return;
+    }
+    
+    btn.disabled = true;
+    try {
+        const plan = await BatchAllocation.autoAllocateRequest(reliefrqstId);
+        updateMetrics();
+        
+        const shortLines = plan.lines.filter(line => line.shortfall > 0).length;
+        let message = `Allocated from ${plan.warehouse_count} warehouse${plan.warehouse_count === 1 ? '' : 's'}.`;
+        if (shortLines > 0) {
+            message += ` ${shortLines} item${shortLines === 1 ? '' : 's'} could not be fully allocated.`;
+        }
+        message += ' Review and save the draft to reserve stock.';
+        alert(message);
+    } catch (error) {
+        alert('Auto-allocation failed: ' + error.message);
+    } finally {
+        btn.disabled = false;
+    }
+}
+
 function jumpToFirstUnallocated() {
     const rows = document.querySelectorAll('.item-row');
     